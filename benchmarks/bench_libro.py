@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+"""
+bench_libro.py — SHILLONG CONTABILIDAD v3.8.0 PRO
+Pruebas de rendimiento del libro sobre datos sintéticos.
+
+Para cada tamaño genera un libro (generador_libro), lo abre en una carpeta
+temporal y mide:
+  cargar / guardar            ContabilidadData (snapshot + diario)
+  movimientos_por_mes         los 12 meses del año
+  totales_mes                 los 12 meses del año
+  top_cuentas                 get_top_cuentas_anuales
+  panel                       lo que agrega DashboardView.actualizar_datos
+  columnar / sumas_y_saldos   vista en columnas y motor de informes
+  exportar_excel              ExportadorExcelMensual.exportar_general (año)
+  importar_csv / importar_excel   ImportacionMovimientos (analizar + importar)
+Los pasos que necesitan openpyxl se anotan como omitidos si no está.
+
+El resultado (segundos: mínimo y mediana de las repeticiones) se guarda en
+JSON junto con la versión; --comparar muestra la relación con otra corrida.
+
+    python benchmarks/bench_libro.py --tamaños 10000 100000
+    python benchmarks/bench_libro.py --completo --comparar benchmarks/resultados/3.8.0_....json
+"""
+
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from benchmarks.generador_libro import TAMAÑOS, escribir_csv, preparar_carpeta
+from core.version import APP_VERSION
+from models.CategoriasCuentas import categoria_de_cuenta
+from models.ContabilidadData import ContabilidadData
+from models.ImportacionMovimientos import ImportacionMovimientos
+from models.Persistencia import escritor, guardar_json
+from models.RegistroConfiguracion import nombres_bancos
+
+try:
+    from models.ExportadorExcelMensual import ExportadorExcelMensual
+except ImportError:
+    ExportadorExcelMensual = None
+
+CARPETA_RESULTADOS = RAIZ / "benchmarks" / "resultados"
+AÑO = 2025
+NOMBRE = "bench.json"
+UMBRAL_REGRESION = 1.2     # --comparar marca lo que tarde un 20% más
+
+
+# ============================================================
+# MEDICIÓN
+# ============================================================
+def medir(fn, repeticiones=3):
+    """Ejecuta fn `repeticiones` veces (sin su salida por consola) y devuelve los tiempos."""
+    tiempos = []
+    for _ in range(repeticiones):
+        with contextlib.redirect_stdout(io.StringIO()):
+            t0 = time.perf_counter()
+            fn()
+            tiempos.append(time.perf_counter() - t0)
+    return {"min": min(tiempos), "mediana": statistics.median(tiempos), "repeticiones": repeticiones}
+
+
+def agregacion_panel(data, año):
+    """Los cálculos de DashboardView.actualizar_datos, sin widgets ni saldos iniciales."""
+    agregados = data.agregados
+    meses = [agregados.totales_mes(año, mm) for mm in range(1, 13)]
+    cats = defaultdict(float)
+    for cuenta, (debe, _, _) in agregados.por_cuenta(año).items():
+        if debe > 0:
+            cats[categoria_de_cuenta(cuenta, oficial=True)] += debe
+    saldos = {b: agregados.saldo_banco(b, "pagado") for b in nombres_bancos() or ["Caja"]}
+    pendientes = [m for m in data.pendientes() if data.fecha_de(m) is not None]
+    return meses, cats, saldos, pendientes
+
+
+# ============================================================
+# UN TAMAÑO
+# ============================================================
+def medir_tamaño(n, repeticiones=3):
+    """Todas las mediciones sobre un libro de `n` movimientos."""
+    resultados = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                preparar_carpeta(tmp, n, NOMBRE)
+
+            # Una sola repetición en lo que escala con el disco y tarda más
+            resultados["cargar"] = medir(lambda: ContabilidadData(NOMBRE), 1)
+            with contextlib.redirect_stdout(io.StringIO()):
+                data = ContabilidadData(NOMBRE)
+
+            def guardar():
+                data.guardar()
+                escritor().esperar()
+            resultados["guardar"] = medir(guardar, 1)
+
+            resultados["movimientos_por_mes"] = medir(
+                lambda: [data.movimientos_por_mes(mm, AÑO) for mm in range(1, 13)], repeticiones)
+            resultados["totales_mes"] = medir(
+                lambda: [data.totales_mes(mm, AÑO) for mm in range(1, 13)], repeticiones)
+            resultados["top_cuentas"] = medir(lambda: data.get_top_cuentas_anuales(AÑO), repeticiones)
+            resultados["panel"] = medir(lambda: agregacion_panel(data, AÑO), repeticiones)
+
+            def columnar():
+                data._columnar = None     # forzar la reconstrucción
+                data.columnar()
+            resultados["columnar"] = medir(columnar, repeticiones)
+            resultados["sumas_y_saldos"] = medir(data.sumas_y_saldos, repeticiones)
+
+            año = [m for mm in range(1, 13) for m in data.movimientos_por_mes(mm, AÑO)]
+            escribir_csv("extracto.csv", año)
+            resultados["importar_csv"] = medir(lambda: _importar("extracto.csv", data), 1)
+
+            if ExportadorExcelMensual is None:
+                resultados["exportar_excel"] = resultados["importar_excel"] = {"omitido": "openpyxl no disponible"}
+            else:
+                resultados["exportar_excel"] = medir(
+                    lambda: ExportadorExcelMensual.exportar_general("libro.xlsx", año, str(AÑO)), 1)
+                resultados["importar_excel"] = medir(lambda: _importar("libro.xlsx", data), 1)
+        finally:
+            escritor().esperar()
+            os.chdir(cwd)
+    return resultados
+
+
+def _importar(ruta, data):
+    """Análisis contra el libro existente (deduplicación) e importación en un libro vacío."""
+    ImportacionMovimientos(ruta, existentes=data.movimientos).analizar()
+    destino = ContabilidadData("importado.json")
+    ImportacionMovimientos(ruta).importar_en(destino)
+    escritor().esperar()
+
+
+# ============================================================
+# INFORME
+# ============================================================
+def ejecutar(tamaños, repeticiones=3, salida=None):
+    informe = {
+        "version": APP_VERSION,
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "numpy": _hay_numpy(),
+        "resultados": {},
+    }
+    for n in tamaños:
+        print(f"[Benchmark] {n} movimientos...")
+        informe["resultados"][str(n)] = medir_tamaño(n, repeticiones)
+        _imprimir(n, informe["resultados"][str(n)])
+
+    if salida is None:
+        salida = CARPETA_RESULTADOS / f"{APP_VERSION}_{datetime.now():%Y%m%d-%H%M%S}.json"
+    Path(salida).parent.mkdir(parents=True, exist_ok=True)
+    guardar_json(salida, informe)
+    print(f"[Benchmark] Resultados en {salida}")
+    return informe
+
+
+def _hay_numpy():
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _imprimir(n, resultados):
+    for nombre, r in resultados.items():
+        texto = r["omitido"] if "omitido" in r else f"{r['min'] * 1000:10.1f} ms"
+        print(f"  {n:>9} {nombre:<22} {texto}")
+
+
+def comparar(actual, ruta_anterior):
+    """Imprime actual/anterior por operación; marca las que superan UMBRAL_REGRESION."""
+    with open(ruta_anterior, "r", encoding="utf-8") as f:
+        anterior = json.load(f)
+    print(f"[Benchmark] Comparación con {anterior.get('version')} ({anterior.get('fecha')})")
+    regresiones = 0
+    for n, ops in actual["resultados"].items():
+        for nombre, r in ops.items():
+            previo = anterior.get("resultados", {}).get(n, {}).get(nombre)
+            if "min" not in r or not previo or "min" not in previo or not previo["min"]:
+                continue
+            ratio = r["min"] / previo["min"]
+            marca = "⚠" if ratio > UMBRAL_REGRESION else " "
+            regresiones += ratio > UMBRAL_REGRESION
+            print(f"  {marca} {n:>9} {nombre:<22} x{ratio:5.2f}")
+    return regresiones
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Rendimiento del libro de SHILLONG.")
+    parser.add_argument("--tamaños", type=int, nargs="+", default=list(TAMAÑOS[:2]))
+    parser.add_argument("--completo", action="store_true", help=f"todos los tamaños: {TAMAÑOS}")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--salida", help="archivo JSON de resultados")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior")
+    args = parser.parse_args()
+
+    informe = ejecutar(TAMAÑOS if args.completo else args.tamaños, args.repeticiones, args.salida)
+    if args.comparar:
+        sys.exit(1 if comparar(informe, args.comparar) else 0)
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+generador_libro.py — SHILLONG CONTABILIDAD v3.8.0 PRO
+Libros sintéticos grandes para las pruebas de rendimiento.
+
+Usa los códigos reales de data/plan_contable_v3.json y los bancos de
+data/bancos.json; con la misma semilla genera siempre el mismo libro, así
+los tiempos de dos versiones se comparan sobre datos idénticos.
+
+    python benchmarks/generador_libro.py 100000 --salida /tmp/libro
+"""
+
+import csv
+import json
+import os
+import random
+import shutil
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from models.Persistencia import guardar_json
+
+TAMAÑOS = (10_000, 100_000, 1_000_000)
+SEMILLA = 2026
+
+PLAN = RAIZ / "data" / "plan_contable_v3.json"
+BANCOS = RAIZ / "data" / "bancos.json"
+
+CONCEPTOS = (
+    "Factura luz", "Recibo agua", "Compra verduras", "Gasolina jeep", "Donativo",
+    "Material escolar", "Medicinas dispensario", "Salario cocinera", "Reparación tejado",
+    "Transferencia", "Intereses banco", "Matrículas", "Internet", "Telefono",
+)
+
+
+def _plan():
+    with open(PLAN, "r", encoding="utf-8") as f:
+        return sorted(json.load(f))
+
+
+def _bancos():
+    with open(BANCOS, "r", encoding="utf-8") as f:
+        return [b["nombre"] for b in json.load(f).get("banks", [])] or ["Caja"]
+
+
+def generar_movimientos(n, años=(2024, 2025), semilla=SEMILLA, cuentas=None, bancos=None):
+    """
+    Genera `n` movimientos con el formato del libro (fecha dd/mm/aaaa,
+    importes float, estado en minúsculas, id). Las cuentas 7xx van al
+    Haber (ingresos); el resto al Debe. ~10% quedan pendientes.
+    """
+    rnd = random.Random(semilla)
+    cuentas = cuentas or _plan()
+    bancos = bancos or _bancos()
+    inicio = date(min(años), 1, 1)
+    dias = (date(max(años), 12, 31) - inicio).days + 1
+
+    for i in range(n):
+        cuenta = rnd.choice(cuentas)
+        importe = round(rnd.lognormvariate(6.5, 1.2), 2)
+        debe, haber = (0.0, importe) if cuenta.startswith("7") else (importe, 0.0)
+        yield {
+            "id": f"{rnd.getrandbits(128):032x}",
+            "fecha": (inicio + timedelta(days=rnd.randrange(dias))).strftime("%d/%m/%Y"),
+            "documento": f"F{i:07d}",
+            "concepto": f"{rnd.choice(CONCEPTOS)} {rnd.randrange(1000)}",
+            "cuenta": cuenta,
+            "debe": debe,
+            "haber": haber,
+            "moneda": "INR",
+            "estado": "pendiente" if rnd.random() < 0.1 else "pagado",
+            "banco": rnd.choice(bancos),
+            "saldo": haber - debe,
+        }
+
+
+def preparar_carpeta(carpeta, n, nombre="bench.json", **opciones):
+    """
+    Deja en `carpeta`/data un libro de `n` movimientos junto con el plan
+    contable y los bancos reales, listo para ContabilidadData(nombre)
+    ejecutado con `carpeta` como directorio actual. Retorna la ruta del libro.
+    """
+    datos = Path(carpeta) / "data"
+    datos.mkdir(parents=True, exist_ok=True)
+    shutil.copy(PLAN, datos / PLAN.name)
+    shutil.copy(BANCOS, datos / BANCOS.name)
+
+    ruta = datos / nombre
+    guardar_json(ruta, {"movimientos": list(generar_movimientos(n, **opciones))}, indent=4)
+    return ruta
+
+
+def escribir_csv(ruta, movimientos):
+    """Extracto CSV (separador ;) como los que se importan desde el banco."""
+    campos = ("fecha", "documento", "concepto", "cuenta", "debe", "haber", "banco", "estado")
+    with open(ruta, "w", encoding="utf-8", newline="") as f:
+        w = csv.writer(f, delimiter=";")
+        w.writerow([c.capitalize() for c in campos])
+        for m in movimientos:
+            w.writerow([m[c] for c in campos])
+    return ruta
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Genera un libro sintético de SHILLONG.")
+    parser.add_argument("movimientos", type=int, nargs="?", default=TAMAÑOS[0])
+    parser.add_argument("--salida", default=".", help="carpeta donde crear data/")
+    parser.add_argument("--semilla", type=int, default=SEMILLA)
+    args = parser.parse_args()
+
+    ruta = preparar_carpeta(args.salida, args.movimientos, semilla=args.semilla)
+    print(f"[Generador] {args.movimientos} movimientos en {ruta} ({os.path.getsize(ruta) / 1e6:.1f} MB)")
@@ -35,7 +35,7 @@ from PySide6.QtCore import Qt
 from PySide6.QtGui import QIcon, QPalette, QColor, QFont
 
 # Importamos las piezas clave
-from models.ContabilidadData import ContabilidadData
+from models.ContabilidadData import abrir_contabilidad
 from ui.MainWindow import MainWindow
 
 # --- CONSTANTES ---
@@ -143,7 +143,7 @@ def main():
     load_theme(app)
 
     try:
-        data = ContabilidadData()
+        data = abrir_contabilidad()  # JSON por defecto; SHILLONG_BACKEND=sqlite para SQLite
     except Exception as e:
         logging.error(f"Error cargando datos iniciales: {e}")
         print(f"❌ Error crítico: {e}")
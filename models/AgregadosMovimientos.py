@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+AgregadosMovimientos.py — SHILLONG CONTABILIDAD v3.8.0 PRO
+Totales acumulados (debe, haber, nº movimientos) mantenidos de forma
+incremental: cada alta, edición o baja cuesta O(1) y los paneles leen
+los números ya calculados en lugar de recorrer todo el libro.
+"""
+
+from collections import defaultdict
+
+from models.IndiceMovimientos import parsear_fecha
+
+
+def importe(valor):
+    """Convierte debe/haber a float (acepta strings con coma decimal). 0.0 si no es válido."""
+    try:
+        return float(str(valor if valor is not None else 0).replace(",", "."))
+    except (ValueError, TypeError):
+        return 0.0
+
+
+class AgregadosMovimientos:
+    """
+    Totales por:
+      - mes               (año, mes)
+      - mes y cuenta      (año, mes) -> cuenta
+      - mes y banco       (año, mes) -> banco
+      - banco y estado    banco -> estado   (histórico completo)
+      - estado
+
+    Cada celda es una lista [debe, haber, n]. Se guarda la aportación de
+    cada movimiento (por id) para poder restarla exactamente al editar o
+    borrar; cuando n llega a 0 la celda se elimina.
+    Los movimientos con fecha inválida no suman (igual que el Dashboard).
+
+    fecha_de: función mov -> date|None. ContabilidadData pasa la caché de
+    IndiceMovimientos para no parsear la misma fecha dos veces.
+
+    suscribir(callback): callback((año, mes)) tras cada cambio que afecte a
+    ese mes, o callback(None) tras una reconstrucción completa;
+    desuscribir(callback) lo retira.
+    """
+
+    def __init__(self, fecha_de=None):
+        self._fecha_de = fecha_de or (lambda m: parsear_fecha(m.get("fecha", "")))
+        self._oyentes = []
+        self.limpiar()
+
+    def suscribir(self, callback):
+        self._oyentes.append(callback)
+
+    def desuscribir(self, callback):
+        """Deja de avisar a `callback` (p. ej. al cerrar la vista que lo usaba)."""
+        if callback in self._oyentes:
+            self._oyentes.remove(callback)
+
+    def _avisar(self, mes):
+        for callback in self._oyentes:
+            callback(mes)
+
+    # ============================================================
+    # MANTENIMIENTO
+    # ============================================================
+    def limpiar(self):
+        self._mes = {}
+        self._mes_cuenta = defaultdict(dict)
+        self._mes_banco = defaultdict(dict)
+        self._banco_estado = defaultdict(dict)
+        self._estado = {}
+        self._aportes = {}          # id(mov) -> (claves, debe, haber)
+
+    def reconstruir(self, movimientos):
+        oyentes, self._oyentes = self._oyentes, []
+        try:
+            self.limpiar()
+            for m in movimientos:
+                self.agregar(m)
+        finally:
+            self._oyentes = oyentes
+        self._avisar(None)
+
+    def _aporte_de(self, m):
+        fecha = self._fecha_de(m)
+        if fecha is None:
+            return None
+        claves = (
+            (fecha.year, fecha.month),
+            str(m.get("cuenta", "")),
+            m.get("banco", "Caja"),
+            str(m.get("estado", "")).lower(),
+        )
+        return claves, importe(m.get("debe", 0)), importe(m.get("haber", 0))
+
+    def _celdas(self, claves):
+        mes, cuenta, banco, estado = claves
+        return (
+            (self._mes, mes),
+            (self._mes_cuenta[mes], cuenta),
+            (self._mes_banco[mes], banco),
+            (self._banco_estado[banco], estado),
+            (self._estado, estado),
+        )
+
+    def _sumar(self, aporte, signo):
+        claves, debe, haber = aporte
+        for tabla, clave in self._celdas(claves):
+            celda = tabla.get(clave)
+            if celda is None:
+                celda = tabla[clave] = [0.0, 0.0, 0]
+            celda[0] += signo * debe
+            celda[1] += signo * haber
+            celda[2] += signo
+            if celda[2] <= 0:
+                del tabla[clave]
+
+        # No dejar contenedores vacíos tras una baja
+        if signo < 0:
+            mes, _, banco, _ = claves
+            for tabla, clave in ((self._mes_cuenta, mes), (self._mes_banco, mes),
+                                 (self._banco_estado, banco)):
+                if not tabla.get(clave):
+                    tabla.pop(clave, None)
+
+        if self._oyentes:
+            self._avisar(claves[0])
+
+    def agregar(self, m):
+        aporte = self._aporte_de(m)
+        if aporte is None:
+            return
+        self._aportes[id(m)] = aporte
+        self._sumar(aporte, 1)
+
+    def quitar(self, m):
+        aporte = self._aportes.pop(id(m), None)
+        if aporte is not None:
+            self._sumar(aporte, -1)
+
+    def actualizar(self, m):
+        """Resta la aportación anterior del movimiento y suma la nueva."""
+        if self._aportes.get(id(m)) == self._aporte_de(m):
+            return
+        self.quitar(m)
+        self.agregar(m)
+
+    # ============================================================
+    # CONSULTAS
+    # ============================================================
+    @staticmethod
+    def _totales(celda):
+        if not celda:
+            return 0.0, 0.0, 0
+        return celda[0], celda[1], celda[2]
+
+    def totales_mes(self, año, mes):
+        """(debe, haber, n) del mes."""
+        return self._totales(self._mes.get((año, mes)))
+
+    def totales_año(self, año):
+        """(debe, haber, n) del año completo (12 lecturas)."""
+        debe = haber = n = 0
+        for mes in range(1, 13):
+            d, h, c = self.totales_mes(año, mes)
+            debe, haber, n = debe + d, haber + h, n + c
+        return debe, haber, n
+
+    def meses_con_datos(self, año):
+        """Meses (1-12) del año que tienen al menos un movimiento."""
+        return [mes for mes in range(1, 13) if (año, mes) in self._mes]
+
+    def por_cuenta(self, año, mes=None):
+        """{cuenta: (debe, haber, n)} del mes indicado o del año completo."""
+        meses = [mes] if mes else range(1, 13)
+        resumen = {}
+        for mm in meses:
+            for cuenta, celda in self._mes_cuenta.get((año, mm), {}).items():
+                d, h, n = resumen.get(cuenta, (0.0, 0.0, 0))
+                resumen[cuenta] = (d + celda[0], h + celda[1], n + celda[2])
+        return resumen
+
+    def totales_banco_mes(self, año, mes, banco):
+        """(debe, haber, n) de un banco en un mes."""
+        return self._totales(self._mes_banco.get((año, mes), {}).get(banco))
+
+    def totales_cuenta_mes(self, año, mes, cuenta):
+        """(debe, haber, n) de una cuenta en un mes."""
+        return self._totales(self._mes_cuenta.get((año, mes), {}).get(str(cuenta)))
+
+    def saldo_banco(self, banco, estado="pagado"):
+        """haber - debe histórico de un banco (por defecto solo movimientos pagados)."""
+        d, h, _ = self._totales(self._banco_estado.get(banco, {}).get(estado))
+        return h - d
+
+    def totales_estado(self, estado):
+        """(debe, haber, n) de todos los movimientos con ese estado."""
+        return self._totales(self._estado.get(str(estado).lower()))
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+"""
+AutomataConceptos.py — SHILLONG CONTABILIDAD v3.8.0 PRO
+Reglas de conceptos ("permitidos" de cada cuenta) compiladas en un único
+autómata Aho-Corasick.
+
+Antes, validar un concepto era un `palabra in concepto` por cada palabra
+permitida de la cuenta, y auto_learn lo repetía por cada movimiento. Con
+el autómata, una sola pasada sobre el concepto devuelve TODAS las cuentas
+cuyas palabras aparecen en él, sea cual sea el número de reglas.
+
+ReglasConceptos junta las palabras de reglas_conceptos.json y del plan
+contable, y recompila el autómata solo cuando el registro entrega una
+instantánea nueva de alguno de los dos archivos.
+"""
+
+import time
+from collections import deque
+
+from models.RegistroConfiguracion import RUTA_PLAN, RUTA_REGLAS, registro as registro_global
+
+
+# ============================================================
+# AUTÓMATA
+# ============================================================
+class AhoCorasick:
+    """
+    automata = AhoCorasick([("luz", "628000"), ("agua", "628000"), ("donativo", "720000")])
+    automata.valores("factura luz y agua")  -> {"628000"}
+    Coincidencia por subcadena, igual que `patron in texto`.
+    """
+
+    def __init__(self, patrones=()):
+        self._transiciones = [{}]     # estado -> {carácter: estado}
+        self._fallo = [0]
+        self._salida = [set()]        # valores de los patrones que terminan en el estado
+        self.num_patrones = 0
+        for patron, valor in patrones:
+            self._insertar(patron, valor)
+        self._enlazar()
+
+    def _insertar(self, patron, valor):
+        estado = 0
+        for c in patron:
+            siguiente = self._transiciones[estado].get(c)
+            if siguiente is None:
+                siguiente = len(self._transiciones)
+                self._transiciones[estado][c] = siguiente
+                self._transiciones.append({})
+                self._fallo.append(0)
+                self._salida.append(set())
+            estado = siguiente
+        self._salida[estado].add(valor)
+        self.num_patrones += 1
+
+    def _enlazar(self):
+        """Enlaces de fallo por anchura; cada estado hereda la salida de su enlace."""
+        cola = deque(self._transiciones[0].values())
+        while cola:
+            estado = cola.popleft()
+            for c, hijo in self._transiciones[estado].items():
+                f = self._fallo[estado]
+                while f and c not in self._transiciones[f]:
+                    f = self._fallo[f]
+                destino = self._transiciones[f].get(c, 0)
+                self._fallo[hijo] = destino if destino != hijo else 0
+                self._salida[hijo] |= self._salida[self._fallo[hijo]]
+                cola.append(hijo)
+        self._salida = [frozenset(s) for s in self._salida]
+
+    def valores(self, texto):
+        """Valores de todos los patrones contenidos en `texto` (una pasada)."""
+        transiciones, fallo, salida = self._transiciones, self._fallo, self._salida
+        encontrados = set()
+        estado = 0
+        for c in texto:
+            while estado and c not in transiciones[estado]:
+                estado = fallo[estado]
+            estado = transiciones[estado].get(c, 0)
+            if salida[estado]:
+                encontrados |= salida[estado]
+        return encontrados
+
+
+# ============================================================
+# REGLAS DE CONCEPTOS
+# ============================================================
+def palabras_permitidas(*fuentes):
+    """{codigo: {palabra, ...}} juntando los "permitidos" de varios archivos de reglas."""
+    permitidas = {}
+    for fuente in fuentes:
+        for codigo, regla in (fuente or {}).items():
+            palabras = regla.get("permitidos", ()) if hasattr(regla, "get") else ()
+            if palabras:
+                destino = permitidas.setdefault(str(codigo).strip(), set())
+                destino.update(str(p).lower().strip() for p in palabras)
+    return permitidas
+
+
+class ConceptosCompilados:
+    """Autómata de unas reglas concretas + qué cuentas tienen reglas."""
+
+    def __init__(self, permitidas):
+        self.con_reglas = frozenset(permitidas)
+        # Una palabra vacía aparece en cualquier concepto: cuenta siempre válida
+        self.siempre = frozenset(c for c, palabras in permitidas.items() if "" in palabras)
+        self.automata = AhoCorasick(
+            (p, codigo) for codigo, palabras in permitidas.items() for p in palabras if p
+        )
+
+    def cuentas_para(self, concepto):
+        return self.automata.valores(str(concepto or "").lower()) | self.siempre
+
+    def es_valido(self, codigo, concepto):
+        codigo = str(codigo).strip()
+        if codigo not in self.con_reglas:
+            return True   # no reglas → se permite todo
+        return codigo in self.cuentas_para(concepto)
+
+
+class ReglasConceptos:
+    """
+    reglas = ReglasConceptos()
+    reglas.cuentas_para("Factura luz")   -> {"628000", ...}
+    reglas.es_valido("628000", "Factura luz")
+
+    Se recompila como mucho una vez por cambio de los archivos (el registro
+    se consulta como mucho cada `intervalo` segundos) o tras invalidar().
+    """
+
+    def __init__(self, ruta_reglas=RUTA_REGLAS, ruta_plan=RUTA_PLAN, intervalo=1.0, registro=None):
+        self.rutas = (ruta_reglas, ruta_plan)
+        self.intervalo = intervalo
+        self.registro = registro or registro_global()
+        self._fuentes = None
+        self._comprobado = 0.0
+        self._compiladas = None
+
+    def _vigentes(self):
+        ahora = time.monotonic()
+        if self._compiladas is not None and ahora - self._comprobado < self.intervalo:
+            return self._compiladas
+        self._comprobado = ahora
+        fuentes = tuple(self.registro.obtener(ruta, {}) for ruta in self.rutas)
+        # Las instantáneas del registro solo cambian de identidad si cambió el archivo
+        if self._fuentes is None or any(a is not b for a, b in zip(fuentes, self._fuentes)):
+            self._fuentes = fuentes
+            self._compiladas = ConceptosCompilados(palabras_permitidas(*fuentes))
+        return self._compiladas
+
+    def invalidar(self):
+        """Fuerza la relectura y recompilación en la próxima consulta."""
+        for ruta in self.rutas:
+            self.registro.invalidar(ruta)
+        self._fuentes = None
+        self._compiladas = None
+
+    def cuentas_para(self, concepto):
+        return self._vigentes().cuentas_para(concepto)
+
+    def es_valido(self, codigo, concepto):
+        return self._vigentes().es_valido(codigo, concepto)
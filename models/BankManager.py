@@ -3,6 +3,8 @@
 import json
 from pathlib import Path
 from utils.rutas import ruta_recurso
+from models.RegistroConfiguracion import registro, descongelar
+from models.Persistencia import guardar_json
 
 
 class BankManager:
@@ -13,16 +15,12 @@ class BankManager:
     def _cargar(self):
         if not self.archivo.exists():
             return []
-        try:
-            with open(self.archivo, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                return data.get("banks", [])
-        except (IOError, json.JSONDecodeError):
-            return []
+        # Copia mutable de la instantánea compartida (BankManager edita la lista)
+        return descongelar(registro().obtener(self.archivo, {}).get("banks", ()))
 
     def _guardar(self):
-        with open(self.archivo, "w", encoding="utf-8") as f:
-            json.dump({"banks": self.bancos}, f, indent=2, ensure_ascii=False)
+        guardar_json(self.archivo, {"banks": self.bancos}, copias=3)
+        registro().invalidar(self.archivo)
 
     def listar(self):
         return self.bancos
@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+CategoriasCuentas.py — SHILLONG CONTABILIDAD v3.8.0 PRO
+Resolución cuenta -> categoría compartida por todas las vistas.
+
+- reglas_conceptos.json llega del RegistroConfiguracion (una sola lectura,
+  y de nuevo solo si cambia en disco).
+- Los rangos contables de respaldo están precompilados en una tabla de
+  intervalos ordenada y se consultan con bisect.
+- El resultado se memoriza por código de cuenta.
+"""
+
+import time
+from bisect import bisect_right
+
+from models.RegistroConfiguracion import RUTA_REGLAS, registro as registro_global
+
+# Categorías oficiales de los libros (el resto se agrupa en OTROS)
+CATEGORIAS = ["FOOD", "MEDICINE", "HYGIENE", "SALARY", "ONLINE", "THERAPEUTIC", "DIET"]
+
+# Categoría de reglas_conceptos.json (español) -> código interno
+MAPEO = {
+    "COMESTIBLES Y BEBIDAS": "FOOD", "ALIMENTACIÓN": "FOOD",
+    "FARMACIA Y MATERIAL SANITARIO": "MEDICINE", "FARMACIA": "MEDICINE",
+    "MEDICINA": "MEDICINE", "MEDICAMENTOS": "MEDICINE",
+    "MATERIAL DE LIMPIEZA": "HYGIENE", "LIMPIEZA": "HYGIENE",
+    "LAVANDERÍA": "HYGIENE", "HIGIENE": "HYGIENE", "ASEO PERSONAL": "HYGIENE",
+    "SUELDOS Y SALARIOS": "SALARY", "NOMINAS": "SALARY",
+    "TELEFONÍA E INTERNET": "ONLINE", "INTERNET": "ONLINE", "TELEFONO": "ONLINE",
+    "TERAPIAS": "THERAPEUTIC", "DIETA": "DIET",
+    "FORMACIÓN": "TRAINING",
+}
+
+# Rangos de respaldo para cuentas sin regla: (desde, hasta, categoría).
+# Pueden solaparse: gana el rango más específico (el más estrecho).
+RANGOS = [
+    (600000, 609999, "MEDICINE"),
+    (602400, 602499, "HYGIENE"),
+    (603000, 603999, "FOOD"),
+    (620401, 620499, "HYGIENE"),
+    (629200, 629299, "ONLINE"),
+    (640000, 649999, "SALARY"),
+    (750000, 759999, "SALARY"),
+]
+
+
+def compilar_rangos(rangos):
+    """
+    Aplana rangos (posiblemente anidados) en una tabla de intervalos
+    disjuntos y ordenados: (inicios, fines, categorias).
+    """
+    cortes = sorted({d for d, _, _ in rangos} | {h + 1 for _, h, _ in rangos})
+    inicios, fines, categorias = [], [], []
+
+    for desde, siguiente in zip(cortes, cortes[1:]):
+        candidatos = [(h - d, cat) for d, h, cat in rangos if d <= desde and siguiente - 1 <= h]
+        if not candidatos:
+            continue
+        cat = min(candidatos, key=lambda c: c[0])[1]
+
+        # Unir con el tramo anterior si es contiguo y de la misma categoría
+        if categorias and categorias[-1] == cat and fines[-1] == desde - 1:
+            fines[-1] = siguiente - 1
+        else:
+            inicios.append(desde)
+            fines.append(siguiente - 1)
+            categorias.append(cat)
+
+    return inicios, fines, categorias
+
+
+class ResolvedorCategorias:
+    """
+    categoria(cuenta)               -> código interno, o la categoría original
+                                       de la regla si no tiene código
+    categoria(cuenta, oficial=True) -> solo CATEGORIAS; lo demás es "OTROS"
+
+    La caché se invalida sola cuando el registro entrega una instantánea
+    nueva de las reglas (se pregunta como mucho una vez cada `intervalo`
+    segundos) o llamando a invalidar().
+    """
+
+    def __init__(self, ruta=RUTA_REGLAS, rangos=RANGOS, intervalo=1.0, registro=None):
+        self.ruta = ruta
+        self.intervalo = intervalo
+        self.registro = registro or registro_global()
+        self._inicios, self._fines, self._cats = compilar_rangos(rangos)
+        self._reglas = None
+        self._comprobado = 0.0
+        self._cache = {}
+
+    # ============================================================
+    # REGLAS
+    # ============================================================
+    def _vigentes(self):
+        ahora = time.monotonic()
+        if self._reglas is not None and ahora - self._comprobado < self.intervalo:
+            return
+        self._comprobado = ahora
+        reglas = self.registro.obtener(self.ruta, {})
+        if reglas is not self._reglas:
+            self._reglas = reglas
+            self._cache = {}
+
+    def invalidar(self):
+        """Fuerza la relectura de reglas_conceptos.json en la próxima consulta."""
+        self.registro.invalidar(self.ruta)
+        self._reglas = None
+        self._cache = {}
+
+    # ============================================================
+    # CONSULTA
+    # ============================================================
+    def _por_rango(self, codigo):
+        try:
+            c = int(codigo)
+        except (ValueError, TypeError):
+            return "OTROS"
+        i = bisect_right(self._inicios, c) - 1
+        if i >= 0 and c <= self._fines[i]:
+            return self._cats[i]
+        return "OTROS"
+
+    def _resolver(self, codigo):
+        regla = self._reglas.get(codigo)
+        if regla is not None:
+            original = regla.get("categoria", "") if hasattr(regla, "get") else ""
+            return MAPEO.get(original.upper(), original or "OTROS")
+        return self._por_rango(codigo)
+
+    def categoria(self, cuenta, oficial=False):
+        self._vigentes()
+        codigo = str(cuenta).split(" ")[0].strip()
+        cat = self._cache.get(codigo)
+        if cat is None:
+            cat = self._cache[codigo] = self._resolver(codigo)
+        if oficial and cat not in CATEGORIAS:
+            return "OTROS"
+        return cat
+
+
+_resolvedor = None
+
+
+def resolvedor_categorias():
+    """Instancia compartida (una sola lectura de reglas para toda la app)."""
+    global _resolvedor
+    if _resolvedor is None:
+        _resolvedor = ResolvedorCategorias()
+    return _resolvedor
+
+
+def categoria_de_cuenta(cuenta, oficial=False):
+    return resolvedor_categorias().categoria(cuenta, oficial)
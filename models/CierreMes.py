@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+CierreMes.py — SHILLONG CONTABILIDAD v3.8.0 PRO
+Motor de cierre mensual: una sola pasada por los movimientos del mes
+obtiene ingresos y gastos de todos los bancos a la vez, sin volver a
+recorrer el libro por cada banco.
+"""
+
+from models.AgregadosMovimientos import importe
+
+
+class CierreMes:
+    """
+    cierre = CierreMes(data.movimientos_por_mes(mes, año), bancos)
+    cierre.total_debe / cierre.total_haber       -> totales del mes (todos los bancos)
+    cierre.ingresos(banco) / cierre.gastos(banco)
+    cierre.saldos_finales(saldo_inicial, firma)  -> estructura de SaldosMensuales.cerrar_mes
+    """
+
+    def __init__(self, movimientos, bancos):
+        self.bancos = [b for b in bancos if b != "Todos"]
+        self._por_banco = {b: [0.0, 0.0] for b in self.bancos}   # banco -> [ingresos, gastos]
+        self.total_debe = 0.0
+        self.total_haber = 0.0
+
+        for m in movimientos:
+            debe = importe(m.get("debe", 0))
+            haber = importe(m.get("haber", 0))
+            self.total_debe += debe
+            self.total_haber += haber
+
+            acumulado = self._por_banco.get(m.get("banco"))
+            if acumulado is not None:
+                acumulado[0] += haber
+                acumulado[1] += debe
+
+    def ingresos(self, banco):
+        return self._por_banco.get(banco, (0.0, 0.0))[0]
+
+    def gastos(self, banco):
+        return self._por_banco.get(banco, (0.0, 0.0))[1]
+
+    def saldos_finales(self, saldo_inicial, firma=None):
+        """
+        saldo_inicial: función banco -> float|None (None cuenta como 0).
+        Devuelve {banco: {inicial, final, ingresos, gastos[, firma]}, ["_firma"]}.
+        """
+        saldos = {}
+        for banco in self.bancos:
+            inicial = saldo_inicial(banco) or 0.0
+            ingresos, gastos = self._por_banco[banco]
+            saldos[banco] = {
+                "inicial": inicial,
+                "final": inicial + ingresos - gastos,
+                "ingresos": ingresos,
+                "gastos": gastos,
+            }
+            if firma is not None:
+                saldos[banco]["firma"] = firma
+
+        if firma is not None:
+            saldos["_firma"] = firma
+        return saldos
@@ -6,10 +6,25 @@ Compatible con: RegistrarView, Dashboard, LibroMensual, Importador, ToolsView.
 """
 
 import json
-from collections import defaultdict
+import os
+import shutil
+import threading
+import uuid
+from collections.abc import Mapping
 from pathlib import Path
 from datetime import datetime
 
+from models.IndiceMovimientos import IndiceMovimientos, PosicionesMovimientos, parsear_fecha
+from models.IndiceTexto import IndiceTexto
+from models.SugeridorCuentas import SugeridorCuentas
+from models.AgregadosMovimientos import AgregadosMovimientos
+from models.LibroColumnar import LibroColumnar
+from models.MotorInformes import MotorInformes
+from models.DetectorDuplicados import DetectorDuplicados
+from models.SaldosMensuales import SaldosMensuales
+from models.RegistroConfiguracion import registro
+from models.Persistencia import guardar_json, escritor
+
 # Ruta segura para EXE y desarrollo
 try:
     from utils.rutas import ruta_recurso
@@ -17,8 +32,25 @@ except ImportError:
     def ruta_recurso(p): return Path(p)
 
 
+def abrir_contabilidad(archivo_json="shillong_2026.json", backend=None):
+    """
+    Crea el gestor de datos con el backend elegido.
+    backend: "json" (por defecto) o "sqlite"; si es None se lee SHILLONG_BACKEND.
+    """
+    backend = (backend or os.environ.get("SHILLONG_BACKEND", "json")).lower()
+    if backend == "sqlite":
+        from models.ContabilidadDataSQLite import ContabilidadDataSQLite
+        return ContabilidadDataSQLite(archivo_json)
+    return ContabilidadData(archivo_json)
+
+
 class ContabilidadData:
 
+    # Entradas del diario antes de compactar automáticamente en el snapshot
+    MAX_ENTRADAS_DIARIO = 500
+    # Versiones anteriores del snapshot que se conservan en data/backups/
+    COPIAS_SEGURIDAD = 10
+
     # ============================================================
     # INIT
     # ============================================================
@@ -33,6 +65,24 @@ class ContabilidadData:
         print(f"[ContabilidadData] Base de datos: {self.archivo_json}")
 
         self.movimientos = []
+        self.indice = IndiceMovimientos()
+        self.posiciones = PosicionesMovimientos()   # bajas sin recorrer la lista
+        self.agregados = AgregadosMovimientos(self.indice.fecha)
+        # Buscadores: se construye en la primera búsqueda (ver buscar_texto)
+        self.indice_texto = IndiceTexto(self._nombre_para_busqueda)
+        # Sugerencia de cuentas por concepto (estado en <libro>.sugeridor.json)
+        self.sugeridor = SugeridorCuentas()
+
+        # Detección de cambios: `generacion` sube con cada modificación en memoria,
+        # `_firma` recuerda (mtime, tamaño) de los archivos tras la última E/S propia.
+        self.generacion = 0
+        self._firma = None
+        self._columnar = None     # (generacion, LibroColumnar) — ver columnar()
+        self._saldos_mensuales = None   # ver saldos_mensuales()
+        # El escritor en segundo plano puede vaciar el diario al terminar
+        self._lock_diario = threading.Lock()
+        # Altas con persistir=False aún no escritas: cerrar() debe volcarlas
+        self._sin_persistir = False
         self.cuentas = self._cargar_plan_contable()
         
         self.cargar()
@@ -44,36 +94,54 @@ class ContabilidadData:
     # ============================================================
     def _cargar_plan_contable(self):
         """
-        Carga plan contable desde plan_contable_v3.json
-        Retorna dict: {codigo: {nombre, permitidos}}
+        Carga plan contable desde plan_contable_v3.json (vía RegistroConfiguracion:
+        una sola lectura compartida por toda la app, instantánea inmutable).
+        Retorna mapping: {codigo: {nombre, permitidos}}
         """
-        # Buscar dentro del EXE
-        path = ruta_recurso("data/plan_contable_v3.json")
-        if path.exists():
-            try:
-                with open(path, "r", encoding="utf-8") as f:
-                    return json.load(f)
-            except (IOError, json.JSONDecodeError) as e:
-                print(f"[ContabilidadData] Error cargando plan contable: {e}")
-
-        # Fallback local
-        local = Path("data/plan_contable_v3.json")
-        if local.exists():
-            with open(local, "r", encoding="utf-8") as f:
-                return json.load(f)
+        # Buscar dentro del EXE; fallback local
+        for path in (ruta_recurso("data/plan_contable_v3.json"), Path("data/plan_contable_v3.json")):
+            if path.exists():
+                registro().suscribir(path, self._plan_recargado)
+                return registro().obtener(path, {})
 
         print("[ContabilidadData] ⚠ No se encontró plan contable.")
         return {}
 
+    def _plan_recargado(self, plan):
+        """El plan contable cambió en disco: usar la nueva instantánea."""
+        self.cuentas = plan
+        self.indice_texto.invalidar()   # los nombres de cuenta también se buscan
+
     # ============================================================
     # CARGAR / GUARDAR
     # ============================================================
+    # Persistencia en dos capas:
+    #   - shillong_2026.json          → snapshot completo (se reescribe al compactar)
+    #   - shillong_2026.json.journal  → diario append-only, una línea JSON por alta,
+    #                                   edición o baja desde el último snapshot.
+    # Cada snapshot lleva un token "diario"; solo se reproducen las líneas del
+    # diario con ese mismo token, así un backup restaurado nunca recibe
+    # operaciones que no le pertenecen.
+    # ============================================================
+    @property
+    def archivo_diario(self):
+        return self.archivo_json.with_name(self.archivo_json.name + ".journal")
+
+    @property
+    def archivo_sugeridor(self):
+        return self.archivo_json.with_name(self.archivo_json.stem + ".sugeridor.json")
+
     def cargar(self):
-        """Carga movimientos desde JSON."""
+        """Carga el snapshot JSON y reproduce el diario pendiente."""
+        self._token_diario = None
+        self._entradas_diario = 0
+        self._diario_obsoleto = False
+        self._sin_persistir = False
         try:
             if not self.archivo_json.exists():
                 print("[ContabilidadData] Creando archivo nuevo.")
                 self.movimientos = []
+                self.reindexar()
                 self.guardar()
                 return
 
@@ -85,61 +153,480 @@ class ContabilidadData:
                 self.movimientos = data
             else:
                 self.movimientos = data.get("movimientos", [])
+                self._token_diario = data.get("diario")
 
-            print(f"[ContabilidadData] Cargados {len(self.movimientos)} movimientos.")
+            self._entradas_diario = self._reproducir_diario()
+
+            print(f"[ContabilidadData] Cargados {len(self.movimientos)} movimientos"
+                  f" ({self._entradas_diario} desde el diario).")
 
         except Exception as e:
             print("[ContabilidadData] ERROR al cargar:", e)
             self.movimientos = []
 
-    def guardar(self):
-        """Guarda JSON con metadatos."""
-        try:
-            paquete = {
-                "version": "3.7.8 PRO",
-                "fecha_guardado": datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
-                "movimientos": self.movimientos
-            }
+        sin_id = self._asignar_ids()
+        self.reindexar()
+        self._firma = self._firma_disco()
+
+        if sin_id:
+            # Migración única: los ids nuevos tienen que quedar en el snapshot
+            print(f"[ContabilidadData] Asignados ids a {sin_id} movimientos antiguos.")
+            self.guardar()
+
+    def _asignar_ids(self):
+        """Da un id persistente a los movimientos que no lo tienen. Retorna cuántos."""
+        n = 0
+        for m in self.movimientos:
+            if not m.get("id"):
+                m["id"] = uuid.uuid4().hex
+                n += 1
+        return n
+
+    def reindexar(self):
+        """
+        Reconstruye los índices secundarios y los totales acumulados.
+        Necesario solo si alguien modifica self.movimientos directamente
+        en lugar de usar agregar/actualizar/eliminar_movimiento.
+        """
+        self.indice.reconstruir(self.movimientos)
+        self.posiciones.reconstruir(self.movimientos)
+        self.indice_texto.reconstruir(self.movimientos)
+        self.sugeridor.reconstruir(self.movimientos, self.archivo_sugeridor)
+        self.agregados.reconstruir(self.movimientos)
+        self._marcar_cambio()
+
+    # ------------------------------------------------------------
+    # DETECCIÓN DE CAMBIOS
+    # ------------------------------------------------------------
+    def _marcar_cambio(self):
+        self.generacion += 1
+
+    def _firma_disco(self):
+        """(mtime, tamaño) del snapshot y del diario; None si no existen."""
+        firma = []
+        for ruta in (self.archivo_json, self.archivo_diario):
+            try:
+                st = ruta.stat()
+                firma.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                firma.append(None)
+        return tuple(firma)
+
+    def hay_cambios_en_disco(self):
+        """True si otro proceso modificó el JSON o el diario desde nuestra última E/S."""
+        return self._firma_disco() != self._firma
+
+    def recargar_si_cambio(self):
+        """
+        Recarga desde disco solo si los archivos cambiaron externamente.
+        Coste en reposo: dos stat(), sin leer ni parsear nada.
+        Retorna True si recargó.
+        """
+        if not self.hay_cambios_en_disco():
+            return False
+        print("[ContabilidadData] Cambios externos detectados, recargando.")
+        self.cargar()
+        return True
+
+    def _paquete(self, token, movimientos):
+        return {
+            "version": "3.7.8 PRO",
+            "fecha_guardado": datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+            "diario": token,
+            "movimientos": movimientos
+        }
 
-            with open(self.archivo_json, "w", encoding="utf-8") as f:
-                json.dump(paquete, f, indent=4, ensure_ascii=False)
+    def guardar(self, segundo_plano=False):
+        """
+        Guarda el snapshot completo con metadatos y vacía el diario (compactación).
+        Es la operación cara: las altas/ediciones/bajas normales solo escriben
+        una línea en el diario.
+
+        La escritura es atómica (temporal + fsync + rename) y la versión
+        anterior se rota a data/backups/. Con segundo_plano=True el volcado se hace
+        en el hilo del escritor (ver _guardar_segundo_plano).
+        """
+        if segundo_plano and self._token_diario:
+            self._guardar_segundo_plano()
+            return
+
+        try:
+            # Un snapshot en segundo plano aún pendiente no debe pisar a este
+            escritor().esperar()
+
+            token = uuid.uuid4().hex
+            guardar_json(self.archivo_json, self._paquete(token, self.movimientos),
+                         indent=4, copias=self.COPIAS_SEGURIDAD)
+
+            # Snapshot escrito: el diario anterior queda obsoleto (token distinto)
+            self._token_diario = token
+            self._entradas_diario = 0
+            self._diario_obsoleto = False
+            self._sin_persistir = False
+            if self.archivo_diario.exists():
+                self.archivo_diario.unlink()
+            self._firma = self._firma_disco()
+            # Quien llama a guardar() suele haber mutado movimientos a mano
+            self._marcar_cambio()
 
             print(f"[ContabilidadData] Guardado OK ({len(self.movimientos)} movimientos).")
 
         except Exception as e:
             print("[ContabilidadData] CRASH al guardar:", e)
 
+    def _guardar_segundo_plano(self):
+        """
+        Compactación sin bloquear la UI:
+          1. Se anota en el diario {"op": "rotar", "t": actual, "nuevo": token}:
+             las entradas posteriores con el token nuevo continúan el snapshot
+             actual, así que si el proceso muere antes de que el nuevo snapshot
+             llegue a disco no se pierde nada.
+          2. Se copia cada movimiento (los dicts pueden seguir editándose en la UI)
+             y el hilo del escritor hace el volcado atómico.
+        Si al terminar no se ha escrito nada más en el diario, se elimina; si no,
+        las líneas obsoletas se descartan en el próximo guardar() síncrono.
+        """
+        token = uuid.uuid4().hex
+        if not self._escribir_linea_diario({"op": "rotar", "t": self._token_diario, "nuevo": token}):
+            self.guardar()
+            return
+
+        paquete = self._paquete(token, [dict(m) for m in self.movimientos])
+        self._token_diario = token
+        self._entradas_diario = 0
+        self._diario_obsoleto = True
+        self._sin_persistir = False     # la copia ya las incluye
+        self._marcar_cambio()
+        snapshot = self.archivo_json
+        ruta = self.archivo_diario
+        fin_rotar = ruta.stat().st_size
+
+        def al_terminar(error):
+            if error is not None:
+                return
+            with self._lock_diario:
+                if self._token_diario == token and ruta.exists() and ruta.stat().st_size == fin_rotar:
+                    ruta.unlink()
+                    self._diario_obsoleto = False
+                self._firma = self._firma_disco()
+            print(f"[ContabilidadData] Guardado en segundo plano OK ({len(paquete['movimientos'])} movimientos).")
+
+        escritor().programar(
+            str(snapshot),
+            lambda: guardar_json(snapshot, paquete, indent=4, copias=self.COPIAS_SEGURIDAD),
+            al_terminar,
+        )
+
+    def cerrar(self):
+        """Compacta el diario en el snapshot si tiene entradas (llamar al salir)."""
+        escritor().esperar()
+        if self._entradas_diario or self._diario_obsoleto or self._sin_persistir:
+            self.guardar()
+        self.sugeridor.guardar()
+
     def asignar_archivo(self, nueva_ruta):
         """Cambia el archivo JSON activo y recarga datos."""
+        self.cerrar()
         self.archivo_json = Path(nueva_ruta)
         self.cargar()
 
+    def restaurar(self, origen):
+        """
+        Sustituye el libro por una copia de seguridad y la carga.
+        La copia lleva el token de diario que tenía el libro al copiarla, así
+        que las líneas escritas después (que comparten ese token) se le
+        reproducirían al cargar: el diario actual se descarta antes.
+        """
+        escritor().esperar()    # un volcado pendiente pisaría la copia restaurada
+        shutil.copy2(origen, self.archivo_json)
+        with self._lock_diario:
+            if self.archivo_diario.exists():
+                self.archivo_diario.unlink()
+        self.cargar()
+
+    # ------------------------------------------------------------
+    # DIARIO (WRITE-AHEAD JOURNAL)
+    # ------------------------------------------------------------
+    def _registrar_en_diario(self, entrada, peso=1):
+        """
+        Añade una operación al diario (append + fsync). Coste constante.
+        `peso` es el número de movimientos que afecta (para decidir la compactación).
+        """
+        if not self._token_diario:
+            # Snapshot antiguo sin token: se compacta una vez para poder usar el diario
+            self.guardar()
+            return
+
+        entrada["t"] = self._token_diario
+        if not self._escribir_linea_diario(entrada):
+            self.guardar()
+            return
+        self._entradas_diario += peso
+
+        if self._entradas_diario >= self.MAX_ENTRADAS_DIARIO:
+            # Compactación automática: no bloquear la UI mientras se escribe
+            self.guardar(segundo_plano=True)
+
+    def _escribir_linea_diario(self, entrada):
+        """Append + fsync de una línea JSON. False si no se pudo escribir."""
+        try:
+            with self._lock_diario:
+                with open(self.archivo_diario, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+                self._firma = self._firma_disco()
+            return True
+        except OSError as e:
+            print("[ContabilidadData] Error escribiendo diario, guardando snapshot:", e)
+            return False
+
+    # ------------------------------------------------------------
+    # PERSISTENCIA INCREMENTAL
+    # Puntos de extensión: ContabilidadDataSQLite los redefine para
+    # escribir filas en la base de datos en lugar del diario.
+    # ------------------------------------------------------------
+    def _persistir_alta(self, mov):
+        self._registrar_en_diario({"op": "add", "mov": mov})
+
+    def _persistir_lote(self, nuevos):
+        if self._entradas_diario + len(nuevos) >= self.MAX_ENTRADAS_DIARIO:
+            # Lote grande: un único snapshot es más barato que diario + compactación
+            self.guardar(segundo_plano=True)
+        else:
+            self._registrar_en_diario({"op": "add_lote", "movs": nuevos}, len(nuevos))
+
+    def _persistir_edicion(self, mov, cambios):
+        self._registrar_en_diario({"op": "edit", "id": mov["id"], "cambios": dict(cambios or mov)})
+
+    def _persistir_baja(self, mov):
+        self._registrar_en_diario({"op": "del", "id": mov["id"]})
+
+    def _reproducir_diario(self):
+        """
+        Aplica sobre self.movimientos las entradas del diario con el token actual.
+        Una entrada "rotar" (compactación en segundo plano que no llegó a disco)
+        encadena el token nuevo: sus entradas también pertenecen a este snapshot.
+        """
+        if not self._token_diario or not self.archivo_diario.exists():
+            return 0
+
+        aplicadas = 0
+        validos = {self._token_diario}
+        por_id = {m.get("id"): m for m in self.movimientos}
+        borrados = set()    # id(mov) de las bajas: se sacan de la lista en una pasada
+        with open(self.archivo_diario, "r", encoding="utf-8") as f:
+            for num, linea in enumerate(f, 1):
+                try:
+                    entrada = json.loads(linea)
+                except json.JSONDecodeError:
+                    # Línea truncada por un cierre abrupto: lo anterior es válido
+                    print(f"[ContabilidadData] Diario truncado en línea {num}, se ignora el resto.")
+                    break
+                if entrada.get("t") not in validos:
+                    continue
+                if entrada.get("op") == "rotar":
+                    validos.add(entrada["nuevo"])
+                    self._token_diario = entrada["nuevo"]
+                    continue
+                try:
+                    aplicadas += self._aplicar_entrada(entrada, por_id, borrados)
+                except (KeyError, IndexError, TypeError) as e:
+                    print(f"[ContabilidadData] Entrada de diario inválida (línea {num}): {e}")
+        self._purgar(borrados)
+        return aplicadas
+
+    def _purgar(self, borrados):
+        if borrados:
+            self.movimientos[:] = [m for m in self.movimientos if id(m) not in borrados]
+            borrados.clear()
+
+    def _aplicar_entrada(self, entrada, por_id, borrados):
+        """
+        Aplica una entrada del diario y devuelve cuántos movimientos afectó.
+        Las ediciones y bajas se dirigen por id; "pos" queda solo para
+        diarios escritos por versiones anteriores (las bajas pendientes se
+        aplican antes, para que las posiciones cuadren).
+        """
+        op = entrada["op"]
+        if "pos" in entrada:
+            self._purgar(borrados)
+        if op == "add":
+            self.movimientos.append(entrada["mov"])
+            por_id[entrada["mov"].get("id")] = entrada["mov"]
+        elif op == "add_lote":
+            self.movimientos.extend(entrada["movs"])
+            por_id.update((m.get("id"), m) for m in entrada["movs"])
+            return len(entrada["movs"])
+        elif op == "edit":
+            mov = por_id[entrada["id"]] if "id" in entrada else self.movimientos[entrada["pos"]]
+            mov.update(entrada["cambios"])
+        elif op == "del":
+            if "id" in entrada:
+                borrados.add(id(por_id.pop(entrada["id"])))
+            else:
+                del self.movimientos[entrada["pos"]]
+        return 1
+
+    def _posicion(self, mov):
+        """Posición de mov en self.movimientos (O(log n)); None si no está."""
+        pos = self.posiciones.posicion(mov)
+        if pos is None or pos >= len(self.movimientos) or self.movimientos[pos] is not mov:
+            # La lista se modificó a mano sin reindexar(): se renumera una vez
+            self.posiciones.reconstruir(self.movimientos)
+            pos = self.posiciones.posicion(mov)
+        return pos
+
     # ============================================================
     # AGREGAR MOVIMIENTO (con features)
     # ============================================================
-    def agregar_movimiento(self, fecha, documento, concepto, cuenta,
-                           debe, haber, moneda="INR", banco="Caja", estado="pagado"):
+    @staticmethod
+    def _normalizar_movimiento(fecha, documento, concepto, cuenta,
+                               debe, haber, moneda="INR", banco="Caja", estado="pagado"):
+        """Construye el dict de movimiento con los tipos y reglas del libro."""
+        debe = float(debe or 0)
+        haber = float(haber or 0)
 
         # Regla: gasto SIEMPRE INR
-        if float(debe or 0) > 0:
+        if debe > 0:
             moneda = "INR"
 
-        mov = {
+        return {
+            "id": uuid.uuid4().hex,
             "fecha": fecha,
             "documento": documento,
             "concepto": concepto,
             "cuenta": str(cuenta),
-            "debe": float(debe or 0),
-            "haber": float(haber or 0),
+            "debe": debe,
+            "haber": haber,
             "moneda": moneda,
             "estado": estado.lower(),
             "banco": banco,
             # Feature añadido → saldo por movimiento
-            "saldo": float(haber or 0) - float(debe or 0)
+            "saldo": haber - debe
         }
 
+    def agregar_movimiento(self, fecha, documento, concepto, cuenta,
+                           debe, haber, moneda="INR", banco="Caja", estado="pagado"):
+
+        mov = self._normalizar_movimiento(fecha, documento, concepto, cuenta,
+                                          debe, haber, moneda, banco, estado)
+
         self.movimientos.append(mov)
-        self.guardar()
+        self.posiciones.agregar(mov)
+        self.indice.agregar(mov)
+        self.indice_texto.agregar(mov)
+        self.sugeridor.agregar(mov)
+        self.agregados.agregar(mov)
+        self._marcar_cambio()
+        self._persistir_alta(mov)
+
+    def agregar_movimientos(self, lista, persistir=True):
+        """
+        Alta masiva (importaciones): valida, normaliza y añade todos los
+        movimientos y persiste UNA sola vez al final.
+
+        lista: iterable de dicts con las mismas claves que agregar_movimiento
+               (fecha, documento, concepto, cuenta, debe, haber, moneda, banco, estado).
+        persistir=False: solo en memoria; quien importa por lotes llama a
+               guardar() una vez al terminar.
+        Retorna: (num_agregados, lista_errores)
+        """
+        nuevos = []
+        errores = []
+
+        for i, datos in enumerate(lista, 1):
+            try:
+                if parsear_fecha(datos.get("fecha")) is None:
+                    errores.append(f"Fila {i}: fecha inválida ({datos.get('fecha')})")
+                    continue
+                nuevos.append(self._normalizar_movimiento(
+                    fecha=datos["fecha"],
+                    documento=datos.get("documento", ""),
+                    concepto=datos.get("concepto", ""),
+                    cuenta=datos.get("cuenta", ""),
+                    debe=datos.get("debe", 0),
+                    haber=datos.get("haber", 0),
+                    moneda=datos.get("moneda") or "INR",
+                    banco=datos.get("banco") or "Caja",
+                    estado=datos.get("estado") or "pagado",
+                ))
+            except (ValueError, TypeError, AttributeError, KeyError) as e:
+                errores.append(f"Fila {i}: {e}")
+
+        if nuevos:
+            self.movimientos.extend(nuevos)
+            for mov in nuevos:
+                self.posiciones.agregar(mov)
+                self.indice.agregar(mov)
+                self.indice_texto.agregar(mov)
+                self.sugeridor.agregar(mov)
+                self.agregados.agregar(mov)
+            self._marcar_cambio()
+            if persistir:
+                self._persistir_lote(nuevos)
+            else:
+                # Si el guardado final del importador no llega a ejecutarse
+                # (cancelado, ventana cerrada), cerrar() las vuelca igual
+                self._sin_persistir = True
+
+        print(f"[ContabilidadData] Lote importado: {len(nuevos)} movimientos, {len(errores)} errores.")
+        return len(nuevos), errores
+
+    # ============================================================
+    # EDITAR / ELIMINAR MOVIMIENTO
+    # ============================================================
+    def movimiento_por_id(self, mov_id):
+        """Movimiento con ese id persistente (O(1)), o None si no existe."""
+        return self.indice.por_id(mov_id)
+
+    def _resolver(self, mov):
+        """Acepta un id o un dict de movimiento (aunque sea una copia o esté obsoleto)."""
+        if isinstance(mov, dict):
+            mov = mov.get("id")
+        return self.indice.por_id(mov) if mov else None
+
+    def actualizar_movimiento(self, mov, cambios=None):
+        """
+        Aplica `cambios` (dict) sobre un movimiento existente, re-indexa y lo
+        registra en el diario. `mov` puede ser el id o el dict del movimiento.
+        Si `cambios` es None, el llamador ya mutó el dict y se registra el
+        movimiento completo. El id nunca se modifica.
+        """
+        actual = self._resolver(mov)
+        if actual is None:
+            return False
+        if cambios is None and actual is not mov and isinstance(mov, dict):
+            cambios = mov   # el llamador mutó una copia: se aplica entera
+        antes = dict(actual)
+        if cambios is not None:
+            cambios = {k: v for k, v in cambios.items() if k != "id"}
+            actual.update(cambios)
+        self.indice.actualizar(actual)
+        self.indice_texto.actualizar(actual)
+        self.sugeridor.actualizar(antes, actual)
+        self.agregados.actualizar(actual)
+        self._marcar_cambio()
+        self._persistir_edicion(actual, cambios)
+        return True
+
+    def eliminar_movimiento(self, mov):
+        """
+        Elimina un movimiento por id (o por su dict), nunca por igualdad de
+        campos: dos filas idénticas siguen siendo movimientos distintos.
+        """
+        actual = self._resolver(mov)
+        if actual is None:
+            return False
+        self.sugeridor.quitar(actual)   # antes de sacarlo de la lista (puede sincronizar)
+        del self.movimientos[self._posicion(actual)]
+        self.posiciones.quitar(actual)
+        self.indice.quitar(actual)
+        self.indice_texto.quitar(actual)
+        self.agregados.quitar(actual)
+        self._marcar_cambio()
+        self._persistir_baja(actual)
+        return True
 
     # ============================================================
     # OBTENER NOMBRE DE CUENTA  (original + safe-fix)
@@ -150,89 +637,70 @@ class ContabilidadData:
         if data is None:
             return "Cuenta desconocida"
 
-        if isinstance(data, dict):
+        # Del registro llega una instantánea (MappingProxyType), no un dict
+        if isinstance(data, Mapping):
             return data.get("nombre", "Cuenta sin nombre")
 
         return str(data)
 
+    def _nombre_para_busqueda(self, cuenta):
+        # Sin "Cuenta desconocida": buscar "cuenta" no debe traer todo lo no catalogado
+        return self.obtener_nombre_cuenta(cuenta) if str(cuenta) in self.cuentas else ""
+
     # ============================================================
     # FILTROS BÁSICOS
     # ============================================================
+    def fecha_de(self, mov):
+        """
+        Fecha del movimiento como objeto date (parseada una sola vez al
+        cargar/insertar). None si la fecha es inválida o falta.
+        """
+        return self.indice.fecha(mov)
+
     def movimientos_por_fecha(self, fecha):
-        return [m for m in self.movimientos if m.get("fecha") == fecha]
+        """Acepta un string de fecha en cualquier formato soportado o un objeto date."""
+        if isinstance(fecha, str):
+            fecha = parsear_fecha(fecha)
+        return self.indice.buscar("fecha", fecha)
 
     def movimientos_por_cuenta(self, cuenta):
-        return [m for m in self.movimientos if m.get("cuenta") == str(cuenta)]
+        return self.indice.buscar("cuenta", str(cuenta))
+
+    def movimientos_por_banco(self, banco):
+        return self.indice.buscar("banco", banco)
+
+    def buscar_texto(self, texto, candidatos=None):
+        """
+        Búsqueda por palabras en concepto, documento, cuenta, nombre de la
+        cuenta y banco (sin mayúsculas ni acentos; subcadena desde 3 letras,
+        inicio de palabra con menos). Con `candidatos` filtra esa lista y
+        conserva su orden; sin texto devuelve todos.
+        """
+        return self.indice_texto.buscar(texto, candidatos)
 
     def pendientes(self):
-        return [m for m in self.movimientos if m.get("estado", "").lower() == "pendiente"]
+        return self.indice.buscar("estado", "pendiente")
 
     def get_movimientos_rango(self, fecha_inicio, fecha_fin):
         """
-        Obtiene movimientos entre dos fechas (objetos date).
+        Obtiene movimientos entre dos fechas (objetos date), en orden cronológico.
         Requerido por InformesView para el Diario General.
         """
-        from datetime import datetime
-        resultado = []
-        for m in self.movimientos:
-            try:
-                f_str = m.get("fecha", "")
-                if "/" in f_str:
-                    d, mm, a = map(int, f_str.split("/"))
-                    fecha_mov = datetime(a, mm, d).date()
-                elif "-" in f_str:
-                    parts = f_str.split("-")
-                    if len(parts[0]) == 4:
-                        a, mm, d = map(int, parts)
-                    else:
-                        d, mm, a = map(int, parts)
-                    fecha_mov = datetime(a, mm, d).date()
-                else:
-                    continue
-                
-                if fecha_inicio <= fecha_mov <= fecha_fin:
-                    resultado.append(m)
-            except (ValueError, IndexError):
-                continue
-        return resultado
+        return self.indice.rango_fechas(fecha_inicio, fecha_fin)
 
     # ============================================================
     # LIBRO MENSUAL
     # ============================================================
     def movimientos_por_mes(self, mes, año):
         """
-        Obtiene movimientos para un mes y año específicos, manejando varios formatos de fecha.
+        Obtiene movimientos para un mes y año específicos.
         Formatos soportados: DD/MM/YYYY, YYYY-MM-DD, DD-MM-YYYY.
+        Los movimientos con fecha inválida o ausente se ignoran.
         """
-        lista = []
-        for m in self.movimientos:
-            try:
-                f_str = m.get("fecha", "")
-                fecha_obj = None
-
-                if "/" in f_str:
-                    # Formato: DD/MM/YYYY
-                    fecha_obj = datetime.strptime(f_str, "%d/%m/%Y")
-                elif "-" in f_str:
-                    try:
-                        # Formato: YYYY-MM-DD
-                        fecha_obj = datetime.strptime(f_str, "%Y-%m-%d")
-                    except ValueError:
-                        # Formato: DD-MM-YYYY
-                        fecha_obj = datetime.strptime(f_str, "%d-%m-%Y")
-
-                if fecha_obj and fecha_obj.month == mes and fecha_obj.year == año:
-                    lista.append(m)
-
-            except (ValueError, AttributeError, IndexError):
-                # Ignora movimientos con formato de fecha inválido o ausente
-                continue
-        return lista
+        return self.indice.buscar("mes", (año, mes))
 
     def totales_mes(self, mes, año):
-        datos = self.movimientos_por_mes(mes, año)
-        gasto = sum(float(m.get("debe", 0)) for m in datos)
-        ingreso = sum(float(m.get("haber", 0)) for m in datos)
+        gasto, ingreso, _ = self.agregados.totales_mes(año, mes)
         return gasto, ingreso, ingreso - gasto
 
     # ============================================================
@@ -253,15 +721,7 @@ class ContabilidadData:
         return sum(float(m.get("haber", 0)) for m in self.movimientos)
 
     def get_top_cuentas_anuales(self, año, limite=5):
-        resumen = defaultdict(float)
-
-        for m in self.movimientos:
-            try:
-                d, mm, aa = m["fecha"].split("/")
-                if int(aa) == año:
-                    resumen[str(m["cuenta"])] += float(m.get("debe", 0))
-            except (ValueError, KeyError, TypeError):
-                pass
+        resumen = {cuenta: d for cuenta, (d, _, _) in self.agregados.por_cuenta(año).items()}
 
         top = sorted(resumen.items(), key=lambda x: x[1], reverse=True)[:limite]
 
@@ -271,3 +731,43 @@ class ContabilidadData:
             salida.append((cuenta, nombre, total))
 
         return salida
+
+    def sumas_y_saldos(self):
+        """
+        Balance de sumas y saldos de todo el libro.
+        Retorna lista ordenada por cuenta: [(cuenta, debe, haber), ...]
+        """
+        return self.informes().por_cuenta()
+
+    def columnar(self):
+        """
+        Vista en columnas (LibroColumnar) de self.movimientos para informes
+        y auditorías: importes ya convertidos, códigos internados y sumas y
+        máscaras vectorizadas. Se construye al pedirla y se reutiliza hasta
+        la próxima modificación (generacion); la fila i es movimientos[i].
+        """
+        if self._columnar is None or self._columnar[0] != self.generacion:
+            self._columnar = (self.generacion, LibroColumnar(self.movimientos, self.indice.fecha))
+        return self._columnar[1]
+
+    def informes(self):
+        """MotorInformes sobre columnar(): agrupaciones por cuenta, mes, banco y categoría."""
+        return MotorInformes(self.columnar())
+
+    def saldos_mensuales(self):
+        """
+        SaldosMensuales del libro conectado a los agregados. Una sola
+        instancia para todas las vistas: cerrar un mes en una lo ve el resto.
+        """
+        if self._saldos_mensuales is None:
+            self._saldos_mensuales = SaldosMensuales(self.carpeta_data / "saldos_mensuales.json",
+                                                     agregados=self.agregados)
+        return self._saldos_mensuales
+
+    def duplicados(self, parecidos=True, **opciones):
+        """
+        Grupos de movimientos duplicados (exactos y, si `parecidos`, casi
+        iguales: mismo importe, fechas cercanas, concepto similar). Ver
+        DetectorDuplicados; `opciones` son dias y umbral.
+        """
+        return DetectorDuplicados(self.fecha_de, **opciones).buscar(self.movimientos, parecidos)
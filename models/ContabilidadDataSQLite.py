@@ -0,0 +1,380 @@
+# -*- coding: utf-8 -*-
+"""
+ContabilidadDataSQLite.py — SHILLONG CONTABILIDAD v3.8.0 PRO
+Backend SQLite opcional para el libro, con la misma API pública que
+ContabilidadData (cargar/guardar, agregar_movimiento, movimientos_por_mes,
+totales_mes, get_top_cuentas_anuales...).
+
+- Cada alta/edición/baja es un INSERT/UPDATE/DELETE de una fila,
+  no una reescritura del archivo completo.
+- Índices SQL sobre fecha, (año, mes), cuenta, banco y estado.
+- Totales (totales_mes, top de cuentas, sumas y saldos) con GROUP BY.
+- Migración transparente: si shillong_2026.json es más reciente que la
+  última importación (primer arranque, backup restaurado, reparación),
+  se importa a la base de datos al cargar.
+- Al cerrar se exporta el JSON para que backups, auto_learn y las
+  herramientas que trabajan sobre el archivo sigan funcionando.
+
+Activación: SHILLONG_BACKEND=sqlite (ver abrir_contabilidad).
+Migración manual del libro y de backups/*.json:
+    python -m models.ContabilidadDataSQLite
+"""
+
+import json
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+
+from models.AgregadosMovimientos import importe
+from models.ContabilidadData import ContabilidadData
+from models.IndiceMovimientos import parsear_fecha
+from models.Persistencia import guardar_json
+
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS movimientos (
+    id        INTEGER PRIMARY KEY,
+    datos     TEXT NOT NULL,      -- movimiento completo (JSON), fuente de verdad
+    fecha_iso TEXT,               -- YYYY-MM-DD, NULL si la fecha es inválida
+    anio      INTEGER,
+    mes       INTEGER,
+    cuenta    TEXT,
+    banco     TEXT,
+    estado    TEXT,
+    debe      REAL NOT NULL DEFAULT 0,
+    haber     REAL NOT NULL DEFAULT 0,
+    mov_id    TEXT                -- "id" persistente del movimiento (ediciones y bajas)
+);
+CREATE INDEX IF NOT EXISTS ix_mov_fecha   ON movimientos(fecha_iso);
+CREATE INDEX IF NOT EXISTS ix_mov_mes     ON movimientos(anio, mes);
+CREATE INDEX IF NOT EXISTS ix_mov_cuenta  ON movimientos(cuenta);
+CREATE INDEX IF NOT EXISTS ix_mov_banco   ON movimientos(banco);
+CREATE INDEX IF NOT EXISTS ix_mov_estado  ON movimientos(estado);
+
+-- ix_mov_id se crea en conectar(): las bases antiguas aún no tienen la columna
+
+CREATE TABLE IF NOT EXISTS meta (
+    clave TEXT PRIMARY KEY,
+    valor TEXT
+);
+"""
+
+SQL_INSERT = (
+    "INSERT INTO movimientos (datos, fecha_iso, anio, mes, cuenta, banco, estado, debe, haber, mov_id) "
+    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+)
+SQL_UPDATE = (
+    "UPDATE movimientos SET datos=?, fecha_iso=?, anio=?, mes=?, cuenta=?, banco=?, "
+    "estado=?, debe=?, haber=?, mov_id=? WHERE mov_id=?"
+)
+SQL_DELETE = "DELETE FROM movimientos WHERE mov_id=?"
+
+
+# ============================================================
+# UTILIDADES SQL
+# ============================================================
+def conectar(ruta_db):
+    conn = sqlite3.connect(str(ruta_db))
+    conn.executescript(ESQUEMA)
+    _migrar_mov_id(conn)
+    return conn
+
+
+def _migrar_mov_id(conn):
+    """Bases creadas antes de la columna mov_id: se añade y se rellena desde `datos`."""
+    columnas = {fila[1] for fila in conn.execute("PRAGMA table_info(movimientos)")}
+    with conn:
+        if "mov_id" not in columnas:
+            conn.execute("ALTER TABLE movimientos ADD COLUMN mov_id TEXT")
+            filas = conn.execute("SELECT id, datos FROM movimientos").fetchall()
+            conn.executemany(
+                "UPDATE movimientos SET mov_id=? WHERE id=?",
+                [(json.loads(datos).get("id"), fila_id) for fila_id, datos in filas],
+            )
+        conn.execute("CREATE INDEX IF NOT EXISTS ix_mov_id ON movimientos(mov_id)")
+
+
+def fila_sql(mov, fecha=None):
+    """Valores de las columnas para un movimiento (mismo orden que SQL_INSERT)."""
+    if fecha is None:
+        fecha = parsear_fecha(mov.get("fecha", ""))
+    return (
+        json.dumps(mov, ensure_ascii=False),
+        fecha.isoformat() if fecha else None,
+        fecha.year if fecha else None,
+        fecha.month if fecha else None,
+        str(mov.get("cuenta", "")),
+        mov.get("banco", "Caja"),
+        str(mov.get("estado", "")).lower(),
+        importe(mov.get("debe", 0)),
+        importe(mov.get("haber", 0)),
+        mov.get("id"),
+    )
+
+
+def volcar(conn, movimientos):
+    """Reemplaza todas las filas por `movimientos` en una sola transacción."""
+    with conn:
+        conn.execute("DELETE FROM movimientos")
+        conn.executemany(SQL_INSERT, (fila_sql(mov) for mov in movimientos))
+
+
+def leer_movimientos_json(ruta):
+    """Lee la lista de movimientos de un JSON de SHILLONG (formato lista o snapshot)."""
+    with open(ruta, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, list):
+        return data, None
+    return data.get("movimientos", []), data.get("diario")
+
+
+# ============================================================
+# BACKEND
+# ============================================================
+class ContabilidadDataSQLite(ContabilidadData):
+
+    def __init__(self, archivo_json="shillong_2026.json"):
+        self.conn = None
+        self._ruta_conn = None
+        self._generacion_exportada = None
+        self._token_diario = None       # solo para importar el diario del JSON
+        self._entradas_diario = 0
+        super().__init__(archivo_json)
+
+    @property
+    def archivo_db(self):
+        return self.archivo_json.with_suffix(".db")
+
+    def _conectar(self):
+        if self.conn is not None and self._ruta_conn == self.archivo_db:
+            return
+        if self.conn is not None:
+            self.conn.close()
+        self.conn = conectar(self.archivo_db)
+        self._ruta_conn = self.archivo_db
+
+    # ------------------------------------------------------------
+    # META
+    # ------------------------------------------------------------
+    def _leer_meta(self, clave):
+        fila = self.conn.execute("SELECT valor FROM meta WHERE clave=?", (clave,)).fetchone()
+        return json.loads(fila[0]) if fila else None
+
+    def _escribir_meta(self, clave, valor):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (clave, valor) VALUES (?, ?)",
+                              (clave, json.dumps(valor)))
+
+    def _firma_json(self):
+        try:
+            st = self.archivo_json.stat()
+            return [st.st_mtime_ns, st.st_size]
+        except OSError:
+            return None
+
+    def _firma_disco(self):
+        """(mtime, tamaño) de la base de datos y del JSON exportado."""
+        firma = []
+        for ruta in (self.archivo_db, self.archivo_json):
+            try:
+                st = ruta.stat()
+                firma.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                firma.append(None)
+        return tuple(firma)
+
+    # ============================================================
+    # CARGAR / GUARDAR
+    # ============================================================
+    def cargar(self):
+        """Abre la base de datos (importando el JSON si cambió) y carga los movimientos."""
+        self._sin_persistir = False
+        try:
+            self._conectar()
+
+            firma = self._firma_json()
+            if firma is not None and firma != self._leer_meta("firma_json"):
+                n = self.importar_json(self.archivo_json)
+                print(f"[ContabilidadDataSQLite] Importados {n} movimientos desde {self.archivo_json}.")
+
+            self.movimientos = [
+                json.loads(datos) for (datos,) in self.conn.execute("SELECT datos FROM movimientos ORDER BY id")
+            ]
+
+            print(f"[ContabilidadDataSQLite] Cargados {len(self.movimientos)} movimientos ({self.archivo_db}).")
+
+        except (sqlite3.Error, OSError, json.JSONDecodeError) as e:
+            print("[ContabilidadDataSQLite] ERROR al cargar:", e)
+            self.movimientos = []
+
+        if self._asignar_ids():
+            self.guardar()      # reescribe las filas con sus ids nuevos (y reindexa)
+        else:
+            self.reindexar()
+        self._generacion_exportada = self.generacion
+        self._firma = self._firma_disco()
+
+    def importar_json(self, ruta):
+        """
+        Importación de un JSON de SHILLONG (reemplaza el contenido de la base).
+        Si es el archivo principal, reproduce también su diario pendiente.
+        Retorna el número de movimientos importados; llamar a cargar() después
+        para ver los datos importados en memoria.
+        """
+        ruta = Path(ruta)
+        movimientos, token = leer_movimientos_json(ruta)
+
+        if ruta == self.archivo_json:
+            self.movimientos = movimientos
+            self._token_diario = token
+            self._reproducir_diario()
+            movimientos = self.movimientos
+
+        volcar(self.conn, movimientos)
+        if ruta == self.archivo_json:
+            self._escribir_meta("firma_json", self._firma_json())
+        return len(movimientos)
+
+    def guardar(self, segundo_plano=False):
+        """
+        Sincroniza la base de datos con self.movimientos en una transacción.
+        Solo es necesario si se modificó la lista a mano; las altas, ediciones
+        y bajas normales ya se escriben fila a fila. La transacción ya es
+        atómica y rápida: segundo_plano se acepta por compatibilidad y se ignora.
+        """
+        try:
+            self._conectar()
+            volcar(self.conn, self.movimientos)
+            self._sin_persistir = False
+            self._firma = self._firma_disco()
+            self.reindexar()
+            print(f"[ContabilidadDataSQLite] Guardado OK ({len(self.movimientos)} movimientos).")
+        except sqlite3.Error as e:
+            print("[ContabilidadDataSQLite] CRASH al guardar:", e)
+
+    def cerrar(self):
+        """
+        Exporta el JSON si hubo cambios desde la última exportación, para que
+        backups y herramientas basadas en archivo vean los datos actuales.
+        """
+        self.sugeridor.guardar()
+        if self._sin_persistir and self.conn is not None:
+            self.guardar()      # altas con persistir=False que no llegaron a la base
+        if self.conn is None or self._generacion_exportada == self.generacion:
+            return
+        try:
+            paquete = {
+                "version": "3.8.0 PRO",
+                "fecha_guardado": datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
+                "movimientos": self.movimientos
+            }
+            guardar_json(self.archivo_json, paquete, indent=4, copias=self.COPIAS_SEGURIDAD)
+            self._escribir_meta("firma_json", self._firma_json())
+            self._generacion_exportada = self.generacion
+            self._firma = self._firma_disco()
+        except (OSError, sqlite3.Error) as e:
+            print("[ContabilidadDataSQLite] Error exportando JSON:", e)
+
+    def restaurar(self, origen):
+        """
+        Como en el backend JSON, y además olvida la firma del JSON exportado:
+        una copia hecha con copy2 conserva mtime y tamaño, y cargar() la daría
+        por ya importada.
+        """
+        self._conectar()
+        self._escribir_meta("firma_json", None)
+        super().restaurar(origen)
+
+    # ------------------------------------------------------------
+    # PERSISTENCIA INCREMENTAL (una fila por operación)
+    # ------------------------------------------------------------
+    def _escribir(self, sql, parametros):
+        """
+        Ejecuta una escritura de una fila. Si falla, o si una edición/baja no
+        encuentra su fila (la base se desvió de la memoria), sincroniza todo.
+        """
+        try:
+            with self.conn:
+                cur = self.conn.execute(sql, parametros)
+        except sqlite3.Error as e:
+            print("[ContabilidadDataSQLite] Error de escritura, sincronizando todo:", e)
+            self.guardar()
+            return
+        if cur.rowcount == 0:
+            print("[ContabilidadDataSQLite] Fila no encontrada, sincronizando todo.")
+            self.guardar()
+            return
+        self._firma = self._firma_disco()
+
+    def _persistir_alta(self, mov):
+        self._escribir(SQL_INSERT, fila_sql(mov, self.fecha_de(mov)))
+
+    def _persistir_lote(self, nuevos):
+        try:
+            with self.conn:
+                self.conn.executemany(SQL_INSERT, (fila_sql(mov, self.fecha_de(mov)) for mov in nuevos))
+            self._firma = self._firma_disco()
+        except sqlite3.Error as e:
+            print("[ContabilidadDataSQLite] Error en lote, sincronizando todo:", e)
+            self.guardar()
+
+    def _persistir_edicion(self, mov, cambios):
+        self._escribir(SQL_UPDATE, fila_sql(mov, self.fecha_de(mov)) + (mov["id"],))
+
+    def _persistir_baja(self, mov):
+        self._escribir(SQL_DELETE, (mov["id"],))
+
+    # ============================================================
+    # TOTALES (GROUP BY)
+    # ============================================================
+    def totales_mes(self, mes, año):
+        gasto, ingreso = self.conn.execute(
+            "SELECT COALESCE(SUM(debe), 0), COALESCE(SUM(haber), 0) "
+            "FROM movimientos WHERE anio=? AND mes=?", (año, mes)).fetchone()
+        return gasto, ingreso, ingreso - gasto
+
+    def get_top_cuentas_anuales(self, año, limite=5):
+        filas = self.conn.execute(
+            "SELECT cuenta, SUM(debe) AS total FROM movimientos WHERE anio=? "
+            "GROUP BY cuenta ORDER BY total DESC LIMIT ?", (año, limite)).fetchall()
+        return [(cuenta, self.obtener_nombre_cuenta(cuenta), total) for cuenta, total in filas]
+
+    def sumas_y_saldos(self):
+        return self.conn.execute(
+            "SELECT cuenta, SUM(debe), SUM(haber) FROM movimientos "
+            "GROUP BY cuenta ORDER BY cuenta").fetchall()
+
+
+# ============================================================
+# MIGRACIÓN DE BACKUPS
+# ============================================================
+def importar_backups(carpeta="backups"):
+    """
+    Convierte cada backups/*.json en su propia base SQLite (backup_X.db),
+    para poder consultarlos con SQL. Los que ya tienen .db se omiten.
+    Retorna la lista de bases creadas.
+    """
+    creadas = []
+    for ruta in sorted(Path(carpeta).glob("*.json")):
+        destino = ruta.with_suffix(".db")
+        if destino.exists():
+            continue
+        try:
+            movimientos, _ = leer_movimientos_json(ruta)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[ContabilidadDataSQLite] Backup ilegible {ruta}: {e}")
+            continue
+        conn = conectar(destino)
+        try:
+            volcar(conn, movimientos)
+        finally:
+            conn.close()
+        print(f"[ContabilidadDataSQLite] {ruta.name}: {len(movimientos)} movimientos → {destino.name}")
+        creadas.append(destino)
+    return creadas
+
+
+if __name__ == "__main__":
+    data = ContabilidadDataSQLite()
+    print(f"Libro principal: {len(data.movimientos)} movimientos en {data.archivo_db}")
+    importar_backups()
@@ -7,12 +7,18 @@ Motor estable, limpio y 100% compatible con RegistrarView, LibroMensualView y Da
 import json
 from pathlib import Path
 
+from models.RegistroConfiguracion import registro
+from models.Persistencia import guardar_json
+from models.AutomataConceptos import ReglasConceptos
+
 class MotorCuentas:
 
     def __init__(self, archivo="data/plan_contable_v3.json"):
         self.archivo = Path(archivo)
         self.cuentas = {}
         self.reglas = {}
+        # Palabras permitidas (reglas_conceptos.json + plan) en un autómata único
+        self.reglas_conceptos = ReglasConceptos(ruta_plan=self.archivo)
 
         self.cargar_cuentas()
 
@@ -26,19 +32,19 @@ class MotorCuentas:
             return
 
         try:
-            with open(self.archivo, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            # Instantánea compartida (no se vuelve a parsear si no cambió en disco)
+            data = registro().obtener(self.archivo, {})
 
             # Handle BOTH formats:
             # Format 1 (old): {"cuentas": [{"codigo": "100", "nombre": "..."}, ...]}
             # Format 2 (actual): {"206000": {"nombre": "..."}, "211000": {...}, ...}
             
-            if "cuentas" in data and isinstance(data.get("cuentas"), list):
+            if "cuentas" in data and isinstance(data.get("cuentas"), tuple):
                 # Old format with list
-                for c in data.get("cuentas", []):
+                for c in data.get("cuentas", ()):
                     codigo = str(c.get("codigo", "")).strip()
                     nombre = c.get("nombre", "Cuenta sin nombre")
-                    permitidos = c.get("permitidos", [])
+                    permitidos = list(c.get("permitidos", ()))
 
                     if codigo:
                         self.cuentas[codigo] = nombre
@@ -46,10 +52,10 @@ class MotorCuentas:
             else:
                 # Actual format: dictionary with codes as keys
                 for codigo, info in data.items():
-                    if isinstance(info, dict) and "nombre" in info:
+                    if hasattr(info, "get") and "nombre" in info:
                         codigo_str = str(codigo).strip()
                         nombre = info.get("nombre", "Cuenta sin nombre")
-                        permitidos = info.get("permitidos", [])
+                        permitidos = list(info.get("permitidos", ()))
                         
                         self.cuentas[codigo_str] = nombre
                         self.reglas[codigo_str] = {"permitidos": permitidos}
@@ -82,19 +88,13 @@ class MotorCuentas:
     # VALIDAR CONCEPTO
     # ============================================================
     def es_concepto_valido(self, codigo, concepto):
-        codigo = str(codigo).strip()
-
-        if codigo not in self.reglas:
-            return True  # no reglas → se permite todo
-
-        reglas = self.reglas[codigo].get("permitidos", [])
-        if not reglas:
-            return True
-
-        concepto = concepto.lower()
+        # Válido si alguna palabra permitida de la cuenta está dentro del concepto
+        # (una pasada del autómata; sin reglas para la cuenta se permite todo)
+        return self.reglas_conceptos.es_valido(codigo, concepto)
 
-        # Valida si alguna palabra permitida está dentro del concepto
-        return any(p.lower() in concepto for p in reglas)
+    def cuentas_para_concepto(self, concepto):
+        """Todas las cuentas con alguna palabra permitida contenida en el concepto."""
+        return self.reglas_conceptos.cuentas_para(concepto)
 
     # ============================================================
     # GUARDAR NUEVO CONCEPTO EN REGLAS
@@ -132,8 +132,8 @@ class MotorCuentas:
                         if concepto not in data[codigo]["permitidos"]:
                             data[codigo]["permitidos"].append(concepto)
 
-                with open(self.archivo, "w", encoding="utf-8") as f:
-                    json.dump(data, f, indent=4, ensure_ascii=False)
+                guardar_json(self.archivo, data, indent=4, copias=3)
+                self.reglas_conceptos.invalidar()   # relee el plan y recompila
 
                 print(f"[MotorCuentas] Regla añadida para {codigo}: {concepto}")
 
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""
+DetectorDuplicados.py — SHILLONG CONTABILIDAD v3.8.0 PRO
+Detección de movimientos duplicados en el libro.
+
+  - Exactos: misma clave normalizada (fecha, debe, haber en céntimos,
+    cuenta, banco, documento y concepto sin mayúsculas, acentos ni signos).
+    Un dict clave -> movimientos, una sola pasada. Dos facturas distintas
+    (F-001 y F-002) nunca forman un grupo exacto.
+  - Parecidos: entre movimientos con el MISMO importe (bloque) y fechas a
+    `dias` días o menos, conceptos con similitud >= `umbral` (difflib).
+    Cada bloque se ordena por fecha y se recorre con una ventana, así que
+    no se compara todo con todo: O(n log n) salvo bloques patológicos,
+    acotados por MAX_VECINOS.
+Los exactos se reducen a un representante antes de buscar parecidos.
+
+El resultado son grupos para revisar y fusionar en la interfaz:
+    {"tipo": "exacto" | "parecido", "movimientos": [...], "similitud": 0..1}
+con los movimientos en el orden del libro (el primero es el que se conserva).
+"""
+
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+from models.AgregadosMovimientos import importe
+from models.IndiceMovimientos import parsear_fecha
+from models.IndiceTexto import palabras
+
+DIAS = 3                # ventana de fechas para los parecidos
+UMBRAL = 0.85           # similitud mínima de conceptos (SequenceMatcher.ratio)
+MAX_VECINOS = 50        # comparaciones como mucho por movimiento dentro de su bloque
+
+
+def concepto_normalizado(concepto):
+    """Sin mayúsculas, acentos ni signos: "Factura  LUZ-Enero." -> "factura luz enero"."""
+    return " ".join(palabras(concepto))
+
+
+def _centimos(valor):
+    return int(round(importe(valor) * 100))
+
+
+class _Conjuntos:
+    """Unión-búsqueda para juntar parejas en grupos."""
+
+    def __init__(self):
+        self.padre = {}
+
+    def raiz(self, x):
+        padre = self.padre
+        padre.setdefault(x, x)
+        while padre[x] != x:
+            padre[x] = padre[padre[x]]
+            x = padre[x]
+        return x
+
+    def unir(self, a, b):
+        ra, rb = self.raiz(a), self.raiz(b)
+        if ra != rb:
+            self.padre[max(ra, rb)] = min(ra, rb)
+
+
+class DetectorDuplicados:
+    """
+    detector = DetectorDuplicados(fecha_de=data.fecha_de)    # o data.duplicados()
+    grupos = detector.buscar(data.movimientos)
+    """
+
+    def __init__(self, fecha_de=None, dias=DIAS, umbral=UMBRAL):
+        self._fecha_de = fecha_de or (lambda m: parsear_fecha(m.get("fecha")))
+        self.dias = dias
+        self.umbral = umbral
+
+    def clave_exacta(self, m, fecha=None, concepto=None):
+        fecha = self._fecha_de(m) if fecha is None else fecha
+        return (
+            fecha or str(m.get("fecha", "")).strip(),
+            _centimos(m.get("debe", 0)), _centimos(m.get("haber", 0)),
+            str(m.get("cuenta", "")).strip(), str(m.get("banco", "")).strip(),
+            concepto_normalizado(m.get("documento", "")),
+            concepto_normalizado(m.get("concepto", "")) if concepto is None else concepto,
+        )
+
+    # ============================================================
+    # BÚSQUEDA
+    # ============================================================
+    def buscar(self, movimientos, parecidos=True):
+        """Grupos de duplicados ordenados por la posición de su primer movimiento."""
+        fechas = [self._fecha_de(m) for m in movimientos]
+        conceptos = [concepto_normalizado(m.get("concepto", "")) for m in movimientos]
+
+        # 1. Exactos: posición -> representante (la primera con esa clave)
+        exactos = defaultdict(list)
+        for i, m in enumerate(movimientos):
+            exactos[self.clave_exacta(m, fechas[i], conceptos[i])].append(i)
+        representantes = [posiciones[0] for posiciones in exactos.values()]
+
+        conjuntos = _Conjuntos()
+        for posiciones in exactos.values():
+            for i in posiciones[1:]:
+                conjuntos.unir(posiciones[0], i)
+
+        # 2. Parecidos entre representantes
+        similitudes = {}
+        if parecidos:
+            for a, b, ratio in self._parejas_parecidas(movimientos, representantes, fechas, conceptos):
+                ra, rb = conjuntos.raiz(a), conjuntos.raiz(b)
+                conjuntos.unir(a, b)
+                r = conjuntos.raiz(a)
+                similitudes[r] = min(ratio, similitudes.pop(ra, 1.0), similitudes.pop(rb, 1.0))
+
+        # 3. Grupos
+        miembros = defaultdict(list)
+        for i in conjuntos.padre:
+            miembros[conjuntos.raiz(i)].append(i)
+
+        grupos = []
+        for raiz in sorted(miembros):
+            posiciones = sorted(miembros[raiz])
+            if len(posiciones) < 2:
+                continue
+            grupos.append({
+                "tipo": "parecido" if raiz in similitudes else "exacto",
+                "movimientos": [movimientos[i] for i in posiciones],
+                "similitud": similitudes.get(raiz, 1.0),
+            })
+        return grupos
+
+    def _parejas_parecidas(self, movimientos, posiciones, fechas, conceptos):
+        """(i, j, ratio) de movimientos con el mismo importe, fechas cercanas y concepto similar."""
+        bloques = defaultdict(list)
+        for i in posiciones:
+            m = movimientos[i]
+            debe, haber = _centimos(m.get("debe", 0)), _centimos(m.get("haber", 0))
+            if fechas[i] is None or (debe == 0 and haber == 0):
+                continue
+            bloques[(debe, haber)].append(i)
+
+        for bloque in bloques.values():
+            if len(bloque) < 2:
+                continue
+            bloque.sort(key=lambda i: (fechas[i], i))
+            for n, i in enumerate(bloque):
+                fin = min(len(bloque), n + 1 + MAX_VECINOS)
+                for j in bloque[n + 1:fin]:
+                    if (fechas[j] - fechas[i]).days > self.dias:
+                        break
+                    ratio = self._parecidos(movimientos[i], movimientos[j], conceptos[i], conceptos[j])
+                    if ratio is not None:
+                        yield i, j, ratio
+
+    def _parecidos(self, a, b, concepto_a, concepto_b):
+        """Similitud si a y b parecen el mismo movimiento; None si no."""
+        doc_a = str(a.get("documento", "")).strip()
+        doc_b = str(b.get("documento", "")).strip()
+        if doc_a and doc_b and doc_a != doc_b:
+            return None     # dos documentos distintos son dos operaciones distintas
+        matcher = SequenceMatcher(None, concepto_a, concepto_b, autojunk=False)
+        # Cotas superiores baratas antes del ratio exacto
+        if matcher.real_quick_ratio() < self.umbral or matcher.quick_ratio() < self.umbral:
+            return None
+        ratio = matcher.ratio()
+        return ratio if ratio >= self.umbral else None
@@ -4,9 +4,10 @@ ExcelImporter.py — SHILLONG CONTABILIDAD v3.6 PRO
 Motor lógico para leer e interpretar archivos Excel de movimientos.
 """
 
-import openpyxl
 from datetime import datetime
 
+from models.ImportacionMovimientos import LectorFilas
+
 class ExcelImporter:
     """
     Clase encargada de leer un Excel, validar datos y convertirlos
@@ -31,9 +32,10 @@ class ExcelImporter:
         y una lista de errores (si los hay).
         Retorna: (movimientos_validos, lista_errores)
         """
+        # Lectura en flujo (openpyxl read_only): las filas no se cargan todas en memoria
         try:
-            wb = openpyxl.load_workbook(ruta_archivo, data_only=True)
-            ws = wb.active
+            filas = iter(LectorFilas(ruta_archivo))
+            cabecera = next(filas, ())
         except Exception as e:
             return [], [f"No se pudo abrir el archivo: {str(e)}"]
 
@@ -42,20 +44,20 @@ class ExcelImporter:
         errores = []
 
         # 1. Detectar cabeceras en la primera fila
-        for cell in ws[1]:
-            if cell.value:
-                val = str(cell.value).lower().strip()
+        for idx, valor in enumerate(cabecera):
+            if valor:
+                val = str(valor).lower().strip()
                 # Mapear nombre de columna a nuestra clave interna
                 for key, variations in self.COL_MAP.items():
                     if val in variations:
-                        headers[key] = cell.column - 1 # Guardamos índice (0-based)
+                        headers[key] = idx # Guardamos índice (0-based)
 
         # Validar que existan columnas mínimas
         if "FECHA" not in headers or "CONCEPTO" not in headers:
             return [], ["El Excel no tiene columnas 'Fecha' o 'Concepto' en la fila 1."]
 
         # 2. Iterar filas de datos (empezando en fila 2)
-        for i, row in enumerate(ws.iter_rows(min_row=2, values_only=True), start=2):
+        for i, row in enumerate(filas, start=2):
             try:
                 # --- FECHA ---
                 raw_fecha = row[headers["FECHA"]]
@@ -125,6 +127,18 @@ class ExcelImporter:
 
         return movimientos, errores
 
+    def importar_a(self, data_manager, ruta_archivo):
+        """
+        Lee el archivo e inserta los movimientos válidos en `data_manager`
+        (ContabilidadData) en un único lote, con una sola escritura a disco.
+        Retorna: (num_agregados, lista_errores)
+        """
+        movimientos, errores = self.importar(ruta_archivo)
+        if not movimientos:
+            return 0, errores
+        agregados, errores_lote = data_manager.agregar_movimientos(movimientos)
+        return agregados, errores + errores_lote
+
     def _procesar_fecha(self, valor):
         """Convierte datetime de Excel o string a 'dd/mm/yyyy'"""
         if isinstance(valor, datetime):
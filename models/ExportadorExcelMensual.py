@@ -1,39 +1,88 @@
 # -*- coding: utf-8 -*-
 """
-models/ExportadorExcelMensual.py — MOTOR DE EXPORTACIÓN v3.7.2
+models/ExportadorExcelMensual.py — MOTOR DE EXPORTACIÓN v3.8.0
 -----------------------------------------------------------------
 Genera reportes Excel profesionales con:
 - Totales calculados (Debe, Haber y SALDO NETO).
 - Formato de moneda.
 - Estilos (Negritas, colores).
+- progreso(porcentaje, texto) opcional: avance para el ejecutor de trabajos
+  (puede lanzar una excepción para cancelar la exportación).
+
+Los libros se escriben en modo write_only: cada fila se añade completa con
+ws.append() y se vuelca a disco al momento, así la memoria no crece con el
+número de movimientos. Los formatos son estilos con nombre registrados una
+vez por libro (cada celda solo guarda la referencia al estilo).
 """
 
 import openpyxl
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from openpyxl.utils import get_column_letter
+
+MONEDA = "#,##0.00"
+
+_fino = Side(border_style="thin", color="000000")
+_BORDE = Border(left=_fino, right=_fino, top=_fino, bottom=_fino)
+_BORDE_GRUESO = Border(bottom=Side(style="thick"))
+
+
+def _relleno(color):
+    return PatternFill(start_color=color, end_color=color, fill_type="solid")
+
+
+# nombre -> propiedades del NamedStyle
+ESTILOS = {
+    # Libro mensual / agrupado
+    "shl_cabecera": dict(font=Font(color="FFFFFF", bold=True), fill=_relleno("1e3a8a"),
+                         alignment=Alignment(horizontal="center"), border=_BORDE),
+    "shl_moneda": dict(number_format=MONEDA),
+    "shl_negrita": dict(font=Font(bold=True)),
+    "shl_total": dict(font=Font(bold=True), number_format=MONEDA),
+    "shl_total_negativo": dict(font=Font(bold=True, color="FF0000"), number_format=MONEDA),
+    "shl_total_positivo": dict(font=Font(bold=True, color="000000"), number_format=MONEDA),
+    "shl_grupo": dict(font=Font(bold=True, size=12, color="1e3a8a"), fill=_relleno("e2e8f0")),
+    "shl_subtotal": dict(font=Font(bold=True), border=_BORDE_GRUESO),
+    "shl_subtotal_moneda": dict(font=Font(bold=True), number_format=MONEDA, border=_BORDE_GRUESO),
+    "shl_subtotal_negativo": dict(font=Font(bold=True, color="FF0000"), number_format=MONEDA,
+                                  border=_BORDE_GRUESO),
+    "shl_subtotal_positivo": dict(font=Font(bold=True, color="008000"), number_format=MONEDA,
+                                  border=_BORDE_GRUESO),
+    "shl_gran_total": dict(font=Font(bold=True, size=14)),
+    "shl_gran_total_moneda": dict(font=Font(bold=True, size=12), number_format=MONEDA),
+    "shl_gran_total_negativo": dict(font=Font(bold=True, size=12, color="FF0000"), number_format=MONEDA),
+    "shl_gran_total_positivo": dict(font=Font(bold=True, size=12, color="008000"), number_format=MONEDA),
+    # Libro mayor (colores SHILLONG de InformesView)
+    "shl_mayor_titulo": dict(font=Font(bold=True, color="FFFFFF"), fill=_relleno("7030A0")),
+    "shl_mayor_cabecera": dict(font=Font(bold=True, color="FFFFFF"), fill=_relleno("7030A0"), border=_BORDE),
+    "shl_mayor_celda": dict(border=_BORDE),
+    "shl_mayor_numero": dict(border=_BORDE, alignment=Alignment(horizontal="right")),
+    "shl_mayor_total": dict(border=_BORDE, fill=_relleno("E2EFDA")),
+    "shl_mayor_total_etiqueta": dict(font=Font(bold=True), border=_BORDE, fill=_relleno("E2EFDA")),
+}
 
 
 class ExportadorExcelMensual:
-    
+
+    @staticmethod
+    def _libro(titulo):
+        """Libro write_only con los estilos con nombre registrados y una hoja."""
+        wb = openpyxl.Workbook(write_only=True)
+        for nombre, props in ESTILOS.items():
+            wb.add_named_style(NamedStyle(name=nombre, **props))
+        return wb, wb.create_sheet(titulo)
+
+    @staticmethod
+    def _celda(ws, valor, estilo):
+        cell = WriteOnlyCell(ws, value=valor)
+        cell.style = estilo
+        return cell
+
     @staticmethod
     def _estilar_cabecera(ws, columnas):
-        """Aplica estilo azul profesional a la cabecera."""
-        thin = Side(border_style="thin", color="000000")
-        border = Border(left=thin, right=thin, top=thin, bottom=thin)
-        fill = PatternFill(
-            start_color="1e3a8a",
-            end_color="1e3a8a",
-            fill_type="solid"
-        )  # Azul oscuro
-        font = Font(color="FFFFFF", bold=True)
-        
+        """Anchos de columna + fila de cabecera con estilo azul profesional."""
         for col_num, nombre in enumerate(columnas, 1):
-            cell = ws.cell(row=1, column=col_num, value=nombre)
-            cell.fill = fill
-            cell.font = font
-            cell.alignment = Alignment(horizontal="center")
-            cell.border = border
-            
-            # Anchos aproximados
+            # Anchos aproximados (en write_only deben fijarse antes de la primera fila)
             ancho = 15
             if "Concepto" in nombre:
                 ancho = 40
@@ -41,29 +90,43 @@ class ExportadorExcelMensual:
                 ancho = 20
             if "Nombre" in nombre:
                 ancho = 30
-            ws.column_dimensions[
-                openpyxl.utils.get_column_letter(col_num)
-            ].width = ancho
+            ws.column_dimensions[get_column_letter(col_num)].width = ancho
+
+        ws.append([ExportadorExcelMensual._celda(ws, nombre, "shl_cabecera") for nombre in columnas])
 
     @staticmethod
-    def _formato_moneda(ws, row, cols_indices):
-        """Aplica formato #,##0.00 a las celdas indicadas."""
-        for col in cols_indices:
-            cell = ws.cell(row=row, column=col)
-            cell.number_format = "#,##0.00"
+    def _avisar(progreso, hechas, total):
+        """
+        Informa cada 200 filas; el 10% final queda para wb.save(). Sin total
+        (datos de un generador) solo se informa de las filas escritas.
+        """
+        if progreso is None or hechas % 200:
+            return
+        if total:
+            progreso(90 * hechas // total, "Escribiendo filas...")
+        else:
+            progreso(0, f"Escribiendo filas... ({hechas})")
+
+    @staticmethod
+    def _guardar(wb, ruta_archivo, progreso):
+        if progreso is not None:
+            progreso(90, "Guardando archivo...")
+        wb.save(ruta_archivo)
+        return True
 
     # ============================================================
     #  EXPORTACIÓN GENERAL — FORMATO LIBRO TEST
     # ============================================================
     @staticmethod
-    def exportar_general(ruta_archivo, datos, periodo_str):
+    def exportar_general(ruta_archivo, datos, periodo_str, progreso=None, total_filas=None):
         """
         Exporta el listado detallado en el formato oficial:
         Fecha | Cuenta | Categoría | Concepto | Debe | Haber | Saldo | Banco | Documento
+        datos: lista o cualquier iterable (se consume una sola vez).
+        total_filas (opcional) sirve para el porcentaje si datos no tiene len().
         """
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Libro Mensual"
+        wb, ws = ExportadorExcelMensual._libro("Libro Mensual")
+        celda = ExportadorExcelMensual._celda
 
         # Encabezado EXACTO como el Libro TEST
         headers = [
@@ -79,11 +142,13 @@ class ExportadorExcelMensual:
         ]
         ExportadorExcelMensual._estilar_cabecera(ws, headers)
 
-        row_idx = 2
         total_debe = 0.0
         total_haber = 0.0
+        if total_filas is None and hasattr(datos, "__len__"):
+            total_filas = len(datos)
 
-        for m in datos:
+        for n, m in enumerate(datos):
+            ExportadorExcelMensual._avisar(progreso, n, total_filas)
             debe = float(m.get("debe", 0) or 0)
             haber = float(m.get("haber", 0) or 0)
             saldo = float(m.get("saldo", 0) or 0)
@@ -91,60 +156,40 @@ class ExportadorExcelMensual:
             total_debe += debe
             total_haber += haber
 
-            row = [
+            ws.append([
                 m.get("fecha"),                    # 1 Fecha
                 str(m.get("cuenta")),              # 2 Cuenta
                 m.get("categoria", ""),            # 3 Categoría
                 m.get("concepto"),                 # 4 Concepto
-                debe,                              # 5 Debe
-                haber,                             # 6 Haber
-                saldo,                             # 7 Saldo
+                celda(ws, debe, "shl_moneda"),     # 5 Debe
+                celda(ws, haber, "shl_moneda"),    # 6 Haber
+                celda(ws, saldo, "shl_moneda"),    # 7 Saldo
                 m.get("banco"),                    # 8 Banco
                 m.get("documento"),                # 9 Documento
-            ]
-
-            for col_idx, val in enumerate(row, 1):
-                ws.cell(row=row_idx, column=col_idx, value=val)
-
-            # Debe, Haber, Saldo → columnas 5,6,7
-            ExportadorExcelMensual._formato_moneda(ws, row_idx, [5, 6, 7])
-            row_idx += 1
+            ])
 
         # Fila de TOTALES
-        ws.cell(row=row_idx, column=1, value="TOTALES DEL PERIODO").font = Font(
-            bold=True
-        )
-        ws.cell(row=row_idx, column=5, value=total_debe).font = Font(bold=True)
-        ws.cell(row=row_idx, column=6, value=total_haber).font = Font(bold=True)
-        ws.cell(
-            row=row_idx,
-            column=7,
-            value=total_haber - total_debe,
-        ).font = Font(
-            bold=True,
-            color="FF0000" if (total_haber - total_debe) < 0 else "000000",
-        )
-
-        ExportadorExcelMensual._formato_moneda(ws, row_idx, [5, 6, 7])
-
-        try:
-            wb.save(ruta_archivo)
-            return True
-        except Exception as e:
-            raise e
+        neto = total_haber - total_debe
+        ws.append([
+            celda(ws, "TOTALES DEL PERIODO", "shl_negrita"), None, None, None,
+            celda(ws, total_debe, "shl_total"),
+            celda(ws, total_haber, "shl_total"),
+            celda(ws, neto, "shl_total_negativo" if neto < 0 else "shl_total_positivo"),
+        ])
+
+        return ExportadorExcelMensual._guardar(wb, ruta_archivo, progreso)
 
     # ============================================================
-    #  EXPORTACIÓN AGRUPADA (NO SE TOCA)
+    #  EXPORTACIÓN AGRUPADA
     # ============================================================
     @staticmethod
-    def exportar_agrupado(ruta_archivo, grupos_data, periodo_str, titulo_agrupacion):
+    def exportar_agrupado(ruta_archivo, grupos_data, periodo_str, titulo_agrupacion, progreso=None):
         """
         Exporta agrupando por Categoría o Cuenta.
         grupos_data: Diccionario { "NombreGrupo": [lista_movimientos] }
         """
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Resumen Agrupado"
+        wb, ws = ExportadorExcelMensual._libro("Resumen Agrupado")
+        celda = ExportadorExcelMensual._celda
 
         headers = [
             titulo_agrupacion,
@@ -158,99 +203,124 @@ class ExportadorExcelMensual:
         ]
         ExportadorExcelMensual._estilar_cabecera(ws, headers)
 
-        row_idx = 2
-
         gran_total_debe = 0.0
         gran_total_haber = 0.0
+        total_filas = sum(len(movs) for movs in grupos_data.values())
+        hechas = 0
 
         # Iterar grupos
-        from openpyxl.styles import PatternFill
-
         for nombre_grupo, movimientos in grupos_data.items():
-            # Cabecera de grupo
-            cell_group = ws.cell(row=row_idx, column=1, value=f"{nombre_grupo.upper()}")
-            cell_group.font = Font(bold=True, size=12, color="1e3a8a")
-            ws.merge_cells(
-                start_row=row_idx,
-                start_column=1,
-                end_row=row_idx,
-                end_column=8,
-            )
-            ws.cell(row=row_idx, column=1).fill = PatternFill(
-                start_color="e2e8f0", end_color="e2e8f0", fill_type="solid"
-            )
-            row_idx += 1
+            # Cabecera de grupo: banda de color en las 8 columnas
+            ws.append([celda(ws, nombre_grupo.upper(), "shl_grupo")]
+                      + [celda(ws, None, "shl_grupo") for _ in range(7)])
 
             subtotal_debe = 0.0
             subtotal_haber = 0.0
             saldo_acumulado_grupo = 0.0
 
             for m in movimientos:
+                ExportadorExcelMensual._avisar(progreso, hechas, total_filas)
+                hechas += 1
                 d = float(m.get("debe", 0) or 0)
                 h = float(m.get("haber", 0) or 0)
                 subtotal_debe += d
                 subtotal_haber += h
                 saldo_acumulado_grupo += (h - d)
 
-                ws.cell(row=row_idx, column=2, value=m.get("fecha"))
-                ws.cell(row=row_idx, column=3, value=m.get("documento"))
-                ws.cell(row=row_idx, column=4, value=m.get("concepto"))
-                ws.cell(row=row_idx, column=5, value=str(m.get("cuenta")))
-                ws.cell(row=row_idx, column=6, value=d)
-                ws.cell(row=row_idx, column=7, value=h)
-                ws.cell(row=row_idx, column=8, value=saldo_acumulado_grupo)
-
-                ExportadorExcelMensual._formato_moneda(ws, row_idx, [6, 7, 8])
-                row_idx += 1
-
-            # Pie de grupo (Subtotales)
-            ws.cell(
-                row=row_idx, column=1, value=f"TOTAL {nombre_grupo}"
-            ).font = Font(bold=True)
-            ws.cell(row=row_idx, column=6, value=subtotal_debe).font = Font(bold=True)
-            ws.cell(row=row_idx, column=7, value=subtotal_haber).font = Font(bold=True)
-
-            # Saldo neto del grupo
+                ws.append([
+                    None,
+                    m.get("fecha"),
+                    m.get("documento"),
+                    m.get("concepto"),
+                    str(m.get("cuenta")),
+                    celda(ws, d, "shl_moneda"),
+                    celda(ws, h, "shl_moneda"),
+                    celda(ws, saldo_acumulado_grupo, "shl_moneda"),
+                ])
+
+            # Pie de grupo (Subtotales) con línea de separación visual
             neto_grupo = subtotal_haber - subtotal_debe
-            cell_saldo = ws.cell(row=row_idx, column=8, value=neto_grupo)
-            cell_saldo.font = Font(
-                bold=True, color="FF0000" if neto_grupo < 0 else "008000"
-            )
-
-            ExportadorExcelMensual._formato_moneda(ws, row_idx, [6, 7, 8])
-
-            # Línea de separación visual
-            for c in range(1, 9):
-                ws.cell(row=row_idx, column=c).border = Border(
-                    bottom=Side(style="thick")
-                )
-
-            row_idx += 2  # Espacio
+            ws.append([
+                celda(ws, f"TOTAL {nombre_grupo}", "shl_subtotal"),
+                celda(ws, None, "shl_subtotal"),
+                celda(ws, None, "shl_subtotal"),
+                celda(ws, None, "shl_subtotal"),
+                celda(ws, None, "shl_subtotal"),
+                celda(ws, subtotal_debe, "shl_subtotal_moneda"),
+                celda(ws, subtotal_haber, "shl_subtotal_moneda"),
+                celda(ws, neto_grupo, "shl_subtotal_negativo" if neto_grupo < 0 else "shl_subtotal_positivo"),
+            ])
+            ws.append([])  # Espacio
 
             gran_total_debe += subtotal_debe
             gran_total_haber += subtotal_haber
 
         # GRAN TOTAL FINAL
-        ws.cell(row=row_idx, column=1, value="TOTAL REPORTE").font = Font(
-            bold=True, size=14
-        )
-        ws.cell(row=row_idx, column=6, value=gran_total_debe).font = Font(
-            bold=True, size=12
-        )
-        ws.cell(row=row_idx, column=7, value=gran_total_haber).font = Font(
-            bold=True, size=12
-        )
-
         gran_neto = gran_total_haber - gran_total_debe
-        cell_gran_saldo = ws.cell(row=row_idx, column=8, value=gran_neto)
-        cell_gran_saldo.font = Font(
-            bold=True, size=12, color="FF0000" if gran_neto < 0 else "008000"
-        )
-
-        ExportadorExcelMensual._formato_moneda(ws, row_idx, [6, 7, 8])
-
-        try:
-            wb.save(ruta_archivo)
-            return True
-        except Exception as e:
-            raise e
+        ws.append([
+            celda(ws, "TOTAL REPORTE", "shl_gran_total"), None, None, None, None,
+            celda(ws, gran_total_debe, "shl_gran_total_moneda"),
+            celda(ws, gran_total_haber, "shl_gran_total_moneda"),
+            celda(ws, gran_neto, "shl_gran_total_negativo" if gran_neto < 0 else "shl_gran_total_positivo"),
+        ])
+
+        return ExportadorExcelMensual._guardar(wb, ruta_archivo, progreso)
+
+    # ============================================================
+    #  LIBRO MAYOR (InformesView)
+    # ============================================================
+    @staticmethod
+    def exportar_libro_mayor(ruta_archivo, cuentas, total_cuentas=0, progreso=None):
+        """
+        cuentas: iterable de (titulo, movimientos), una entrada por cuenta.
+        Se consume perezosamente: cada cuenta se escribe y se descarta.
+        total_cuentas (opcional) solo sirve para el porcentaje de progreso.
+        """
+        wb, ws = ExportadorExcelMensual._libro("Libro Mayor")
+        celda = ExportadorExcelMensual._celda
+        headers = ["Fecha", "Documento", "Desglose", "Debe", "Haber", "Saldo"]
+
+        for n, (titulo, movs) in enumerate(cuentas):
+            if progreso is not None:
+                progreso(90 * n // max(total_cuentas, n + 1), titulo)
+
+            # ENCABEZADO CUENTA
+            ws.append([celda(ws, titulo, "shl_mayor_titulo")])
+            ws.append([])
+            ws.append([celda(ws, h, "shl_mayor_cabecera") for h in headers])
+
+            saldo_acum = 0
+            total_debe = 0
+            total_haber = 0
+
+            for m in movs:
+                des = m.get("concepto", "").strip() or m.get("nombre_cuenta", "")
+                debe = float(m.get("debe", 0))
+                haber = float(m.get("haber", 0))
+
+                saldo_acum += (haber - debe)
+                total_debe += debe
+                total_haber += haber
+
+                ws.append([
+                    celda(ws, m.get("fecha", ""), "shl_mayor_celda"),
+                    celda(ws, m.get("documento", ""), "shl_mayor_celda"),
+                    celda(ws, des, "shl_mayor_celda"),
+                    celda(ws, debe, "shl_mayor_numero"),
+                    celda(ws, haber, "shl_mayor_numero"),
+                    celda(ws, saldo_acum, "shl_mayor_numero"),
+                ])
+
+            # TOTAL
+            ws.append([
+                celda(ws, None, "shl_mayor_total"),
+                celda(ws, None, "shl_mayor_total"),
+                celda(ws, "TOTAL", "shl_mayor_total_etiqueta"),
+                celda(ws, total_debe, "shl_mayor_total"),
+                celda(ws, total_haber, "shl_mayor_total"),
+                celda(ws, total_haber - total_debe, "shl_mayor_total"),
+            ])
+            ws.append([])
+            ws.append([])
+
+        return ExportadorExcelMensual._guardar(wb, ruta_archivo, progreso)
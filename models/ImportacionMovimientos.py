@@ -0,0 +1,311 @@
+# -*- coding: utf-8 -*-
+"""
+ImportacionMovimientos.py — SHILLONG CONTABILIDAD v3.8.0 PRO
+Importación de extractos CSV/Excel en flujo (memoria acotada).
+
+Etapas encadenadas como generadores; ninguna guarda el archivo entero:
+  LectorFilas         -> filas crudas (openpyxl read_only / csv.reader)
+  detectar_cabecera   -> mapa columna -> índice y el resto de filas
+  normalizar_filas    -> dicts de movimiento (fecha dd/mm/aaaa, importes float)
+  validar_movimientos -> descarta fechas inválidas y filas sin importe
+  Deduplicador        -> omite repetidos (en el archivo o ya en el libro)
+  en_lotes            -> listas de N movimientos para el destino
+
+ImportacionMovimientos junta todo: analizar() cuenta válidos/errores y
+guarda una muestra para la vista previa; lotes() vuelve a leer el archivo
+y entrega los movimientos de N en N (la vista los añade en el hilo de la
+UI); importar_en(data) hace lo mismo en el hilo actual con un único guardado.
+"""
+
+import csv
+import os
+from datetime import date, datetime
+from itertools import islice
+
+from models.AgregadosMovimientos import importe
+from models.IndiceMovimientos import parsear_fecha
+
+# Clave interna -> fragmentos que puede contener la cabecera (en orden de prioridad)
+COLUMNAS = {
+    "fecha": ("fecha", "date"),
+    "documento": ("doc", "ref"),
+    "concepto": ("concepto", "descrip", "detalle"),
+    "cuenta": ("cuenta", "cta"),
+    "debe": ("debe", "cargo"),
+    "haber": ("haber", "abono"),
+    "banco": ("banco",),
+    "estado": ("estado", "status"),
+}
+
+TAMAÑO_LOTE = 1000
+MAX_ERRORES = 50      # mensajes que se conservan (el total se cuenta siempre)
+
+
+# ============================================================
+# LECTURA
+# ============================================================
+class LectorFilas:
+    """
+    Itera las filas de un CSV o de la hoja activa de un Excel como listas
+    de valores crudos. `fraccion` (0..1) indica cuánto se ha leído.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = str(ruta)
+        self.fraccion = 0.0
+
+    def __iter__(self):
+        if self.ruta.lower().endswith((".xlsx", ".xlsm", ".xls")):
+            return self._excel()
+        return self._csv()
+
+    def _csv(self):
+        total = max(os.path.getsize(self.ruta), 1)
+        with open(self.ruta, "r", encoding="utf-8", errors="replace", newline="") as f:
+            try:
+                dialect = csv.Sniffer().sniff(f.read(2048))
+            except csv.Error:
+                dialect = "excel"
+            f.seek(0)
+
+            leidos = 0
+
+            def lineas():
+                nonlocal leidos
+                for linea in f:
+                    leidos += len(linea)
+                    yield linea
+
+            for fila in csv.reader(lineas(), dialect):
+                self.fraccion = min(leidos / total, 1.0)
+                yield fila
+        self.fraccion = 1.0
+
+    def _excel(self):
+        import openpyxl
+
+        wb = openpyxl.load_workbook(self.ruta, read_only=True, data_only=True)
+        try:
+            ws = wb.active
+            total = ws.max_row or 0
+            for i, fila in enumerate(ws.iter_rows(values_only=True), 1):
+                if total:
+                    self.fraccion = min(i / total, 1.0)
+                yield fila
+        finally:
+            wb.close()   # read_only mantiene el archivo abierto hasta close()
+        self.fraccion = 1.0
+
+
+# ============================================================
+# ETAPAS
+# ============================================================
+def _texto(valor):
+    return str(valor).strip() if valor is not None else ""
+
+
+def detectar_cabecera(filas, obligatorias=("fecha", "cuenta"), columnas=COLUMNAS, max_filas=50):
+    """
+    Busca en las primeras `max_filas` la fila que contiene las columnas
+    obligatorias. Devuelve (mapa, filas_restantes) donde filas_restantes
+    produce (número_de_fila, fila). Lanza ValueError si no la encuentra.
+    """
+    filas = iter(filas)
+    for num, fila in enumerate(islice(filas, max_filas), 1):
+        textos = [_texto(c).lower() for c in fila]
+        if not all(clave in textos for clave in obligatorias):
+            continue
+
+        mapa = {}
+        for idx, texto in enumerate(textos):
+            for clave, fragmentos in columnas.items():
+                if clave not in mapa and any(fr in texto for fr in fragmentos):
+                    mapa[clave] = idx
+                    break
+        return mapa, enumerate(filas, num + 1)
+
+    raise ValueError(
+        f"No se encontró la fila de cabeceras (Busqué {' y '.join(repr(c.title()) for c in obligatorias)})."
+    )
+
+
+def normalizar_fecha(valor):
+    """datetime/date o texto (dd/mm/aaaa, aaaa-mm-dd[ hh:mm:ss], dd-mm-aaaa) -> 'dd/mm/aaaa' o None."""
+    if isinstance(valor, (datetime, date)):
+        return valor.strftime("%d/%m/%Y")
+    f = parsear_fecha(_texto(valor).split(" ")[0])
+    return f.strftime("%d/%m/%Y") if f else None
+
+
+def _importe(valor):
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    return float(_texto(valor).replace(",", ".") or 0)
+
+
+def normalizar_filas(filas, mapa):
+    """
+    (num, fila) -> (num, movimiento, None) o (num, None, error).
+    Las filas vacías (sin fecha) se saltan sin error.
+    """
+    def celda(fila, clave):
+        idx = mapa.get(clave)
+        return fila[idx] if idx is not None and idx < len(fila) else None
+
+    for num, fila in filas:
+        if not fila:
+            continue
+        fecha_raw = celda(fila, "fecha")
+        if not _texto(fecha_raw):
+            continue
+        try:
+            cuenta = _texto(celda(fila, "cuenta")).split(" ")[0]
+            if cuenta.endswith(".0"):     # Excel lee los códigos como float
+                cuenta = cuenta[:-2]
+            yield num, {
+                "fecha": normalizar_fecha(fecha_raw) or _texto(fecha_raw),
+                "documento": _texto(celda(fila, "documento")),
+                "concepto": _texto(celda(fila, "concepto")),
+                "cuenta": cuenta,
+                "debe": _importe(celda(fila, "debe")),
+                "haber": _importe(celda(fila, "haber")),
+                "banco": _texto(celda(fila, "banco")) or "Caja",
+                "estado": _texto(celda(fila, "estado")).lower() or "pagado",
+                "moneda": "INR",
+            }, None
+        except (ValueError, TypeError) as e:
+            yield num, None, f"Fila {num}: {e}"
+
+
+def validar_movimientos(registros, omitir_sin_importe=True):
+    """Marca como error las fechas inválidas; descarta filas con Debe y Haber a cero."""
+    for num, mov, error in registros:
+        if mov is not None:
+            if parsear_fecha(mov["fecha"]) is None:
+                mov, error = None, f"Fila {num}: fecha inválida ({mov['fecha']})"
+            elif omitir_sin_importe and mov["debe"] == 0 and mov["haber"] == 0:
+                continue
+        yield num, mov, error
+
+
+def clave_movimiento(mov):
+    """Identidad de un movimiento a efectos de duplicados."""
+    f = parsear_fecha(mov.get("fecha"))
+    return (
+        f, str(mov.get("documento", "")).strip(), str(mov.get("concepto", "")).strip().lower(),
+        str(mov.get("cuenta", "")), round(importe(mov.get("debe", 0)), 2),
+        round(importe(mov.get("haber", 0)), 2), mov.get("banco", ""),
+    )
+
+
+class Deduplicador:
+    """Omite movimientos repetidos dentro del archivo o ya presentes en `existentes`."""
+
+    def __init__(self, existentes=()):
+        self.vistos = {clave_movimiento(m) for m in existentes}
+        self.omitidos = 0
+
+    def __call__(self, registros):
+        for num, mov, error in registros:
+            if mov is not None:
+                clave = clave_movimiento(mov)
+                if clave in self.vistos:
+                    self.omitidos += 1
+                    continue
+                self.vistos.add(clave)
+            yield num, mov, error
+
+
+def en_lotes(iterable, tamaño=TAMAÑO_LOTE):
+    iterador = iter(iterable)
+    while True:
+        lote = list(islice(iterador, tamaño))
+        if not lote:
+            return
+        yield lote
+
+
+# ============================================================
+# ORQUESTADOR
+# ============================================================
+class ResumenImportacion:
+    def __init__(self):
+        self.validos = 0
+        self.duplicados = 0
+        self.num_errores = 0
+        self.errores = []      # como mucho MAX_ERRORES mensajes
+        self.muestra = []      # primeros movimientos válidos (vista previa)
+
+    def anotar_error(self, error):
+        self.num_errores += 1
+        if len(self.errores) < MAX_ERRORES:
+            self.errores.append(error)
+
+
+class ImportacionMovimientos:
+    """
+    imp = ImportacionMovimientos(ruta, existentes=data.movimientos)
+    resumen = imp.analizar(progreso)           # vista previa, sin tocar el libro
+    agregados, resumen = imp.importar_en(data, progreso)
+
+    progreso(porcentaje, texto) se llama una vez por lote.
+    `existentes` se recorre en el hilo que lee el archivo: desde otro hilo,
+    pasar una copia (list(data.movimientos)), no la lista viva del libro.
+    """
+
+    def __init__(self, ruta, existentes=(), tamaño_lote=TAMAÑO_LOTE, omitir_sin_importe=True):
+        self.ruta = ruta
+        self.existentes = existentes
+        self.tamaño_lote = tamaño_lote
+        self.omitir_sin_importe = omitir_sin_importe
+
+    def _registros(self, lector, dedup):
+        mapa, filas = detectar_cabecera(lector)
+        return dedup(validar_movimientos(normalizar_filas(filas, mapa), self.omitir_sin_importe))
+
+    def lotes(self, progreso=None, texto="Importando"):
+        """Lotes de (movimientos, resumen) sobre una lectura nueva del archivo."""
+        lector = LectorFilas(self.ruta)
+        dedup = Deduplicador(self.existentes)
+        resumen = ResumenImportacion()
+        for lote in en_lotes(self._registros(lector, dedup), self.tamaño_lote):
+            movimientos = []
+            for _, mov, error in lote:
+                if mov is None:
+                    resumen.anotar_error(error)
+                else:
+                    movimientos.append(mov)
+            resumen.validos += len(movimientos)
+            resumen.duplicados = dedup.omitidos
+            if progreso is not None:
+                progreso(int(lector.fraccion * 100), f"{texto}: {resumen.validos} movimientos")
+            yield movimientos, resumen
+        resumen.duplicados = dedup.omitidos
+
+    def analizar(self, progreso=None, muestra=200):
+        resumen = ResumenImportacion()
+        for movimientos, resumen in self.lotes(progreso, "Analizando"):
+            faltan = muestra - len(resumen.muestra)
+            if faltan > 0:
+                resumen.muestra.extend(movimientos[:faltan])
+        return resumen
+
+    def importar_en(self, data, progreso=None):
+        """
+        Añade los movimientos a `data` (ContabilidadData) lote a lote sin
+        persistir cada lote; al final se guarda una sola vez.
+        Retorna (num_agregados, resumen).
+        """
+        agregados = 0
+        resumen = ResumenImportacion()
+        try:
+            for movimientos, resumen in self.lotes(progreso):
+                n, errores = data.agregar_movimientos(movimientos, persistir=False)
+                agregados += n
+                for error in errores:
+                    resumen.anotar_error(error)
+        finally:
+            # También si se cancela a medias: lo ya añadido queda guardado
+            if agregados:
+                data.guardar(segundo_plano=True)
+        return agregados, resumen
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+IndiceMovimientos.py — SHILLONG CONTABILIDAD v3.8.0 PRO
+Índices secundarios en memoria sobre los movimientos del libro.
+Permite que las consultas de ContabilidadData cuesten O(coincidencias)
+en lugar de recorrer (y re-parsear) todo el libro en cada llamada.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date
+
+
+def parsear_fecha(f_str):
+    """
+    Convierte una fecha del libro en objeto date.
+    Formatos soportados: DD/MM/YYYY, YYYY-MM-DD, DD-MM-YYYY.
+    Devuelve None si la fecha está vacía o es inválida.
+    """
+    f_str = str(f_str or "").strip()
+    try:
+        if "/" in f_str:
+            d, mm, a = map(int, f_str.split("/"))
+        elif "-" in f_str:
+            p = f_str.split("-")
+            if len(p[0]) == 4:
+                a, mm, d = map(int, p)
+            else:
+                d, mm, a = map(int, p)
+        else:
+            return None
+        return date(a, mm, d)
+    except (ValueError, TypeError):
+        return None
+
+
+class IndiceMovimientos:
+    """
+    Mantiene índices por (año, mes), cuenta, banco, estado y fecha.
+
+    Cada cubo es un dict {id(mov): mov}: conserva el orden de inserción
+    y permite altas y bajas en O(1). Los movimientos siguen siendo los
+    mismos dicts de ContabilidadData.movimientos (no se copian).
+
+    La fecha se parsea una sola vez al indexar y queda en caché junto a
+    las claves: fecha(mov) la devuelve sin volver a parsear el string.
+    Además mantiene el mapa id persistente -> movimiento (por_id).
+    """
+
+    CAMPOS = ("mes", "cuenta", "banco", "estado", "fecha")
+
+    def __init__(self):
+        self.limpiar()
+
+    # ============================================================
+    # MANTENIMIENTO
+    # ============================================================
+    def limpiar(self):
+        self._tablas = {campo: defaultdict(dict) for campo in self.CAMPOS}
+        self._claves = {}           # id(mov) -> claves con las que se indexó
+        self._por_id = {}           # mov["id"] -> mov
+        self._fechas_ordenadas = []
+        self._fechas_sucias = False
+
+    def reconstruir(self, movimientos):
+        """Reconstruye todos los índices desde cero (carga o edición externa)."""
+        self.limpiar()
+        for m in movimientos:
+            self.agregar(m)
+
+    def _claves_de(self, m):
+        fecha = parsear_fecha(m.get("fecha", ""))
+        return (
+            (fecha.year, fecha.month) if fecha else None,
+            str(m.get("cuenta", "")),
+            m.get("banco", ""),
+            str(m.get("estado", "")).lower(),
+            fecha,
+        )
+
+    def agregar(self, m, claves=None):
+        if claves is None:
+            claves = self._claves_de(m)
+        self._claves[id(m)] = claves
+        if m.get("id"):
+            self._por_id[m["id"]] = m
+        for campo, clave in zip(self.CAMPOS, claves):
+            if clave is None:
+                continue
+            tabla = self._tablas[campo]
+            if campo == "fecha" and clave not in tabla:
+                self._fechas_sucias = True
+            tabla[clave][id(m)] = m
+
+    def quitar(self, m):
+        claves = self._claves.pop(id(m), None)
+        if claves is None:
+            return
+        if self._por_id.get(m.get("id")) is m:
+            del self._por_id[m["id"]]
+        for campo, clave in zip(self.CAMPOS, claves):
+            if clave is None:
+                continue
+            tabla = self._tablas[campo]
+            cubo = tabla.get(clave)
+            if cubo is None:
+                continue
+            cubo.pop(id(m), None)
+            if not cubo:
+                del tabla[clave]
+                if campo == "fecha":
+                    self._fechas_sucias = True
+
+    def actualizar(self, m):
+        """Re-indexa un movimiento después de modificar sus campos."""
+        claves = self._claves_de(m)
+        if self._claves.get(id(m)) == claves:
+            return
+        self.quitar(m)
+        self.agregar(m, claves)
+
+    # ============================================================
+    # CONSULTAS
+    # ============================================================
+    def por_id(self, mov_id):
+        """Movimiento con ese id persistente, o None."""
+        return self._por_id.get(mov_id)
+
+    def fecha(self, m):
+        """Fecha parseada del movimiento (date) o None si es inválida."""
+        claves = self._claves.get(id(m))
+        if claves is None:
+            return parsear_fecha(m.get("fecha", ""))
+        return claves[4]
+
+    def buscar(self, campo, clave):
+        """Devuelve la lista de movimientos con esa clave (orden de inserción)."""
+        cubo = self._tablas[campo].get(clave)
+        return list(cubo.values()) if cubo else []
+
+    def rango_fechas(self, fecha_inicio, fecha_fin):
+        """Movimientos con fecha entre ambos extremos (incluidos), en orden cronológico."""
+        if self._fechas_sucias:
+            self._fechas_ordenadas = sorted(self._tablas["fecha"])
+            self._fechas_sucias = False
+
+        fechas = self._fechas_ordenadas
+        tabla = self._tablas["fecha"]
+        resultado = []
+        for f in fechas[bisect_left(fechas, fecha_inicio):bisect_right(fechas, fecha_fin)]:
+            resultado.extend(tabla[f].values())
+        return resultado
+
+
+class PosicionesMovimientos:
+    """
+    Posición de cada movimiento en la lista del libro, para borrar sin
+    recorrerla.
+
+    Cada alta recibe un número de orden creciente (id(mov) -> orden) y las
+    bajas se anotan en un árbol de Fenwick sobre esos órdenes: la posición
+    actual es orden - bajas con orden menor, en O(log n). Al reconstruir
+    (carga, compactación, reindexar) se vuelve a numerar desde cero.
+    """
+
+    def __init__(self):
+        self.reconstruir([])
+
+    def reconstruir(self, movimientos):
+        self._orden = {id(m): i for i, m in enumerate(movimientos)}
+        self._bajas = [0] * (len(movimientos) + 1)   # Fenwick, índices 1..n
+
+    def _contar(self, hasta):
+        """Bajas con orden < hasta."""
+        total = 0
+        while hasta > 0:
+            total += self._bajas[hasta]
+            hasta -= hasta & -hasta
+        return total
+
+    def agregar(self, m):
+        n = len(self._bajas)            # orden del nuevo = n - 1, nodo n
+        # El nodo nuevo resume las bajas de (n - lowbit(n), n]: todas anteriores a él
+        self._bajas.append(self._contar(n - 1) - self._contar(n - (n & -n)))
+        self._orden[id(m)] = n - 1
+
+    def posicion(self, m):
+        """Posición actual de m en la lista, o None si no está registrado."""
+        orden = self._orden.get(id(m))
+        if orden is None:
+            return None
+        return orden - self._contar(orden)
+
+    def quitar(self, m):
+        orden = self._orden.pop(id(m), None)
+        if orden is None:
+            return
+        i = orden + 1
+        while i < len(self._bajas):
+            self._bajas[i] += 1
+            i += i & -i
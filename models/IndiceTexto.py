@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+"""
+IndiceTexto.py — SHILLONG CONTABILIDAD v3.8.0 PRO
+Índice invertido de texto para los buscadores del libro.
+
+Cada movimiento se parte en palabras (concepto, documento, cuenta, nombre
+de la cuenta y banco; sin mayúsculas ni acentos) y se guarda
+palabra -> movimientos. Sobre el vocabulario, que es mucho menor que el
+libro, hay un segundo índice trigrama -> palabras:
+  - término de 3+ letras: subcadena de alguna palabra ("actur" -> factura)
+  - término de 1-2 letras: inicio de palabra ("lu" -> luz, luces)
+Varios términos separados por espacios se combinan con Y.
+
+Se mantiene como IndiceMovimientos (agregar/quitar/actualizar) pero no se
+construye hasta la primera búsqueda: abrir el libro no paga su coste.
+"""
+
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+CAMPOS = ("concepto", "documento", "cuenta", "banco")
+_PALABRA = re.compile(r"\w+")
+
+
+def normalizar(texto):
+    """Minúsculas y sin acentos ("Energía" -> "energia")."""
+    texto = str(texto or "").lower()
+    if texto.isascii():
+        return texto
+    texto = unicodedata.normalize("NFKD", texto)
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def palabras(texto):
+    return _PALABRA.findall(normalizar(texto))
+
+
+def _trigramas(palabra):
+    return {palabra[i:i + 3] for i in range(len(palabra) - 2)}
+
+
+class IndiceTexto:
+    """
+    indice = IndiceTexto(nombre_de=data.obtener_nombre_cuenta)
+    indice.reconstruir(data.movimientos)
+    indice.buscar("luz ene")              -> movimientos (sin orden)
+    indice.buscar("luz", candidatos)      -> los de `candidatos` que coinciden, en su orden
+    """
+
+    def __init__(self, nombre_de=None):
+        self._nombre_de = nombre_de or (lambda cuenta: "")
+        self._fuente = []
+        self._construido = False
+        self.limpiar()
+
+    # ============================================================
+    # MANTENIMIENTO
+    # ============================================================
+    def limpiar(self):
+        self._docs = {}                          # id(mov) -> (mov, palabras)
+        self._postings = defaultdict(set)        # palabra -> {id(mov)}
+        self._trigramas = defaultdict(set)       # trigrama -> {palabra}
+        self._vocabulario = []                   # palabras ordenadas (búsqueda por prefijo)
+        self._vocabulario_sucio = False
+
+    def reconstruir(self, movimientos):
+        """Apunta a la nueva lista; el índice se construirá en la próxima búsqueda."""
+        self._fuente = movimientos
+        self._construido = False
+        self.limpiar()
+
+    def invalidar(self):
+        """Los textos derivados cambiaron (p. ej. nombres del plan contable)."""
+        self.reconstruir(self._fuente)
+
+    def _construir(self):
+        self.limpiar()
+        self._construido = True
+        # Versión en bloque de _indexar: los trigramas, una vez por palabra al final
+        docs, postings = self._docs, self._postings
+        for m in self._fuente:
+            clave = id(m)
+            claves = self._palabras_de(m)
+            docs[clave] = (m, claves)
+            for p in claves:
+                postings[p].add(clave)
+        trigramas = self._trigramas
+        for p in postings:
+            for t in _trigramas(p):
+                trigramas[t].add(p)
+        self._vocabulario_sucio = True
+
+    def _palabras_de(self, m):
+        textos = [str(m.get(campo) or "") for campo in CAMPOS]
+        textos.append(self._nombre_de(str(m.get("cuenta", ""))))
+        return frozenset(palabras(" ".join(textos)))
+
+    def _indexar(self, m, claves=None):
+        clave = id(m)
+        claves = self._palabras_de(m) if claves is None else claves
+        self._docs[clave] = (m, claves)
+        for p in claves:
+            cubo = self._postings[p]
+            if not cubo:
+                self._nueva_palabra(p)
+            cubo.add(clave)
+
+    def _nueva_palabra(self, p):
+        for t in _trigramas(p):
+            self._trigramas[t].add(p)
+        self._vocabulario_sucio = True
+
+    def _olvidar_palabra(self, p):
+        del self._postings[p]
+        for t in _trigramas(p):
+            cubo = self._trigramas[t]
+            cubo.discard(p)
+            if not cubo:
+                del self._trigramas[t]
+        self._vocabulario_sucio = True
+
+    def agregar(self, m):
+        if self._construido:
+            self._indexar(m)
+
+    def quitar(self, m):
+        if not self._construido:
+            return
+        doc = self._docs.pop(id(m), None)
+        if doc is None:
+            return
+        for p in doc[1]:
+            cubo = self._postings[p]
+            cubo.discard(id(m))
+            if not cubo:
+                self._olvidar_palabra(p)
+
+    def actualizar(self, m):
+        """Re-indexa un movimiento después de modificar sus campos."""
+        if not self._construido:
+            return
+        doc = self._docs.get(id(m))
+        claves = self._palabras_de(m)
+        if doc is not None and doc[1] == claves:
+            return
+        self.quitar(m)
+        self._indexar(m, claves)
+
+    # ============================================================
+    # CONSULTAS
+    # ============================================================
+    def _palabras_que_contienen(self, termino):
+        if len(termino) < 3:
+            if self._vocabulario_sucio:
+                self._vocabulario = sorted(self._postings)
+                self._vocabulario_sucio = False
+            vocab = self._vocabulario
+            i = bisect_left(vocab, termino)
+            encontradas = []
+            while i < len(vocab) and vocab[i].startswith(termino):
+                encontradas.append(vocab[i])
+                i += 1
+            return encontradas
+
+        cubos = sorted((self._trigramas.get(t, ()) for t in _trigramas(termino)), key=len)
+        if not cubos[0]:
+            return []
+        posibles = set(cubos[0]).intersection(*cubos[1:])
+        return [p for p in posibles if termino in p]   # el trigrama es condición necesaria
+
+    def coincidencias(self, texto):
+        """Conjunto de id(mov) que contienen todos los términos de `texto` (None si no hay términos)."""
+        if not self._construido:
+            self._construir()
+        terminos = palabras(texto)
+        if not terminos:
+            return None
+
+        resultado = None
+        # Primero los términos más largos: suelen ser los más selectivos
+        for termino in sorted(set(terminos), key=len, reverse=True):
+            claves = set().union(*(self._postings[p] for p in self._palabras_que_contienen(termino)))
+            resultado = claves if resultado is None else resultado & claves
+            if not resultado:
+                return set()
+        return resultado
+
+    def buscar(self, texto, candidatos=None):
+        """
+        Movimientos que coinciden con `texto`. Con `candidatos` (p. ej. los
+        del mes) se devuelven solo esos, en su orden; sin términos, todos.
+        """
+        claves = self.coincidencias(texto)
+        if candidatos is not None:
+            if claves is None:
+                return list(candidatos)
+            return [m for m in candidatos if id(m) in claves]
+        if claves is None:
+            return list(self._fuente)
+        return [self._docs[c][0] for c in claves]
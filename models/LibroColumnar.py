@@ -0,0 +1,305 @@
+# -*- coding: utf-8 -*-
+"""
+LibroColumnar.py — SHILLONG CONTABILIDAD v3.8.0 PRO
+Representación en columnas del libro para informes y auditorías.
+
+En lugar de un dict de ~10 claves por movimiento, cada campo es un array
+compacto (módulo array de la biblioteca estándar):
+  debe, haber   -> float64 (ya convertidos: nada de "1,5" como texto)
+  ordinal       -> date.toordinal() (0 = fecha inválida)
+  periodo       -> año * 12 + (mes - 1) (0 = fecha inválida)
+  cuenta, banco, estado -> códigos enteros de tablas internadas
+  concepto      -> lista aparte (solo la usan las búsquedas de texto)
+La fila i corresponde a movimientos[i] del libro con el que se construyó.
+
+Si NumPy está instalado las columnas se exponen como vistas ndarray (sin
+copia) y máscaras y sumas se calculan vectorizadas; si no, con bucles
+sobre los arrays, con el mismo resultado.
+"""
+
+from array import array
+from datetime import date
+
+from models.AgregadosMovimientos import importe
+from models.IndiceMovimientos import parsear_fecha
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def periodo(año, mes):
+    return año * 12 + (mes - 1)
+
+
+def año_mes(codigo):
+    """Inverso de periodo(): (año, mes)."""
+    return codigo // 12, codigo % 12 + 1
+
+
+class TablaCodigos:
+    """Internado de textos repetidos (cuentas, bancos, estados) -> código entero."""
+
+    def __init__(self):
+        self.valores = []
+        self._codigos = {}
+
+    def codigo(self, valor):
+        c = self._codigos.get(valor)
+        if c is None:
+            c = self._codigos[valor] = len(self.valores)
+            self.valores.append(valor)
+        return c
+
+    def buscar(self, valor):
+        """Código existente o None (no añade)."""
+        return self._codigos.get(valor)
+
+    def __len__(self):
+        return len(self.valores)
+
+
+class LibroColumnar:
+    """
+    libro = LibroColumnar(data.movimientos)      # o data.columnar()
+    m = libro.mascara(banco="Caja", año=2025, mes=3)
+    libro.suma("debe", m)
+    libro.sumas_por("cuenta", m)   -> {cuenta: (debe, haber)}
+    libro.sumas_por(("cuenta", "periodo"))  -> {(cuenta, (año, mes)): (debe, haber)}
+    libro.filas(m)                 -> posiciones en data.movimientos
+    """
+
+    def __init__(self, movimientos=(), fecha_de=None):
+        self._fecha_de = fecha_de or (lambda m: parsear_fecha(m.get("fecha", "")))
+        self.debe = array("d")
+        self.haber = array("d")
+        self.ordinal = array("l")
+        self.periodo = array("l")
+        self.cuenta = array("l")
+        self.banco = array("l")
+        self.estado = array("l")
+        self.concepto = []
+        self.cuentas = TablaCodigos()
+        self.bancos = TablaCodigos()
+        self.estados = TablaCodigos()
+        self._derivadas = {}   # nombre -> (columna base, función, mapa de códigos, tabla)
+        for m in movimientos:
+            self.agregar(m)
+
+    def agregar(self, m):
+        f = self._fecha_de(m)
+        self.debe.append(importe(m.get("debe", 0)))
+        self.haber.append(importe(m.get("haber", 0)))
+        self.ordinal.append(f.toordinal() if f else 0)
+        self.periodo.append(periodo(f.year, f.month) if f else 0)
+        self.cuenta.append(self.cuentas.codigo(str(m.get("cuenta", ""))))
+        self.banco.append(self.bancos.codigo(m.get("banco", "")))
+        self.estado.append(self.estados.codigo(str(m.get("estado", "")).lower()))
+        self.concepto.append(m.get("concepto", ""))
+
+    def __len__(self):
+        return len(self.debe)
+
+    # ============================================================
+    # COLUMNAS
+    # ============================================================
+    def columna(self, nombre):
+        """Vista ndarray (sin copia) con NumPy; el array tal cual sin él."""
+        col = getattr(self, nombre)
+        if np is not None and isinstance(col, array):
+            tipo = np.float64 if col.typecode == "d" else np.dtype(col.typecode)
+            return np.frombuffer(col, dtype=tipo) if len(col) else np.zeros(0, dtype=tipo)
+        return col
+
+    # ============================================================
+    # MÁSCARAS
+    # ============================================================
+    def _codigos_validos(self, tabla, condicion):
+        """Códigos de `tabla` cuyo valor cumple `condicion` (se evalúa una vez por valor)."""
+        return {c for c, v in enumerate(tabla.valores) if condicion(v)}
+
+    def mascara(self, cuenta=None, prefijo=None, banco=None, estado=None,
+                desde=None, hasta=None, año=None, mes=None,
+                con_debe=None, con_haber=None, base=None):
+        """
+        Filas que cumplen TODOS los filtros indicados:
+          cuenta/banco/estado: igualdad; prefijo: la cuenta empieza por él
+          desde/hasta: date (inclusive); año[/mes]: periodo
+          con_debe/con_haber: True -> importe > 0, False -> importe == 0
+          base: máscara previa con la que combinar
+        Devuelve un ndarray bool (NumPy) o una lista de bool.
+        """
+        condiciones = []
+
+        def por_codigo(columna, codigos):
+            condiciones.append((columna, codigos))
+
+        if cuenta is not None:
+            por_codigo("cuenta", {self.cuentas.buscar(str(cuenta))})
+        if prefijo is not None:
+            por_codigo("cuenta", self._codigos_validos(self.cuentas, lambda c: c.startswith(str(prefijo))))
+        if banco is not None:
+            por_codigo("banco", {self.bancos.buscar(banco)})
+        if estado is not None:
+            por_codigo("estado", {self.estados.buscar(str(estado).lower())})
+
+        if np is not None:
+            return self._mascara_np(condiciones, desde, hasta, año, mes, con_debe, con_haber, base)
+        return self._mascara_py(condiciones, desde, hasta, año, mes, con_debe, con_haber, base)
+
+    def _mascara_np(self, condiciones, desde, hasta, año, mes, con_debe, con_haber, base):
+        m = np.ones(len(self), dtype=bool) if base is None else np.array(base, dtype=bool)
+        for nombre, codigos in condiciones:
+            validos = np.zeros(len(getattr(self, nombre + "s")) + 1, dtype=bool)
+            validos[[c for c in codigos if c is not None]] = True
+            m &= validos[self.columna(nombre)]
+        if desde is not None or hasta is not None:
+            ordinal = self.columna("ordinal")
+            m &= ordinal > 0
+            if desde is not None:
+                m &= ordinal >= desde.toordinal()
+            if hasta is not None:
+                m &= ordinal <= hasta.toordinal()
+        if año is not None:
+            per = self.columna("periodo")
+            if mes is not None:
+                m &= per == periodo(año, mes)
+            else:
+                m &= (per >= periodo(año, 1)) & (per <= periodo(año, 12))
+        if con_debe is not None:
+            debe = self.columna("debe")
+            m &= (debe > 0) if con_debe else (debe == 0)
+        if con_haber is not None:
+            haber = self.columna("haber")
+            m &= (haber > 0) if con_haber else (haber == 0)
+        return m
+
+    def _mascara_py(self, condiciones, desde, hasta, año, mes, con_debe, con_haber, base):
+        m = [True] * len(self) if base is None else list(base)
+        for nombre, codigos in condiciones:
+            col = getattr(self, nombre)
+            m = [ok and col[i] in codigos for i, ok in enumerate(m)]
+        if desde is not None or hasta is not None:
+            lo = desde.toordinal() if desde is not None else 1
+            hi = hasta.toordinal() if hasta is not None else float("inf")
+            m = [ok and lo <= o <= hi and o > 0 for ok, o in zip(m, self.ordinal)]
+        if año is not None:
+            lo, hi = (periodo(año, mes),) * 2 if mes is not None else (periodo(año, 1), periodo(año, 12))
+            m = [ok and lo <= p <= hi for ok, p in zip(m, self.periodo)]
+        if con_debe is not None:
+            m = [ok and ((d > 0) if con_debe else (d == 0)) for ok, d in zip(m, self.debe)]
+        if con_haber is not None:
+            m = [ok and ((h > 0) if con_haber else (h == 0)) for ok, h in zip(m, self.haber)]
+        return m
+
+    def filas(self, mascara):
+        """Posiciones (índices en la lista de movimientos) que cumplen la máscara."""
+        if np is not None:
+            return np.flatnonzero(mascara).tolist()
+        return [i for i, ok in enumerate(mascara) if ok]
+
+    def cuantas(self, mascara):
+        return int(np.count_nonzero(mascara)) if np is not None else sum(mascara)
+
+    # ============================================================
+    # SUMAS
+    # ============================================================
+    def suma(self, nombre, mascara=None):
+        """Suma de la columna (debe/haber), opcionalmente solo de las filas de la máscara."""
+        if np is not None:
+            col = self.columna(nombre)
+            return float(col.sum() if mascara is None else col[mascara].sum())
+        col = getattr(self, nombre)
+        if mascara is None:
+            return sum(col)
+        return sum(v for v, ok in zip(col, mascara) if ok)
+
+    def derivar(self, nombre, base, funcion):
+        """
+        Registra una clave de agrupación calculada a partir de otra columna
+        codificada (p. ej. "categoria" desde "cuenta"). `funcion` se evalúa
+        una sola vez por valor distinto de la columna base, no por fila.
+        """
+        if nombre not in self._derivadas:
+            self._derivadas[nombre] = (base, funcion, array("l"), TablaCodigos())
+
+    def _agrupacion(self, clave):
+        """(códigos por fila, decodificar(código)) de una clave de agrupación."""
+        if clave == "periodo":
+            return self.periodo, año_mes
+        if clave in self._derivadas:
+            base, funcion, mapa, tabla = self._derivadas[clave]
+            origen = getattr(self, base + "s").valores
+            # Completar el mapa con los valores base aparecidos desde la última vez
+            for valor in origen[len(mapa):]:
+                mapa.append(tabla.codigo(funcion(valor)))
+            if np is not None:
+                return np.asarray(mapa, dtype=np.int64)[self.columna(base)], tabla.valores.__getitem__
+            return [mapa[c] for c in getattr(self, base)], tabla.valores.__getitem__
+        tabla = getattr(self, {"cuenta": "cuentas", "banco": "bancos", "estado": "estados"}[clave])
+        return getattr(self, clave), tabla.valores.__getitem__
+
+    def sumas_por(self, clave, mascara=None):
+        """
+        {valor: (debe, haber)} agrupando por "cuenta", "banco", "estado",
+        "periodo" (valor (año, mes)) o una clave derivada. Con una tupla de
+        claves, p. ej. ("cuenta", "periodo"), agrupa por la combinación y el
+        valor es la tupla. Solo aparecen los grupos con filas; si se agrupa
+        por periodo no cuentan las fechas inválidas.
+        """
+        claves = (clave,) if isinstance(clave, str) else tuple(clave)
+        columnas = [self._agrupacion(c) for c in claves]
+        if "periodo" in claves:
+            mascara = self.mascara(desde=date.min, base=mascara)
+
+        if np is not None:
+            grupos = self._sumas_np(columnas, mascara)
+        else:
+            grupos = self._sumas_py(columnas, mascara)
+
+        decodificar = [dec for _, dec in columnas]
+        if isinstance(clave, str):
+            return {decodificar[0](c[0]): v for c, v in grupos.items()}
+        return {tuple(dec(x) for dec, x in zip(decodificar, c)): v for c, v in grupos.items()}
+
+    def _sumas_np(self, columnas, mascara):
+        """{tupla de códigos: (debe, haber)} con una única pasada de bincount."""
+        debe, haber = self.columna("debe"), self.columna("haber")
+        filas = None if mascara is None else np.asarray(mascara, dtype=bool)
+        if filas is not None:
+            debe, haber = debe[filas], haber[filas]
+
+        # Cada clave se compacta a 0..k-1 y se combinan en un único índice (base mixta)
+        combinado = np.zeros(len(debe), dtype=np.int64)
+        valores = []
+        for codigos, _ in columnas:
+            cod = np.asarray(codigos, dtype=np.int64)
+            if filas is not None:
+                cod = cod[filas]
+            unicos, cod = np.unique(cod, return_inverse=True)
+            combinado = combinado * len(unicos) + cod
+            valores.append(unicos)
+
+        grupos, inverso = np.unique(combinado, return_inverse=True)
+        sd = np.bincount(inverso, weights=debe, minlength=len(grupos))
+        sh = np.bincount(inverso, weights=haber, minlength=len(grupos))
+
+        resultado = {}
+        for g, d, h in zip(grupos.tolist(), sd.tolist(), sh.tolist()):
+            codigos = []
+            for unicos in reversed(valores):
+                g, r = divmod(g, len(unicos))
+                codigos.append(int(unicos[r]))
+            resultado[tuple(reversed(codigos))] = (d, h)
+        return resultado
+
+    def _sumas_py(self, columnas, mascara):
+        acumulado = {}
+        cols = [codigos for codigos, _ in columnas]
+        filas = range(len(self)) if mascara is None else (i for i, ok in enumerate(mascara) if ok)
+        for i in filas:
+            c = tuple(col[i] for col in cols)
+            d, h = acumulado.get(c, (0.0, 0.0))
+            acumulado[c] = (d + self.debe[i], h + self.haber[i])
+        return acumulado
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+"""
+MotorInformes.py — SHILLONG CONTABILIDAD v3.8.0 PRO
+Agrupaciones para informes sobre la vista en columnas del libro.
+
+Cada informe es una sola pasada agrupada (LibroColumnar.sumas_por), no un
+recorrido de los movimientos por cuenta o por mes:
+  por_cuenta       -> sumas y saldos [(cuenta, debe, haber)]
+  por_cuenta_mes   -> evolutivo {cuenta: ([debe x 12], [haber x 12])}
+  por_banco_mes    -> {banco: ([debe x 12], [haber x 12])}
+  por_categoria    -> {categoría: (debe, haber)}
+Los filtros extra (banco, estado, prefijo, desde, hasta...) son los de
+LibroColumnar.mascara().
+"""
+
+from models.CategoriasCuentas import categoria_de_cuenta
+
+
+class MotorInformes:
+    """
+    motor = data.informes()        # o MotorInformes(data.columnar())
+    motor.por_cuenta(2025, 3)
+    motor.por_cuenta_mes(2025)
+    """
+
+    def __init__(self, libro, categoria_de=categoria_de_cuenta):
+        self.libro = libro
+        libro.derivar("categoria", "cuenta", categoria_de)
+        libro.derivar("categoria_oficial", "cuenta", lambda cta: categoria_de(cta, oficial=True))
+
+    def _mascara(self, año=None, mes=None, **filtros):
+        if año is None and mes is None and not filtros:
+            return None
+        return self.libro.mascara(año=año, mes=mes, **filtros)
+
+    def por_cuenta(self, año=None, mes=None, **filtros):
+        """Sumas por cuenta ordenadas: [(cuenta, debe, haber), ...]."""
+        sumas = self.libro.sumas_por("cuenta", self._mascara(año, mes, **filtros))
+        return [(cta, d, h) for cta, (d, h) in sorted(sumas.items())]
+
+    def _matriz(self, clave, año, **filtros):
+        matriz = {}
+        for (valor, (_, mes)), (d, h) in self.libro.sumas_por((clave, "periodo"), self._mascara(año, **filtros)).items():
+            debe, haber = matriz.setdefault(valor, ([0.0] * 12, [0.0] * 12))
+            debe[mes - 1] += d
+            haber[mes - 1] += h
+        return dict(sorted(matriz.items()))
+
+    def por_cuenta_mes(self, año, **filtros):
+        """{cuenta: ([debe ene..dic], [haber ene..dic])} del año."""
+        return self._matriz("cuenta", año, **filtros)
+
+    def por_banco_mes(self, año, **filtros):
+        """{banco: ([debe ene..dic], [haber ene..dic])} del año."""
+        return self._matriz("banco", año, **filtros)
+
+    def por_categoria(self, año=None, mes=None, oficial=False, **filtros):
+        """{categoría: (debe, haber)}; oficial=True usa las categorías oficiales."""
+        clave = "categoria_oficial" if oficial else "categoria"
+        return self.libro.sumas_por(clave, self._mascara(año, mes, **filtros))
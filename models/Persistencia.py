@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Persistencia.py — SHILLONG CONTABILIDAD v3.8.0 PRO
+Escritura segura compartida por todos los almacenes JSON.
+
+- Escritura atómica: archivo temporal en la misma carpeta -> flush + fsync
+  -> os.replace. Un cierre abrupto deja el archivo anterior o el nuevo,
+  nunca uno truncado.
+- Copias rotativas: antes de reemplazar, la versión anterior se copia a
+  <carpeta del archivo>/backups/<nombre>_<AAAAMMDD_HHMMSS_ffffff>.json y
+  se conservan las N más recientes (las copias manuales no se tocan).
+- EscritorSegundoPlano: un hilo que vuelca a disco fuera del hilo de la UI.
+"""
+
+import glob
+import json
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+
+CARPETA_COPIAS = "backups"
+COPIAS_POR_DEFECTO = 5
+
+
+# ============================================================
+# ESCRITURA ATÓMICA
+# ============================================================
+def _fsync_carpeta(carpeta):
+    """Persiste el rename en la carpeta (POSIX). En Windows no aplica."""
+    try:
+        fd = os.open(carpeta, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def rotar_copias(ruta, copias=COPIAS_POR_DEFECTO, carpeta=None):
+    """
+    Copia la versión actual de `ruta` a la carpeta de copias (por defecto
+    backups/ junto al archivo) con marca de tiempo y borra las más antiguas
+    por encima de `copias`.
+    """
+    ruta = Path(ruta)
+    if copias <= 0 or not ruta.exists():
+        return None
+
+    carpeta = Path(carpeta) if carpeta else ruta.parent / CARPETA_COPIAS
+    carpeta.mkdir(parents=True, exist_ok=True)
+    marca = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    destino = carpeta / f"{ruta.stem}_{marca}{ruta.suffix}"
+    shutil.copy2(ruta, destino)
+
+    patron = str(carpeta / f"{glob.escape(ruta.stem)}_{'[0-9]' * 8}_{'[0-9]' * 6}_{'[0-9]' * 6}{ruta.suffix}")
+    for viejo in sorted(glob.glob(patron))[:-copias]:
+        try:
+            os.remove(viejo)
+        except OSError as e:
+            print(f"[Persistencia] No se pudo borrar la copia {viejo}: {e}")
+    return destino
+
+
+def escribir_atomico(ruta, escribir, copias=0, carpeta_copias=None):
+    """
+    escribir(f): vuelca el contenido en el archivo de texto `f` (temporal).
+    Si todo va bien, la versión anterior se rota a copias y el temporal
+    reemplaza al destino de forma atómica. Si falla, el destino no se toca.
+    """
+    ruta = Path(ruta)
+    carpeta = ruta.parent if str(ruta.parent) else Path(".")
+    carpeta.mkdir(parents=True, exist_ok=True)
+
+    fd, temporal = tempfile.mkstemp(prefix=f".{ruta.name}.", suffix=".tmp", dir=carpeta)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            escribir(f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        if copias:
+            rotar_copias(ruta, copias, carpeta_copias)
+
+        os.replace(temporal, ruta)
+        _fsync_carpeta(carpeta)
+    except BaseException:
+        try:
+            os.remove(temporal)
+        except OSError:
+            pass
+        raise
+
+
+def guardar_json(ruta, datos, indent=2, copias=0, carpeta_copias=None):
+    """json.dump atómico (se serializa directamente al temporal, sin string intermedio)."""
+    escribir_atomico(
+        ruta,
+        lambda f: json.dump(datos, f, indent=indent, ensure_ascii=False),
+        copias,
+        carpeta_copias,
+    )
+
+
+# ============================================================
+# ESCRITURA EN SEGUNDO PLANO
+# ============================================================
+class EscritorSegundoPlano:
+    """
+    Hilo único que ejecuta escrituras encargadas desde la UI.
+
+    programar(clave, tarea, al_terminar): si ya hay una tarea pendiente con la
+    misma clave (p. ej. la ruta del archivo) se sustituye por la nueva: solo
+    importa la última versión. al_terminar(error) se llama en el hilo del
+    escritor con None o con la excepción.
+    """
+
+    def __init__(self):
+        self._cola = queue.Queue()
+        self._pendientes = {}
+        self._lock = threading.Lock()
+        self._hilo = None
+
+    def _asegurar_hilo(self):
+        if self._hilo is None or not self._hilo.is_alive():
+            self._hilo = threading.Thread(target=self._bucle, name="EscritorSegundoPlano", daemon=True)
+            self._hilo.start()
+
+    def programar(self, clave, tarea, al_terminar=None):
+        with self._lock:
+            nueva = clave not in self._pendientes
+            self._pendientes[clave] = (tarea, al_terminar)
+            if nueva:
+                self._cola.put(clave)
+            self._asegurar_hilo()
+
+    def _bucle(self):
+        while True:
+            clave = self._cola.get()
+            with self._lock:
+                tarea, al_terminar = self._pendientes.pop(clave, (None, None))
+            error = None
+            if tarea is not None:
+                try:
+                    tarea()
+                except Exception as e:
+                    error = e
+                    print(f"[Persistencia] Error escribiendo {clave} en segundo plano: {e}")
+                if al_terminar is not None:
+                    try:
+                        al_terminar(error)
+                    except Exception as e:
+                        print(f"[Persistencia] Error tras escribir {clave}: {e}")
+            self._cola.task_done()
+
+    def esperar(self):
+        """Bloquea hasta que no quede ninguna escritura pendiente (p. ej. al salir)."""
+        if self._hilo is not None:
+            self._cola.join()
+
+
+_escritor = EscritorSegundoPlano()
+
+
+def escritor():
+    """Escritor en segundo plano compartido por la aplicación."""
+    return _escritor
@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+RegistroConfiguracion.py — SHILLONG CONTABILIDAD v3.8.0 PRO
+Caché única (por proceso) de los archivos de referencia:
+  - data/bancos.json
+  - data/plan_contable_v3.json
+  - data/reglas_conceptos.json
+
+Cada archivo se parsea una sola vez y se vuelve a leer solo cuando cambia
+su firma en disco (mtime + tamaño). Se entregan instantáneas inmutables
+(MappingProxyType / tuplas) que todas las vistas pueden compartir sin
+copiarlas. Quien necesite enterarse de una recarga puede suscribirse.
+"""
+
+import inspect
+import json
+import os
+import weakref
+from types import MappingProxyType
+
+RUTA_BANCOS = "data/bancos.json"
+RUTA_PLAN = "data/plan_contable_v3.json"
+RUTA_REGLAS = "data/reglas_conceptos.json"
+
+
+def congelar(valor):
+    """dict -> MappingProxyType, list -> tuple (recursivo)."""
+    if isinstance(valor, dict):
+        return MappingProxyType({k: congelar(v) for k, v in valor.items()})
+    if isinstance(valor, list):
+        return tuple(congelar(v) for v in valor)
+    return valor
+
+
+def descongelar(valor):
+    """Copia mutable de una instantánea (para quien tenga que modificarla)."""
+    if isinstance(valor, MappingProxyType):
+        return {k: descongelar(v) for k, v in valor.items()}
+    if isinstance(valor, tuple):
+        return [descongelar(v) for v in valor]
+    return valor
+
+
+class RegistroConfiguracion:
+    """
+    obtener(ruta, por_defecto)  -> instantánea inmutable del JSON
+    suscribir(ruta, callback)   -> callback(instantánea) tras cada recarga
+    comprobar()                 -> revisa todos los archivos (MainWindow: QTimer y cambio de vista)
+    invalidar(ruta)             -> fuerza la relectura (tras escribir el archivo)
+    """
+
+    def __init__(self):
+        self._entradas = {}        # ruta absoluta -> [firma, instantánea, por_defecto]
+        self._suscriptores = {}    # ruta absoluta -> [callbacks]
+
+    @staticmethod
+    def _clave(ruta):
+        return os.path.abspath(os.fspath(ruta))
+
+    @staticmethod
+    def _firma(clave):
+        try:
+            st = os.stat(clave)
+            return st.st_mtime_ns, st.st_size
+        except OSError:
+            return None
+
+    def _leer(self, clave, firma, por_defecto):
+        if firma is None:
+            return congelar(por_defecto)
+        try:
+            with open(clave, "r", encoding="utf-8") as f:
+                return congelar(json.load(f))
+        except (IOError, json.JSONDecodeError) as e:
+            print(f"[RegistroConfiguracion] Error leyendo {clave}: {e}")
+            return congelar(por_defecto)
+
+    def _refrescar(self, clave, por_defecto=None):
+        """Devuelve (instantánea, recargada)."""
+        firma = self._firma(clave)
+        entrada = self._entradas.get(clave)
+        if entrada is not None:
+            if entrada[0] == firma:
+                return entrada[1], False
+            if por_defecto is None:
+                por_defecto = entrada[2]
+
+        instantanea = self._leer(clave, firma, por_defecto)
+        self._entradas[clave] = [firma, instantanea, por_defecto]
+        return instantanea, entrada is not None
+
+    def _notificar(self, clave, instantanea):
+        vivos = []
+        for ref in self._suscriptores.get(clave, []):
+            callback = ref()
+            if callback is None:        # el objeto suscrito ya no existe
+                continue
+            vivos.append(ref)
+            try:
+                callback(instantanea)
+            except Exception as e:
+                print(f"[RegistroConfiguracion] Error en suscriptor: {e}")
+        if clave in self._suscriptores:
+            self._suscriptores[clave] = vivos
+
+    def obtener(self, ruta, por_defecto=None):
+        clave = self._clave(ruta)
+        instantanea, recargada = self._refrescar(clave, por_defecto)
+        if recargada:
+            self._notificar(clave, instantanea)
+        return instantanea
+
+    def comprobar(self):
+        """Recarga los archivos que hayan cambiado. Devuelve las rutas recargadas."""
+        recargadas = []
+        for clave in list(self._entradas):
+            instantanea, recargada = self._refrescar(clave)
+            if recargada:
+                recargadas.append(clave)
+                self._notificar(clave, instantanea)
+        return recargadas
+
+    def invalidar(self, ruta=None):
+        """La próxima consulta relee el archivo (y avisa a los suscriptores)."""
+        claves = list(self._entradas) if ruta is None else [self._clave(ruta)]
+        for clave in claves:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                entrada[0] = "invalidada"
+
+    def suscribir(self, ruta, callback):
+        """
+        Los métodos ligados se guardan con referencia débil: una vista
+        destruida deja de recibir avisos sin tener que desuscribirse.
+        """
+        if inspect.ismethod(callback):
+            ref = weakref.WeakMethod(callback)
+        else:
+            ref = lambda: callback
+        self._suscriptores.setdefault(self._clave(ruta), []).append(ref)
+
+    def desuscribir(self, ruta, callback):
+        clave = self._clave(ruta)
+        self._suscriptores[clave] = [
+            ref for ref in self._suscriptores.get(clave, []) if ref() != callback
+        ]
+
+
+_registro = RegistroConfiguracion()
+
+
+def registro():
+    """Registro compartido por toda la aplicación."""
+    return _registro
+
+
+# ============================================================
+# ACCESOS DIRECTOS
+# ============================================================
+def bancos(ruta=RUTA_BANCOS):
+    """Tupla de bancos (cada uno un mapping con id, nombre, ...)."""
+    return _registro.obtener(ruta, {}).get("banks", ())
+
+
+def nombres_bancos(ruta=RUTA_BANCOS):
+    return [b["nombre"] for b in bancos(ruta) if "nombre" in b]
+
+
+def plan_contable(ruta=RUTA_PLAN):
+    """{codigo: {nombre, ...}} del plan contable."""
+    return _registro.obtener(ruta, {})
+
+
+def reglas_conceptos(ruta=RUTA_REGLAS):
+    return _registro.obtener(ruta, {})
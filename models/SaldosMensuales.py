@@ -2,6 +2,17 @@
 """
 SaldosMensuales.py — SHILLONG CONTABILIDAD v3.8.0 PRO
 Sistema de gestión automática de saldos mensuales
+
+Con los agregados del libro conectados (AgregadosMovimientos), el saldo
+inicial de cualquier mes/banco se obtiene encadenando desde el último
+ancla conocida (mes cerrado o saldo inicial registrado) y sumando los
+totales mensuales intermedios. Los resultados se memorizan y se olvidan
+desde el mes modificado en adelante.
+
+Cada libro comparte una sola instancia (ContabilidadData.saldos_mensuales()).
+Aun así, si otra instancia o herramienta reescribe el archivo, la
+siguiente consulta lo relee: (mtime, tamaño) se compara con el de la
+última lectura o escritura propia.
 """
 
 import json
@@ -9,6 +20,19 @@ from pathlib import Path
 from datetime import datetime, timedelta
 from typing import Dict, Optional, Tuple
 
+from models.Persistencia import guardar_json
+
+
+CAMPOS_META = ("fecha_cierre", "cerrado", "fecha_reapertura", "_firma")
+
+
+def _mes_siguiente(año: int, mes: int) -> Tuple[int, int]:
+    return (año + 1, 1) if mes == 12 else (año, mes + 1)
+
+
+def _mes_anterior(año: int, mes: int) -> Tuple[int, int]:
+    return (año - 1, 12) if mes == 1 else (año, mes - 1)
+
 
 class SaldosMensuales:
     """
@@ -16,14 +40,66 @@ class SaldosMensuales:
     Permite el arrastre automático de saldos entre meses.
     """
 
-    def __init__(self, archivo="data/saldos_mensuales.json"):
+    # Versiones anteriores que se conservan en backups/ junto al archivo
+    COPIAS_SEGURIDAD = 5
+
+    def __init__(self, archivo="data/saldos_mensuales.json", agregados=None):
         self.archivo = Path(archivo)
         self.saldos = {}
+        self.agregados = None
+        self._memo = {}     # (año, mes, banco) -> saldo inicial encadenado
+        self._firma = None  # (mtime, tamaño) del archivo tras la última E/S propia
         self._cargar()
+        if agregados is not None:
+            self.conectar(agregados)
+
+    def conectar(self, agregados):
+        """
+        Usa los totales mensuales del libro para encadenar saldos y se
+        suscribe a sus cambios para invalidar la memoria.
+        """
+        self.agregados = agregados
+        self._memo.clear()
+        agregados.suscribir(self._movimientos_cambiados)
+
+    def desconectar(self):
+        """Retira la suscripción a los agregados (la instancia deja de usarse)."""
+        if self.agregados is not None:
+            self.agregados.desuscribir(self._movimientos_cambiados)
+            self.agregados = None
+        self._memo.clear()
+
+    # ============================================================
+    # MEMORIA DE SALDOS ENCADENADOS
+    # ============================================================
+    def _olvidar_desde(self, año: int, mes: int):
+        """Olvida los saldos iniciales memorizados de (año, mes) en adelante."""
+        desde = (año, mes)
+        for clave in [c for c in self._memo if (c[0], c[1]) >= desde]:
+            del self._memo[clave]
+
+    def _movimientos_cambiados(self, mes_afectado):
+        # Un cambio en el mes P altera los saldos iniciales de P+1 en adelante
+        if mes_afectado is None:
+            self._memo.clear()
+        else:
+            self._olvidar_desde(*_mes_siguiente(*mes_afectado))
 
     # ============================================================
     # CARGA Y GUARDADO
     # ============================================================
+    def _firma_archivo(self):
+        try:
+            st = self.archivo.stat()
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def _al_dia(self):
+        """Relee el archivo si cambió desde la última lectura o escritura propia."""
+        if self._firma_archivo() != self._firma:
+            self._cargar()
+
     def _cargar(self):
         """Carga el archivo JSON de saldos mensuales."""
         if not self.archivo.exists():
@@ -35,25 +111,36 @@ class SaldosMensuales:
             with open(self.archivo, "r", encoding="utf-8") as f:
                 data = json.load(f)
                 self.saldos = data.get("saldos", {})
+            self._memo.clear()
+            self._firma = self._firma_archivo()
             print(f"[SaldosMensuales] Cargados {len(self.saldos)} meses.")
         except (IOError, json.JSONDecodeError) as e:
             print(f"[SaldosMensuales] Error al cargar: {e}")
             self.saldos = {}
+            self._memo.clear()
+            self._firma = self._firma_archivo()
 
-    def _guardar(self):
-        """Guarda los saldos en el archivo JSON."""
-        try:
-            # Crear directorio si no existe
-            self.archivo.parent.mkdir(parents=True, exist_ok=True)
+    def _guardar(self, año: Optional[int] = None, mes: Optional[int] = None):
+        """
+        Guarda los saldos en el archivo JSON.
+        (año, mes): primer mes afectado por el cambio, para olvidar solo
+        los saldos encadenados a partir de él (None = todos).
+        """
+        if año is None:
+            self._memo.clear()
+        else:
+            self._olvidar_desde(año, mes)
 
+        try:
             data = {
                 "version": "1.0",
                 "ultima_actualizacion": datetime.now().strftime("%d/%m/%Y %H:%M:%S"),
                 "saldos": self.saldos
             }
 
-            with open(self.archivo, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            # Crea el directorio si no existe y rota la versión anterior
+            guardar_json(self.archivo, data, copias=self.COPIAS_SEGURIDAD)
+            self._firma = self._firma_archivo()
 
             print(f"[SaldosMensuales] Guardado OK: {len(self.saldos)} meses.")
         except Exception as e:
@@ -119,6 +206,7 @@ class SaldosMensuales:
         Returns:
             Saldo inicial o None si no existe
         """
+        self._al_dia()
         clave = f"{año}-{mes:02d}"
 
         # Si el mes existe en el sistema, devolver su saldo inicial
@@ -127,8 +215,11 @@ class SaldosMensuales:
             if banco_data and isinstance(banco_data, dict):
                 return float(banco_data.get("inicial", 0.0))
 
-        # Si no existe, intentar arrastrar del mes anterior
-        return self._arrastrar_saldo_anterior(mes, año, banco)
+        # Si no existe: encadenar desde el último ancla (o, sin agregados,
+        # arrastrar solo del mes anterior cerrado)
+        if self.agregados is None:
+            return self._arrastrar_saldo_anterior(mes, año, banco)
+        return self._encadenar(mes, año, banco)
 
     def obtener_saldo_final(self, mes: int, año: int, banco: str) -> Optional[float]:
         """
@@ -137,6 +228,7 @@ class SaldosMensuales:
         Returns:
             Saldo final o None si no existe
         """
+        self._al_dia()
         clave = f"{año}-{mes:02d}"
 
         if clave in self.saldos:
@@ -173,6 +265,68 @@ class SaldosMensuales:
 
         return None
 
+    def _ancla(self, año: int, mes: int, banco: str) -> Optional[Tuple[float, bool]]:
+        """
+        (saldo, es_final) si el mes sirve de ancla para el banco:
+          - mes cerrado con el banco  -> su saldo final
+          - banco con saldo inicial   -> ese inicial (hay que sumarle el mes)
+        """
+        mes_data = self.saldos.get(f"{año}-{mes:02d}")
+        if not mes_data:
+            return None
+        banco_data = mes_data.get(banco)
+        if not isinstance(banco_data, dict):
+            return None
+        if mes_data.get("cerrado"):
+            return float(banco_data.get("final", 0.0)), True
+        return float(banco_data.get("inicial", 0.0)), False
+
+    def _neto_mes(self, año: int, mes: int, banco: str) -> float:
+        debe, haber, _ = self.agregados.totales_banco_mes(año, mes, banco)
+        return haber - debe
+
+    def _encadenar(self, mes: int, año: int, banco: str) -> Optional[float]:
+        """
+        Saldo inicial de (mes, año, banco) caminando hacia atrás hasta el
+        último ancla (o un saldo ya memorizado) y sumando hacia delante el
+        neto mensual de cada mes intermedio. Memoriza todos los meses del
+        recorrido. None si no hay ningún ancla anterior.
+        """
+        if (año, mes, banco) in self._memo:
+            return self._memo[(año, mes, banco)]
+
+        meses = [k for k in self.saldos if len(k) == 7 and k[4] == "-"]
+        if not meses:
+            return None
+        primero = min(meses)
+
+        # Hacia atrás: meses cuyo saldo inicial falta por calcular
+        pendientes = [(año, mes)]
+        a, m = _mes_anterior(año, mes)
+        saldo = None
+        while f"{a}-{m:02d}" >= primero:
+            if (a, m, banco) in self._memo:
+                saldo = self._memo[(a, m, banco)] + self._neto_mes(a, m, banco)
+                break
+            ancla = self._ancla(a, m, banco)
+            if ancla is not None:
+                valor, es_final = ancla
+                saldo = valor if es_final else valor + self._neto_mes(a, m, banco)
+                break
+            pendientes.append((a, m))
+            a, m = _mes_anterior(a, m)
+
+        if saldo is None:
+            return None
+
+        # Hacia delante: memorizar cada saldo inicial del recorrido
+        for a, m in reversed(pendientes):
+            self._memo[(a, m, banco)] = saldo
+            if (a, m) != (año, mes):
+                saldo += self._neto_mes(a, m, banco)
+
+        return self._memo[(año, mes, banco)]
+
     # ============================================================
     # CIERRE DE MES
     # ============================================================
@@ -193,6 +347,7 @@ class SaldosMensuales:
         Returns:
             True si se guardó correctamente
         """
+        self._al_dia()
         clave = f"{año}-{mes:02d}"
 
         # Crear o actualizar entrada
@@ -200,7 +355,7 @@ class SaldosMensuales:
         self.saldos[clave]["fecha_cierre"] = datetime.now().strftime("%d/%m/%Y")
         self.saldos[clave]["cerrado"] = True
 
-        self._guardar()
+        self._guardar(año, mes)
         print(f"[SaldosMensuales] ✅ Mes {clave} cerrado correctamente")
         return True
 
@@ -211,6 +366,7 @@ class SaldosMensuales:
         Returns:
             True si el mes está cerrado
         """
+        self._al_dia()
         clave = f"{año}-{mes:02d}"
         return self.saldos.get(clave, {}).get("cerrado", False)
 
@@ -221,12 +377,13 @@ class SaldosMensuales:
         Returns:
             True si se reabrió correctamente
         """
+        self._al_dia()
         clave = f"{año}-{mes:02d}"
 
         if clave in self.saldos:
             self.saldos[clave]["cerrado"] = False
             self.saldos[clave]["fecha_reapertura"] = datetime.now().strftime("%d/%m/%Y")
-            self._guardar()
+            self._guardar(año, mes)
             print(f"[SaldosMensuales] 🔓 Mes {clave} reabierto")
             return True
 
@@ -243,6 +400,7 @@ class SaldosMensuales:
         Returns:
             True si se editó correctamente
         """
+        self._al_dia()
         clave = f"{año}-{mes:02d}"
 
         # Crear entrada si no existe
@@ -260,7 +418,7 @@ class SaldosMensuales:
 
         # Actualizar saldo inicial
         self.saldos[clave][banco]["inicial"] = float(nuevo_saldo)
-        self._guardar()
+        self._guardar(año, mes)
 
         print(f"[SaldosMensuales] ✏️ Saldo inicial editado: {banco} {clave} = {nuevo_saldo}")
         return True
@@ -275,11 +433,12 @@ class SaldosMensuales:
         Returns:
             Lista de nombres de bancos
         """
+        self._al_dia()
         bancos = set()
 
         for mes_data in self.saldos.values():
             for key in mes_data.keys():
-                if key not in ["fecha_cierre", "cerrado", "fecha_reapertura"]:
+                if key not in CAMPOS_META:
                     bancos.add(key)
 
         return sorted(list(bancos))
@@ -291,6 +450,7 @@ class SaldosMensuales:
         Returns:
             Dict con todos los datos del mes o None
         """
+        self._al_dia()
         clave = f"{año}-{mes:02d}"
         return self.saldos.get(clave)
 
@@ -303,6 +463,7 @@ class SaldosMensuales:
     # ============================================================
     def actualizar_saldo_completo(self, mes: int, año: int, banco: str, inicial: float, ingresos: float, gastos: float, final: float):
         """Permite editar todos los campos de un banco en un mes."""
+        self._al_dia()
         clave = f"{año}-{mes:02d}"
         if clave not in self.saldos:
             self.saldos[clave] = {}
@@ -314,19 +475,20 @@ class SaldosMensuales:
             "gastos": float(gastos),
             "final": float(final)
         })
-        self._guardar()
+        self._guardar(año, mes)
         print(f"[SaldosMensuales] ✅ Saldo actualizado {banco} {clave}: ini={inicial}, ing={ingresos}, gas={gastos}, fin={final}")
 
     def eliminar_saldo_banco(self, mes: int, año: int, banco: str) -> bool:
         """Elimina el registro de un banco en un mes. Si el mes queda vacío, se elimina la entrada."""
+        self._al_dia()
         clave = f"{año}-{mes:02d}"
         if clave not in self.saldos or banco not in self.saldos[clave]:
             return False
         self.saldos[clave].pop(banco, None)
         # Si solo quedan campos meta, eliminar mes
-        restantes = {k: v for k, v in self.saldos[clave].items() if k not in ["fecha_cierre", "fecha_reapertura", "cerrado"]}
+        restantes = {k: v for k, v in self.saldos[clave].items() if k not in CAMPOS_META}
         if not restantes:
             self.saldos.pop(clave, None)
-        self._guardar()
+        self._guardar(año, mes)
         print(f"[SaldosMensuales] ✅ Banco {banco} eliminado de {clave}")
         return True
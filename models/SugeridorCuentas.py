@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+"""
+SugeridorCuentas.py — SHILLONG CONTABILIDAD v3.8.0 PRO
+Sugerencia de cuentas para un concepto (Bayes ingenuo multinomial).
+
+Aprende del historial: cuántas veces aparece cada palabra del concepto
+(mismas palabras que el buscador, sin números sueltos) en movimientos de
+cada cuenta. sugerir("factura lu") puntúa las cuentas con
+    log P(cuenta) + Σ log P(palabra | cuenta)     (suavizado de Laplace)
+y la última palabra, si se está escribiendo, cuenta como prefijo.
+
+El estado entrenado se guarda en <libro>.sugeridor.json con una marca de
+agua (id del último movimiento aprendido): al abrir solo se aprenden los
+movimientos posteriores; durante la sesión ContabilidadData le pasa cada
+alta, edición y baja. Como el resto de índices, no se carga hasta la
+primera consulta, salvo que antes se edite o borre un movimiento: eso
+sí hay que descontarlo de lo guardado.
+"""
+
+import json
+import math
+from bisect import bisect_left
+from pathlib import Path
+
+from models.IndiceTexto import palabras
+from models.Persistencia import guardar_json
+
+VERSION_ESTADO = 1
+ALFA = 1.0              # suavizado de Laplace
+MAX_PREFIJOS = 20       # palabras del vocabulario que puede representar la última a medio escribir
+
+
+def palabras_concepto(concepto):
+    """Palabras útiles para aprender: sin números sueltos ni letras aisladas."""
+    return [p for p in palabras(concepto) if len(p) > 1 and not p.isdigit()]
+
+
+class SugeridorCuentas:
+    """
+    sugeridor = data.sugeridor
+    sugeridor.sugerir("Factura de luz", k=3)  -> ["628000", "629000", ...]
+    """
+
+    def __init__(self, ruta=None):
+        self.ruta = Path(ruta) if ruta else None
+        self._fuente = []
+        self._cargado = False
+        self._sucio = False
+        self.limpiar()
+
+    # ============================================================
+    # ESTADO
+    # ============================================================
+    def limpiar(self):
+        self.documentos = {}      # cuenta -> movimientos aprendidos
+        self.total_palabras = {}  # cuenta -> palabras aprendidas
+        self.conteos = {}         # palabra -> {cuenta: veces}
+        self.ultimo_id = None     # marca de agua
+        self._vocabulario = []
+        self._vocabulario_sucio = True
+
+    def reconstruir(self, movimientos, ruta=None):
+        """Nueva lista de movimientos (carga del libro); se sincroniza en la próxima consulta."""
+        ruta = Path(ruta) if ruta is not None else self.ruta
+        if movimientos is self._fuente and ruta == self.ruta:
+            # Misma lista (reindexar tras un guardado): las altas, ediciones y
+            # bajas ya llegaron por los ganchos, no hay nada que resincronizar
+            return
+        self.guardar()   # lo aprendido en la sesión no se pierde al resincronizar
+        self.ruta = ruta
+        self._fuente = movimientos
+        self._cargado = False
+
+    def _leer_estado(self):
+        if self.ruta is None or not self.ruta.exists():
+            return False
+        try:
+            with open(self.ruta, "r", encoding="utf-8") as f:
+                estado = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"[SugeridorCuentas] Estado ilegible, se reentrena: {e}")
+            return False
+        if estado.get("version") != VERSION_ESTADO:
+            return False
+        self.documentos = estado.get("documentos", {})
+        self.total_palabras = estado.get("total_palabras", {})
+        self.conteos = estado.get("conteos", {})
+        self.ultimo_id = estado.get("ultimo_id")
+        return True
+
+    def _sincronizar(self):
+        """
+        Carga el estado guardado y aprende solo lo posterior a la marca de
+        agua. Devuelve {id(mov)} de lo aprendido ahora desde la lista.
+        """
+        self.limpiar()
+        self._cargado = True
+        desde = 0
+        if self._leer_estado():
+            posicion = next(
+                (i for i in range(len(self._fuente) - 1, -1, -1)
+                 if self._fuente[i].get("id") == self.ultimo_id),
+                None,
+            ) if self.ultimo_id else None
+            if posicion is None and self.ultimo_id:
+                # La marca de agua ya no existe (libro restaurado o borrado): reentrenar
+                self.limpiar()
+            else:
+                desde = 0 if posicion is None else posicion + 1
+
+        nuevos = self._fuente[desde:]
+        for m in nuevos:
+            self._aprender(m, 1)
+        if nuevos:
+            self.ultimo_id = nuevos[-1].get("id") or self.ultimo_id
+            self._sucio = True
+            print(f"[SugeridorCuentas] Aprendidos {len(nuevos)} movimientos nuevos.")
+            self.guardar()
+        return {id(m) for m in nuevos}
+
+    def _asegurar(self):
+        if not self._cargado:
+            return self._sincronizar()
+        return set()
+
+    def guardar(self):
+        """Persiste el estado si cambió desde la última vez."""
+        if not (self._cargado and self._sucio) or self.ruta is None:
+            return
+        guardar_json(self.ruta, {
+            "version": VERSION_ESTADO,
+            "ultimo_id": self.ultimo_id,
+            "documentos": self.documentos,
+            "total_palabras": self.total_palabras,
+            "conteos": self.conteos,
+        }, indent=None)
+        self._sucio = False
+
+    # ============================================================
+    # APRENDIZAJE INCREMENTAL
+    # ============================================================
+    def _aprender(self, m, signo):
+        cuenta = str(m.get("cuenta", "")).strip()
+        tokens = palabras_concepto(m.get("concepto", ""))
+        if not cuenta or not tokens:
+            return
+        self.documentos[cuenta] = max(self.documentos.get(cuenta, 0) + signo, 0)
+        self.total_palabras[cuenta] = max(self.total_palabras.get(cuenta, 0) + signo * len(tokens), 0)
+        for t in tokens:
+            por_cuenta = self.conteos.get(t)
+            if por_cuenta is None:
+                if signo < 0:
+                    continue
+                por_cuenta = self.conteos[t] = {}
+                self._vocabulario_sucio = True
+            n = por_cuenta.get(cuenta, 0) + signo
+            if n > 0:
+                por_cuenta[cuenta] = n
+            else:
+                por_cuenta.pop(cuenta, None)
+                if not por_cuenta:
+                    del self.conteos[t]
+                    self._vocabulario_sucio = True
+        self._sucio = True
+
+    def agregar(self, m):
+        """Movimiento nuevo al final del libro: se aprende y avanza la marca de agua."""
+        if not self._cargado:
+            return
+        self._aprender(m, 1)
+        self.ultimo_id = m.get("id") or self.ultimo_id
+
+    def quitar(self, m):
+        """
+        Baja: se llama con el movimiento TODAVÍA en la lista. Si el modelo no
+        estaba cargado se carga ahora; si no, lo guardado seguiría contando
+        un movimiento que ya no existe.
+        """
+        self._asegurar()
+        self._aprender(m, -1)
+
+    def actualizar(self, antes, despues):
+        """Edición: se olvida la versión anterior y se aprende la nueva."""
+        if (antes.get("cuenta"), antes.get("concepto")) == (despues.get("cuenta"), despues.get("concepto")):
+            return
+        if id(despues) in self._asegurar():
+            return   # posterior a la marca de agua: se acaba de aprender ya editado
+        self._aprender(antes, -1)
+        self._aprender(despues, 1)
+
+    # ============================================================
+    # SUGERENCIA
+    # ============================================================
+    def _prefijos(self, inicio):
+        if self._vocabulario_sucio:
+            self._vocabulario = sorted(self.conteos)
+            self._vocabulario_sucio = False
+        vocab = self._vocabulario
+        i = bisect_left(vocab, inicio)
+        encontradas = []
+        while i < len(vocab) and vocab[i].startswith(inicio) and len(encontradas) < MAX_PREFIJOS:
+            encontradas.append(vocab[i])
+            i += 1
+        return encontradas
+
+    def _conteos_de(self, termino, es_prefijo):
+        """{cuenta: veces} de una palabra; la que se está escribiendo suma sus prefijos."""
+        if not es_prefijo or termino in self.conteos:
+            return self.conteos.get(termino, {})
+        suma = {}
+        for p in self._prefijos(termino):
+            for cuenta, n in self.conteos[p].items():
+                suma[cuenta] = suma.get(cuenta, 0) + n
+        return suma
+
+    def puntuaciones(self, concepto):
+        """[(cuenta, log-probabilidad)] de mayor a menor, solo cuentas con alguna palabra en común."""
+        self._asegurar()
+        terminos = palabras_concepto(concepto)
+        if not terminos:
+            return []
+        escribiendo = not str(concepto)[-1:].isspace()
+        conteos = [self._conteos_de(t, escribiendo and i == len(terminos) - 1)
+                   for i, t in enumerate(terminos)]
+
+        candidatas = set().union(*conteos)
+        if not candidatas:
+            return []
+        total_docs = sum(self.documentos.values()) or 1
+        vocabulario = len(self.conteos) or 1
+        resultado = []
+        for cuenta in candidatas:
+            denominador = math.log(self.total_palabras.get(cuenta, 0) + ALFA * vocabulario)
+            score = math.log((self.documentos.get(cuenta, 0) + 1) / total_docs)
+            for c in conteos:
+                score += math.log(c.get(cuenta, 0) + ALFA) - denominador
+            resultado.append((cuenta, score))
+        resultado.sort(key=lambda x: (-x[1], x[0]))
+        return resultado
+
+    def sugerir(self, concepto, k=5):
+        """Las k cuentas más probables para el concepto (códigos)."""
+        return [cuenta for cuenta, _ in self.puntuaciones(concepto)[:k]]
@@ -3,62 +3,136 @@
 models/auto_learn.py
 Script de AUTO-APRENDIZAJE.
 Lee el historial de movimientos y enriquece las reglas automáticamente.
+
+Incremental: una marca de agua por libro (id del último movimiento
+procesado, en aprendizaje_estado.json junto a las reglas) hace que cada
+ejecución recorra solo los movimientos nuevos. Si la marca no aparece
+(libro restaurado, movimiento borrado) se vuelve a recorrer todo.
 """
 import json
+from datetime import datetime
 from pathlib import Path
 
-def ejecutar_aprendizaje(ruta_movimientos="data/shillong_2026.json", ruta_reglas="data/reglas_conceptos.json"):
+from models.AutomataConceptos import ConceptosCompilados, palabras_permitidas
+from models.Persistencia import guardar_json
+
+# Conceptos aprendidos que se comprueban uno a uno antes de recompilar el autómata
+LOTE_RECOMPILAR = 256
+ARCHIVO_ESTADO = "aprendizaje_estado.json"
+
+
+def _ruta_estado(path_reg):
+    return path_reg.with_name(ARCHIVO_ESTADO)
+
+
+def _leer_estado(path_reg):
+    try:
+        with open(_ruta_estado(path_reg), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def movimientos_pendientes(movimientos, ultimo_id):
+    """
+    Movimientos posteriores a la marca de agua. Se busca desde el final:
+    el coste es proporcional a lo nuevo, no al historial.
+    """
+    if ultimo_id:
+        for i in range(len(movimientos) - 1, -1, -1):
+            if movimientos[i].get("id") == ultimo_id:
+                return movimientos[i + 1:]
+    return movimientos
+
+
+def ejecutar_aprendizaje(ruta_movimientos="data/shillong_2026.json", ruta_reglas="data/reglas_conceptos.json",
+                         movimientos=None):
+    """
+    movimientos: lista en memoria (ContabilidadData.movimientos); si no se
+    pasa se lee del JSON de ruta_movimientos. Retorna (aprendidos, mensaje).
+    """
     path_mov = Path(ruta_movimientos)
     path_reg = Path(ruta_reglas)
 
-    if not path_mov.exists() or not path_reg.exists():
+    if (movimientos is None and not path_mov.exists()) or not path_reg.exists():
         return 0, "Faltan archivos de datos."
 
     # 1. Cargar Movimientos y Reglas
     try:
-        with open(path_mov, "r", encoding="utf-8") as f:
-            data_mov = json.load(f)
-            movimientos = data_mov.get("movimientos", [])
+        if movimientos is None:
+            with open(path_mov, "r", encoding="utf-8") as f:
+                data_mov = json.load(f)
+                movimientos = data_mov.get("movimientos", []) if isinstance(data_mov, dict) else data_mov
 
         with open(path_reg, "r", encoding="utf-8") as f:
             reglas = json.load(f)
     except Exception as e:
         return 0, f"Error leyendo archivos: {str(e)}"
 
+    estado = _leer_estado(path_reg)
+    marca = estado.get(path_mov.name, {})
+    delta = movimientos_pendientes(movimientos, marca.get("ultimo_id"))
+
     aprendidos = 0
-    
-    # 2. Analizar historial
-    for m in movimientos:
+    # Pertenencia exacta en O(1): un set por cuenta
+    conocidos = {cuenta: set(r.get("permitidos", [])) for cuenta, r in reglas.items() if isinstance(r, dict)}
+    # Coincidencia parcial: las reglas de todas las cuentas compiladas, una pasada por concepto
+    compiladas = ConceptosCompilados(palabras_permitidas(reglas))
+    nuevos = {}     # cuenta -> conceptos aprendidos aún no compilados
+    pendientes = 0
+
+    # 2. Analizar solo los movimientos nuevos
+    for m in delta:
         cuenta = str(m.get("cuenta", "")).strip()
         # Limpiamos el concepto: minúsculas y sin espacios extra
-        concepto_raw = m.get("concepto", "").lower().strip()
-        
+        concepto_raw = str(m.get("concepto", "")).lower().strip()
+
         # Filtros de seguridad: ignorar conceptos muy cortos o vacíos
         if len(concepto_raw) < 3 or not cuenta:
             continue
-            
+
         # Solo aprendemos de cuentas que ya existen en las reglas (ej: 603000, 600000)
-        if cuenta in reglas:
-            lista_actual = reglas[cuenta].get("permitidos", [])
-            
+        if cuenta in conocidos:
             # ¿El concepto ya está en la lista?
             # Buscamos coincidencia exacta o parcial
-            ya_existe = any(x in concepto_raw for x in lista_actual)
-            
+            ya_existe = (
+                concepto_raw in conocidos[cuenta]
+                or cuenta in compiladas.cuentas_para(concepto_raw)
+                or any(x in concepto_raw for x in nuevos.get(cuenta, ()))
+            )
+
             if not ya_existe:
                 # ¡NUEVO CONOCIMIENTO!
                 # Añadimos el concepto a la lista de permitidos de esa cuenta
-                reglas[cuenta]["permitidos"].append(concepto_raw)
+                reglas[cuenta].setdefault("permitidos", []).append(concepto_raw)
+                conocidos[cuenta].add(concepto_raw)
+                nuevos.setdefault(cuenta, []).append(concepto_raw)
                 aprendidos += 1
+                pendientes += 1
                 print(f"🧠 Aprendido: '{concepto_raw}' pertenece a {cuenta}")
 
+                if pendientes >= LOTE_RECOMPILAR:
+                    compiladas = ConceptosCompilados(palabras_permitidas(reglas))
+                    nuevos, pendientes = {}, 0
+
     # 3. Guardar cambios si aprendió algo
     if aprendidos > 0:
         try:
-            with open(path_reg, "w", encoding="utf-8") as f:
-                json.dump(reglas, f, indent=4, ensure_ascii=False)
-            return aprendidos, f"El sistema ha aprendido {aprendidos} nuevos conceptos."
+            guardar_json(path_reg, reglas, indent=4, copias=3)
         except Exception as e:
             return 0, f"Error guardando reglas: {str(e)}"
-    
-    return 0, "El sistema ya conocía todos los conceptos. Nada nuevo."
\ No newline at end of file
+
+    # 4. Avanzar la marca de agua (aunque no se haya aprendido nada)
+    if movimientos and movimientos[-1].get("id"):
+        estado[path_mov.name] = {
+            "ultimo_id": movimientos[-1]["id"],
+            "fecha": datetime.now().isoformat(timespec="seconds"),
+        }
+        try:
+            guardar_json(_ruta_estado(path_reg), estado)
+        except OSError as e:
+            print(f"[auto_learn] No se pudo guardar la marca de agua: {e}")
+
+    if aprendidos > 0:
+        return aprendidos, f"El sistema ha aprendido {aprendidos} nuevos conceptos ({len(delta)} movimientos nuevos revisados)."
+    return 0, f"El sistema ya conocía todos los conceptos. Nada nuevo ({len(delta)} movimientos nuevos revisados)."
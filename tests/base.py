@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""
+Shared test helpers — SHILLONG CONTABILIDAD v3.8.0 PRO
+Base TestCase for suites that open ledgers: each test runs in its own
+temporary working directory (so data/ is never the real one) with the
+models' console prints silenced.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from models.Persistencia import escritor
+
+
+class CarpetaTemporalTestCase(unittest.TestCase):
+    """Base class: isolated working directory + silenced prints."""
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self.addCleanup(self._restore)
+
+        self._print = patch("builtins.print")
+        self._print.start()
+        self.addCleanup(self._print.stop)
+
+    def _restore(self):
+        escritor().esperar()    # ningún guardado en segundo plano sobre la carpeta borrada
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
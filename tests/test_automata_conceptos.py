@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Test Suite for AutomataConceptos — SHILLONG CONTABILIDAD v3.8.0 PRO
+Aho-Corasick keyword automaton behind concept validation and auto_learn.
+"""
+
+import json
+import os
+import random
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.AutomataConceptos import AhoCorasick, ReglasConceptos
+from models.RegistroConfiguracion import RegistroConfiguracion
+from models.auto_learn import ejecutar_aprendizaje
+
+
+class TestAutomataConceptos(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.ruta_reglas = os.path.join(self._tmp.name, "reglas.json")
+        self.ruta_plan = os.path.join(self._tmp.name, "plan.json")
+        self._escribir(self.ruta_reglas, {
+            "628000": {"categoria": "Suministros", "permitidos": ["luz", "Agua"]},
+            "720000": {"permitidos": ["donativo", "luz divina"]},
+            "570000": {"categoria": "Caja"},
+        })
+        self._escribir(self.ruta_plan, {"628000": {"nombre": "Suministros", "permitidos": ["gas"]}})
+
+    def _escribir(self, ruta, datos):
+        with open(ruta, "w", encoding="utf-8") as f:
+            json.dump(datos, f)
+
+    def test_matches_like_substring_search(self):
+        rnd = random.Random(3)
+        patrones = ["".join(rnd.choice("abc") for _ in range(rnd.randint(1, 4))) for _ in range(30)]
+        automata = AhoCorasick((p, p) for p in patrones)
+        for _ in range(200):
+            texto = "".join(rnd.choice("abcd") for _ in range(rnd.randint(0, 12)))
+            self.assertEqual(automata.valores(texto), {p for p in patrones if p in texto})
+
+    def test_one_pass_yields_every_account(self):
+        reglas = ReglasConceptos(self.ruta_reglas, self.ruta_plan, registro=RegistroConfiguracion())
+        self.assertEqual(reglas.cuentas_para("Ofrenda LUZ DIVINA"), {"628000", "720000"})
+        self.assertTrue(reglas.es_valido("628000", "Bombona de gas"))   # palabra del plan
+        self.assertFalse(reglas.es_valido("628000", "Donativo"))
+        self.assertTrue(reglas.es_valido("570000", "cualquier cosa"))    # sin reglas
+
+    def test_rebuilds_only_when_rules_change(self):
+        reglas = ReglasConceptos(self.ruta_reglas, self.ruta_plan, intervalo=0,
+                                 registro=RegistroConfiguracion())
+        compiladas = reglas._vigentes()
+        self.assertIs(reglas._vigentes(), compiladas)
+
+        self._escribir(self.ruta_reglas, {"628000": {"permitidos": ["telefono"]}})
+        os.utime(self.ruta_reglas, ns=(1, 1))
+        self.assertIsNot(reglas._vigentes(), compiladas)
+        self.assertEqual(reglas.cuentas_para("telefono movil"), {"628000"})
+
+    def test_auto_learn_uses_compiled_rules(self):
+        ruta_movs = os.path.join(self._tmp.name, "libro.json")
+        self._escribir(ruta_movs, {"movimientos": [
+            {"cuenta": "628000", "concepto": "Factura LUZ enero"},
+            {"cuenta": "628000", "concepto": "Internet fibra"},
+            {"cuenta": "628000", "concepto": "internet fibra marzo"},
+            {"cuenta": "999999", "concepto": "Sin reglas"},
+        ]})
+        with patch("builtins.print"):
+            num, _ = ejecutar_aprendizaje(ruta_movs, self.ruta_reglas)
+        self.assertEqual(num, 1)
+        with open(self.ruta_reglas, encoding="utf-8") as f:
+            self.assertEqual(json.load(f)["628000"]["permitidos"], ["luz", "Agua", "internet fibra"])
+
+    def test_auto_learn_only_processes_new_movements(self):
+        ruta_movs = os.path.join(self._tmp.name, "libro.json")
+        movs = [{"id": "a", "cuenta": "628000", "concepto": "Internet fibra"}]
+        with patch("builtins.print"):
+            self.assertEqual(ejecutar_aprendizaje(ruta_movs, self.ruta_reglas, movimientos=movs)[0], 1)
+
+            # Una regla aprendida y borrada a mano no vuelve: su movimiento ya está procesado
+            self._escribir(self.ruta_reglas, {"628000": {"permitidos": ["luz"]}})
+            movs.append({"id": "b", "cuenta": "628000", "concepto": "Gas natural"})
+            num, msg = ejecutar_aprendizaje(ruta_movs, self.ruta_reglas, movimientos=movs)
+            self.assertEqual(num, 1)
+            self.assertIn("1 movimientos nuevos", msg)
+            with open(self.ruta_reglas, encoding="utf-8") as f:
+                self.assertEqual(json.load(f)["628000"]["permitidos"], ["luz", "gas natural"])
+
+            # Sin la marca de agua en la lista (libro restaurado) se recorre todo
+            num, _ = ejecutar_aprendizaje(ruta_movs, self.ruta_reglas,
+                                          movimientos=[{"id": "x", "cuenta": "628000", "concepto": "Internet fibra"}])
+            self.assertEqual(num, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
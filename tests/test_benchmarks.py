@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+Test Suite for the benchmark harness — SHILLONG CONTABILIDAD v3.8.0 PRO
+Synthetic ledger generator and a tiny end-to-end benchmark run.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import bench_libro
+from benchmarks.generador_libro import _plan, generar_movimientos
+
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_generator_is_deterministic_and_uses_real_codes(self):
+        a = list(generar_movimientos(200, semilla=7))
+        b = list(generar_movimientos(200, semilla=7))
+        self.assertEqual(a, b)
+        self.assertTrue({m["cuenta"] for m in a} <= set(_plan()))
+        for m in a:
+            self.assertTrue((m["debe"] > 0) != (m["haber"] > 0))
+            self.assertEqual(m["haber"] > 0, m["cuenta"].startswith("7"))
+
+    def test_run_writes_comparable_json(self):
+        with tempfile.TemporaryDirectory() as tmp, patch("builtins.print"):
+            salida = os.path.join(tmp, "r.json")
+            informe = bench_libro.ejecutar([300], repeticiones=1, salida=salida)
+            with open(salida, encoding="utf-8") as f:
+                self.assertEqual(json.load(f)["resultados"].keys(), {"300"})
+
+            ops = informe["resultados"]["300"]
+            for nombre in ("cargar", "guardar", "movimientos_por_mes", "totales_mes",
+                           "top_cuentas", "panel", "importar_csv", "exportar_excel"):
+                self.assertIn(nombre, ops)
+            self.assertGreater(ops["cargar"]["min"], 0)
+            self.assertEqual(bench_libro.comparar(informe, salida), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Test Suite for CategoriasCuentas — SHILLONG CONTABILIDAD v3.8.0 PRO
+Shared account -> category resolver (rules file + interval table fallback).
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.CategoriasCuentas import ResolvedorCategorias, compilar_rangos
+from models.RegistroConfiguracion import RegistroConfiguracion
+
+
+class TestCategoriasCuentas(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.ruta = os.path.join(self._tmp.name, "reglas.json")
+        self._escribir({
+            "602100": {"categoria": "Comestibles y bebidas"},
+            "206000": {"categoria": "Aplicaciones informáticas"},
+        })
+
+    def _resolvedor(self, **kw):
+        return ResolvedorCategorias(self.ruta, registro=RegistroConfiguracion(), **kw)
+
+    def _escribir(self, reglas):
+        with open(self.ruta, "w", encoding="utf-8") as f:
+            json.dump(reglas, f)
+
+    def test_rules_take_priority_and_are_mapped(self):
+        r = self._resolvedor()
+        self.assertEqual(r.categoria("602100"), "FOOD")
+        self.assertEqual(r.categoria("602100 Compras"), "FOOD")
+        self.assertEqual(r.categoria("206000"), "Aplicaciones informáticas")
+        self.assertEqual(r.categoria("206000", oficial=True), "OTROS")
+
+    def test_interval_fallback_prefers_narrowest_range(self):
+        r = self._resolvedor()
+        self.assertEqual(r.categoria("603500"), "FOOD")
+        self.assertEqual(r.categoria("602450"), "HYGIENE")
+        self.assertEqual(r.categoria("601000"), "MEDICINE")
+        self.assertEqual(r.categoria(755000), "SALARY")
+        self.assertEqual(r.categoria("570000"), "OTROS")
+        self.assertEqual(r.categoria(None), "OTROS")
+
+    def test_compiled_table_is_disjoint(self):
+        inicios, fines, cats = compilar_rangos([(10, 99, "A"), (20, 29, "B"), (100, 109, "A")])
+        self.assertEqual(list(zip(inicios, fines, cats)),
+                         [(10, 19, "A"), (20, 29, "B"), (30, 109, "A")])
+
+    def test_rules_file_read_once_and_reloaded_on_change(self):
+        r = self._resolvedor(intervalo=0)
+        with patch("models.RegistroConfiguracion.json.load", wraps=json.load) as load:
+            for _ in range(50):
+                r.categoria("602100")
+            self.assertEqual(load.call_count, 1)
+
+            self._escribir({"602100": {"categoria": "Sueldos y salarios", "extra": "x"}})
+            self.assertEqual(r.categoria("602100"), "SALARY")
+            self.assertEqual(load.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+Test Suite for CierreMes — SHILLONG CONTABILIDAD v3.8.0 PRO
+Single-pass month close: per-bank totals for SaldosMensuales.cerrar_mes.
+"""
+
+import os
+import sys
+import unittest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.CierreMes import CierreMes
+
+
+class TestCierreMes(unittest.TestCase):
+
+    MOVS = [
+        {"banco": "Caja", "debe": 10, "haber": 0},
+        {"banco": "Caja", "debe": 0, "haber": "25,5"},
+        {"banco": "SBI", "debe": 40, "haber": 0},
+        {"banco": "Otro banco", "debe": 5, "haber": 0},
+    ]
+
+    def test_totals_and_per_bank(self):
+        cierre = CierreMes(self.MOVS, ["Todos", "Caja", "SBI", "Union Bank"])
+        self.assertEqual((cierre.total_debe, cierre.total_haber), (55.0, 25.5))
+        self.assertEqual((cierre.ingresos("Caja"), cierre.gastos("Caja")), (25.5, 10.0))
+        self.assertEqual(cierre.gastos("Union Bank"), 0.0)
+
+    def test_saldos_finales_structure(self):
+        cierre = CierreMes(self.MOVS, ["Todos", "Caja", "SBI"])
+        iniciales = {"Caja": 100.0, "SBI": None}
+        saldos = cierre.saldos_finales(iniciales.get, "Sor Ana")
+
+        self.assertEqual(saldos["Caja"], {
+            "inicial": 100.0, "final": 115.5, "ingresos": 25.5, "gastos": 10.0, "firma": "Sor Ana"
+        })
+        self.assertEqual(saldos["SBI"]["final"], -40.0)
+        self.assertEqual(saldos["_firma"], "Sor Ana")
+        self.assertNotIn("Todos", saldos)
+
+    def test_movements_scanned_once(self):
+        leidos = []
+
+        def movimientos():
+            for m in self.MOVS:
+                leidos.append(m)
+                yield m
+
+        CierreMes(movimientos(), ["Caja", "SBI", "A", "B", "C"]).saldos_finales(lambda b: 0.0)
+        self.assertEqual(len(leidos), len(self.MOVS))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,423 @@
+# -*- coding: utf-8 -*-
+"""
+Test Suite for ContabilidadData — SHILLONG CONTABILIDAD v3.8.0 PRO
+Runs against a temporary data/ folder so the real ledger is never touched.
+"""
+
+import json
+import os
+import shutil
+import sys
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.base import CarpetaTemporalTestCase
+from models.ContabilidadData import ContabilidadData
+from models.IndiceMovimientos import PosicionesMovimientos
+from models.Persistencia import escritor
+from models.RegistroConfiguracion import registro
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class ContabilidadDataTestCase(CarpetaTemporalTestCase):
+    """Base class: a fresh test_ledger.json in the temporary folder."""
+
+    def setUp(self):
+        super().setUp()
+
+        self.data = ContabilidadData("test_ledger.json")
+
+    def _add(self, fecha, cuenta="603000", debe=0, haber=0, banco="Caja", estado="pagado", concepto="x"):
+        self.data.agregar_movimiento(fecha, "DOC", concepto, cuenta, debe, haber,
+                                     banco=banco, estado=estado)
+        return self.data.movimientos[-1]
+
+
+class TestIndices(ContabilidadDataTestCase):
+    """Secondary indexes must give the same answers as a full scan."""
+
+    def test_movimientos_por_mes_all_formats(self):
+        self._add("05/03/2025", debe=10)
+        self._add("2025-03-20", debe=20)
+        self._add("28-03-2025", debe=30)
+        self._add("01/04/2025", debe=40)
+        self._add("fecha rota", debe=50)
+
+        self.assertEqual([m["debe"] for m in self.data.movimientos_por_mes(3, 2025)], [10, 20, 30])
+        self.assertEqual(self.data.totales_mes(4, 2025), (40.0, 0.0, -40.0))
+        self.assertEqual(self.data.movimientos_por_mes(5, 2025), [])
+
+    def test_cuenta_banco_estado(self):
+        a = self._add("01/01/2025", cuenta="603000", banco="SBI", estado="Pendiente")
+        b = self._add("02/01/2025", cuenta="700000", banco="Caja")
+
+        self.assertEqual(self.data.movimientos_por_cuenta(603000), [a])
+        self.assertEqual(self.data.movimientos_por_banco("Caja"), [b])
+        self.assertEqual(self.data.pendientes(), [a])
+
+    def test_fecha_and_rango(self):
+        a = self._add("10/02/2025")
+        b = self._add("2025-01-15")
+        self._add("01/06/2025")
+
+        self.assertEqual(self.data.movimientos_por_fecha("2025-02-10"), [a])
+        self.assertEqual(self.data.movimientos_por_fecha(date(2025, 2, 10)), [a])
+        self.assertEqual(
+            self.data.get_movimientos_rango(date(2025, 1, 1), date(2025, 2, 28)), [b, a]
+        )
+
+    def test_actualizar_movimiento_moves_buckets(self):
+        m = self._add("05/03/2025", estado="pendiente")
+        self.data.actualizar_movimiento(m, {"fecha": "05/04/2025", "estado": "pagado"})
+
+        self.assertEqual(self.data.movimientos_por_mes(3, 2025), [])
+        self.assertEqual(self.data.movimientos_por_mes(4, 2025), [m])
+        self.assertEqual(self.data.pendientes(), [])
+
+    def test_eliminar_movimiento_by_identity(self):
+        a = self._add("05/03/2025", debe=10)
+        b = self._add("05/03/2025", debe=10)  # duplicate-looking row
+
+        self.assertTrue(self.data.eliminar_movimiento(b))
+        self.assertEqual(len(self.data.movimientos), 1)
+        self.assertIs(self.data.movimientos[0], a)
+        self.assertEqual(self.data.movimientos_por_mes(3, 2025), [a])
+
+    def test_fecha_de_is_parsed_once(self):
+        a = self._add("2025-03-05")
+        b = self._add("sin fecha")
+
+        with patch("models.IndiceMovimientos.parsear_fecha") as parsear:
+            self.assertEqual(self.data.fecha_de(a), date(2025, 3, 5))
+            self.assertIsNone(self.data.fecha_de(b))
+            parsear.assert_not_called()
+
+        self.data.actualizar_movimiento(a, {"fecha": "01/04/2025"})
+        self.assertEqual(self.data.fecha_de(a), date(2025, 4, 1))
+
+    def test_reload_rebuilds_indexes(self):
+        self._add("05/03/2025", debe=10)
+        self.data.cargar()
+        self.assertEqual(len(self.data.movimientos_por_mes(3, 2025)), 1)
+
+    def test_top_cuentas_anuales(self):
+        self._add("05/03/2025", cuenta="603000", debe=10)
+        self._add("2025-04-01", cuenta="603000", debe=5)
+        self._add("05/03/2025", cuenta="629200", debe=12)
+        self._add("05/03/2024", cuenta="629200", debe=100)
+
+        top = self.data.get_top_cuentas_anuales(2025)
+        self.assertEqual([(c, t) for c, _, t in top], [("603000", 15.0), ("629200", 12.0)])
+
+
+class TestPlanContable(CarpetaTemporalTestCase):
+    """Account names come from the real plan contable, read through the registry."""
+
+    def setUp(self):
+        super().setUp()
+
+        os.makedirs("data")
+        shutil.copy(os.path.join(RAIZ, "data", "plan_contable_v3.json"), "data")
+        self.data = ContabilidadData("test_ledger.json")
+
+    def test_names_from_registry_snapshot(self):
+        self.assertIs(self.data.cuentas, registro().obtener("data/plan_contable_v3.json"))
+        self.assertEqual(self.data.obtener_nombre_cuenta("211000"), "Edificios y otras construcciones")
+        self.assertEqual(self.data.obtener_nombre_cuenta(206000), "Aplicaciones informáticas")
+        self.assertEqual(self.data.obtener_nombre_cuenta("000000"), "Cuenta desconocida")
+
+    def test_plan_reload_reaches_the_ledger(self):
+        with open("data/plan_contable_v3.json", "w", encoding="utf-8") as f:
+            json.dump({"211000": {"nombre": "Edificios"}}, f)
+        self.assertIn(os.path.abspath("data/plan_contable_v3.json"), registro().comprobar())
+        self.assertEqual(self.data.obtener_nombre_cuenta("211000"), "Edificios")
+
+
+class TestDiario(ContabilidadDataTestCase):
+    """Append-only journal: constant-cost saves, replay on load, compaction."""
+
+    def _reabrir(self):
+        return ContabilidadData("test_ledger.json")
+
+    def _snapshot(self):
+        with open(self.data.archivo_json, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def test_insert_appends_to_journal_only(self):
+        antes = self._snapshot()
+        self._add("05/03/2025", debe=10)
+        self._add("06/03/2025", debe=20)
+
+        self.assertEqual(self._snapshot()["movimientos"], antes["movimientos"])
+        with open(self.data.archivo_diario, "r", encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 2)
+
+    def test_reload_replays_add_edit_delete(self):
+        a = self._add("05/03/2025", debe=10)
+        b = self._add("06/03/2025", debe=20)
+        self._add("07/03/2025", debe=30)
+        self.data.actualizar_movimiento(a, {"concepto": "editado"})
+        self.data.eliminar_movimiento(b)
+
+        otro = self._reabrir()
+        self.assertEqual([m["debe"] for m in otro.movimientos], [10, 30])
+        self.assertEqual(otro.movimientos[0]["concepto"], "editado")
+        self.assertEqual(len(otro.movimientos_por_mes(3, 2025)), 2)
+
+    def test_truncated_last_line_is_ignored(self):
+        self._add("05/03/2025", debe=10)
+        with open(self.data.archivo_diario, "a", encoding="utf-8") as f:
+            f.write('{"op": "add", "mov": {"fecha": "06/03')
+
+        otro = self._reabrir()
+        self.assertEqual(len(otro.movimientos), 1)
+
+    def test_guardar_compacts_and_clears_journal(self):
+        self._add("05/03/2025", debe=10)
+        self.data.guardar()
+
+        self.assertFalse(self.data.archivo_diario.exists())
+        self.assertEqual(len(self._snapshot()["movimientos"]), 1)
+        self.assertEqual(len(self._reabrir().movimientos), 1)
+
+    def test_auto_compaction(self):
+        self.data.MAX_ENTRADAS_DIARIO = 3
+        for dia in range(1, 4):
+            self._add(f"{dia:02d}/03/2025", debe=dia)
+
+        escritor().esperar()   # la compactación automática se vuelca en segundo plano
+        self.assertFalse(self.data.archivo_diario.exists())
+        self.assertEqual(len(self._snapshot()["movimientos"]), 3)
+
+    def test_restored_snapshot_ignores_foreign_journal(self):
+        restaurado = {"movimientos": [{"fecha": "01/01/2024", "debe": 1.0, "haber": 0.0}]}
+        self._add("05/03/2025", debe=10)
+        with open(self.data.archivo_json, "w", encoding="utf-8") as f:
+            json.dump(restaurado, f)
+
+        otro = self._reabrir()
+        sin_id = [{k: v for k, v in m.items() if k != "id"} for m in otro.movimientos]
+        self.assertEqual(sin_id, restaurado["movimientos"])
+
+    def test_restore_backup_drops_later_journal_lines(self):
+        self._add("05/03/2025", concepto="ANTES")
+        self.data.cerrar()      # lo que hace ToolsView._backup antes de copiar
+        shutil.copy2(self.data.archivo_json, "backup.json")
+        self._add("06/03/2025", concepto="POST-BACKUP")
+
+        self.data.restaurar("backup.json")
+        self.assertEqual([m["concepto"] for m in self.data.movimientos], ["ANTES"])
+        self.assertEqual([m["concepto"] for m in self._reabrir().movimientos], ["ANTES"])
+
+
+class TestIds(ContabilidadDataTestCase):
+    """Stable ids: O(1) lookup, unambiguous edits/deletes, persisted across reloads."""
+
+    def _reabrir(self):
+        return ContabilidadData("test_ledger.json")
+
+    def test_ids_unique_and_lookup(self):
+        a = self._add("05/03/2025", debe=10)
+        b = self._add("05/03/2025", debe=10)
+
+        self.assertNotEqual(a["id"], b["id"])
+        self.assertIs(self.data.movimiento_por_id(b["id"]), b)
+        self.assertIsNone(self.data.movimiento_por_id("no-existe"))
+
+    def test_edit_and_delete_by_id_with_duplicates(self):
+        a = self._add("05/03/2025", debe=10)
+        b = self._add("05/03/2025", debe=10)
+
+        self.assertTrue(self.data.actualizar_movimiento(b["id"], {"estado": "pendiente", "id": "x"}))
+        self.assertEqual((a["estado"], b["estado"], b["id"] != "x"), ("pagado", "pendiente", True))
+
+        self.assertTrue(self.data.eliminar_movimiento(a["id"]))
+        self.assertEqual(self.data.movimientos, [b])
+
+        otro = ContabilidadData("test_ledger.json")
+        self.assertEqual([(m["id"], m["estado"]) for m in otro.movimientos], [(b["id"], "pendiente")])
+
+    def test_deletes_use_position_map_without_renumbering(self):
+        movs = [self._add("05/03/2025", debe=i) for i in range(40)]
+        quedan = list(movs)
+        with patch.object(PosicionesMovimientos, "reconstruir") as renumerar:
+            for i in (0, 39, 17, 18, 5, 30):
+                self.assertTrue(self.data.eliminar_movimiento(movs[i]["id"]))
+                quedan.remove(movs[i])
+            self.data.agregar_movimiento("06/03/2025", "DOC", "nuevo", "603000", 1, 0)
+            quedan.append(self.data.movimientos[-1])
+            self.assertTrue(self.data.eliminar_movimiento(movs[20]["id"]))
+            quedan.remove(movs[20])
+            renumerar.assert_not_called()
+        self.assertEqual(self.data.movimientos, quedan)
+        self.assertEqual([m["id"] for m in self._reabrir().movimientos], [m["id"] for m in quedan])
+
+        # Lista tocada a mano sin reindexar(): se renumera y borra el correcto
+        self.data.movimientos.insert(0, {"id": "a-mano", "fecha": "01/03/2025"})
+        self.assertTrue(self.data.eliminar_movimiento(quedan[3]["id"]))
+        self.assertNotIn(quedan[3], self.data.movimientos)
+        self.assertEqual(len(self.data.movimientos), len(quedan))
+
+    def test_stale_copy_resolves_to_live_record(self):
+        a = self._add("05/03/2025", debe=10, estado="pendiente")
+        copia = dict(a)
+        self.data.cargar()  # la vista se queda con objetos de la carga anterior
+
+        self.assertTrue(self.data.actualizar_movimiento(copia, {"estado": "pagado"}))
+        self.assertEqual(self.data.pendientes(), [])
+
+    def test_legacy_records_get_persistent_ids(self):
+        with open(self.data.archivo_json, "w", encoding="utf-8") as f:
+            json.dump({"movimientos": [{"fecha": "01/01/2025", "debe": 1.0}]}, f)
+
+        ids = [m["id"] for m in ContabilidadData("test_ledger.json").movimientos]
+        self.assertEqual(ids, [m["id"] for m in ContabilidadData("test_ledger.json").movimientos])
+
+    def test_legacy_positional_journal_still_replays(self):
+        self._add("05/03/2025", debe=10)
+        self.data.guardar()
+        with open(self.data.archivo_diario, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"op": "edit", "pos": 0, "cambios": {"concepto": "viejo"},
+                                "t": self.data._token_diario}) + "\n")
+
+        self.assertEqual(ContabilidadData("test_ledger.json").movimientos[0]["concepto"], "viejo")
+
+
+class TestAltaMasiva(ContabilidadDataTestCase):
+    """agregar_movimientos: validate + normalise + persist once."""
+
+    def _filas(self, n):
+        return [
+            {"fecha": f"{(i % 28) + 1:02d}/03/2025", "documento": f"IMP-{i}", "concepto": "imp",
+             "cuenta": 603000, "debe": "10", "haber": 0, "banco": "SBI", "estado": "Pendiente"}
+            for i in range(n)
+        ]
+
+    def test_normalises_and_indexes(self):
+        agregados, errores = self.data.agregar_movimientos(self._filas(3))
+
+        self.assertEqual((agregados, errores), (3, []))
+        m = self.data.movimientos[0]
+        self.assertEqual((m["cuenta"], m["debe"], m["estado"], m["saldo"]), ("603000", 10.0, "pendiente", -10.0))
+        self.assertEqual(len(self.data.movimientos_por_banco("SBI")), 3)
+
+    def test_invalid_rows_are_reported(self):
+        filas = self._filas(2) + [{"fecha": "sin fecha", "debe": 1}, {"fecha": "01/03/2025", "debe": "abc"}]
+        agregados, errores = self.data.agregar_movimientos(filas)
+
+        self.assertEqual(agregados, 2)
+        self.assertEqual(len(errores), 2)
+
+    def test_small_batch_is_one_journal_line(self):
+        self.data.agregar_movimientos(self._filas(10))
+
+        with open(self.data.archivo_diario, "r", encoding="utf-8") as f:
+            self.assertEqual(len(f.readlines()), 1)
+        self.assertEqual(len(ContabilidadData("test_ledger.json").movimientos), 10)
+
+    def test_large_batch_writes_single_snapshot(self):
+        with patch.object(ContabilidadData, "guardar", wraps=self.data.guardar) as guardar:
+            self.data.agregar_movimientos(self._filas(self.data.MAX_ENTRADAS_DIARIO + 1))
+            guardar.assert_called_once()
+
+        escritor().esperar()
+        self.assertFalse(self.data.archivo_diario.exists())
+
+    def test_unpersisted_batch_is_flushed_on_close(self):
+        # Importación interrumpida: el guardado final del diálogo nunca se ejecuta
+        self.data.agregar_movimientos(self._filas(3), persistir=False)
+        self.data.cerrar()
+
+        self.assertEqual(len(ContabilidadData("test_ledger.json").movimientos), 3)
+
+
+
+class TestDeteccionCambios(ContabilidadDataTestCase):
+    """Dirty-generation counter and on-disk change detection."""
+
+    def test_generation_bumps_on_mutations(self):
+        g0 = self.data.generacion
+        m = self._add("05/03/2025", debe=10)
+        g1 = self.data.generacion
+        self.data.actualizar_movimiento(m, {"concepto": "y"})
+        g2 = self.data.generacion
+        self.data.eliminar_movimiento(m)
+
+        self.assertTrue(g0 < g1 < g2 < self.data.generacion)
+
+    def test_own_writes_are_not_external_changes(self):
+        self._add("05/03/2025", debe=10)
+        self.data.guardar()
+        self._add("06/03/2025", debe=10)
+
+        g = self.data.generacion
+        self.assertFalse(self.data.recargar_si_cambio())
+        self.assertEqual(self.data.generacion, g)
+
+    def test_external_write_triggers_reload(self):
+        otro = ContabilidadData("test_ledger.json")
+        otro.agregar_movimiento("05/03/2025", "D", "externo", "603000", 5, 0)
+
+        self.assertTrue(self.data.recargar_si_cambio())
+        self.assertEqual(len(self.data.movimientos), 1)
+        self.assertFalse(self.data.recargar_si_cambio())
+
+
+class TestAgregados(ContabilidadDataTestCase):
+    """Running totals must match a full recomputation after any mutation."""
+
+    def _recalcular(self, año, mes):
+        movs = self.data.movimientos_por_mes(mes, año)
+        return (sum(float(m["debe"]) for m in movs), sum(float(m["haber"]) for m in movs), len(movs))
+
+    def test_totals_follow_insert_edit_delete(self):
+        a = self._add("05/03/2025", debe=10)
+        b = self._add("06/03/2025", haber=50, banco="SBI")
+        self.data.agregar_movimientos([{"fecha": "07/03/2025", "cuenta": "629200", "debe": "2.5"}])
+        self.assertEqual(self.data.agregados.totales_mes(2025, 3), self._recalcular(2025, 3))
+
+        self.data.actualizar_movimiento(a, {"fecha": "05/04/2025", "debe": 7})
+        self.data.eliminar_movimiento(b)
+
+        self.assertEqual(self.data.agregados.totales_mes(2025, 3), self._recalcular(2025, 3))
+        self.assertEqual(self.data.agregados.totales_mes(2025, 4), (7.0, 0.0, 1))
+        self.assertEqual(self.data.agregados.meses_con_datos(2025), [3, 4])
+        self.assertEqual(self.data.agregados.totales_banco_mes(2025, 3, "SBI"), (0.0, 0.0, 0))
+
+    def test_caller_mutation_then_actualizar(self):
+        m = self._add("05/03/2025", debe=10, estado="pendiente")
+        m["estado"] = "pagado"
+        m["debe"] = "12.50"
+        self.data.actualizar_movimiento(m)
+
+        self.assertEqual(self.data.agregados.totales_estado("pendiente"), (0.0, 0.0, 0))
+        self.assertEqual(self.data.agregados.saldo_banco("Caja"), -12.5)
+
+    def test_bank_balance_only_paid(self):
+        self._add("01/01/2024", haber=100, banco="SBI")
+        self._add("01/02/2025", debe=30, banco="SBI")
+        self._add("01/03/2025", debe=999, banco="SBI", estado="pendiente")
+
+        self.assertEqual(self.data.agregados.saldo_banco("SBI"), 70.0)
+
+    def test_por_cuenta_year_and_month(self):
+        self._add("05/03/2025", cuenta="603000", debe=10)
+        self._add("05/04/2025", cuenta="603000", debe=5)
+        self._add("05/04/2025", cuenta="700000", haber=80)
+
+        self.assertEqual(self.data.agregados.por_cuenta(2025)["603000"], (15.0, 0.0, 2))
+        self.assertEqual(set(self.data.agregados.por_cuenta(2025, 3)), {"603000"})
+
+    def test_rebuilt_on_reload(self):
+        self._add("05/03/2025", debe=10)
+        otro = ContabilidadData("test_ledger.json")
+        self.assertEqual(otro.totales_mes(3, 2025), (10.0, 0.0, -10.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
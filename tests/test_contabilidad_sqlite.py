@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+Test Suite for ContabilidadDataSQLite — SHILLONG CONTABILIDAD v3.8.0 PRO
+Same public API as the JSON backend, persisted row by row in SQLite.
+"""
+
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.base import CarpetaTemporalTestCase
+from models.ContabilidadData import ContabilidadData, abrir_contabilidad
+from models.ContabilidadDataSQLite import ContabilidadDataSQLite, importar_backups
+
+
+class SQLiteTestCase(CarpetaTemporalTestCase):
+
+    def _abrir(self):
+        data = ContabilidadDataSQLite("test_ledger.json")
+        self.addCleanup(data.conn.close)
+        return data
+
+
+class TestBackendSQLite(SQLiteTestCase):
+
+    def test_rows_survive_reopen(self):
+        data = self._abrir()
+        data.agregar_movimiento("05/03/2025", "D1", "a", "603000", 10, 0)
+        data.agregar_movimiento("2025-03-06", "D2", "b", "700000", 0, 50, banco="SBI")
+        data.agregar_movimientos([{"fecha": "07/03/2025", "cuenta": "603000", "debe": 5}])
+        m = data.movimientos[0]
+        data.actualizar_movimiento(m, {"concepto": "editado"})
+        data.eliminar_movimiento(data.movimientos[1])
+
+        otro = self._abrir()
+        self.assertEqual([x["concepto"] for x in otro.movimientos], ["editado", ""])
+        self.assertEqual(len(otro.movimientos_por_mes(3, 2025)), 2)
+
+    def test_unpersisted_batch_is_flushed_on_close(self):
+        data = self._abrir()
+        data.agregar_movimientos([{"fecha": "07/03/2025", "cuenta": "603000", "debe": 5}], persistir=False)
+        data.cerrar()
+
+        self.assertEqual(len(self._abrir().movimientos), 1)
+
+    def test_edits_and_deletes_address_rows_by_movement_id(self):
+        data = self._abrir()
+        data.agregar_movimiento("05/03/2025", "D1", "a", "603000", 10, 0)
+        data.agregar_movimiento("06/03/2025", "D2", "b", "603000", 20, 0)
+        # Dicts reemplazados a mano: la identidad en memoria ya no es la de la carga
+        data.movimientos = [dict(m) for m in data.movimientos]
+        data.reindexar()
+
+        data.actualizar_movimiento(data.movimientos[0]["id"], {"concepto": "editado"})
+        data.eliminar_movimiento(data.movimientos[1]["id"])
+        self.assertEqual([m["concepto"] for m in self._abrir().movimientos], ["editado"])
+
+    def test_missing_row_falls_back_to_full_sync(self):
+        data = self._abrir()
+        data.agregar_movimiento("05/03/2025", "D1", "a", "603000", 10, 0)
+        with data.conn:
+            data.conn.execute("DELETE FROM movimientos")
+
+        data.actualizar_movimiento(data.movimientos[0]["id"], {"concepto": "editado"})
+        self.assertEqual([m["concepto"] for m in self._abrir().movimientos], ["editado"])
+
+    def test_old_database_gets_mov_id_column(self):
+        conn = sqlite3.connect("test_ledger.db")
+        conn.execute("CREATE TABLE movimientos (id INTEGER PRIMARY KEY, datos TEXT NOT NULL, fecha_iso TEXT, "
+                     "anio INTEGER, mes INTEGER, cuenta TEXT, banco TEXT, estado TEXT, "
+                     "debe REAL NOT NULL DEFAULT 0, haber REAL NOT NULL DEFAULT 0)")
+        conn.execute("INSERT INTO movimientos (datos, cuenta) VALUES (?, ?)",
+                     (json.dumps({"id": "m1", "fecha": "05/03/2025", "cuenta": "603000", "debe": 1}), "603000"))
+        conn.commit()
+        conn.close()
+
+        data = self._abrir()
+        data.eliminar_movimiento("m1")
+        self.assertEqual(self._abrir().movimientos, [])
+
+    def test_group_by_aggregates(self):
+        data = self._abrir()
+        data.agregar_movimiento("05/03/2025", "D", "a", "603000", 10, 0)
+        data.agregar_movimiento("06/03/2025", "D", "b", "603000", 5, 0)
+        data.agregar_movimiento("06/03/2025", "D", "c", "700000", 0, 80)
+        data.agregar_movimiento("06/03/2024", "D", "d", "629200", 99, 0)
+
+        self.assertEqual(data.totales_mes(3, 2025), (15.0, 80.0, 65.0))
+        self.assertEqual([(c, t) for c, _, t in data.get_top_cuentas_anuales(2025, 1)], [("603000", 15.0)])
+        self.assertEqual(data.sumas_y_saldos(),
+                         [("603000", 15.0, 0.0), ("629200", 99.0, 0.0), ("700000", 0.0, 80.0)])
+
+    def test_imports_existing_json_with_journal(self):
+        json_data = ContabilidadData("test_ledger.json")
+        json_data.agregar_movimiento("05/03/2025", "D", "snapshot", "603000", 10, 0)
+        json_data.guardar()
+        json_data.agregar_movimiento("06/03/2025", "D", "diario", "603000", 20, 0)
+
+        data = self._abrir()
+        self.assertEqual([m["concepto"] for m in data.movimientos], ["snapshot", "diario"])
+        self.assertTrue(data.archivo_db.exists())
+
+        # Segunda apertura: lee de la base, no vuelve a importar
+        with patch.object(ContabilidadDataSQLite, "importar_json") as importar:
+            self.assertEqual(len(self._abrir().movimientos), 2)
+            importar.assert_not_called()
+
+    def test_cerrar_exports_json_and_restored_json_is_reimported(self):
+        data = self._abrir()
+        data.agregar_movimiento("05/03/2025", "D", "a", "603000", 10, 0)
+        data.cerrar()
+        self.assertEqual(len(ContabilidadData("test_ledger.json").movimientos), 1)
+
+        with open(data.archivo_json, "w", encoding="utf-8") as f:
+            json.dump({"movimientos": []}, f)
+        self.assertTrue(data.recargar_si_cambio())
+        self.assertEqual(data.movimientos, [])
+
+    def test_restore_backup_replaces_rows(self):
+        data = self._abrir()
+        data.agregar_movimiento("05/03/2025", "D", "ANTES", "603000", 10, 0)
+        data.cerrar()       # exporta el JSON que copia ToolsView._backup
+        shutil.copy2(data.archivo_json, "backup.json")
+        data.agregar_movimiento("06/03/2025", "D", "POST-BACKUP", "603000", 20, 0)
+
+        data.restaurar("backup.json")
+        self.assertEqual([m["concepto"] for m in data.movimientos], ["ANTES"])
+        self.assertEqual([m["concepto"] for m in self._abrir().movimientos], ["ANTES"])
+
+    def test_importar_backups(self):
+        Path("backups").mkdir()
+        with open("backups/backup_1.json", "w", encoding="utf-8") as f:
+            json.dump({"movimientos": [{"fecha": "01/01/2025", "cuenta": "603000", "debe": 3}]}, f)
+
+        creadas = importar_backups("backups")
+        self.assertEqual(creadas, [Path("backups/backup_1.db")])
+        self.assertEqual(importar_backups("backups"), [])
+
+    def test_factory_selects_backend(self):
+        with patch.dict(os.environ, {"SHILLONG_BACKEND": "sqlite"}):
+            data = abrir_contabilidad("test_ledger.json")
+            self.addCleanup(data.conn.close)
+        self.assertIsInstance(data, ContabilidadDataSQLite)
+        self.assertNotIsInstance(abrir_contabilidad("test_ledger.json", "json"), ContabilidadDataSQLite)
+
+
+if __name__ == "__main__":
+    unittest.main()
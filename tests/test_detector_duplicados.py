@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Test Suite for DetectorDuplicados — SHILLONG CONTABILIDAD v3.8.0 PRO
+Exact duplicates by normalised key, near-duplicates by amount blocks and
+date windows, and merging the exact groups from ContabilidadData.
+"""
+
+import os
+import sys
+import unittest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.base import CarpetaTemporalTestCase
+from models.ContabilidadData import ContabilidadData
+from models.DetectorDuplicados import DetectorDuplicados, concepto_normalizado
+
+
+def mov(fecha, concepto, debe=0, haber=0, cuenta="628000", banco="Caja", documento=""):
+    return {"fecha": fecha, "documento": documento, "concepto": concepto, "cuenta": cuenta,
+            "debe": debe, "haber": haber, "banco": banco}
+
+
+class TestDetectorDuplicados(unittest.TestCase):
+
+    def test_exact_duplicates_ignore_case_accents_and_format(self):
+        movs = [
+            mov("01/03/2025", "Factura Energía  marzo", debe=120),
+            mov("2025-03-01", "factura energia marzo.", debe="120,00"),
+            mov("01/03/2025", "Factura energía marzo", debe=120, banco="SBI"),   # otro banco
+        ]
+        grupos = DetectorDuplicados().buscar(movs, parecidos=False)
+        self.assertEqual(len(grupos), 1)
+        self.assertEqual(grupos[0]["tipo"], "exacto")
+        self.assertEqual(grupos[0]["movimientos"], movs[:2])
+        self.assertEqual(concepto_normalizado("Factura  LUZ-Enero."), "factura luz enero")
+
+    def test_near_duplicates_need_same_amount_close_dates_and_similar_concept(self):
+        movs = [
+            mov("01/03/2025", "Factura luz marzo", debe=80),
+            mov("02/03/2025", "Factura luz marzo 2025", debe=80, cuenta="629000"),
+            mov("20/03/2025", "Factura luz marzo", debe=80),          # fuera de la ventana
+            mov("01/03/2025", "Factura luz marzo", debe=81),          # otro importe
+            mov("01/03/2025", "Donativo parroquia", debe=80),         # concepto distinto
+        ]
+        grupos = DetectorDuplicados(dias=3, umbral=0.8).buscar(movs)
+        self.assertEqual(len(grupos), 1)
+        self.assertEqual(grupos[0]["tipo"], "parecido")
+        self.assertEqual(grupos[0]["movimientos"], movs[:2])
+        self.assertGreaterEqual(grupos[0]["similitud"], 0.8)
+        self.assertLess(grupos[0]["similitud"], 1.0)
+
+    def test_different_documents_are_not_near_duplicates(self):
+        movs = [
+            mov("01/03/2025", "Gasolina jeep", debe=50, documento="F-1"),
+            mov("01/03/2025", "Gasolina del jeep", debe=50, documento="F-2"),
+        ]
+        self.assertEqual(DetectorDuplicados().buscar(movs), [])
+
+    def test_different_documents_are_not_exact_duplicates(self):
+        movs = [
+            mov("01/03/2025", "Factura gasoil", debe=50, documento="F-001"),
+            mov("01/03/2025", "Factura gasoil", debe=50, documento="F-002"),
+            mov("01/03/2025", "factura gasoil", debe=50, documento="f-002"),
+        ]
+        grupos = DetectorDuplicados().buscar(movs)
+        self.assertEqual(len(grupos), 1)
+        self.assertEqual(grupos[0]["tipo"], "exacto")
+        self.assertEqual(grupos[0]["movimientos"], movs[1:])
+
+    def test_exact_group_joins_near_duplicate_cluster(self):
+        movs = [
+            mov("01/03/2025", "Alquiler local", haber=500),
+            mov("01/03/2025", "ALQUILER LOCAL", haber=500),
+            mov("02/03/2025", "Alquiler del local", haber=500),
+        ]
+        grupos = DetectorDuplicados(umbral=0.8).buscar(movs)
+        self.assertEqual(len(grupos), 1)
+        self.assertEqual(grupos[0]["tipo"], "parecido")
+        self.assertEqual(grupos[0]["movimientos"], movs)
+
+
+class TestDuplicadosEnLibro(CarpetaTemporalTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.data = ContabilidadData("libro.json")
+
+    def test_merge_exact_groups_keeps_first(self):
+        for _ in range(3):
+            self.data.agregar_movimiento("05/04/2025", "", "Recibo agua", "628000", 30, 0)
+        self.data.agregar_movimiento("06/04/2025", "", "Donativo", "720000", 0, 100)
+
+        grupos = self.data.duplicados()
+        self.assertEqual([g["tipo"] for g in grupos], ["exacto"])
+        primero = grupos[0]["movimientos"][0]
+        self.assertIs(primero, self.data.movimientos[0])
+
+        for m in grupos[0]["movimientos"][1:]:
+            self.assertTrue(self.data.eliminar_movimiento(m["id"]))
+        self.assertEqual(len(self.data.movimientos), 2)
+        self.assertEqual(self.data.duplicados(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Test Suite for ExportadorExcelMensual — SHILLONG CONTABILIDAD v3.8.0 PRO
+Round trip of the write_only exporters: export, reload with openpyxl and
+check totals rows, named styles and number formats.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import openpyxl
+    from models.ExportadorExcelMensual import ExportadorExcelMensual, MONEDA
+except ImportError:
+    openpyxl = None
+
+MOVS = [
+    {"fecha": "01/03/2025", "cuenta": "628000", "concepto": "Luz", "debe": 100.0, "haber": 0.0,
+     "saldo": -100.0, "banco": "Caja", "documento": "F-1", "categoria": "Suministros"},
+    {"fecha": "02/03/2025", "cuenta": "700000", "concepto": "Donativo", "debe": 0.0, "haber": 40.0,
+     "saldo": 40.0, "banco": "SBI", "documento": "R-1", "categoria": "Ingresos"},
+]
+
+
+@unittest.skipUnless(openpyxl, "openpyxl no disponible")
+class TestExportadorExcel(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.ruta = os.path.join(self._tmp.name, "libro.xlsx")
+
+    def _filas(self):
+        ws = openpyxl.load_workbook(self.ruta).active
+        return ws, list(ws.iter_rows())
+
+    def test_general_totals_and_formats(self):
+        avisos = []
+        # Un generador: sin len(), el progreso no puede dar porcentaje
+        ExportadorExcelMensual.exportar_general(
+            self.ruta, (m for m in MOVS), "Marzo 2025", progreso=lambda p, t: avisos.append((p, t)))
+
+        ws, filas = self._filas()
+        self.assertEqual(ws.title, "Libro Mensual")
+        self.assertEqual(filas[0][0].value, "Fecha")
+        self.assertEqual(filas[0][0].style, "shl_cabecera")
+        self.assertEqual(filas[1][4].value, 100.0)
+        self.assertEqual(filas[1][4].number_format, MONEDA)
+
+        totales = filas[-1]
+        self.assertEqual(totales[0].value, "TOTALES DEL PERIODO")
+        self.assertEqual([c.value for c in totales[4:7]], [100.0, 40.0, -60.0])
+        self.assertEqual(totales[6].style, "shl_total_negativo")
+        self.assertEqual(totales[6].number_format, MONEDA)
+        self.assertEqual(avisos[0], (0, "Escribiendo filas... (0)"))
+        self.assertEqual(avisos[-1], (90, "Guardando archivo..."))
+
+    def test_agrupado_subtotals_and_grand_total(self):
+        grupos = {"Suministros": MOVS[:1], "Ingresos": MOVS[1:]}
+        ExportadorExcelMensual.exportar_agrupado(self.ruta, grupos, "Marzo 2025", "Categoría")
+
+        _, filas = self._filas()
+        subtotales = [f for f in filas if f and str(f[0].value or "").startswith("TOTAL ")]
+        self.assertEqual([f[0].value for f in subtotales], ["TOTAL Suministros", "TOTAL Ingresos", "TOTAL REPORTE"])
+        self.assertEqual(subtotales[0][7].value, -100.0)
+        self.assertEqual(subtotales[0][7].style, "shl_subtotal_negativo")
+        self.assertEqual(subtotales[1][7].style, "shl_subtotal_positivo")
+
+        gran_total = subtotales[-1]
+        self.assertEqual([c.value for c in gran_total[5:8]], [100.0, 40.0, -60.0])
+        self.assertEqual(gran_total[7].style, "shl_gran_total_negativo")
+
+    def test_libro_mayor_consumes_accounts_lazily(self):
+        leidas = []
+
+        def cuentas():
+            for cuenta in ("628000", "700000"):
+                leidas.append(cuenta)
+                yield f"{cuenta} - Cuenta", [m for m in MOVS if m["cuenta"] == cuenta]
+
+        avisos = []
+        ExportadorExcelMensual.exportar_libro_mayor(
+            self.ruta, cuentas(), total_cuentas=2,
+            progreso=lambda p, t: avisos.append((p, t, list(leidas))))
+
+        # Cada cuenta se pide justo antes de escribirla
+        self.assertEqual(avisos[0], (0, "628000 - Cuenta", ["628000"]))
+        self.assertEqual(avisos[1], (45, "700000 - Cuenta", ["628000", "700000"]))
+
+        _, filas = self._filas()
+        totales = [f for f in filas if len(f) > 2 and f[2].value == "TOTAL"]
+        self.assertEqual([[c.value for c in f[3:6]] for f in totales], [[100, 0, -100], [0, 40, 40]])
+        self.assertEqual(totales[0][2].style, "shl_mayor_total_etiqueta")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+Test Suite for ImportacionMovimientos — SHILLONG CONTABILIDAD v3.8.0 PRO
+Streaming CSV import: header detection, normalisation, validation,
+de-duplication and batched insertion.
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.base import CarpetaTemporalTestCase
+from models.ContabilidadData import ContabilidadData
+from models.ImportacionMovimientos import ImportacionMovimientos, LectorFilas, detectar_cabecera
+
+CSV = """Extracto SBI;;;;;
+;;;;;
+Fecha;Documento;Concepto;Cuenta;Debe;Haber
+2025-01-05;F1;Luz;628000 Suministros;10,50;0
+05/01/2025;F1;Luz;628000;10.5;0
+31/02/2025;F2;Agua;628000;3;0
+06/01/2025;F3;Nada;628000;0;0
+07/01/2025;F4;Donativo;720000;abc;
+08/01/2025;F5;Donativo;720000;0;100
+"""
+
+
+class TestImportacionMovimientos(CarpetaTemporalTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        with open("extracto.csv", "w", encoding="utf-8") as f:
+            f.write(CSV)
+
+    def test_header_found_after_preamble(self):
+        mapa, filas = detectar_cabecera(LectorFilas("extracto.csv"))
+        self.assertEqual(mapa["fecha"], 0)
+        self.assertEqual(mapa["haber"], 5)
+        self.assertEqual(next(filas)[0], 4)
+
+    def test_analysis_normalises_validates_and_dedups(self):
+        resumen = ImportacionMovimientos("extracto.csv").analizar()
+
+        self.assertEqual(resumen.validos, 2)
+        self.assertEqual(resumen.duplicados, 1)
+        self.assertEqual(resumen.num_errores, 2)
+        self.assertIn("Fila 6", resumen.errores[0])
+        primero = resumen.muestra[0]
+        self.assertEqual((primero["fecha"], primero["cuenta"], primero["debe"]), ("05/01/2025", "628000", 10.5))
+
+    def test_existing_ledger_rows_are_skipped(self):
+        existentes = [{"fecha": "08/01/2025", "documento": "F5", "concepto": "Donativo",
+                       "cuenta": "720000", "debe": 0, "haber": 100.0, "banco": "Caja"}]
+        resumen = ImportacionMovimientos("extracto.csv", existentes=existentes).analizar()
+        self.assertEqual((resumen.validos, resumen.duplicados), (1, 2))
+
+    def test_import_in_batches_saves_once(self):
+        data = ContabilidadData("libro.json")
+        avances = []
+        imp = ImportacionMovimientos("extracto.csv", existentes=data.movimientos, tamaño_lote=1)
+
+        with patch.object(data, "guardar") as guardar:
+            agregados, resumen = imp.importar_en(data, lambda pct, texto: avances.append(pct))
+
+        self.assertEqual(agregados, 2)
+        self.assertEqual(len(data.movimientos), 2)
+        guardar.assert_called_once_with(segundo_plano=True)
+        self.assertGreaterEqual(len(avances), 2)
+        self.assertEqual(avances, sorted(avances))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Test Suite for IndiceTexto — SHILLONG CONTABILIDAD v3.8.0 PRO
+Inverted word/trigram index behind the ledger search boxes.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.ContabilidadData import ContabilidadData
+from models.IndiceTexto import IndiceTexto
+
+NOMBRES = {"628000": "Suministros", "720000": "Donaciones recibidas"}
+
+
+def _mov(concepto, documento="", cuenta="628000", banco="Caja"):
+    return {"concepto": concepto, "documento": documento, "cuenta": cuenta, "banco": banco}
+
+
+class TestIndiceTexto(unittest.TestCase):
+
+    def setUp(self):
+        self.movs = [
+            _mov("Factura luz enero", "F-0012"),
+            _mov("Energía eléctrica", "F-0100", banco="SBI"),
+            _mov("Donativo parroquia", "R-7", cuenta="720000"),
+        ]
+        self.indice = IndiceTexto(lambda cta: NOMBRES.get(cta, ""))
+        self.indice.reconstruir(self.movs)
+
+    def _buscar(self, texto):
+        return [self.movs.index(m) for m in self.indice.buscar(texto, self.movs)]
+
+    def test_substring_prefix_and_accents(self):
+        self.assertEqual(self._buscar("actur"), [0])          # subcadena
+        self.assertEqual(self._buscar("lu"), [0])             # inicio de palabra
+        self.assertEqual(self._buscar("ENERGIA"), [1])        # sin acentos ni mayúsculas
+        self.assertEqual(self._buscar("0012"), [0])           # documento
+        self.assertEqual(self._buscar("suministros"), [0, 1]) # nombre de la cuenta
+        self.assertEqual(self._buscar("sbi F-01"), [1])       # términos con Y
+        self.assertEqual(self._buscar("xyz"), [])
+        self.assertEqual(self._buscar("  "), [0, 1, 2])
+
+    def test_incremental_insert_edit_and_delete(self):
+        self.indice.buscar("luz")                              # construye el índice
+        nuevo = _mov("Luz febrero", "F-0013")
+        self.movs.append(nuevo)
+        self.indice.agregar(nuevo)
+        self.assertEqual(self._buscar("luz"), [0, 3])
+
+        self.movs[0]["concepto"] = "Agua enero"
+        self.indice.actualizar(self.movs[0])
+        self.assertEqual(self._buscar("luz"), [3])
+        self.assertEqual(self._buscar("agu"), [0])
+
+        self.indice.quitar(nuevo)
+        self.movs.remove(nuevo)
+        self.assertEqual(self._buscar("febrero"), [])
+        self.assertEqual(self._buscar("fe"), [])               # palabra fuera del vocabulario
+
+    def test_ledger_keeps_index_in_sync(self):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp, patch("builtins.print"):
+            os.chdir(tmp)
+            try:
+                data = ContabilidadData("libro.json")
+                data.agregar_movimiento("01/01/2025", "F1", "Factura luz", "628000", 10, 0)
+                self.assertEqual(len(data.buscar_texto("luz")), 1)
+
+                data.agregar_movimiento("02/01/2025", "F2", "Luz oficina", "628000", 5, 0)
+                mov = data.buscar_texto("oficina")[0]
+                data.actualizar_movimiento(mov, {"concepto": "Agua oficina"})
+                self.assertEqual(len(data.buscar_texto("luz")), 1)
+
+                data.eliminar_movimiento(mov)
+                self.assertEqual(data.buscar_texto("oficina"), [])
+            finally:
+                os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    unittest.main()
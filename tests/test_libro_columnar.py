@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Test Suite for LibroColumnar — SHILLONG CONTABILIDAD v3.8.0 PRO
+Columnar ledger view: masks, grouped sums and cache invalidation.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.ContabilidadData import ContabilidadData
+from models.LibroColumnar import LibroColumnar
+from models.MotorInformes import MotorInformes
+
+MOVIMIENTOS = [
+    {"fecha": "05/01/2025", "cuenta": "628000", "debe": "10,50", "haber": 0, "banco": "Caja", "estado": "pagado"},
+    {"fecha": "20/01/2025", "cuenta": "720000", "debe": 0, "haber": 100.0, "banco": "SBI", "estado": "Pagado"},
+    {"fecha": "03/02/2025", "cuenta": "628100", "debe": 5.0, "haber": 0, "banco": "Caja", "estado": "pendiente"},
+    {"fecha": "no-fecha", "cuenta": "628000", "debe": 0, "haber": 0, "banco": "Caja", "estado": "pagado"},
+    {"fecha": "10/03/2024", "cuenta": "570000", "debe": 2.0, "haber": 3.0, "banco": "SBI", "estado": "pagado"},
+]
+
+
+class TestLibroColumnar(unittest.TestCase):
+
+    def setUp(self):
+        self.libro = LibroColumnar(MOVIMIENTOS)
+
+    def test_amounts_are_parsed_once(self):
+        self.assertEqual(len(self.libro), 5)
+        self.assertAlmostEqual(self.libro.suma("debe"), 17.5)
+        self.assertAlmostEqual(self.libro.suma("haber"), 103.0)
+
+    def test_masks_combine_filters(self):
+        libro = self.libro
+        self.assertEqual(libro.filas(libro.mascara(banco="Caja", estado="PAGADO")), [0, 3])
+        self.assertEqual(libro.filas(libro.mascara(prefijo="628", año=2025)), [0, 2])
+        self.assertEqual(libro.filas(libro.mascara(año=2025, mes=1)), [0, 1])
+        self.assertEqual(libro.filas(libro.mascara(desde=date(2025, 1, 10), hasta=date(2025, 2, 28))), [1, 2])
+        self.assertEqual(libro.filas(libro.mascara(con_debe=False, con_haber=False)), [3])
+        self.assertEqual(libro.filas(libro.mascara(con_debe=True, con_haber=True)), [4])
+        self.assertEqual(libro.cuantas(libro.mascara(cuenta="999999")), 0)
+
+    def test_grouped_sums(self):
+        libro = self.libro
+        por_cuenta = libro.sumas_por("cuenta", libro.mascara(año=2025))
+        self.assertEqual(set(por_cuenta), {"628000", "720000", "628100"})
+        self.assertAlmostEqual(por_cuenta["628000"][0], 10.5)
+
+        por_mes = libro.sumas_por("periodo")
+        self.assertEqual(sorted(por_mes), [(2024, 3), (2025, 1), (2025, 2)])
+        self.assertAlmostEqual(por_mes[(2025, 1)][1], 100.0)
+
+    def test_group_by_several_keys(self):
+        sumas = self.libro.sumas_por(("banco", "periodo"))
+        self.assertEqual(sorted(sumas), [("Caja", (2025, 1)), ("Caja", (2025, 2)),
+                                         ("SBI", (2024, 3)), ("SBI", (2025, 1))])
+        self.assertEqual(sumas[("SBI", (2024, 3))], (2.0, 3.0))
+
+    def test_report_engine(self):
+        motor = MotorInformes(self.libro, categoria_de=lambda cta, oficial=False: cta[:3])
+        self.assertEqual([c for c, _, _ in motor.por_cuenta()], ["570000", "628000", "628100", "720000"])
+        self.assertEqual(motor.por_cuenta(2025, 2), [("628100", 5.0, 0.0)])
+
+        evolutivo = motor.por_cuenta_mes(2025)
+        self.assertEqual(evolutivo["628000"][0][:2], [10.5, 0.0])
+        self.assertEqual(evolutivo["720000"][1][0], 100.0)
+        self.assertNotIn("570000", evolutivo)
+
+        self.assertEqual(sorted(motor.por_banco_mes(2025, estado="pagado")), ["Caja", "SBI"])
+        self.assertEqual(motor.por_categoria(2025)["628"], (15.5, 0.0))
+
+    def test_ledger_rebuilds_after_changes(self):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp, patch("builtins.print"):
+            os.chdir(tmp)
+            try:
+                data = ContabilidadData("libro.json")
+                data.agregar_movimientos([dict(m) for m in MOVIMIENTOS[1:3]], persistir=False)
+                primera = data.columnar()
+                self.assertIs(data.columnar(), primera)
+
+                data.agregar_movimientos([dict(MOVIMIENTOS[4])], persistir=False)
+                self.assertIsNot(data.columnar(), primera)
+                self.assertEqual(len(data.columnar()), 3)
+            finally:
+                os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    unittest.main()
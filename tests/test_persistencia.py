@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+Test Suite for Persistencia — SHILLONG CONTABILIDAD v3.8.0 PRO
+Atomic JSON writes, rotating backups and the background writer.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.base import CarpetaTemporalTestCase
+from models.ContabilidadData import ContabilidadData
+from models.Persistencia import EscritorSegundoPlano, escribir_atomico, escritor, guardar_json
+
+
+class TestEscrituraAtomica(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.carpeta = Path(self._tmp.name)
+        self.ruta = self.carpeta / "reglas.json"
+
+    def test_failed_write_keeps_original(self):
+        guardar_json(self.ruta, {"a": 1})
+
+        def escribir_a_medias(f):
+            f.write('{"a": ')
+            raise OSError("disco lleno")
+
+        with self.assertRaises(OSError):
+            escribir_atomico(self.ruta, escribir_a_medias)
+
+        self.assertEqual(json.loads(self.ruta.read_text(encoding="utf-8")), {"a": 1})
+        self.assertEqual(sorted(p.name for p in self.carpeta.iterdir()), ["reglas.json"])
+
+    def test_rotation_keeps_newest_copies_only(self):
+        backups = self.carpeta / "backups"
+        backups.mkdir()
+        (backups / "backup_20250101.json").write_text("{}", encoding="utf-8")
+
+        for i in range(5):
+            guardar_json(self.ruta, {"version": i}, copias=2)
+
+        copias = sorted(backups.glob("reglas_*.json"))
+        self.assertEqual(len(copias), 2)
+        self.assertEqual([json.loads(p.read_text(encoding="utf-8"))["version"] for p in copias], [2, 3])
+        self.assertTrue((backups / "backup_20250101.json").exists())
+
+
+class TestEscritorSegundoPlano(unittest.TestCase):
+
+    def test_pending_tasks_with_same_key_are_coalesced(self):
+        esc = EscritorSegundoPlano()
+        bloqueo = threading.Event()
+        hechas = []
+
+        esc.programar("a", bloqueo.wait)
+        for i in range(3):
+            esc.programar("b", lambda i=i: hechas.append(i))
+        bloqueo.set()
+        esc.esperar()
+
+        self.assertEqual(hechas, [2])
+
+
+class TestCompactacionSegundoPlano(CarpetaTemporalTestCase):
+
+    def test_journal_survives_crash_before_background_snapshot(self):
+        data = ContabilidadData("libro.json")
+        data.agregar_movimiento("01/01/2025", "D", "antes", "603000", 10, 0)
+
+        # El volcado en segundo plano "no llega" a disco (cierre abrupto)
+        with patch.object(escritor(), "programar"):
+            data.guardar(segundo_plano=True)
+        data.agregar_movimiento("02/01/2025", "D", "despues", "603000", 20, 0)
+
+        recargado = ContabilidadData("libro.json")
+        self.assertEqual([m["concepto"] for m in recargado.movimientos], ["antes", "despues"])
+
+    def test_background_snapshot_then_close_compacts_journal(self):
+        data = ContabilidadData("libro.json")
+        data.agregar_movimiento("01/01/2025", "D", "uno", "603000", 10, 0)
+        data.guardar(segundo_plano=True)
+        data.agregar_movimiento("02/01/2025", "D", "dos", "603000", 20, 0)
+        data.cerrar()
+
+        self.assertFalse(data.archivo_diario.exists())
+        recargado = ContabilidadData("libro.json")
+        self.assertEqual([m["concepto"] for m in recargado.movimientos], ["uno", "dos"])
+        self.assertTrue(list(Path("data/backups").glob("libro_*.json")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+"""
+Test Suite for RegistroConfiguracion — SHILLONG CONTABILIDAD v3.8.0 PRO
+Process-wide cache of the reference JSON files (bancos, plan contable, reglas).
+"""
+
+import gc
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.RegistroConfiguracion import RegistroConfiguracion, descongelar
+
+
+class TestRegistroConfiguracion(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.ruta = os.path.join(self._tmp.name, "bancos.json")
+        self._escribir([{"id": 1, "nombre": "Caja"}])
+        self.registro = RegistroConfiguracion()
+
+    def _escribir(self, banks):
+        with open(self.ruta, "w", encoding="utf-8") as f:
+            json.dump({"banks": banks}, f)
+
+    def test_snapshot_is_shared_and_immutable(self):
+        with patch("models.RegistroConfiguracion.json.load", wraps=json.load) as load:
+            a = self.registro.obtener(self.ruta)
+            b = self.registro.obtener(self.ruta)
+        self.assertIs(a, b)
+        self.assertEqual(load.call_count, 1)
+        with self.assertRaises(TypeError):
+            a["banks"] = ()
+        self.assertEqual(descongelar(a), {"banks": [{"id": 1, "nombre": "Caja"}]})
+
+    def test_reload_on_change_notifies_subscribers(self):
+        recibidas = []
+        self.registro.obtener(self.ruta)
+        self.registro.suscribir(self.ruta, recibidas.append)
+
+        self.assertEqual(self.registro.comprobar(), [])
+        self._escribir([{"id": 1, "nombre": "Caja"}, {"id": 2, "nombre": "SBI"}])
+        self.assertEqual(len(self.registro.comprobar()), 1)
+        self.assertEqual([b["nombre"] for b in recibidas[-1]["banks"]], ["Caja", "SBI"])
+
+        self.registro.invalidar(self.ruta)
+        self.registro.obtener(self.ruta)
+        self.assertEqual(len(recibidas), 2)
+
+    def test_missing_file_returns_default(self):
+        ruta = os.path.join(self._tmp.name, "no_existe.json")
+        self.assertEqual(dict(self.registro.obtener(ruta, {})), {})
+
+    def test_bound_method_subscribers_are_weak(self):
+        class Vista:
+            def __init__(self):
+                self.avisos = 0
+
+            def recargar(self, _):
+                self.avisos += 1
+
+        vista = Vista()
+        self.registro.obtener(self.ruta)
+        self.registro.suscribir(self.ruta, vista.recargar)
+        self.registro.invalidar(self.ruta)
+        self.registro.obtener(self.ruta)
+        self.assertEqual(vista.avisos, 1)
+
+        del vista
+        gc.collect()
+        self.registro.invalidar(self.ruta)
+        self.registro.obtener(self.ruta)
+        self.assertEqual(self.registro._suscriptores[os.path.abspath(self.ruta)], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+"""
+Test Suite for SaldosMensuales — SHILLONG CONTABILIDAD v3.8.0 PRO
+Opening balances chained forward from the last closed month.
+"""
+
+import json
+import os
+import sys
+import unittest
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.base import CarpetaTemporalTestCase
+from models.ContabilidadData import ContabilidadData
+from models.SaldosMensuales import SaldosMensuales
+
+
+class TestSaldosEncadenados(CarpetaTemporalTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        with open("saldos.json", "w", encoding="utf-8") as f:
+            json.dump({"saldos": {
+                "2024-11": {"Caja": {"inicial": 0.0, "final": 100.0, "ingresos": 0, "gastos": 0},
+                            "cerrado": True},
+            }}, f)
+
+        self.data = ContabilidadData("test_ledger.json")
+        for fecha, debe, haber in [("10/12/2024", 30, 0), ("05/01/2025", 0, 50),
+                                   ("20/02/2025", 10, 0), ("15/04/2026", 0, 1000)]:
+            self.data.agregar_movimiento(fecha, "D", "x", "603000", debe, haber, banco="Caja")
+        self.saldos = SaldosMensuales("saldos.json", agregados=self.data.agregados)
+
+    def test_opening_chains_from_last_closed_month(self):
+        self.assertEqual(self.saldos.obtener_saldo_inicial(12, 2024, "Caja"), 100.0)
+        self.assertEqual(self.saldos.obtener_saldo_inicial(3, 2025, "Caja"), 110.0)
+        self.assertEqual(self.saldos.obtener_saldo_inicial(1, 2027, "Caja"), 1110.0)
+        self.assertIsNone(self.saldos.obtener_saldo_inicial(3, 2025, "SBI"))
+        self.assertIsNone(self.saldos.obtener_saldo_inicial(1, 2024, "Caja"))
+
+    def test_edit_invalidates_from_changed_month_forward(self):
+        self.assertEqual(self.saldos.obtener_saldo_inicial(3, 2025, "Caja"), 110.0)
+        self.assertIn((2025, 1, "Caja"), self.saldos._memo)
+
+        feb = self.data.movimientos_por_mes(2, 2025)[0]
+        self.data.actualizar_movimiento(feb, {"debe": 60})
+        self.assertIn((2025, 1, "Caja"), self.saldos._memo)      # antes del cambio: se conserva
+        self.assertNotIn((2025, 3, "Caja"), self.saldos._memo)
+        self.assertEqual(self.saldos.obtener_saldo_inicial(3, 2025, "Caja"), 60.0)
+
+    def test_manual_opening_is_an_anchor(self):
+        self.saldos.obtener_saldo_inicial(3, 2025, "Caja")
+        self.saldos.editar_saldo_inicial(2, 2025, "Caja", 500.0)
+        self.assertEqual(self.saldos.obtener_saldo_inicial(2, 2025, "Caja"), 500.0)
+        self.assertEqual(self.saldos.obtener_saldo_inicial(3, 2025, "Caja"), 490.0)
+
+    def test_without_aggregates_only_previous_closed_month(self):
+        sin_agregados = SaldosMensuales("saldos.json")
+        self.assertEqual(sin_agregados.obtener_saldo_inicial(12, 2024, "Caja"), 100.0)
+        self.assertIsNone(sin_agregados.obtener_saldo_inicial(1, 2025, "Caja"))
+
+    def test_second_instance_sees_closed_month(self):
+        otra = SaldosMensuales("saldos.json", agregados=self.data.agregados)
+        self.assertEqual(otra.obtener_saldo_inicial(3, 2025, "Caja"), 110.0)
+
+        self.saldos.cerrar_mes(1, 2025, {"Caja": {"inicial": 70.0, "final": 500.0}})
+        self.assertTrue(otra.mes_cerrado(1, 2025))
+        self.assertEqual(otra.obtener_saldo_inicial(3, 2025, "Caja"), 490.0)
+
+    def test_desconectar_stops_notifications(self):
+        self.saldos.obtener_saldo_inicial(3, 2025, "Caja")
+        self.saldos.desconectar()
+        self.assertNotIn(self.saldos._movimientos_cambiados, self.data.agregados._oyentes)
+
+        self.data.agregar_movimiento("01/01/2025", "D", "x", "603000", 1, 0, banco="Caja")
+        self.assertIsNone(self.saldos.agregados)
+
+    def test_ledger_shares_one_instance(self):
+        compartido = self.data.saldos_mensuales()
+        self.assertIs(self.data.saldos_mensuales(), compartido)
+        self.assertIs(compartido.agregados, self.data.agregados)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Test Suite for SugeridorCuentas — SHILLONG CONTABILIDAD v3.8.0 PRO
+Naive-Bayes account suggestions: ranking, prefixes, incremental learning
+and persisted state with a watermark.
+"""
+
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+# Add project root to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tests.base import CarpetaTemporalTestCase
+from models.ContabilidadData import ContabilidadData
+from models.SugeridorCuentas import SugeridorCuentas
+
+HISTORIAL = [
+    ("01/01/2025", "Factura luz enero", "628000"),
+    ("01/02/2025", "Factura luz febrero", "628000"),
+    ("03/02/2025", "Recibo agua", "628000"),
+    ("05/02/2025", "Factura gasolina jeep", "624000"),
+    ("06/02/2025", "Gasolina generador", "624000"),
+    ("07/02/2025", "Donativo parroquia", "720000"),
+]
+
+
+class TestSugeridorCuentas(CarpetaTemporalTestCase):
+
+    def setUp(self):
+        super().setUp()
+
+        self.data = ContabilidadData("libro.json")
+        for fecha, concepto, cuenta in HISTORIAL:
+            self.data.agregar_movimiento(fecha, "", concepto, cuenta, 10, 0)
+
+    def test_ranks_accounts_for_concept(self):
+        s = self.data.sugeridor
+        self.assertEqual(s.sugerir("luz marzo", k=1), ["628000"])
+        self.assertEqual(s.sugerir("factura gasolina")[0], "624000")
+        self.assertEqual(s.sugerir("gaso")[0], "624000")        # última palabra como prefijo
+        self.assertEqual(s.sugerir("gaso "), [])                 # palabra completa desconocida
+        self.assertEqual(s.sugerir("xyz"), [])
+
+    def test_learns_from_inserts_edits_and_deletes(self):
+        s = self.data.sugeridor
+        self.assertEqual(s.sugerir("telefono"), [])
+        self.data.agregar_movimiento("08/02/2025", "", "Recarga telefono", "629000", 5, 0)
+        self.assertEqual(s.sugerir("telefono"), ["629000"])
+
+        mov = self.data.buscar_texto("telefono")[0]
+        self.data.actualizar_movimiento(mov, {"cuenta": "628000"})
+        self.assertEqual(s.sugerir("telefono"), ["628000"])
+
+        self.data.eliminar_movimiento(mov)
+        self.assertEqual(s.sugerir("telefono"), [])
+
+    def test_state_persists_and_only_new_movements_are_learned(self):
+        self.data.sugeridor.sugerir("luz")        # entrena y guarda
+        self.data.cerrar()
+        self.assertTrue(self.data.archivo_sugeridor.exists())
+
+        # Alta que solo conoce el libro (el estado guardado es anterior)
+        self.data.agregar_movimiento("09/02/2025", "", "Luz oficina", "628000", 5, 0)
+        escritos = []
+        otro = ContabilidadData("libro.json")
+        with patch.object(SugeridorCuentas, "_aprender", autospec=True,
+                          side_effect=lambda s, m, signo: escritos.append(m["concepto"])):
+            otro.sugeridor.sugerir("luz")
+        self.assertEqual(escritos, ["Luz oficina"])
+
+    def test_edits_and_deletes_before_first_query_are_unlearned(self):
+        self.data.sugeridor.sugerir("luz")        # entrena y guarda
+        self.data.cerrar()
+
+        otro = ContabilidadData("libro.json")
+        self.assertFalse(otro.sugeridor._cargado)
+        generador = otro.buscar_texto("generador")[0]
+        agua = otro.buscar_texto("agua")[0]
+        otro.eliminar_movimiento(generador)
+        otro.actualizar_movimiento(agua, {"cuenta": "629000"})
+        # Alta posterior a la marca de agua, editada antes de cargar el modelo
+        otro.agregar_movimiento("09/02/2025", "", "Recarga telefono", "629000", 5, 0)
+        otro.cerrar()
+        tercero = ContabilidadData("libro.json")
+        telefono = tercero.buscar_texto("telefono")[0]
+        tercero.actualizar_movimiento(telefono, {"cuenta": "628000"})
+        tercero.cerrar()
+
+        ultimo = ContabilidadData("libro.json")
+        self.assertEqual(ultimo.sugeridor.sugerir("generador"), [])
+        self.assertEqual(ultimo.sugeridor.sugerir("agua"), ["629000"])
+        self.assertEqual(ultimo.sugeridor.sugerir("telefono"), ["628000"])
+        documentos = {c: n for c, n in ultimo.sugeridor.documentos.items() if n}
+        self.assertEqual(documentos, {"628000": 3, "624000": 1, "629000": 1, "720000": 1})
+
+    def test_reindexing_the_same_list_keeps_the_model(self):
+        s = self.data.sugeridor
+        s.sugerir("luz")
+        with patch.object(SugeridorCuentas, "guardar") as guardar:
+            self.data.reindexar()
+        guardar.assert_not_called()
+        self.assertTrue(s._cargado)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -9,16 +9,15 @@ con el libro mensual perfecto solicitado por las Hermanas.
 """
 
 import datetime
-import json
 from collections import defaultdict
 
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QComboBox, QPushButton,
-    QLabel, QTableWidget, QTableWidgetItem, QTextEdit, QMenu, QHeaderView,
+    QLabel, QTextEdit, QMenu,
     QFrame, QFileDialog, QMessageBox, QInputDialog, QLineEdit
 )
 from PySide6.QtCore import Qt, QMarginsF
-from PySide6.QtGui import QColor, QFont, QPainter, QTextDocument, QPageLayout
+from PySide6.QtGui import QPainter, QTextDocument, QPageLayout
 from PySide6.QtPrintSupport import QPrinter
 from PySide6.QtCharts import QChart, QChartView, QBarSeries, QBarSet, QBarCategoryAxis
 
@@ -27,6 +26,11 @@ try:
 except ImportError:
     ExportadorExcelMensual = None
 
+from models.CategoriasCuentas import categoria_de_cuenta
+from models.RegistroConfiguracion import nombres_bancos, plan_contable
+from ui.TablaMovimientos import TablaMovimientos, Columna, columna_importe
+from ui.EjecutorTrabajos import trabajo_con_progreso
+
 
 class CierreMensualView(QWidget):
 
@@ -44,7 +48,6 @@ class CierreMensualView(QWidget):
 
         self.bancos = self._cargar_bancos()
         self.cuentas = self._cargar_cuentas()
-        self.reglas_cache = self._cargar_reglas()
 
         self._build_ui()
         self.actualizar()
@@ -53,29 +56,16 @@ class CierreMensualView(QWidget):
     # CARGA DE DATOS
     # ---------------------------------------------------------
     def _cargar_bancos(self):
-        try:
-            with open("data/bancos.json", "r", encoding="utf-8") as f:
-                return ["Todos"] + [b["nombre"] for b in json.load(f).get("banks", [])]
-        except (IOError, json.JSONDecodeError, KeyError):
-            return ["Todos", "Caja"]
+        return ["Todos"] + (nombres_bancos() or ["Caja"])
 
     def _cargar_cuentas(self):
         cuentas = ["Todas"]
         try:
-            with open("data/plan_contable_v3.json", "r", encoding="utf-8") as f:
-                plan = json.load(f)
-                cuentas.extend([f"{k} – {v['nombre']}" for k, v in plan.items()])
-        except (IOError, json.JSONDecodeError, KeyError):
+            cuentas.extend([f"{k} – {v['nombre']}" for k, v in plan_contable().items()])
+        except (KeyError, TypeError):
             pass
         return cuentas
 
-    def _cargar_reglas(self):
-        try:
-            with open("data/reglas_conceptos.json", "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (IOError, json.JSONDecodeError):
-            return {}
-
     def _pedir_password(self):
         pwd, ok = QInputDialog.getText(
             self,
@@ -97,18 +87,9 @@ class CierreMensualView(QWidget):
         return self._pedir_password()
 
     def _cargar_saldos_iniciales(self, año, mes):
-        """Carga saldos iniciales desde saldos_mensuales.json para un mes/año."""
-        ruta = "data/saldos_mensuales.json"
-        try:
-            with open(ruta, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            clave = f"{año}-{mes:02d}"
-            return {
-                banco: vals.get("inicial", 0.0)
-                for banco, vals in data.get("saldos", {}).get(clave, {}).items()
-            }
-        except (IOError, json.JSONDecodeError, AttributeError):
-            return {}
+        """Saldo inicial por banco del mes/año (encadenado desde el último mes conocido)."""
+        saldos = self.data.saldos_mensuales()
+        return {b: saldos.obtener_saldo_inicial(mes, año, b) or 0.0 for b in nombres_bancos() or ["Caja"]}
 
     def _pedir_password(self):
         """Solicita la contraseña y devuelve True si es correcta."""
@@ -131,45 +112,6 @@ class CierreMensualView(QWidget):
             return True
         return self._pedir_password()
 
-    # ---------------------------------------------------------
-    # CATEGORÍAS
-    # ---------------------------------------------------------
-    def _categoria_de_cuenta(self, cuenta):
-        cuenta_str = str(cuenta).split(" ")[0].strip()
-
-        if cuenta_str in self.reglas_cache:
-            cat = self.reglas_cache[cuenta_str].get("categoria", "").upper()
-
-            mapeo = {
-                "COMESTIBLES Y BEBIDAS": "FOOD",
-                "ALIMENTACIÓN": "FOOD",
-                "FARMACIA Y MATERIAL SANITARIO": "MEDICINE",
-                "MEDICINA": "MEDICINE",
-                "MEDICAMENTOS": "MEDICINE",
-                "MATERIAL DE LIMPIEZA": "HYGIENE",
-                "LIMPIEZA": "HYGIENE",
-                "ASEO PERSONAL": "HYGIENE",
-                "LAVANDERÍA": "HYGIENE",
-                "SUELDOS Y SALARIOS": "SALARY",
-                "TELEFONÍA E INTERNET": "ONLINE",
-                "INTERNET": "ONLINE",
-                "TELEFONO": "ONLINE",
-                "FORMACIÓN": "TRAINING"
-            }
-            return mapeo.get(cat, cat)
-
-        # Rango contable genérico
-        try:
-            c = int(cuenta_str)
-            if 603000 <= c <= 603999: return "FOOD"
-            if 600000 <= c <= 609999: return "MEDICINE"
-            if 602400 <= c <= 602499: return "HYGIENE"
-            if 629200 <= c <= 629299: return "ONLINE"
-        except (ValueError, TypeError):
-            pass
-
-        return "OTROS"
-
     # ---------------------------------------------------------
     # UI
     # ---------------------------------------------------------
@@ -262,12 +204,8 @@ class CierreMensualView(QWidget):
         # ------------------------
         # TABLA — FORMATO OFICIAL
         # ------------------------
-        self.tabla = QTableWidget(0, 10)
-        self.tabla.setHorizontalHeaderLabels([
-            "Fecha", "Doc", "Concepto", "Cuenta", "Nombre", 
-            "Debe", "Haber", "Banco", "Estado", "Saldo"
-        ])
-        self.tabla.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
+        self.tabla = TablaMovimientos(self._columnas_tabla())
+        self.tabla.estirar_columna(2)
         layout.addWidget(self.tabla)
 
         # ------------------------
@@ -310,6 +248,27 @@ class CierreMensualView(QWidget):
         f.val = l2
         return f
 
+    # ---------------------------------------------------------
+    # COLUMNAS DE LA TABLA — filas: (mov, debe, haber, saldo)
+    # ---------------------------------------------------------
+    def _columnas_tabla(self):
+        def nombre(f):
+            cuenta_id = str(f[0].get("cuenta", ""))
+            return self.data.cuentas.get(cuenta_id, {}).get("nombre", "DESCONOCIDA")
+
+        return [
+            Columna("Fecha", lambda f: f[0].get("fecha")),
+            Columna("Doc", lambda f: f[0].get("documento")),
+            Columna("Concepto", lambda f: f[0].get("concepto")),
+            Columna("Cuenta", lambda f: f[0].get("cuenta")),
+            Columna("Nombre", nombre),
+            columna_importe("Debe", lambda f: f[1], color=lambda f, v: "#dc2626" if v > 0 else None),
+            columna_importe("Haber", lambda f: f[2], color=lambda f, v: "#16a34a" if v > 0 else None),
+            Columna("Banco", lambda f: f[0].get("banco")),
+            Columna("Estado", lambda f: f[0].get("estado")),
+            columna_importe("Saldo", lambda f: f[3]),
+        ]
+
     # ---------------------------------------------------------
     # ACTUALIZAR VISTA
     # ---------------------------------------------------------
@@ -332,53 +291,33 @@ class CierreMensualView(QWidget):
                 continue
             self.filtrados.append(m)
 
-        gas = sum(float(m.get("debe", 0)) for m in self.filtrados)
-        ing = sum(float(m.get("haber", 0)) for m in self.filtrados)
+        # KPIs: totales acumulados salvo que se filtre por banco Y cuenta a la vez
+        agregados = self.data.agregados
+        if banco == "Todos" and not cta_filt:
+            gas, ing, _ = agregados.totales_mes(año, mes)
+        elif not cta_filt:
+            gas, ing, _ = agregados.totales_banco_mes(año, mes, banco)
+        elif banco == "Todos":
+            gas, ing, _ = agregados.totales_cuenta_mes(año, mes, cta_filt)
+        else:
+            gas = sum(float(m.get("debe", 0)) for m in self.filtrados)
+            ing = sum(float(m.get("haber", 0)) for m in self.filtrados)
 
         self.card_gasto.val.setText(f"{gas:,.2f}")
         self.card_ingreso.val.setText(f"{ing:,.2f}")
         self.card_saldo.val.setText(f"{ing - gas:,.2f}")
 
         # TABLA
-        self.tabla.setRowCount(0)
         saldo = 0
-
+        filas = []
         for m in self.filtrados:
             d = float(m.get("debe", 0))
             h = float(m.get("haber", 0))
             saldo += h - d
+            filas.append((m, d, h, saldo))
+        self.tabla.set_filas(filas)
 
-            cuenta_id = str(m.get("cuenta", ""))
-            nombre_cuenta = self.data.cuentas.get(cuenta_id, {}).get("nombre", "DESCONOCIDA")
-
-            row = [
-                m.get("fecha"),
-                m.get("documento"),
-                m.get("concepto"),
-                m.get("cuenta"),
-                nombre_cuenta,
-                f"{d:,.2f}",
-                f"{h:,.2f}",
-                m.get("banco"),
-                m.get("estado"),
-                f"{saldo:,.2f}"
-            ]
-
-            r = self.tabla.rowCount()
-            self.tabla.insertRow(r)
-
-            for c, val in enumerate(row):
-                it = QTableWidgetItem(str(val))
-                
-                # Ajustar alineación para las nuevas columnas numéricas
-                if c in [5, 6, 9]:
-                    it.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                    if c == 5 and d > 0: it.setForeground(QColor("#dc2626"))
-                    if c == 6 and h > 0: it.setForeground(QColor("#16a34a"))
-                
-                self.tabla.setItem(r, c, it)
-
-        self._graficos(self.filtrados)
+        self._graficos(self.filtrados, mes, año, banco == "Todos" and not cta_filt)
 
         # Anomalías
         anomalies = []
@@ -418,11 +357,17 @@ class CierreMensualView(QWidget):
     # ---------------------------------------------------------
     # GRAFICOS
     # ---------------------------------------------------------
-    def _graficos(self, movs):
+    def _graficos(self, movs, mes=None, año=None, sin_filtros=False):
         cats = defaultdict(float)
-        for m in movs:
-            if float(m.get("debe", 0)) > 0:
-                cats[self._categoria_de_cuenta(m.get("cuenta"))] += float(m.get("debe", 0))
+        if sin_filtros:
+            # Mes completo: se agregan los totales por cuenta, no los movimientos
+            for cuenta, (debe, _, _) in self.data.agregados.por_cuenta(año, mes).items():
+                if debe > 0:
+                    cats[categoria_de_cuenta(cuenta)] += debe
+        else:
+            for m in movs:
+                if float(m.get("debe", 0)) > 0:
+                    cats[categoria_de_cuenta(m.get("cuenta"))] += float(m.get("debe", 0))
 
         if not cats:
             self.chart_view.setChart(QChart())
@@ -509,7 +454,7 @@ class CierreMensualView(QWidget):
             it = {
                 "fecha": m.get("fecha"),
                 "cuenta": m.get("cuenta"),
-                "categoria": self._categoria_de_cuenta(m.get("cuenta")),
+                "categoria": categoria_de_cuenta(m.get("cuenta")),
                 "concepto": m.get("concepto"),
                 "debe": d,
                 "haber": h,
@@ -522,30 +467,29 @@ class CierreMensualView(QWidget):
 
         per = f"{self.cbo_mes.currentText()} {self.cbo_año.currentText()}"
 
-        try:
-            if modo == "general":
-                ExportadorExcelMensual.exportar_general(ruta, prep, per)
-
-            elif modo == "categoria":
-                g = defaultdict(list)
-                for x in prep:
-                    g[x["categoria"]].append(x)
-                ExportadorExcelMensual.exportar_agrupado(
-                    ruta, dict(sorted(g.items())), per, "Categoría"
-                )
-
-            elif modo == "cuenta":
-                g = defaultdict(list)
-                for x in prep:
-                    g[f"{x['cuenta']} - {x['categoria']}"].append(x)
-                ExportadorExcelMensual.exportar_agrupado(
-                    ruta, dict(sorted(g.items())), per, "Cuenta"
-                )
-
-            QMessageBox.information(self, "OK", "Excel exportado correctamente.")
-
-        except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
+        if modo == "general":
+            tarea, args = ExportadorExcelMensual.exportar_general, (ruta, prep, per)
+
+        elif modo == "categoria":
+            g = defaultdict(list)
+            for x in prep:
+                g[x["categoria"]].append(x)
+            tarea, args = ExportadorExcelMensual.exportar_agrupado, (
+                ruta, dict(sorted(g.items())), per, "Categoría"
+            )
+
+        else:
+            g = defaultdict(list)
+            for x in prep:
+                g[f"{x['cuenta']} - {x['categoria']}"].append(x)
+            tarea, args = ExportadorExcelMensual.exportar_agrupado, (
+                ruta, dict(sorted(g.items())), per, "Cuenta"
+            )
+
+        trabajo_con_progreso(
+            self, "Exportando Excel", tarea, *args,
+            al_terminar=lambda _: QMessageBox.information(self, "OK", "Excel exportado correctamente."),
+        )
 
     # ---------------------------------------------------------
     # AUDITORÍA DEL MES
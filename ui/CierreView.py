@@ -20,6 +20,9 @@ from PySide6.QtGui import QColor, QFont
 import datetime
 from collections import defaultdict
 
+from models.CategoriasCuentas import categoria_de_cuenta
+from ui.EjecutorTrabajos import trabajo_con_progreso
+
 # Intentamos importar el motor de exportación
 try:
     from models.ExportadorExcelMensual import ExportadorExcelMensual
@@ -32,55 +35,10 @@ class CierreView(QWidget):
         self.data = data
         self.año_actual = datetime.date.today().year
         
-        self.reglas_cache = self._cargar_reglas()
         
         self._build_ui()
         self.actualizar()
 
-    def _cargar_reglas(self):
-        import json, os
-        try:
-            if os.path.exists("data/reglas_conceptos.json"):
-                with open("data/reglas_conceptos.json", "r", encoding="utf-8") as f:
-                    return json.load(f)
-        except (IOError, json.JSONDecodeError):
-            pass
-        return {}
-
-    # --- CATEGORIZACIÓN INTELIGENTE (IGUAL QUE EN LIBRO MENSUAL) ---
-    def _categoria_de_cuenta(self, cuenta):
-        cuenta_str = str(cuenta).split(" ")[0].strip()
-        
-        # 1. Reglas aprendidas
-        if cuenta_str in self.reglas_cache:
-            cat = self.reglas_cache[cuenta_str].get("categoria", "").upper()
-            mapeo = {
-                "COMESTIBLES Y BEBIDAS": "FOOD", "ALIMENTACIÓN": "FOOD",
-                "FARMACIA Y MATERIAL SANITARIO": "MEDICINE", "FARMACIA": "MEDICINE",
-                "MEDICAMENTOS": "MEDICINE", "MATERIAL DE LIMPIEZA": "HYGIENE", 
-                "LIMPIEZA": "HYGIENE", "LAVANDERÍA": "HYGIENE", "HIGIENE": "HYGIENE",
-                "ASEO PERSONAL": "HYGIENE", "SUELDOS Y SALARIOS": "SALARY", 
-                "NOMINAS": "SALARY", "TELEFONÍA E INTERNET": "ONLINE", 
-                "INTERNET": "ONLINE", "TELEFONO": "ONLINE", 
-                "TERAPIAS": "THERAPEUTIC", "DIETA": "DIET"
-            }
-            if cat in mapeo: return mapeo[cat]
-            return cat
-
-        # 2. Fallback numérico
-        try:
-            c = int(cuenta_str)
-            if 600000 <= c <= 609999: return "MEDICINE"
-            if 603000 <= c <= 603999: return "FOOD"
-            if 602400 <= c <= 602499: return "HYGIENE"
-            if 620401 <= c <= 620499: return "HYGIENE"
-            if 640000 <= c <= 649999: return "SALARY"
-            if 629200 <= c <= 629299: return "ONLINE"
-        except (ValueError, TypeError):
-            pass
-        
-        return "OTROS"
-
     def _build_ui(self):
         layout = QVBoxLayout(self)
         layout.setContentsMargins(30, 30, 30, 30)
@@ -187,13 +145,8 @@ class CierreView(QWidget):
 
         for i, nombre_mes in enumerate(meses):
             num_mes = i + 1
-            # Usar data.movimientos_por_mes (asumimos que existe y filtra bien)
-            # Si quieres hacerlo robusto manual:
-            movs = self._filtrar_movimientos_robust(num_mes, año)
-            
-            ing = sum(float(m.get("haber", 0)) for m in movs)
-            gas = sum(float(m.get("debe", 0)) for m in movs)
-            sal = ing - gas
+            # Totales acumulados del mes (sin recorrer los movimientos)
+            gas, ing, sal = self.data.totales_mes(num_mes, año)
             
             total_ingresos += ing
             total_gastos += gas
@@ -227,25 +180,6 @@ class CierreView(QWidget):
         color_res = "#16a34a" if resultado >= 0 else "#dc2626"
         self.kpi_resultado.valor_lbl.setStyleSheet(f"color: {color_res}; font-weight: 800; font-size: 32px;")
 
-    def _filtrar_movimientos_robust(self, mes, año):
-        """Filtrado manual robusto que soporta fechas con guiones y barras."""
-        filtrados = []
-        for m in self.data.movimientos:
-            f_str = str(m.get("fecha", ""))
-            try:
-                if "/" in f_str: d, mm, a = map(int, f_str.split("/"))
-                elif "-" in f_str:
-                    parts = list(map(int, f_str.split("-")))
-                    if parts[0] > 1000: a, mm, d = parts
-                    else: d, mm, a = parts
-                else: continue
-                
-                if mm == mes and a == año:
-                    filtrados.append(m)
-            except (ValueError, IndexError):
-                continue
-        return filtrados
-
     # ============================================================
     # EXPORTACIONES (NUEVAS Y POTENTES)
     # ============================================================
@@ -256,25 +190,10 @@ class CierreView(QWidget):
         datos_prep = []
         saldo = 0
         
-        # Recorremos todos los meses para asegurar orden cronológico o filtrar todo de golpe
+        # Índice por mes (fechas parseadas una sola vez al cargar), en orden de meses
         todos_movs = []
-        for m in self.data.movimientos:
-            f_str = str(m.get("fecha", ""))
-            try:
-                if "/" in f_str: d, mm, a = map(int, f_str.split("/"))
-                elif "-" in f_str:
-                    parts = list(map(int, f_str.split("-")))
-                    if parts[0] > 1000: a, mm, d = parts
-                    else: d, mm, a = parts
-                else: continue
-                
-                if a == año:
-                    todos_movs.append(m)
-            except (ValueError, IndexError):
-                continue
-            
-        # Ordenar (opcional)
-        # todos_movs.sort(...) 
+        for mes in range(1, 13):
+            todos_movs.extend(self.data.movimientos_por_mes(mes, año))
 
         for m in todos_movs:
             d = float(m.get("debe", 0))
@@ -283,7 +202,7 @@ class CierreView(QWidget):
             
             item = m.copy()
             item["saldo"] = saldo
-            item["categoria"] = self._categoria_de_cuenta(m.get("cuenta"))
+            item["categoria"] = categoria_de_cuenta(m.get("cuenta"))
             item["nombre_cuenta"] = self.data.obtener_nombre_cuenta(m.get("cuenta"))
             datos_prep.append(item)
             
@@ -307,21 +226,22 @@ class CierreView(QWidget):
         datos = self._recopilar_datos_anuales()
         periodo = f"EJERCICIO {año}"
 
-        try:
-            if modo == "general":
-                ExportadorExcelMensual.exportar_general(archivo, datos, periodo)
-            elif modo == "categoria":
-                g = defaultdict(list)
-                for x in datos: g[x["categoria"]].append(x)
-                ExportadorExcelMensual.exportar_agrupado(archivo, dict(sorted(g.items())), periodo, "Categoría")
-            elif modo == "cuenta":
-                g = defaultdict(list)
-                for x in datos: g[f"{x['cuenta']} - {x['nombre_cuenta']}"].append(x)
-                ExportadorExcelMensual.exportar_agrupado(archivo, dict(sorted(g.items())), periodo, "Cuenta")
-                
-            QMessageBox.information(self, "Éxito", f"Reporte Anual '{modo}' generado.")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
+        if modo == "general":
+            tarea, args = ExportadorExcelMensual.exportar_general, (archivo, datos, periodo)
+        elif modo == "categoria":
+            g = defaultdict(list)
+            for x in datos: g[x["categoria"]].append(x)
+            tarea, args = ExportadorExcelMensual.exportar_agrupado, (archivo, dict(sorted(g.items())), periodo, "Categoría")
+        else:
+            g = defaultdict(list)
+            for x in datos: g[f"{x['cuenta']} - {x['nombre_cuenta']}"].append(x)
+            tarea, args = ExportadorExcelMensual.exportar_agrupado, (archivo, dict(sorted(g.items())), periodo, "Cuenta")
+
+        # El libro Excel se construye en segundo plano; la ventana sigue respondiendo
+        trabajo_con_progreso(
+            self, "Exportando Excel anual", tarea, *args,
+            al_terminar=lambda _: QMessageBox.information(self, "Éxito", f"Reporte Anual '{modo}' generado."),
+        )
 
     def _exportar_general_anual(self): self._exportar_base("general")
     def _exportar_categorias_anual(self): self._exportar_base("categoria")
@@ -336,27 +256,18 @@ class CierreView(QWidget):
         if ExportadorExcelMensual is None:
             return
 
-        # Preparar datos matriz
-        matriz = defaultdict(lambda: [0.0]*12)
-        nombres = {}
-        
-        # Reutilizamos la lógica de recopilación para no repetir bucles feos
-        # Pero el evolutivo necesita estructura específica, así que lo hacemos manual rápido
-        for m in range(1, 13):
-            movs = self._filtrar_movimientos_robust(m, año)
-            for x in movs:
-                if float(x.get("debe", 0)) > 0:
-                    cta = str(x.get("cuenta", "S/N"))
-                    nombres[cta] = self.data.obtener_nombre_cuenta(cta)
-                    matriz[cta][m-1] += float(x["debe"])
-        
-        datos = {k: (nombres.get(k, ""), v, sum(v)) for k, v in matriz.items()}
+        # Matriz cuenta × mes en una sola pasada agrupada (solo cuentas con gasto)
+        datos = {
+            cta: (self.data.obtener_nombre_cuenta(cta), debe, sum(debe))
+            for cta, (debe, _) in self.data.informes().por_cuenta_mes(año).items()
+            if any(d > 0 for d in debe)
+        }
         
         try:
             # Asumimos que el motor tiene 'exportar_evolutivo_anual', si no, habría que añadirlo
             # Si falla, es porque el motor no tiene este método específico.
             if hasattr(ExportadorExcelMensual, "exportar_evolutivo_anual"):
-                ExportadorExcelMensual.exportar_evolutivo_anual(archivo, dict(sorted(datos.items())), año)
+                ExportadorExcelMensual.exportar_evolutivo_anual(archivo, datos, año)
                 QMessageBox.information(self, "Éxito", "Evolutivo generado.")
             else:
                 QMessageBox.warning(self, "Aviso", "El motor no soporta exportación de matriz evolutiva.")
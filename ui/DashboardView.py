@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 """
 DashboardView.py — SHILLONG CONTABILIDAD v3.7.8 PRO
-✅ AUTO-REFRESH cada 5 segundos
+✅ AUTO-REFRESH cada 5 segundos (solo recalcula si los datos cambiaron)
 ✅ BOTÓN DEPURAR integrado
 ✅ Totales anuales en tarjetas
 """
@@ -11,7 +11,7 @@ from PySide6.QtWidgets import (
     QGridLayout, QScrollArea, QPushButton, QComboBox, QListWidget, 
     QListWidgetItem, QMessageBox
 )
-from PySide6.QtCore import Qt, QDate, Signal, QTimer
+from PySide6.QtCore import Qt, Signal, QTimer
 from PySide6.QtGui import QColor, QFont, QPainter
 from PySide6.QtCharts import (
     QChart, QChartView, QPieSeries, QBarSeries, QBarSet, 
@@ -20,10 +20,12 @@ from PySide6.QtCharts import (
 
 import datetime
 from collections import defaultdict
-from pathlib import Path
-import json
 import os
 
+from models.AgregadosMovimientos import importe
+from models.CategoriasCuentas import categoria_de_cuenta
+from models.RegistroConfiguracion import bancos, nombres_bancos
+
 print(">>> DASHBOARD CARGADO DESDE:", __file__)
 
 
@@ -34,7 +36,7 @@ class DashboardView(QWidget):
         super().__init__()
         self.data = data
         self.año_sistema = datetime.date.today().year
-        self.reglas_cache = self._cargar_reglas()
+        self._clave_mostrada = None  # Estado de los datos en el último refresco
         
         # 🔥 NUEVO: Timer para auto-refresh
         self.timer_auto_refresh = QTimer(self)
@@ -62,48 +64,10 @@ class DashboardView(QWidget):
         self.timer_auto_refresh.stop()
         super().closeEvent(event)
 
-    def _cargar_reglas(self):
-        try:
-            if os.path.exists("data/reglas_conceptos.json"):
-                with open("data/reglas_conceptos.json", "r", encoding="utf-8") as f:
-                    return json.load(f)
-        except (IOError, json.JSONDecodeError) as e:
-            print(f"[DashboardView] Error cargando reglas: {e}")
-        return {}
-
     def _cargar_saldos_iniciales(self, año, mes):
-        """Carga saldos iniciales por banco desde saldos_mensuales.json para el mes/año indicado."""
-        ruta = Path("data/saldos_mensuales.json")
-        if not ruta.exists():
-            return {}
-        try:
-            data = json.loads(ruta.read_text(encoding="utf-8"))
-            clave = f"{año}-{mes:02d}"
-            return {
-                banco: valores.get("inicial", 0.0)
-                for banco, valores in data.get("saldos", {}).get(clave, {}).items()
-            }
-        except (json.JSONDecodeError, OSError, AttributeError) as e:
-            print(f"[DashboardView] Error cargando saldos iniciales: {e}")
-            return {}
-
-    def _categoria_de_cuenta(self, cuenta):
-        cuenta_str = str(cuenta).split(" ")[0].strip()
-        if cuenta_str in self.reglas_cache:
-            cat = self.reglas_cache[cuenta_str].get("categoria", "").upper()
-            mapeo = {
-                "COMESTIBLES Y BEBIDAS": "FOOD", "ALIMENTACIÓN": "FOOD",
-                "FARMACIA Y MATERIAL SANITARIO": "MEDICINE", "FARMACIA": "MEDICINE",
-                "MEDICAMENTOS": "MEDICINE",
-                "MATERIAL DE LIMPIEZA": "HYGIENE", "LIMPIEZA": "HYGIENE", 
-                "LAVANDERÍA": "HYGIENE", "HIGIENE": "HYGIENE", "ASEO PERSONAL": "HYGIENE",
-                "SUELDOS Y SALARIOS": "SALARY", "NOMINAS": "SALARY",
-                "TELEFONÍA E INTERNET": "ONLINE", "INTERNET": "ONLINE", 
-                "TELEFONO": "ONLINE", "TERAPIAS": "THERAPEUTIC", "DIETA": "DIET"
-            }
-            if cat in mapeo: return mapeo[cat]
-            return "OTROS"
-        return "OTROS"
+        """Saldo inicial por banco del mes/año (encadenado desde el último mes conocido)."""
+        saldos = self.data.saldos_mensuales()
+        return {b: saldos.obtener_saldo_inicial(mes, año, b) or 0.0 for b in self._obtener_bancos()}
 
     def _build_ui(self):
         main_layout = QVBoxLayout(self)
@@ -260,13 +224,14 @@ class DashboardView(QWidget):
 
     # 🔥 NUEVO: Auto-actualización silenciosa
     def _auto_actualizar(self):
-        """Actualización automática cada 5 segundos."""
+        """
+        Comprobación cada 5 segundos: solo recarga el JSON si cambió en disco
+        y solo recalcula el panel si los datos cambiaron desde el último refresco.
+        """
         try:
-            # Recargar datos desde el archivo
-            self.data.cargar_datos()
-            
-            # Actualizar vista
-            self.actualizar_datos()
+            self.data.recargar_si_cambio()
+            if not self.actualizar_datos():
+                return
             
             # Actualizar timestamp
             ahora = datetime.datetime.now().strftime("%H:%M:%S")
@@ -303,8 +268,7 @@ class DashboardView(QWidget):
             corregidos = self._ejecutar_depuracion()
             
             if corregidos > 0:
-                # Recargar datos
-                self.data.cargar_datos()
+                # Los índices y agregados ya están al día: no hace falta recargar
                 self.actualizar_datos()
                 
                 QMessageBox.information(
@@ -329,21 +293,11 @@ class DashboardView(QWidget):
             )
 
     def _ejecutar_depuracion(self):
-        """Lógica de depuración (basada en fix_data.py)."""
-        archivo = Path("data/shillong_2026.json")
-        
-        if not archivo.exists():
-            raise FileNotFoundError(f"No se encuentra el archivo: {archivo}")
+        """Lógica de depuración (basada en fix_data.py) sobre los datos en memoria."""
+        correcciones = []
 
-        # Cargar datos
-        with open(archivo, "r", encoding="utf-8") as f:
-            data = json.load(f)
-
-        movimientos = data.get("movimientos", [])
-        corregidos = 0
-
-        # Recorrer y corregir
-        for m in movimientos:
+        # Recorrer y detectar
+        for m in self.data.movimientos:
             cuenta = str(m.get("cuenta", ""))
             debe = float(m.get("debe", 0))
             haber = float(m.get("haber", 0))
@@ -352,110 +306,82 @@ class DashboardView(QWidget):
             # con HABER > 0 y DEBE = 0 están MAL
             if (cuenta.startswith("6") or cuenta.startswith("2")) and haber > 0 and debe == 0:
                 # Corregir: mover de HABER a DEBE
-                m["debe"] = haber
-                m["haber"] = 0.0
-                m["saldo"] = -haber
-                corregidos += 1
-
-        # Guardar si hubo cambios
-        if corregidos > 0:
-            data["fecha_guardado"] = datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-            
-            with open(archivo, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
+                correcciones.append((m["id"], {"debe": haber, "haber": 0.0, "saldo": -haber}))
+
+        # Cada corrección pasa por actualizar_movimiento: re-indexa, ajusta los
+        # agregados y queda en el diario (no hace falta reescribir el snapshot)
+        corregidos = 0
+        for id_mov, cambios in correcciones:
+            corregidos += bool(self.data.actualizar_movimiento(id_mov, cambios))
 
         return corregidos
 
-    def actualizar_datos(self):
+    def _clave_refresco(self, año):
+        """Todo lo que puede cambiar el contenido del panel."""
+        try:
+            saldos_mtime = os.stat(self.data.saldos_mensuales().archivo).st_mtime_ns
+        except OSError:
+            saldos_mtime = None
+        # bancos(): instantánea del registro; cambia solo si bancos.json cambió
+        return (self.data.generacion, año, datetime.date.today(), saldos_mtime, bancos())
+
+    def actualizar_datos(self, *_):
+        """Recalcula KPIs y gráficos. Retorna False si no había nada nuevo que mostrar."""
         try:
             año = int(self.cbo_año.currentText())
         except (ValueError, TypeError):
             año = self.año_sistema
+
+        clave = self._clave_refresco(año)
+        if clave == self._clave_mostrada:
+            return False
+        self._clave_mostrada = clave
         
         self.lbl_titulo.setText(f"Panel de Control {año}")
         
-        hoy = QDate.currentDate()
-        
-        t_ing_anual, t_gas_anual = 0, 0
-        ing_meses, gas_meses = [0]*12, [0]*12
+        hoy = datetime.date.today()
+        agregados = self.data.agregados
+
+        # Totales del año: lectura directa de los acumulados (sin recorrer el libro)
+        ing_meses, gas_meses = [0.0]*12, [0.0]*12
+        for mm in range(1, 13):
+            gas_meses[mm-1], ing_meses[mm-1], _ = agregados.totales_mes(año, mm)
+        t_ing_anual, t_gas_anual = sum(ing_meses), sum(gas_meses)
+
+        # Categorías anuales: pocas cuentas distintas, no miles de movimientos
         cats_anual = defaultdict(float)
-        pendientes_proyeccion = 0
-        alertas = []
-        
+        for cuenta, (d_val, _, _) in agregados.por_cuenta(año).items():
+            if d_val > 0:
+                cats_anual[categoria_de_cuenta(cuenta, oficial=True)] += d_val
+
         # Tomar como referencia el mes más reciente del año seleccionado (según los movimientos)
-        meses_del_año = []
-        for m in self.data.movimientos:
-            f_raw = str(m.get("fecha", ""))
-            try:
-                if "/" in f_raw:
-                    _, mm, a = map(int, f_raw.split("/"))
-                elif "-" in f_raw:
-                    p = f_raw.split("-")
-                    a, mm, _ = (int(p[0]), int(p[1]), int(p[2])) if len(p[0]) == 4 else (int(p[2]), int(p[1]), int(p[0]))
-                else:
-                    continue
-                if a == año:
-                    meses_del_año.append(mm)
-            except Exception:
-                continue
-        mes_referencia = max(meses_del_año) if meses_del_año else datetime.date.today().month
+        meses_del_año = agregados.meses_con_datos(año)
+        mes_referencia = max(meses_del_año) if meses_del_año else hoy.month
 
+        # Saldos Bancos (Histórico completo, solo pagados)
         saldos_iniciales = self._cargar_saldos_iniciales(año, mes_referencia)
-        saldos = {b: saldos_iniciales.get(b, 0.0) for b in self._obtener_bancos()}
+        saldos = {
+            b: saldos_iniciales.get(b, 0.0) + agregados.saldo_banco(b, "pagado")
+            for b in self._obtener_bancos()
+        }
 
-        for m in self.data.movimientos:
-            f_raw = str(m.get("fecha",""))
-            try:
-                if "/" in f_raw:
-                    d, mm, a = map(int, f_raw.split("/"))
-                elif "-" in f_raw:
-                    p = f_raw.split("-")
-                    a, mm, d = (int(p[0]), int(p[1]), int(p[2])) if len(p[0]) == 4 else (int(p[2]), int(p[1]), int(p[0]))
-                else:
-                    continue
-                fecha_obj = QDate(a, mm, d)
-            except (ValueError, IndexError):
+        # Proyección (Pendientes futuros cercanos): solo se recorren los pendientes
+        pendientes_proyeccion = 0
+        alertas = []
+        for m in self.data.pendientes():
+            fecha_obj = self.data.fecha_de(m)
+            if fecha_obj is None:
                 continue
+            h, d_val = importe(m.get("haber", 0)), importe(m.get("debe", 0))
 
-            try:
-                h = float(str(m.get("haber", 0)).replace(",", "."))
-                d_val = float(str(m.get("debe", 0)).replace(",", "."))
-            except (ValueError, TypeError):
-                h, d_val = 0, 0
-            
-            banco = m.get("banco", "Caja")
-            estado = str(m.get("estado","")).lower()
-
-            # 1. Saldos Bancos (Histórico completo, solo pagados)
-            if banco in saldos and estado == "pagado":
-                saldos[banco] += (h - d_val)
-
-            # 2. Datos del AÑO SELECCIONADO (KPIs y Gráficos)
-            if a == año:
-                # Sumamos para KPIs Anuales
-                t_ing_anual += h
-                t_gas_anual += d_val
-                
-                # Desglose mensual para gráfico
-                if 1 <= mm <= 12:
-                    ing_meses[mm-1] += h
-                    gas_meses[mm-1] += d_val
-                
-                # Categorías anuales
-                if d_val > 0:
-                    cat = self._categoria_de_cuenta(m.get("cuenta"))
-                    cats_anual[cat] += d_val
-
-            # 3. Proyección (Pendientes futuros cercanos)
-            if estado == "pendiente":
-                dias_diff = hoy.daysTo(fecha_obj)
-                if 0 <= dias_diff <= 30:
-                    pendientes_proyeccion += (h - d_val)
-                
-                if dias_diff < 0:
-                    alertas.append(f"⚠️ VENCIDA ({abs(dias_diff)}d): {m.get('concepto')}")
-                elif dias_diff <= 7:
-                    alertas.append(f"⏰ Vence pronto ({dias_diff}d): {m.get('concepto')}")
+            dias_diff = (fecha_obj - hoy).days
+            if 0 <= dias_diff <= 30:
+                pendientes_proyeccion += (h - d_val)
+
+            if dias_diff < 0:
+                alertas.append(f"⚠️ VENCIDA ({abs(dias_diff)}d): {m.get('concepto')}")
+            elif dias_diff <= 7:
+                alertas.append(f"⏰ Vence pronto ({dias_diff}d): {m.get('concepto')}")
 
         # Actualizar KPIs
         self._update_kpi(self.card_ingreso, t_ing_anual)
@@ -470,6 +396,7 @@ class DashboardView(QWidget):
         self._update_alertas(alertas)
         self._update_chart_barras(ing_meses, gas_meses)
         self._update_chart_pie(cats_anual)
+        return True
 
     def _crear_kpi_card(self, tit, col, icon):
         card = QFrame()
@@ -566,8 +493,5 @@ class DashboardView(QWidget):
         self.chart_pie.addSeries(s)
 
     def _obtener_bancos(self):
-        try:
-            with open("data/bancos.json", "r", encoding="utf-8") as f:
-                return [b["nombre"] for b in json.load(f).get("banks", [])]
-        except (IOError, json.JSONDecodeError, KeyError):
-            return ["Caja"]
+        # Instantánea compartida: solo se relee bancos.json si cambió en disco
+        return nombres_bancos() or ["Caja"]
@@ -10,8 +10,9 @@ from PySide6.QtWidgets import (
     QProgressBar
 )
 from PySide6.QtCore import Qt
-import csv
-import datetime
+
+from models.ImportacionMovimientos import ImportacionMovimientos
+from ui.EjecutorTrabajos import ejecutor
 
 # Intentamos importar openpyxl
 try:
@@ -25,9 +26,13 @@ class ImportarExcelDialog(QDialog):
         self.setWindowTitle("📥 Importar Movimientos")
         self.resize(850, 550)
         self.data_manager = data_manager
-        self.datos_leidos = [] 
+        self.importacion = None
+        self.resumen = None
+        self._trabajo = None
         
         self._build_ui()
+        # Cerrar el diálogo corta la lectura en curso
+        self.rejected.connect(self._cancelar_lectura)
 
     def _build_ui(self):
         layout = QVBoxLayout(self)
@@ -100,123 +105,74 @@ class ImportarExcelDialog(QDialog):
         archivo, _ = QFileDialog.getOpenFileName(self, "Abrir Archivo", "", "Archivos de Datos (*.csv *.xlsx *.xls)")
         if not archivo: return
 
-        self.lbl_status.setText("Analizando archivo...")
-        self.datos_leidos = []
-        
-        try:
-            if archivo.endswith(".csv"):
-                self._leer_csv(archivo)
-            elif archivo.endswith((".xlsx", ".xls")):
-                if openpyxl:
-                    self._leer_excel(archivo)
-                else:
-                    QMessageBox.warning(self, "Falta Librería", "Para leer Excel necesita instalar openpyxl. Use CSV por ahora.")
-                    return
-            else:
-                return
-
-            self._llenar_tabla_preview()
-            
-            if self.datos_leidos:
-                self.btn_import.setEnabled(True)
-                self.lbl_status.setText(f"✅ Listo para importar {len(self.datos_leidos)} movimientos.")
-            else:
-                self.btn_import.setEnabled(False)
-                self.lbl_status.setText("⚠️ No se encontraron datos válidos.")
-
-        except Exception as e:
-            QMessageBox.critical(self, "Error Crítico", f"Error al leer el archivo:\n{str(e)}")
-            self.lbl_status.setText("Error de lectura.")
-
-    def _leer_csv(self, ruta):
-        try:
-            with open(ruta, 'r', encoding='utf-8', errors='replace') as f:
-                sample = f.read(2048)
-                dialect = csv.Sniffer().sniff(sample)
-        except:
-            dialect = 'excel'
+        if archivo.endswith((".xlsx", ".xls")) and not openpyxl:
+            QMessageBox.warning(self, "Falta Librería", "Para leer Excel necesita instalar openpyxl. Use CSV por ahora.")
+            return
+        if not archivo.endswith((".csv", ".xlsx", ".xls")):
+            return
 
-        with open(ruta, 'r', encoding='utf-8', errors='replace') as f:
-            reader = csv.reader(f, dialect)
-            rows = list(reader)
-            self._parsear_filas(rows)
-
-    def _leer_excel(self, ruta):
-        wb = openpyxl.load_workbook(ruta, data_only=True)
-        ws = wb.active
-        rows = []
-        for row in ws.iter_rows(values_only=True):
-            rows.append([str(c).strip() if c is not None else "" for c in row])
-        self._parsear_filas(rows)
+        self.lbl_status.setText("Analizando archivo...")
+        # Copia tomada aquí: el deduplicador recorre los existentes en el hilo
+        # del ejecutor mientras la UI puede seguir añadiendo al libro
+        self.importacion = ImportacionMovimientos(archivo, existentes=list(self.data_manager.movimientos))
+        self.resumen = None
+        self._ocupado(True)
+
+        # Primera pasada en segundo plano: cuenta válidos/errores y guarda una
+        # muestra para la vista previa (el archivo no se carga entero en memoria)
+        self._trabajo = ejecutor().enviar(
+            self.importacion.analizar,
+            al_terminar=self._archivo_analizado,
+            al_fallar=self._error_lectura,
+            al_progreso=self._avance,
+            con_progreso=True,
+            dueño=self,
+        )
 
-    def _parsear_filas(self, rows):
-        header_map = {}
-        start_index = -1
-        
-        # BUSCAR CABECERA
-        for i, row in enumerate(rows):
-            row_lower = [str(x).lower().strip() for x in row]
-            if "fecha" in row_lower and "cuenta" in row_lower:
-                start_index = i
-                for col_idx, val in enumerate(row_lower):
-                    if "fecha" in val: header_map["fecha"] = col_idx
-                    elif "doc" in val: header_map["documento"] = col_idx
-                    elif "concepto" in val: header_map["concepto"] = col_idx
-                    elif "cuenta" in val: header_map["cuenta"] = col_idx
-                    elif "debe" in val or "cargo" in val: header_map["debe"] = col_idx
-                    elif "haber" in val or "abono" in val: header_map["haber"] = col_idx
-                    elif "banco" in val: header_map["banco"] = col_idx
-                    elif "estado" in val: header_map["estado"] = col_idx
-                break
+    def _ocupado(self, si):
+        self.btn_select.setEnabled(not si)
+        self.btn_import.setEnabled(False)
+        self.progress.setMaximum(100)
+        self.progress.setValue(0)
+        self.progress.setVisible(si)
+
+    def _avance(self, porcentaje, texto):
+        self.progress.setValue(porcentaje)
+        if texto:
+            self.lbl_status.setText(texto)
+
+    def _cancelar_lectura(self):
+        if self._trabajo is not None:
+            self._trabajo.cancelar()
+
+    def _archivo_analizado(self, resumen):
+        self._trabajo = None
+        self.resumen = resumen
+        self._ocupado(False)
+        self._llenar_tabla_preview()
         
-        if start_index == -1:
-            raise Exception("No se encontró la fila de cabeceras (Busqué 'Fecha' y 'Cuenta').")
-
-        # PROCESAR DATOS
-        for i in range(start_index + 1, len(rows)):
-            row = rows[i]
-            if not row or len(row) <= header_map.get("fecha", 0): continue
-            
-            try:
-                def get(k): 
-                    idx = header_map.get(k)
-                    return str(row[idx]).strip() if idx is not None and idx < len(row) else ""
-
-                fecha_raw = get("fecha")
-                if not fecha_raw: continue
-
-                # Normalizar Fecha
-                fecha_fmt = fecha_raw
-                if "-" in fecha_raw and len(fecha_raw.split("-")) == 3: 
-                    parts = fecha_raw.split(" ")[0].split("-")
-                    if len(parts[0]) == 4:
-                        fecha_fmt = f"{parts[2]}/{parts[1]}/{parts[0]}"
-                
-                # Normalizar importes
-                debe = float(get("debe").replace(",", ".") or 0)
-                haber = float(get("haber").replace(",", ".") or 0)
-
-                if debe == 0 and haber == 0: continue
-
-                mov = {
-                    "fecha": fecha_fmt,
-                    "documento": get("documento"),
-                    "concepto": get("concepto"),
-                    "cuenta": get("cuenta").split(" ")[0],
-                    "debe": debe,
-                    "haber": haber,
-                    "banco": get("banco") or "Caja",
-                    "estado": get("estado").lower() or "pagado",
-                    "moneda": "INR"
-                }
-                self.datos_leidos.append(mov)
-
-            except Exception as e:
-                print(f"Fila {i} ignorada: {e}")
+        if resumen.validos:
+            self.btn_import.setEnabled(True)
+            texto = f"✅ Listo para importar {resumen.validos} movimientos."
+            if resumen.duplicados:
+                texto += f" ({resumen.duplicados} duplicados se omitirán)"
+            if resumen.num_errores:
+                texto += f" ({resumen.num_errores} filas con errores)"
+            self.lbl_status.setText(texto)
+        else:
+            self.btn_import.setEnabled(False)
+            self.lbl_status.setText("⚠️ No se encontraron datos válidos.")
+
+    def _error_lectura(self, e):
+        self._trabajo = None
+        self._ocupado(False)
+        QMessageBox.critical(self, "Error Crítico", f"Error al leer el archivo:\n{str(e)}")
+        self.lbl_status.setText("Error de lectura.")
 
     def _llenar_tabla_preview(self):
-        self.tabla.setRowCount(len(self.datos_leidos))
-        for i, m in enumerate(self.datos_leidos):
+        muestra = self.resumen.muestra
+        self.tabla.setRowCount(len(muestra))
+        for i, m in enumerate(muestra):
             self.tabla.setItem(i, 0, QTableWidgetItem(m["fecha"]))
             self.tabla.setItem(i, 1, QTableWidgetItem(m["documento"]))
             self.tabla.setItem(i, 2, QTableWidgetItem(m["concepto"]))
@@ -228,40 +184,69 @@ class ImportarExcelDialog(QDialog):
 
     def _procesar_importacion(self):
         """
-        Versión simplificada: Sin pregunta SI/NO. 
-        Guarda directamente y muestra progreso.
+        Segunda pasada: el hilo del ejecutor lee y valida el archivo por lotes
+        y cada lote se añade al libro aquí, en el hilo de la UI (los índices
+        del libro no se tocan desde otro hilo). Se guarda una sola vez al final.
         """
-        if not self.datos_leidos: return
+        if not self.resumen or not self.resumen.validos: return
         
         # Bloquear botón para no doble clic
-        self.btn_import.setEnabled(False)
-        self.progress.setVisible(True)
-        self.progress.setMaximum(len(self.datos_leidos))
+        self._ocupado(True)
+        self.btn_select.setEnabled(False)
         self.lbl_status.setText("Guardando datos...")
-        
-        # 1. Añadir a memoria
-        for i, mov in enumerate(self.datos_leidos):
-            self.data_manager.agregar_movimiento(
-                fecha=mov["fecha"],
-                documento=mov["documento"],
-                concepto=mov["concepto"],
-                cuenta=mov["cuenta"],
-                debe=mov["debe"],
-                haber=mov["haber"],
-                moneda=mov["moneda"],
-                banco=mov["banco"],
-                estado=mov["estado"]
-            )
-            self.progress.setValue(i + 1)
-        
-        # 2. Forzar escritura en disco (usando el método seguro que creamos antes)
-        if hasattr(self.data_manager, "guardar_datos"):
-            self.data_manager.guardar_datos()
-        elif hasattr(self.data_manager, "save_data"):
-            self.data_manager.save_data()
-        elif hasattr(self.data_manager, "guardar"):
-            self.data_manager.guardar()
-            
-        # 3. Éxito
-        QMessageBox.information(self, "¡Completado!", f"Se han importado {len(self.datos_leidos)} movimientos correctamente.")
-        self.accept()
\ No newline at end of file
+        self._agregados = 0
+        self._errores_lote = []
+        # Los lotes se añaden al libro mientras se lee: el hilo trabaja con una copia
+        self.importacion.existentes = list(self.data_manager.movimientos)
+
+        def _leer_lotes(progreso, entregar):
+            resumen = None
+            for movimientos, resumen in self.importacion.lotes(progreso):
+                entregar(movimientos)
+            return resumen
+
+        self._trabajo = ejecutor().enviar(
+            _leer_lotes,
+            al_parcial=self._agregar_lote,
+            al_progreso=self._avance,
+            al_terminar=self._importacion_terminada,
+            al_fallar=self._importacion_fallida,
+            al_cancelar=lambda: self._guardar_importado(),
+            con_progreso=True,
+            dueño=self,
+        )
+
+    def _agregar_lote(self, movimientos):
+        # 1. Alta masiva del lote en memoria; se persiste una vez al terminar
+        agregados, errores = self.data_manager.agregar_movimientos(movimientos, persistir=False)
+        self._agregados += agregados
+        self._errores_lote.extend(errores)
+
+    def _guardar_importado(self):
+        self._trabajo = None
+        if self._agregados:
+            self.data_manager.guardar(segundo_plano=True)
+
+    def _importacion_fallida(self, e):
+        self._guardar_importado()
+        self._ocupado(False)
+        QMessageBox.critical(
+            self, "Error",
+            f"La importación se detuvo:\n{e}\n\nSe guardaron {self._agregados} movimientos."
+        )
+        self.accept()
+
+    def _importacion_terminada(self, resumen):
+        self._guardar_importado()
+        self.progress.setValue(100)
+
+        # 2. Éxito
+        mensaje = f"Se han importado {self._agregados} movimientos correctamente."
+        errores = (resumen.errores if resumen else []) + self._errores_lote
+        num_errores = (resumen.num_errores if resumen else 0) + len(self._errores_lote)
+        if resumen and resumen.duplicados:
+            mensaje += f"\n\n{resumen.duplicados} duplicados omitidos."
+        if num_errores:
+            mensaje += f"\n\n{num_errores} filas rechazadas:\n" + "\n".join(errores[:10])
+        QMessageBox.information(self, "¡Completado!", mensaje)
+        self.accept()
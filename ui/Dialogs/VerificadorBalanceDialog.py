@@ -103,13 +103,14 @@ class VerificadorBalanceDialog(QDialog):
                     if nuevo_debe == 0 and nuevo_haber == 0:
                          raise ValueError(f"Fila {row+1}: Debe o Haber debe ser mayor que cero.")
 
-                    # Guardar en la estructura de datos
-                    mov["debe"] = f"{nuevo_debe:.2f}"
-                    mov["haber"] = f"{nuevo_haber:.2f}"
+                    # Guardar en la estructura de datos (mantiene índices y totales al día)
+                    self.data.actualizar_movimiento(mov, {
+                        "debe": f"{nuevo_debe:.2f}",
+                        "haber": f"{nuevo_haber:.2f}",
+                    })
                     cambios_aplicados += 1
 
             if cambios_aplicados > 0:
-                self.data.guardar() # Suponemos que existe un método para guardar el JSON
                 QMessageBox.information(self, "Éxito", f"Se aplicaron {cambios_aplicados} correcciones y se guardó la base de datos.")
             
             self.accept()
@@ -6,13 +6,16 @@ Versión FIXED: Corrección de Dialog (Indentación) y Filtros Robustos para Exc
 
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QDateEdit, 
-    QPushButton, QTableWidget, QTableWidgetItem, QHeaderView, QFrame,
+    QPushButton, QFrame,
     QMenu, QMessageBox, QDialog, QFormLayout, QLineEdit, QDialogButtonBox,
     QDoubleSpinBox, QRadioButton, QButtonGroup, QGroupBox, QComboBox
 )
 from PySide6.QtCore import Qt, QDate, Signal
-from PySide6.QtGui import QColor, QFont
-import json
+import datetime
+
+from models.AgregadosMovimientos import importe
+from models.RegistroConfiguracion import nombres_bancos, plan_contable
+from ui.TablaMovimientos import TablaMovimientos, Columna, columna_importe
 
 # ============================================================================
 # 1. CLASE DEL DIÁLOGO (VENTANA FLOTANTE)
@@ -137,22 +140,14 @@ class DiarioView(QWidget):
         self._filtrar()
 
     def _cargar_cuentas(self):
-        l = []
         try:
-            with open("data/plan_contable_v3.json", "r", encoding="utf-8") as f:
-                plan = json.load(f)
-                for c, d in plan.items():
-                    l.append(f"{c} – {d['nombre']}")
-        except (IOError, json.JSONDecodeError, KeyError):
-            l = ["S/N – Desconocida"]
-        return sorted(l)
+            l = [f"{c} – {d['nombre']}" for c, d in plan_contable().items()]
+        except (KeyError, TypeError):
+            l = []
+        return sorted(l) or ["S/N – Desconocida"]
 
     def _cargar_bancos(self):
-        try:
-            with open("data/bancos.json", "r", encoding="utf-8") as f:
-                return [b["nombre"] for b in json.load(f).get("banks", [])]
-        except (IOError, json.JSONDecodeError, KeyError):
-            return ["Caja"]
+        return nombres_bancos() or ["Caja"]
 
     def _build_ui(self):
         layout = QVBoxLayout(self)
@@ -221,17 +216,13 @@ class DiarioView(QWidget):
         self.txt_buscar.returnPressed.connect(self._filtrar)
 
         # TABLA
-        self.tabla = QTableWidget(0, 10)
-        self.tabla.setHorizontalHeaderLabels(["Fecha", "Doc", "Concepto", "Cuenta", "Nombre", "Debe", "Haber", "Banco", "Estado", "Saldo"])
-        self.tabla.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
-        self.tabla.setAlternatingRowColors(True)
-        self.tabla.setSelectionBehavior(QTableWidget.SelectRows)
-        self.tabla.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.tabla = TablaMovimientos(self._columnas_tabla(), ordenable=True)
+        self.tabla.estirar_columna(2)
         self.tabla.setStyleSheet("QHeaderView::section { background:#f1f5f9; padding:6px; border:none; font-weight:bold; color:#64748b; }")
         
         self.tabla.setContextMenuPolicy(Qt.CustomContextMenu)
         self.tabla.customContextMenuRequested.connect(self._menu_contextual)
-        self.tabla.cellDoubleClicked.connect(lambda r, c: self._editar(r))
+        self.tabla.doubleClicked.connect(lambda idx: self._editar(idx.row()))
         
         layout.addWidget(self.tabla)
 
@@ -250,102 +241,61 @@ class DiarioView(QWidget):
         self._filtrar()
 
     def _filtrar(self):
-        res = []
         texto = self.txt_buscar.text().lower().strip()
         modo = "todo"
         if self.rb_mes.isChecked(): modo = "mes"
         elif self.rb_rango.isChecked(): modo = "rango"
 
-        hoy = QDate.currentDate()
-
-        for m in self.data.movimientos:
-            # 1. Parseo Fecha (Seguro)
-            f_str = str(m.get("fecha", "")).strip()
-            fecha_mov = None
-            try:
-                if "/" in f_str: 
-                    d, mm, aa = map(int, f_str.split("/"))
-                    fecha_mov = QDate(aa, mm, d)
-                elif "-" in f_str: 
-                    p = f_str.split("-")
-                    if len(p[0]) == 4:
-                        fecha_mov = QDate(int(p[0]), int(p[1]), int(p[2]))
-                    else:
-                        fecha_mov = QDate(int(p[2]), int(p[1]), int(p[0]))
-            except (ValueError, IndexError):
-                pass
-
-            # 2. Filtro Fecha
-            mostrar = True
-            if fecha_mov and fecha_mov.isValid():
-                if modo == "mes":
-                    if not (fecha_mov.month() == hoy.month() and fecha_mov.year() == hoy.year()): mostrar = False
-                elif modo == "rango":
-                    if not (self.date_desde.date() <= fecha_mov <= self.date_hasta.date()): mostrar = False
-            else:
-                if modo != "todo": mostrar = False # Si la fecha es mala, solo sale en "todo"
-
-            if not mostrar: continue
-
-            # 3. Filtro Texto
-            if texto:
-                full = " ".join([str(m.get(k,'')) for k in ['concepto','cuenta','documento','banco']]).lower()
-                if texto not in full: continue
-
-            res.append(m)
+        # Las fechas ya vienen parseadas del índice: el filtro de fecha es
+        # una consulta por mes o por rango, no un recorrido re-parseando strings.
+        hoy = datetime.date.today()
+        if modo == "mes":
+            candidatos = self.data.movimientos_por_mes(hoy.month, hoy.year)
+        elif modo == "rango":
+            candidatos = self.data.get_movimientos_rango(
+                self.date_desde.date().toPython(), self.date_hasta.date().toPython()
+            )
+        else:
+            candidatos = self.data.movimientos  # Si la fecha es mala, solo sale en "todo"
+
+        # Filtro Texto: índice invertido (no se reconstruye un string por movimiento y tecla)
+        res = self.data.buscar_texto(texto, candidatos)
 
         # Ordenar y Mostrar
-        res.sort(key=lambda x: self._fecha_key(x), reverse=True)
+        res.sort(key=self._fecha_key, reverse=True)
         self._llenar_tabla(res)
 
     def _fecha_key(self, m):
-        try:
-            f = str(m.get("fecha", "")).replace("-", "/")
-            if "/" in f: 
-                p = f.split("/")
-                return QDate(int(p[2]), int(p[1]), int(p[0]))
-        except (ValueError, IndexError):
-            pass
-        return QDate(1900, 1, 1)
+        return self.data.fecha_de(m) or datetime.date.min
+
+    def _columnas_tabla(self):
+        def debe(m): return importe(m.get("debe", 0))
+        def haber(m): return importe(m.get("haber", 0))
+
+        # FIX: Obtener el nombre de la cuenta directamente del plan contable
+        # para evitar que desaparezca si no está en el movimiento.
+        def nombre(m):
+            return self.data.cuentas.get(str(m.get("cuenta", "")), {}).get("nombre", "DESCONOCIDA")
+
+        return [
+            Columna("Fecha", lambda m: m.get("fecha")),
+            Columna("Doc", lambda m: m.get("documento")),
+            Columna("Concepto", lambda m: m.get("concepto")),
+            Columna("Cuenta", lambda m: m.get("cuenta")),
+            Columna("Nombre", nombre),
+            columna_importe("Debe", debe, color=lambda m, v: "#dc2626" if v > 0 else None),
+            columna_importe("Haber", haber, color=lambda m, v: "#16a34a" if v > 0 else None),
+            Columna("Banco", lambda m: m.get("banco")),
+            Columna("Estado", lambda m: m.get("estado")),
+            columna_importe("Saldo", lambda m: haber(m) - debe(m)),
+        ]
 
     def _llenar_tabla(self, movs):
-        self.tabla.setRowCount(0)
         self.movimientos_actuales = movs
-        td, th = 0, 0
-        
-        for m in movs:
-            r = self.tabla.rowCount()
-            self.tabla.insertRow(r)
-            try:
-                d = float(str(m.get("debe", 0)).replace(",", "."))
-            except (ValueError, TypeError):
-                d = 0.0
-            try:
-                h = float(str(m.get("haber", 0)).replace(",", "."))
-            except (ValueError, TypeError):
-                h = 0.0
-            td+=d; th+=h
-            
-            # FIX: Obtener el nombre de la cuenta directamente del plan contable
-            # para evitar que desaparezca si no está en el movimiento.
-            cuenta_id = str(m.get("cuenta", ""))
-            nom = self.data.cuentas.get(cuenta_id, {}).get("nombre", "DESCONOCIDA")
-
-
-            vals = [
-                m.get("fecha"), m.get("documento"), m.get("concepto"), 
-                m.get("cuenta"), nom, 
-                f"{d:,.2f}", f"{h:,.2f}", 
-                m.get("banco"), m.get("estado"), f"{(h-d):,.2f}"
-            ]
-            for c, v in enumerate(vals):
-                it = QTableWidgetItem(str(v))
-                if c in [5,6,9]: 
-                    it.setTextAlignment(Qt.AlignRight|Qt.AlignVCenter)
-                    if c==5 and d>0: it.setForeground(QColor("#dc2626"))
-                    if c==6 and h>0: it.setForeground(QColor("#16a34a"))
-                self.tabla.setItem(r, c, it)
-        
+        self.tabla.set_filas(movs)
+        td = sum(importe(m.get("debe", 0)) for m in movs)
+        th = sum(importe(m.get("haber", 0)) for m in movs)
+
         self.lbl_totales.setText(f"Registros: {len(movs)}  |  Gastos: {td:,.2f}  |  Ingresos: {th:,.2f}")
 
     # ============================================================
@@ -367,23 +317,17 @@ class DiarioView(QWidget):
 
     def _editar(self, row):
         if row < 0: return
-        mov = self.movimientos_actuales[row]
+        mov = self.tabla.fila_en(row)
         dlg = EditarMovimientoDialog(self, mov, self.cuentas_cache, self.bancos_cache)
         if dlg.exec():
-            mov.update(dlg.get_data())
-            self._guardar()
+            self.data.actualizar_movimiento(mov["id"], dlg.get_data())
+            self._filtrar()
             QMessageBox.information(self, "OK", "Movimiento actualizado.")
 
     def _eliminar(self, row):
         if row < 0: return
-        mov = self.movimientos_actuales[row]
+        mov = self.tabla.fila_en(row)
         if QMessageBox.question(self, "Confirmar", "¿Eliminar registro?", QMessageBox.Yes|QMessageBox.No) == QMessageBox.Yes:
-            if mov in self.data.movimientos:
-                self.data.movimientos.remove(mov)
-                self._guardar()
+            if self.data.eliminar_movimiento(mov["id"]):
+                self._filtrar()
                 QMessageBox.information(self, "OK", "Eliminado.")
-
-    def _guardar(self):
-        if hasattr(self.data, "guardar_datos"): self.data.guardar_datos()
-        elif hasattr(self.data, "guardar"): self.data.guardar()
-        self._filtrar()
\ No newline at end of file
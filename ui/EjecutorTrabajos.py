@@ -0,0 +1,209 @@
+# -*- coding: utf-8 -*-
+"""
+EjecutorTrabajos.py — SHILLONG CONTABILIDAD v3.8.0 PRO
+---------------------------------------------------------
+Trabajos pesados (exportar Excel, leer un archivo a importar, consultar
+actualizaciones) fuera del hilo de la interfaz:
+- Trabajo (QRunnable): ejecuta fn(*args, **kwargs) en el QThreadPool y
+  avisa con señales (progreso, terminado, fallo, cancelado).
+- EjecutorTrabajos: envía trabajos y entrega los callbacks en el hilo de
+  la UI (conexiones en cola), así pueden tocar widgets sin riesgo.
+- trabajo_con_progreso(): lo mismo con un QProgressDialog cancelable.
+
+La función del trabajo no debe tocar widgets. Con con_progreso=True recibe
+progreso(porcentaje, texto): informa del avance y lanza TrabajoCancelado
+si el usuario ha cancelado, de modo que el trabajo se corta en ese punto.
+Si se pasa al_parcial recibe además entregar(objeto): resultados
+intermedios (p. ej. lotes de una importación) que se procesan en la UI.
+---------------------------------------------------------
+"""
+
+import threading
+
+from PySide6.QtCore import Qt, QObject, QRunnable, QThreadPool, Signal
+from PySide6.QtWidgets import QMessageBox, QProgressDialog
+
+
+class TrabajoCancelado(Exception):
+    """Lanzada por progreso() cuando se ha pedido cancelar el trabajo."""
+
+
+class _Senales(QObject):
+    # QRunnable no es QObject: las señales viven en este objeto (hilo de la UI)
+    progreso = Signal(int, str)
+    parcial = Signal(object)
+    terminado = Signal(object)
+    fallo = Signal(object)
+    cancelado = Signal()
+
+
+class Trabajo(QRunnable):
+
+    def __init__(self, fn, args, kwargs, con_progreso=False, con_entregas=False):
+        super().__init__()
+        # El ejecutor guarda la referencia: Qt no debe borrar el objeto Python
+        self.setAutoDelete(False)
+        self.senales = _Senales()
+        self._fn = fn
+        self._args = args
+        self._kwargs = kwargs
+        self._con_progreso = con_progreso
+        self._con_entregas = con_entregas
+        self._cancelar = threading.Event()
+
+    @property
+    def cancelado(self):
+        return self._cancelar.is_set()
+
+    def cancelar(self):
+        """Pide cancelar; el trabajo se corta en su próxima llamada a progreso()."""
+        self._cancelar.set()
+
+    def progreso(self, porcentaje, texto=""):
+        if self._cancelar.is_set():
+            raise TrabajoCancelado()
+        self.senales.progreso.emit(int(porcentaje), texto)
+
+    def entregar(self, objeto):
+        if self._cancelar.is_set():
+            raise TrabajoCancelado()
+        self.senales.parcial.emit(objeto)
+
+    def run(self):
+        try:
+            if self._cancelar.is_set():
+                raise TrabajoCancelado()
+            kwargs = dict(self._kwargs)
+            if self._con_progreso:
+                kwargs["progreso"] = self.progreso
+            if self._con_entregas:
+                kwargs["entregar"] = self.entregar
+            resultado = self._fn(*self._args, **kwargs)
+        except TrabajoCancelado:
+            self.senales.cancelado.emit()
+        except Exception as e:
+            print(f"[EjecutorTrabajos] Error en segundo plano: {e}")
+            self.senales.fallo.emit(e)
+        else:
+            if self._cancelar.is_set():
+                self.senales.cancelado.emit()
+            else:
+                self.senales.terminado.emit(resultado)
+
+
+class EjecutorTrabajos(QObject):
+    """
+    trabajo = ejecutor().enviar(fn, *args, al_terminar=..., al_fallar=...,
+                                al_progreso=..., al_parcial=..., al_cancelar=...,
+                                con_progreso=False, dueño=widget, **kwargs)
+    Si `dueño` se destruye antes de terminar, el trabajo se cancela y sus
+    callbacks ya no se llaman.
+    """
+
+    def __init__(self, hilos=None, parent=None):
+        super().__init__(parent)
+        self._pool = QThreadPool()
+        if hilos:
+            self._pool.setMaxThreadCount(hilos)
+        self._activos = set()
+
+    def enviar(self, fn, *args, al_terminar=None, al_fallar=None, al_progreso=None,
+               al_parcial=None, al_cancelar=None, con_progreso=False, dueño=None, **kwargs):
+        trabajo = Trabajo(fn, args, kwargs, con_progreso, con_entregas=al_parcial is not None)
+        senales = trabajo.senales
+        vivo = [True]
+
+        if dueño is not None:
+            def _dueño_destruido(*_):
+                vivo[0] = False
+                trabajo.cancelar()
+            dueño.destroyed.connect(_dueño_destruido)
+
+        def _si_vivo(callback):
+            return lambda *a: callback(*a) if vivo[0] else None
+
+        cola = Qt.QueuedConnection
+        if al_progreso is not None:
+            senales.progreso.connect(_si_vivo(al_progreso), cola)
+        if al_parcial is not None:
+            senales.parcial.connect(_si_vivo(al_parcial), cola)
+        if al_terminar is not None:
+            senales.terminado.connect(_si_vivo(al_terminar), cola)
+        if al_fallar is not None:
+            senales.fallo.connect(_si_vivo(al_fallar), cola)
+        if al_cancelar is not None:
+            senales.cancelado.connect(_si_vivo(al_cancelar), cola)
+
+        # Conectadas al final: se ejecutan después de los callbacks del usuario
+        for senal in (senales.terminado, senales.fallo, senales.cancelado):
+            senal.connect(lambda *_: self._activos.discard(trabajo), cola)
+
+        self._activos.add(trabajo)
+        self._pool.start(trabajo)
+        return trabajo
+
+    def ocupado(self):
+        return bool(self._activos)
+
+    def cancelar_todos(self):
+        for trabajo in list(self._activos):
+            trabajo.cancelar()
+
+    def esperar(self, ms=-1):
+        """Bloquea hasta que terminen los trabajos en curso (p. ej. al cerrar)."""
+        return self._pool.waitForDone(ms)
+
+
+_ejecutor = None
+
+
+def ejecutor():
+    """Ejecutor compartido por todas las vistas (se crea al primer uso)."""
+    global _ejecutor
+    if _ejecutor is None:
+        _ejecutor = EjecutorTrabajos()
+    return _ejecutor
+
+
+def trabajo_con_progreso(parent, titulo, fn, *args, al_terminar=None, al_fallar=None, **kwargs):
+    """
+    Envía fn(*args, progreso=..., **kwargs) con un diálogo de progreso modal
+    a la ventana (la UI sigue pintándose) y botón Cancelar. Si no se indica
+    al_fallar se muestra el error en un QMessageBox.
+    """
+    dialogo = QProgressDialog(titulo, "Cancelar", 0, 100, parent)
+    dialogo.setWindowTitle(titulo)
+    dialogo.setWindowModality(Qt.WindowModal)
+    dialogo.setMinimumDuration(400)
+    dialogo.setAutoClose(False)
+    dialogo.setAutoReset(False)
+    dialogo.setValue(0)
+
+    def _progreso(porcentaje, texto):
+        dialogo.setValue(porcentaje)
+        if texto:
+            dialogo.setLabelText(texto)
+
+    def _cerrar_y(callback):
+        def _fin(*a):
+            dialogo.close()
+            dialogo.deleteLater()
+            if callback is not None:
+                callback(*a)
+        return _fin
+
+    def _fallo(error):
+        QMessageBox.critical(parent, "Error", f"{titulo}:\n{error}")
+
+    trabajo = ejecutor().enviar(
+        fn, *args,
+        al_terminar=_cerrar_y(al_terminar),
+        al_fallar=_cerrar_y(al_fallar or _fallo),
+        al_progreso=_progreso,
+        al_cancelar=_cerrar_y(None),
+        con_progreso=True,
+        dueño=parent,
+        **kwargs,
+    )
+    dialogo.canceled.connect(trabajo.cancelar)
+    return trabajo
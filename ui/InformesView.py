@@ -19,16 +19,20 @@ COLORES SHILLONG:
 
 from PySide6.QtWidgets import (
     QWidget, QLabel, QVBoxLayout, QHBoxLayout, QPushButton, QComboBox,
-    QTableWidget, QTableWidgetItem, QFileDialog, QDateEdit, QScrollArea
+    QFileDialog, QDateEdit, QScrollArea
 )
 from PySide6.QtCore import Qt, QDate
 from PySide6.QtGui import QFont
 
 import datetime
-from collections import defaultdict
+from operator import itemgetter
 import openpyxl
 from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
 
+from models.ExportadorExcelMensual import ExportadorExcelMensual
+from ui.TablaMovimientos import TablaMovimientos, Columna, DERECHA
+from ui.EjecutorTrabajos import trabajo_con_progreso
+
 
 class InformesView(QWidget):
 
@@ -218,15 +222,9 @@ class InformesView(QWidget):
         ini = self.fecha_ini.date().toPython()
         fin = self.fecha_fin.date().toPython()
         datos = self.data.get_movimientos_rango(ini, fin)
-        tabla = QTableWidget(0, 8)
-        tabla.setHorizontalHeaderLabels(
-            ["Fecha","Documento","Concepto","Cuenta","Debe","Haber","Saldo","Banco"]
-        )
 
-        for m in datos:
-            r = tabla.rowCount()
-            tabla.insertRow(r)
-            fila = [
+        filas = [
+            (
                 m.get("fecha",""),
                 m.get("documento",""),
                 m.get("concepto",""),
@@ -235,14 +233,14 @@ class InformesView(QWidget):
                 m.get("haber",0),
                 m.get("saldo",0),
                 m.get("banco","")
-            ]
-            for c, val in enumerate(fila):
-                it = QTableWidgetItem(str(val))
-                if c >= 4:
-                    it.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                tabla.setItem(r,c,it)
+            )
+            for m in datos
+        ]
 
-        self.contenedor_layout.addWidget(tabla)
+        self.contenedor_layout.addWidget(self._tabla(
+            ["Fecha","Documento","Concepto","Cuenta","Debe","Haber","Saldo","Banco"],
+            filas, numericas=range(4, 8)
+        ))
 
     # ================================================================
     # LIBRO MAYOR AGRUPADO
@@ -269,19 +267,12 @@ class InformesView(QWidget):
             )
             self.contenedor_layout.addWidget(header)
 
-            tabla = QTableWidget(0, 6)
-            tabla.setHorizontalHeaderLabels(
-                ["Fecha","Documento","Desglose","Debe","Haber","Saldo"]
-            )
-
             total_debe=0
             total_haber=0
             saldo_acum=0
+            filas=[]
 
             for m in movs:
-                r = tabla.rowCount()
-                tabla.insertRow(r)
-
                 concepto = m.get("concepto","").strip()
                 if concepto:
                     des = concepto
@@ -295,76 +286,46 @@ class InformesView(QWidget):
                 total_debe += debe
                 total_haber += haber
 
-                fila = [
+                filas.append((
                     m.get("fecha",""),
                     m.get("documento",""),
                     des,
                     debe,
                     haber,
                     saldo_acum
-                ]
-
-                for c,val in enumerate(fila):
-                    it = QTableWidgetItem(str(val))
-                    if c>=3:
-                        it.setTextAlignment(Qt.AlignRight|Qt.AlignVCenter)
-                    tabla.setItem(r,c,it)
+                ))
 
-            r = tabla.rowCount()
-            tabla.insertRow(r)
-            tabla.setItem(r,2, QTableWidgetItem("TOTAL"))
-            tabla.setItem(r,3, QTableWidgetItem(str(total_debe)))
-            tabla.setItem(r,4, QTableWidgetItem(str(total_haber)))
-            tabla.setItem(r,5, QTableWidgetItem(str(total_haber-total_debe)))
+            filas.append((None, None, "TOTAL", total_debe, total_haber, total_haber-total_debe))
 
-            self.contenedor_layout.addWidget(tabla)
+            self.contenedor_layout.addWidget(self._tabla(
+                ["Fecha","Documento","Desglose","Debe","Haber","Saldo"],
+                filas, numericas=range(3, 6)
+            ))
 
     # ================================================================
     # SUMAS & SALDOS — VISTA SHILLONG
     # ================================================================
     def _mostrar_sumas_saldos(self):
 
-        tabla = QTableWidget(0,5)
-        tabla.setHorizontalHeaderLabels(
-            ["Cuenta","Nombre","Debe","Haber","Saldo"]
-        )
-
-        resumen = defaultdict(lambda: {"nombre":"", "debe":0, "haber":0})
-
-        for m in self.data.movimientos:
-            cta = str(m.get("cuenta",""))
-            resumen[cta]["nombre"] = m.get("nombre_cuenta","")
-            resumen[cta]["debe"] += float(m.get("debe",0))
-            resumen[cta]["haber"] += float(m.get("haber",0))
-
         total_debe=0
         total_haber=0
+        filas=[]
 
-        for cta in sorted(resumen.keys()):
-            d = resumen[cta]
-            saldo = d["haber"]-d["debe"]
-
-            total_debe += d["debe"]
-            total_haber+= d["haber"]
+        # Totales por cuenta calculados por el backend (GROUP BY en SQLite, motor de informes en JSON)
+        for cta, debe, haber in self.data.sumas_y_saldos():
+            saldo = haber-debe
 
-            r = tabla.rowCount()
-            tabla.insertRow(r)
-            fila=[cta, d["nombre"], d["debe"], d["haber"], saldo]
+            total_debe += debe
+            total_haber+= haber
 
-            for c,val in enumerate(fila):
-                it = QTableWidgetItem(str(val))
-                if c>=2:
-                    it.setTextAlignment(Qt.AlignRight|Qt.AlignVCenter)
-                tabla.setItem(r,c,it)
+            filas.append((cta, self.data.obtener_nombre_cuenta(cta), debe, haber, saldo))
 
-        r = tabla.rowCount()
-        tabla.insertRow(r)
-        tabla.setItem(r,1, QTableWidgetItem("TOTAL GENERAL"))
-        tabla.setItem(r,2, QTableWidgetItem(str(total_debe)))
-        tabla.setItem(r,3, QTableWidgetItem(str(total_haber)))
-        tabla.setItem(r,4, QTableWidgetItem(str(total_haber-total_debe)))
+        filas.append((None, "TOTAL GENERAL", total_debe, total_haber, total_haber-total_debe))
 
-        self.contenedor_layout.addWidget(tabla)
+        self.contenedor_layout.addWidget(self._tabla(
+            ["Cuenta","Nombre","Debe","Haber","Saldo"],
+            filas, numericas=range(2, 5)
+        ))
 
     # ================================================================
     # RESUMEN MENSUAL
@@ -374,36 +335,28 @@ class InformesView(QWidget):
         mes = self.cbo_mes.currentIndex()+1
         anio = int(self.cbo_anio.currentText())
 
-        movs = self.data.movimientos_por_mes(mes, anio)
-
-        resumen = defaultdict(lambda: {"nombre":"", "debe":0, "haber":0})
+        # Una sola pasada agrupada por cuenta sobre el mes
+        filas=[]
+        for cta, debe, haber in self.data.informes().por_cuenta(anio, mes):
+            filas.append((cta, self.data.obtener_nombre_cuenta(cta), debe, haber, haber-debe))
 
-        for m in movs:
-            cta=str(m.get("cuenta",""))
-            resumen[cta]["nombre"]=m.get("nombre_cuenta","")
-            resumen[cta]["debe"]+=float(m.get("debe",0))
-            resumen[cta]["haber"]+=float(m.get("haber",0))
-
-        tabla = QTableWidget(0,5)
-        tabla.setHorizontalHeaderLabels(
-            ["Cuenta","Nombre","Debe","Haber","Saldo"]
-        )
+        self.contenedor_layout.addWidget(self._tabla(
+            ["Cuenta","Nombre","Debe","Haber","Saldo"],
+            filas, numericas=range(2, 5)
+        ))
 
-        for cta in sorted(resumen.keys()):
-            d=resumen[cta]
-            saldo=d["haber"]-d["debe"]
-
-            r=tabla.rowCount()
-            tabla.insertRow(r)
-            fila=[cta, d["nombre"], d["debe"], d["haber"], saldo]
-
-            for c,val in enumerate(fila):
-                it=QTableWidgetItem(str(val))
-                if c>=2:
-                    it.setTextAlignment(Qt.AlignRight|Qt.AlignVCenter)
-                tabla.setItem(r,c,it)
-
-        self.contenedor_layout.addWidget(tabla)
+    # ================================================================
+    # TABLA (modelo/vista: sin un QTableWidgetItem por celda)
+    # ================================================================
+    @staticmethod
+    def _tabla(titulos, filas, numericas=()):
+        columnas = [
+            Columna(t, itemgetter(c), alineacion=DERECHA if c in numericas else None)
+            for c, t in enumerate(titulos)
+        ]
+        tabla = TablaMovimientos(columnas)
+        tabla.set_filas(filas)
+        return tabla
 
     # ================================================================
     # EXPORTAR VISTA ACTUAL
@@ -429,21 +382,16 @@ class InformesView(QWidget):
                 ws.cell(row=row,column=1,value=w.text()).font=Font(bold=True)
                 row+=2
 
-            if isinstance(w, QTableWidget):
-                tabla = w
-
+            if isinstance(w, TablaMovimientos):
                 # Encabezados
-                for c in range(tabla.columnCount()):
-                    ws.cell(row=row,column=c+1,
-                        value=tabla.horizontalHeaderItem(c).text())
+                for c, titulo in enumerate(w.titulos()):
+                    ws.cell(row=row,column=c+1,value=titulo)
                 row+=1
 
-                # Datos
-                for r2 in range(tabla.rowCount()):
-                    for c2 in range(tabla.columnCount()):
-                        it=tabla.item(r2,c2)
-                        ws.cell(row=row,column=c2+1,
-                            value=it.text() if it else "")
+                # Datos (en el orden visible)
+                for textos in w.textos_visibles():
+                    for c2, texto in enumerate(textos):
+                        ws.cell(row=row,column=c2+1,value=texto)
                     row+=1
 
                 row+=2
@@ -462,91 +410,18 @@ class InformesView(QWidget):
         if not ruta:
             return
 
-        wb=openpyxl.Workbook()
-        ws=wb.active
-
-        morado=PatternFill(start_color="7030A0", end_color="7030A0", fill_type="solid")
-        verde=PatternFill(start_color="E2EFDA", end_color="E2EFDA", fill_type="solid")
-        borde=Border(
-            left=Side(style="thin",color="000000"),
-            right=Side(style="thin",color="000000"),
-            top=Side(style="thin",color="000000"),
-            bottom=Side(style="thin",color="000000")
-        )
-
-        row=1
-
-        cuentas=sorted(self.data.cuentas.keys())
-
-        for cta in cuentas:
+        # Se prepara aquí, en el hilo de la interfaz: el índice puede
+        # reconstruirse (recarga, edición) mientras el trabajo escribe
+        mayor=[]
+        for cta in sorted(self.data.cuentas.keys()):
             movs=self.data.movimientos_por_cuenta(cta)
-            if not movs:
-                continue
-
-            nombre=self.data.cuentas[cta].get("nombre","")
-
-            # ENCABEZADO CUENTA
-            cell=ws.cell(row=row,column=1,value=f"{cta} — {nombre}")
-            cell.font=Font(bold=True,color="FFFFFF")
-            cell.fill=morado
-            row+=2
-
-            headers=["Fecha","Documento","Desglose","Debe","Haber","Saldo"]
-            for c,h in enumerate(headers, start=1):
-                cell=ws.cell(row=row,column=c,value=h)
-                cell.font=Font(bold=True,color="FFFFFF")
-                cell.fill=morado
-                cell.border=borde
-            row+=1
-
-            saldo_acum=0
-            total_debe=0
-            total_haber=0
-
-            for m in movs:
-                concepto=m.get("concepto","").strip()
-                if concepto:
-                    des=concepto
-                else:
-                    des=m.get("nombre_cuenta","")
-
-                debe=float(m.get("debe",0))
-                haber=float(m.get("haber",0))
+            if movs:
+                mayor.append((f"{cta} — {self.data.obtener_nombre_cuenta(cta)}", [dict(m) for m in movs]))
 
-                saldo_acum+=(haber-debe)
-                total_debe+=debe
-                total_haber+=haber
-
-                fila=[
-                    m.get("fecha",""),
-                    m.get("documento",""),
-                    des,
-                    debe,
-                    haber,
-                    saldo_acum
-                ]
-
-                for c,val in enumerate(fila,start=1):
-                    cell=ws.cell(row=row,column=c,value=val)
-                    cell.border=borde
-                    if c>=4:
-                        cell.alignment=Alignment(horizontal="right")
-                row+=1
-
-            # TOTAL
-            for c in range(1,7):
-                cell=ws.cell(row=row,column=c)
-                cell.border=borde
-                cell.fill=verde
-
-            ws.cell(row=row,column=3,value="TOTAL").font=Font(bold=True)
-            ws.cell(row=row,column=4,value=total_debe)
-            ws.cell(row=row,column=5,value=total_haber)
-            ws.cell(row=row,column=6,value=(total_haber-total_debe))
-
-            row+=3
-
-        wb.save(ruta)
+        trabajo_con_progreso(
+            self, "Exportando Libro Mayor",
+            ExportadorExcelMensual.exportar_libro_mayor, ruta, mayor, len(mayor),
+        )
 
     # ================================================================
     # EXPORTAR BALANCE SHILLONG (SUMAS & SALDOS)
@@ -582,22 +457,13 @@ class InformesView(QWidget):
             cell.border=borde
         row+=1
 
-        resumen=defaultdict(lambda:{"nombre":"", "debe":0, "haber":0})
-
-        for m in self.data.movimientos:
-            cta=str(m.get("cuenta",""))
-            resumen[cta]["nombre"]=m.get("nombre_cuenta","")
-            resumen[cta]["debe"]+=float(m.get("debe",0))
-            resumen[cta]["haber"]+=float(m.get("haber",0))
-
         total_debe=0
         total_haber=0
 
-        for cta in sorted(resumen.keys()):
-            d=resumen[cta]
-            saldo=d["haber"]-d["debe"]
+        for cta, debe, haber in self.data.sumas_y_saldos():
+            saldo=haber-debe
 
-            fila=[cta, d["nombre"], d["debe"], d["haber"], saldo]
+            fila=[cta, self.data.obtener_nombre_cuenta(cta), debe, haber, saldo]
 
             for c,val in enumerate(fila,start=1):
                 cell=ws.cell(row=row,column=c,value=val)
@@ -605,8 +471,8 @@ class InformesView(QWidget):
                 if c>=3:
                     cell.alignment=Alignment(horizontal="right")
 
-            total_debe+=d["debe"]
-            total_haber+=d["haber"]
+            total_debe+=debe
+            total_haber+=haber
             row+=1
 
         # TOTAL GENERAL
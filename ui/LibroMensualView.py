@@ -11,12 +11,12 @@ LibroMensualView.py — SHILLONG CONTABILIDAD v3.8.0 PRO
 
 from PySide6.QtWidgets import (
     QWidget, QLabel, QVBoxLayout, QHBoxLayout, QComboBox,
-    QPushButton, QTableWidget, QTableWidgetItem, QFrame,
-    QFileDialog, QMessageBox, QHeaderView, QMenu, QInputDialog, QCheckBox, QLineEdit,
+    QPushButton, QFrame,
+    QFileDialog, QMessageBox, QMenu, QInputDialog, QCheckBox, QLineEdit,
     QDialog, QFormLayout, QDoubleSpinBox, QSpinBox
 )
 from PySide6.QtCore import Qt, QUrl
-from PySide6.QtGui import QColor, QFont, QTextDocument, QDesktopServices
+from PySide6.QtGui import QTextDocument, QDesktopServices
 from PySide6.QtPrintSupport import QPrinter, QPrintPreviewDialog, QPrintDialog
 
 import datetime
@@ -25,6 +25,12 @@ import os
 from collections import defaultdict
 from pathlib import Path
 
+from models.CategoriasCuentas import categoria_de_cuenta
+from models.CierreMes import CierreMes
+from models.RegistroConfiguracion import nombres_bancos
+from ui.TablaMovimientos import TablaMovimientos, Columna, columna_importe, negrita
+from ui.EjecutorTrabajos import trabajo_con_progreso
+
 # Importar el nuevo sistema de saldos
 try:
     from models.SaldosMensuales import SaldosMensuales
@@ -51,11 +57,12 @@ class LibroMensualView(QWidget):
         self.modo_flujo = False  # Visualizar Debe/Haber como flujo (entra/sale)
         
         self.bancos = self._cargar_bancos()
-        self.reglas_cache = self._cargar_reglas()
         
         # 🆕 Inicializar sistema de saldos
         if SALDOS_DISPONIBLE:
-            self.saldos_sistema = SaldosMensuales()
+            # Compartido por todas las vistas del libro y conectado a sus agregados:
+            # saldos iniciales encadenados desde el último cierre
+            self.saldos_sistema = self.data.saldos_mensuales()
         else:
             self.saldos_sistema = None
         
@@ -63,23 +70,20 @@ class LibroMensualView(QWidget):
         self.actualizar()
 
     def _cargar_bancos(self):
-        try:
-            with open("data/bancos.json", "r", encoding="utf-8") as f:
-                return ["Todos"] + [b["nombre"] for b in json.load(f).get("banks", [])]
-        except (IOError, json.JSONDecodeError, KeyError):
-            return ["Todos", "Caja"]
-
-    def _cargar_reglas(self):
-        try:
-            if os.path.exists("data/reglas_conceptos.json"):
-                with open("data/reglas_conceptos.json", "r", encoding="utf-8") as f:
-                    return json.load(f)
-        except (IOError, json.JSONDecodeError):
-            pass
-        return {}
+        return ["Todos"] + (nombres_bancos() or ["Caja"])
 
     def _cargar_saldos_iniciales(self, año, mes):
-        """Carga saldos iniciales por banco desde saldos_mensuales.json."""
+        """Saldos iniciales por banco (encadenados desde el último cierre si no están registrados)."""
+        if self.saldos_sistema:
+            iniciales = {}
+            for banco in self.bancos:
+                if banco == "Todos":
+                    continue
+                saldo = self.saldos_sistema.obtener_saldo_inicial(mes, año, banco)
+                if saldo is not None:
+                    iniciales[banco] = saldo
+            return iniciales
+
         ruta = Path("data/saldos_mensuales.json")
         if not ruta.exists():
             return {}
@@ -110,46 +114,6 @@ class LibroMensualView(QWidget):
             return True
         return self._pedir_password()
 
-    # --- LÓGICA DE CATEGORÍAS (ROBUSTA) ---
-    def _categoria_de_cuenta(self, cuenta):
-        # 1. Limpieza del input
-        cuenta_str = str(cuenta).split(" ")[0].strip()
-        
-        # 2. Búsqueda directa en reglas (Cache)
-        if cuenta_str in self.reglas_cache:
-            cat_original = self.reglas_cache[cuenta_str].get("categoria", "")
-            cat_upper = cat_original.upper()
-            
-            # Mapeo de categorías en español a códigos internos en inglés
-            mapeo = {
-                "COMESTIBLES Y BEBIDAS": "FOOD", "ALIMENTACIÓN": "FOOD",
-                "FARMACIA Y MATERIAL SANITARIO": "MEDICINE", "FARMACIA": "MEDICINE",
-                "MEDICAMENTOS": "MEDICINE",
-                "MATERIAL DE LIMPIEZA": "HYGIENE", "LIMPIEZA": "HYGIENE", 
-                "LAVANDERÍA": "HYGIENE", "HIGIENE": "HYGIENE", "ASEO PERSONAL": "HYGIENE",
-                "SUELDOS Y SALARIOS": "SALARY", "NOMINAS": "SALARY",
-                "TELEFONÍA E INTERNET": "ONLINE", "INTERNET": "ONLINE", 
-                "TELEFONO": "ONLINE",
-                "TERAPIAS": "THERAPEUTIC", "DIETA": "DIET"
-            }
-            
-            if cat_upper in mapeo: return mapeo[cat_upper]
-            return cat_original
-
-        # 3. Fallback por rangos numéricos
-        try:
-            c = int(cuenta_str)
-            if 600000 <= c <= 609999: return "MEDICINE"
-            if 603000 <= c <= 603999: return "FOOD"
-            if 602400 <= c <= 602499: return "HYGIENE"
-            if 620401 <= c <= 620499: return "HYGIENE"
-            if 640000 <= c <= 649999 or (750000 <= c <= 759999): return "SALARY"
-            if 629200 <= c <= 629299: return "ONLINE"
-        except (ValueError, TypeError):
-            pass
-            
-        return "OTROS"
-
     # 🆕 GESTIÓN DE SALDOS INICIALES
     def _solicitar_saldo_inicial(self, mes, año, banco):
         """
@@ -444,17 +408,37 @@ class LibroMensualView(QWidget):
         layout.addLayout(cards)
 
         # TABLA
-        self.tabla = QTableWidget()
-        self.tabla.setColumnCount(11)
-        self.tabla.setHorizontalHeaderLabels([
-            "Fecha", "Doc", "Concepto", "Cuenta", "Nombre", 
-            "Debe", "Haber", "Saldo", "Banco", "Estado", "Categoría"
-        ])
-        self.tabla.horizontalHeader().setSectionResizeMode(2, QHeaderView.Stretch)
-        self.tabla.setAlternatingRowColors(True)
+        self.tabla = TablaMovimientos(self._columnas_tabla())
+        self.tabla.estirar_columna(2)
         self.tabla.setStyleSheet("QHeaderView::section { background-color: #f1f5f9; font-weight: bold; border: none; padding: 6px; }")
         layout.addWidget(self.tabla)
 
+    def _columnas_tabla(self):
+        """Filas: (movimiento, debe_mostrar, haber_mostrar, saldo_acumulado, es_saldo_inicial)."""
+        def campo(clave):
+            return lambda f: f[0].get(clave, "")
+
+        def solo_movimiento(func):
+            return lambda f: "" if f[4] else func(f[0])
+
+        return [
+            Columna("Fecha", campo("fecha")),
+            Columna("Doc", campo("documento")),
+            Columna("Concepto", campo("concepto")),
+            Columna("Cuenta", lambda f: str(f[0].get("cuenta", ""))),
+            Columna("Nombre", solo_movimiento(lambda m: self.data.obtener_nombre_cuenta(m.get("cuenta")))),
+            columna_importe("Debe", lambda f: f[1]),
+            columna_importe("Haber", lambda f: f[2]),
+            columna_importe("Saldo", lambda f: f[3], fuente=lambda f, v: negrita(9)),
+            Columna("Banco", campo("banco")),
+            Columna("Estado", campo("estado")),
+            Columna(
+                "Categoría", solo_movimiento(lambda m: categoria_de_cuenta(m.get("cuenta"))),
+                color=lambda f, v: None if f[4] else ("#94a3b8" if v == "OTROS" else "#16a34a"),
+                fuente=lambda f, v: None if f[4] else negrita(9),
+            ),
+        ]
+
     def _crear_card(self, titulo, color):
         card = QFrame()
         card.setStyleSheet(f"background: white; border: 1px solid #e2e8f0; border-radius: 10px; border-left: 5px solid {color};")
@@ -491,34 +475,24 @@ class LibroMensualView(QWidget):
 
         movs = self.data.movimientos_por_mes(mes, año)
 
-        self.tabla.setRowCount(0)
         saldo_acum = saldo_inicial
         total_debe = 0
         total_haber = 0
 
-        # Fila saldo inicial
-        fila0 = [
-            f"01/{mes:02d}/{año}", "", "Saldo inicial", "", "",
-            f"{0.0:,.2f}", f"{0.0:,.2f}", f"{saldo_acum:,.2f}",
-            "Caja" if banco_filtro == "Todos" else banco_filtro, "", ""
-        ]
-        self.tabla.insertRow(0)
+        # Fila saldo inicial (no es un movimiento: record None)
+        inicial = {
+            "fecha": f"01/{mes:02d}/{año}", "concepto": "Saldo inicial",
+            "banco": "Caja" if banco_filtro == "Todos" else banco_filtro,
+        }
+        filas = [(inicial, 0.0, 0.0, saldo_acum, True)]
         self.row_records.append(None)
-        for c, val in enumerate(fila0):
-            it = QTableWidgetItem(str(val))
-            if c in [5, 6, 7]:
-                it.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                if c == 7:
-                    it.setFont(QFont("Arial", 9, QFont.Bold))
-            self.tabla.setItem(0, c, it)
 
+        # Solo se calculan importes y saldo acumulado; el texto de cada celda
+        # lo genera el modelo cuando la fila se pinta.
         for m in movs:
             if banco_filtro != "Todos" and m.get("banco") != banco_filtro:
                 continue
 
-            row = self.tabla.rowCount()
-            self.tabla.insertRow(row)
-
             try:
                 debe = float(m.get("debe", 0))
             except (ValueError, TypeError):
@@ -542,31 +516,12 @@ class LibroMensualView(QWidget):
 
             total_debe += debe_mostrar
             total_haber += haber_mostrar
-            
-            cat = self._categoria_de_cuenta(m.get("cuenta"))
-            nombre_cuenta = self.data.obtener_nombre_cuenta(m.get("cuenta"))
-
-            items = [
-                m.get("fecha", ""), m.get("documento", ""), m.get("concepto", ""),
-                str(m.get("cuenta", "")), nombre_cuenta,
-                f"{debe_mostrar:,.2f}", f"{haber_mostrar:,.2f}", f"{saldo_acum:,.2f}",
-                m.get("banco", ""), m.get("estado", ""), cat
-            ]
-
-            for c, val in enumerate(items):
-                it = QTableWidgetItem(str(val))
-                if c in [5,6,7]: 
-                    it.setTextAlignment(Qt.AlignRight | Qt.AlignVCenter)
-                    if c == 7: it.setFont(QFont("Arial", 9, QFont.Bold))
-
-                if c == 10:
-                    if val == "OTROS": it.setForeground(QColor("#94a3b8"))
-                    else: it.setForeground(QColor("#16a34a"))
-                    it.setFont(QFont("Arial", 9, QFont.Bold))
-
-                self.tabla.setItem(row, c, it)
+
+            filas.append((m, debe_mostrar, haber_mostrar, saldo_acum, False))
             self.row_records.append(m)
 
+        self.tabla.set_filas(filas)
+
         self._update_card(self.card_gasto, total_debe)     # gastos (Debe)
         self._update_card(self.card_ingreso, total_haber)  # ingresos (Haber)
         self._update_card(self.card_saldo, saldo_acum)
@@ -646,10 +601,10 @@ class LibroMensualView(QWidget):
         if respuesta != QMessageBox.Yes:
             return
 
-        # Resumen y firma
-        movs_mes = self.data.movimientos_por_mes(mes, año)
-        total_debe = sum(float(m.get("debe", 0)) for m in movs_mes)
-        total_haber = sum(float(m.get("haber", 0)) for m in movs_mes)
+        # Resumen y firma (una sola pasada por los movimientos del mes)
+        cierre = CierreMes(self.data.movimientos_por_mes(mes, año), self.bancos)
+        total_debe = cierre.total_debe
+        total_haber = cierre.total_haber
         saldo_inicial_global = sum(
             self.saldos_sistema.obtener_saldo_inicial(mes, año, b) or 0.0
             for b in self.bancos if b != "Todos"
@@ -670,29 +625,9 @@ class LibroMensualView(QWidget):
         firma = firmante.strip()
 
         # Calcular saldos finales de todos los bancos
-        saldos_finales = {}
-
-        for banco in self.bancos:
-            if banco == "Todos":
-                continue
-
-            saldo_inicial = self._solicitar_saldo_inicial(mes, año, banco) or 0.0
-            
-            # Calcular movimientos del banco
-            movs = self.data.movimientos_por_mes(mes, año)
-            ingresos = sum(float(m.get("haber", 0)) for m in movs if m.get("banco") == banco)
-            gastos = sum(float(m.get("debe", 0)) for m in movs if m.get("banco") == banco)
-            saldo_final = saldo_inicial + ingresos - gastos
-
-            saldos_finales[banco] = {
-                "inicial": saldo_inicial,
-                "final": saldo_final,
-                "ingresos": ingresos,
-                "gastos": gastos,
-                "firma": firma
-            }
-
-        saldos_finales["_firma"] = firma
+        saldos_finales = cierre.saldos_finales(
+            lambda banco: self._solicitar_saldo_inicial(mes, año, banco), firma
+        )
 
         # Guardar en el sistema
         self.saldos_sistema.cerrar_mes(mes, año, saldos_finales)
@@ -812,37 +747,37 @@ class LibroMensualView(QWidget):
             item_ordenado["nombre_cuenta"] = self.data.obtener_nombre_cuenta(m.get("cuenta"))
             item_ordenado["saldo"] = saldo
             item_ordenado["banco"] = m.get("banco", "")
-            item_ordenado["categoria"] = self._categoria_de_cuenta(m.get("cuenta"))
+            item_ordenado["categoria"] = categoria_de_cuenta(m.get("cuenta"))
             
             datos_prep.append(item_ordenado)
 
-        try:
-            periodo = f"{self.cbo_mes.currentText()} {año}"
-            
-            if modo == "general":
-                ExportadorExcelMensual.exportar_general(ruta, datos_prep, periodo)
-                
-            elif modo == "categoria":
-                # Agrupar por categoría
-                grupos = defaultdict(list)
-                for x in datos_prep: 
-                    cat = x["categoria"] if x["categoria"] else "SIN_CATEGORIA"
-                    grupos[cat].append(x)
-                # Ordenar por nombre de categoría
-                grupos_ord = dict(sorted(grupos.items()))
-                ExportadorExcelMensual.exportar_agrupado(ruta, grupos_ord, periodo, "Categoría")
-                
-            elif modo == "cuenta":
-                # Agrupar por Cuenta
-                grupos = defaultdict(list)
-                for x in datos_prep: 
-                    # Usamos cuenta + nombre para la cabecera del grupo
-                    clave = f"{x['cuenta']} - {x['nombre_cuenta']}" if x['cuenta'] else "SALDO_INICIAL"
-                    grupos[clave].append(x)
-                # Ordenar por número de cuenta
-                grupos_ord = dict(sorted(grupos.items()))
-                ExportadorExcelMensual.exportar_agrupado(ruta, grupos_ord, periodo, "Cuenta")
+        periodo = f"{self.cbo_mes.currentText()} {año}"
+
+        if modo == "general":
+            tarea, args = ExportadorExcelMensual.exportar_general, (ruta, datos_prep, periodo)
 
+        elif modo == "categoria":
+            # Agrupar por categoría
+            grupos = defaultdict(list)
+            for x in datos_prep: 
+                cat = x["categoria"] if x["categoria"] else "SIN_CATEGORIA"
+                grupos[cat].append(x)
+            # Ordenar por nombre de categoría
+            grupos_ord = dict(sorted(grupos.items()))
+            tarea, args = ExportadorExcelMensual.exportar_agrupado, (ruta, grupos_ord, periodo, "Categoría")
+
+        else:
+            # Agrupar por Cuenta
+            grupos = defaultdict(list)
+            for x in datos_prep: 
+                # Usamos cuenta + nombre para la cabecera del grupo
+                clave = f"{x['cuenta']} - {x['nombre_cuenta']}" if x['cuenta'] else "SALDO_INICIAL"
+                grupos[clave].append(x)
+            # Ordenar por número de cuenta
+            grupos_ord = dict(sorted(grupos.items()))
+            tarea, args = ExportadorExcelMensual.exportar_agrupado, (ruta, grupos_ord, periodo, "Cuenta")
+
+        def _exportado(_):
             QMessageBox.information(self, "Éxito", f"Reporte '{modo}' generado correctamente.")
             abrir = QMessageBox.question(
                 self,
@@ -852,8 +787,13 @@ class LibroMensualView(QWidget):
             )
             if abrir == QMessageBox.Yes:
                 QDesktopServices.openUrl(QUrl.fromLocalFile(ruta))
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Fallo al exportar: {e}")
+
+        # El libro Excel se construye en segundo plano; la ventana sigue respondiendo
+        trabajo_con_progreso(
+            self, "Exportando Excel", tarea, *args,
+            al_terminar=_exportado,
+            al_fallar=lambda e: QMessageBox.critical(self, "Error", f"Fallo al exportar: {e}"),
+        )
 
     # ============================================================
     # IMPRESIÓN Y PDF
@@ -866,8 +806,8 @@ class LibroMensualView(QWidget):
         mes = self.cbo_mes.currentText()
         año = self.cbo_año.currentText()
         html = f"<html><head><style>body{{font-family:Arial;}} table{{width:100%;border-collapse:collapse;}} th{{background:#eee;}} td,th{{border:1px solid #ccc;padding:5px;}} .num{{text-align:right;}}</style></head><body><h1>Libro {mes} {año}</h1><table><tr><th>Fecha</th><th>Concepto</th><th>Cuenta</th><th>Debe</th><th>Haber</th></tr>"
-        for r in range(self.tabla.rowCount()):
-            html += f"<tr><td>{self.tabla.item(r,0).text()}</td><td>{self.tabla.item(r,2).text()}</td><td>{self.tabla.item(r,3).text()}</td><td class='num'>{self.tabla.item(r,5).text()}</td><td class='num'>{self.tabla.item(r,6).text()}</td></tr>"
+        for t in self.tabla.textos_visibles():
+            html += f"<tr><td>{t[0]}</td><td>{t[2]}</td><td>{t[3]}</td><td class='num'>{t[5]}</td><td class='num'>{t[6]}</td></tr>"
         html += "</table></body></html>"
         return html
 
@@ -981,7 +921,7 @@ class LibroMensualView(QWidget):
     def _borrar_seleccion(self):
         if not self._asegurar_password():
             return
-        row = self.tabla.currentRow()
+        row = self.tabla.indice_actual()
         if row <= 0:
             QMessageBox.information(self, "Borrar", "Seleccione un movimiento (no el saldo inicial).")
             return
@@ -989,17 +929,15 @@ class LibroMensualView(QWidget):
         if not record:
             QMessageBox.warning(self, "Borrar", "No se pudo identificar el movimiento seleccionado.")
             return
-        # Buscar en data.movimientos
-        idx = self._buscar_indice_record(record)
-        if idx is None:
+        # Buscar en data por id (O(1), sin ambigüedad entre filas iguales)
+        if self.data.movimiento_por_id(record.get("id")) is None:
             QMessageBox.warning(self, "Borrar", "No se encontró el movimiento en la base de datos.")
             return
         resp = QMessageBox.question(self, "Confirmar", "¿Desea borrar el movimiento seleccionado?", QMessageBox.Yes | QMessageBox.No)
         if resp != QMessageBox.Yes:
             return
         try:
-            self.data.movimientos.pop(idx)
-            self.data.guardar()
+            self.data.eliminar_movimiento(record["id"])
             self.actualizar()
             QMessageBox.information(self, "Borrar", "Movimiento eliminado.")
         except Exception as e:
@@ -1008,7 +946,7 @@ class LibroMensualView(QWidget):
     def _editar_seleccion(self):
         if not self._asegurar_password():
             return
-        row = self.tabla.currentRow()
+        row = self.tabla.indice_actual()
         if row <= 0:
             QMessageBox.information(self, "Editar", "Seleccione un movimiento (no el saldo inicial).")
             return
@@ -1016,12 +954,12 @@ class LibroMensualView(QWidget):
         if not record:
             QMessageBox.warning(self, "Editar", "No se pudo identificar el movimiento seleccionado.")
             return
-        idx = self._buscar_indice_record(record)
-        if idx is None:
+        actual = self.data.movimiento_por_id(record.get("id"))
+        if actual is None:
             QMessageBox.warning(self, "Editar", "No se encontró el movimiento en la base de datos.")
             return
 
-        m = dict(self.data.movimientos[idx])
+        m = dict(actual)
         campos = [
             ("Concepto", m.get("concepto", "")),
             ("Documento", m.get("documento", "")),
@@ -1047,24 +985,9 @@ class LibroMensualView(QWidget):
             else:
                 m[nombre.lower()] = texto.strip()
 
-        self.data.movimientos[idx] = m
         try:
-            self.data.guardar()
+            self.data.actualizar_movimiento(actual["id"], m)
             self.actualizar()
             QMessageBox.information(self, "Editar", "Movimiento actualizado.")
         except Exception as e:
             QMessageBox.critical(self, "Error", f"No se pudo guardar: {e}")
-
-    def _buscar_indice_record(self, record):
-        for i, mov in enumerate(self.data.movimientos):
-            if (
-                mov.get("fecha") == record.get("fecha") and
-                mov.get("documento") == record.get("documento") and
-                mov.get("concepto") == record.get("concepto") and
-                str(mov.get("cuenta","")) == str(record.get("cuenta","")) and
-                float(mov.get("debe",0)) == float(record.get("debe",0)) and
-                float(mov.get("haber",0)) == float(record.get("haber",0)) and
-                mov.get("banco","") == record.get("banco","")
-            ):
-                return i
-        return None
@@ -34,6 +34,11 @@ from ui.ToolsView import ToolsView
 from ui.HelpView import HelpView
 from ui.CierresHub import CierresHub
 # =======================================================
+from ui.EjecutorTrabajos import ejecutor
+from models.RegistroConfiguracion import registro
+
+# Cada cuánto se revisan bancos.json, plan contable y reglas en disco
+INTERVALO_CONFIGURACION_MS = 5000
 
 class MainWindow(QMainWindow):
     def __init__(self, data):
@@ -46,6 +51,12 @@ class MainWindow(QMainWindow):
         self.views = {} 
 
         self._init_ui()
+
+        # Archivos de configuración editados fuera de la vista que los usa:
+        # el registro relee los que cambiaron y avisa a sus suscriptores
+        self.timer_configuracion = QTimer(self)
+        self.timer_configuracion.timeout.connect(self._comprobar_configuracion)
+        self.timer_configuracion.start(INTERVALO_CONFIGURACION_MS)
         
         # Check for updates after window is shown (delayed to not slow startup)
         if UPDATE_CHECKER_AVAILABLE:
@@ -152,12 +163,31 @@ class MainWindow(QMainWindow):
             if self.header:
                 self.header.actualizar_titulo(id_vista)
             
-            # Auto-refresco al entrar
+            # Auto-refresco al entrar (con la configuración al día)
+            self._comprobar_configuracion()
             if hasattr(widget, "actualizar"): widget.actualizar()
             elif hasattr(widget, "actualizar_datos"): widget.actualizar_datos()
             elif hasattr(widget, "_cargar_ultimos"): widget._cargar_ultimos() # Registrar
             elif hasattr(widget, "_filtrar"): widget._filtrar() # Diario
 
+    def _comprobar_configuracion(self):
+        try:
+            registro().comprobar()
+        except Exception as e:
+            print(f"[MainWindow] Error revisando configuración: {e}")
+
+    def closeEvent(self, event):
+        """Compacta el diario de movimientos en el JSON principal antes de salir."""
+        # Trabajos en segundo plano: se cortan en su próximo aviso de progreso
+        self.timer_configuracion.stop()
+        ejecutor().cancelar_todos()
+        ejecutor().esperar(5000)
+        try:
+            self.data.cerrar()
+        except Exception as e:
+            print(f"[MainWindow] Error al compactar datos: {e}")
+        super().closeEvent(event)
+
     def actualizar_vistas(self):
         """
         Método llamado por el Importador de Excel para refrescar todo.
@@ -173,10 +203,17 @@ class MainWindow(QMainWindow):
     def _check_updates_on_startup(self):
         """
         Check for updates silently on startup and notify user if available.
+        The GitHub request runs in the job runner so the window never freezes.
         """
+        ejecutor().enviar(
+            get_update_info,
+            al_terminar=self._mostrar_actualizacion,
+            al_fallar=lambda e: print(f"[MainWindow] Update check failed: {e}"),
+            dueño=self,
+        )
+
+    def _mostrar_actualizacion(self, info):
         try:
-            info = get_update_info()
-            
             if info["available"]:
                 # Show non-intrusive notification
                 msg = QMessageBox(self)
@@ -6,16 +6,19 @@ Vista profesional de movimientos pendientes
 
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QComboBox, QPushButton, QLabel,
-    QTableWidget, QTableWidgetItem, QLineEdit, QFileDialog, QMessageBox
+    QLineEdit, QFileDialog, QMessageBox
 )
 from PySide6.QtCore import Qt
-from PySide6.QtGui import QColor, QTextDocument
+from PySide6.QtGui import QTextDocument
 from PySide6.QtPrintSupport import QPrinter, QPrintPreviewDialog, QPrintDialog
 
 import datetime
-import json
 
 from models.ExportadorExcelMensual import ExportadorExcelMensual
+from ui.EjecutorTrabajos import trabajo_con_progreso
+from models.CategoriasCuentas import categoria_de_cuenta
+from models.RegistroConfiguracion import nombres_bancos, plan_contable
+from ui.TablaMovimientos import TablaMovimientos, Columna, DERECHA
 
 
 class PendientesView(QWidget):
@@ -41,58 +44,16 @@ class PendientesView(QWidget):
         self.actualizar()
 
     def _cargar_bancos(self):
-        try:
-            with open("data/bancos.json", "r", encoding="utf-8") as f:
-                return ["Todos"] + [b["nombre"] for b in json.load(f).get("banks", [])]
-        except (IOError, json.JSONDecodeError, KeyError):
-            return ["Todos", "Caja"]
+        return ["Todos"] + (nombres_bancos() or ["Caja"])
 
     def _cargar_cuentas(self):
         cuentas = ["Todas"]
         try:
-            with open("data/plan_contable_v3.json", "r", encoding="utf-8") as f:
-                plan = json.load(f)
-                cuentas.extend([f"{k} – {v['nombre']}" for k, v in plan.items()])
-        except (IOError, json.JSONDecodeError, KeyError):
+            cuentas.extend([f"{k} – {v['nombre']}" for k, v in plan_contable().items()])
+        except (KeyError, TypeError):
             pass
         return cuentas
 
-    def _categoria_de_cuenta(self, cuenta):
-        try:
-            with open("data/reglas_conceptos.json", "r", encoding="utf-8") as f:
-                reglas = json.load(f)
-        except (IOError, json.JSONDecodeError):
-            reglas = {}
-
-        cuenta_str = str(cuenta).strip()
-
-        if cuenta_str in reglas:
-            cat = reglas[cuenta_str].get("categoria", "").upper()
-            mapeo = {
-                "COMESTIBLES Y BEBIDAS": "FOOD",
-                "FARMACIA Y MATERIAL SANITARIO": "MEDICINE",
-                "MATERIAL DE LIMPIEZA": "HYGIENE",
-                "LAVANDERÍA": "HYGIENE",
-                "ASEO PERSONAL": "HYGIENE",
-                "SUELDOS Y SALARIOS": "SALARY",
-                "TELEFONÍA E INTERNET": "ONLINE"
-            }
-            return mapeo.get(cat, "OTROS")
-
-        try:
-            c = int(cuenta)
-            if 600000 <= c <= 609999: return "FOOD"
-            if 610000 <= c <= 619999: return "MEDICINE"
-            if 620000 <= c <= 629999: return "HYGIENE"
-            if 750000 <= c <= 759999: return "SALARY"
-            if 770000 <= c <= 779999: return "ONLINE"
-            if 780000 <= c <= 789999: return "THERAPEUTIC"
-            if 790000 <= c <= 799999: return "DIET"
-        except (ValueError, TypeError):
-            pass
-
-        return "OTROS"
-
     def _build_ui(self):
         layout = QVBoxLayout(self)
         layout.setContentsMargins(30, 20, 30, 20)
@@ -171,12 +132,7 @@ class PendientesView(QWidget):
         layout.addWidget(self.buscador)
 
         # Tabla
-        self.tabla = QTableWidget()
-        self.tabla.setColumnCount(10)
-        self.tabla.setHorizontalHeaderLabels([
-            "Fecha","Documento","Concepto","Cuenta","Nombre Cuenta",
-            "Debe","Haber","Banco","Estado","Saldo Acum."
-        ])
+        self.tabla = TablaMovimientos(self._columnas_tabla(), fondo=self._fondo_fila)
         layout.addWidget(self.tabla)
 
         # Totales
@@ -188,6 +144,29 @@ class PendientesView(QWidget):
         self.lbl_totales.setAlignment(Qt.AlignCenter)
         layout.addWidget(self.lbl_totales)
 
+    def _columnas_tabla(self):
+        # Filas: (mov, debe, haber, saldo acumulado, días transcurridos)
+        def importe(titulo, i, color=None):
+            return Columna(titulo, lambda f: f[i], self._fmt, DERECHA, color)
+
+        return [
+            Columna("Fecha", lambda f: f[0].get("fecha", "")),
+            Columna("Documento", lambda f: f[0].get("documento", "")),
+            Columna("Concepto", lambda f: f[0].get("concepto", "")),
+            Columna("Cuenta", lambda f: str(f[0].get("cuenta", ""))),
+            Columna("Nombre Cuenta", lambda f: self.data.obtener_nombre_cuenta(f[0].get("cuenta"))),
+            importe("Debe", 1, lambda f, v: "#dc2626" if v > 0 else None),
+            importe("Haber", 2, lambda f, v: "#16a34a" if v > 0 else None),
+            Columna("Banco", lambda f: f[0].get("banco", "Caja")),
+            Columna("Estado", lambda f: f[0].get("estado", "")),
+            importe("Saldo Acum.", 3),
+        ]
+
+    @staticmethod
+    def _fondo_fila(fila):
+        # rojo suave vencido (> 30 días), amarillo suave el resto
+        return "#fee2e2" if fila[4] > 30 else "#fef9c3"
+
     def _fmt(self, n):
         return f"{float(n):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
@@ -208,15 +187,12 @@ class PendientesView(QWidget):
             if m.get("estado", "").lower() != "pendiente":
                 continue
 
-            if mes > 0:
-                try:
-                    _, mm, _ = m.get("fecha", "").split("/")
-                    if int(mm) != mes:
-                        continue
-                except (ValueError, AttributeError):
-                    continue
+            fecha_mov = self.data.fecha_de(m)
 
-            if año != "Todos" and not m.get("fecha", "").endswith(año):
+            if mes > 0 and (fecha_mov is None or fecha_mov.month != mes):
+                continue
+
+            if año != "Todos" and (fecha_mov is None or str(fecha_mov.year) != año):
                 continue
 
             if banco != "Todos" and m.get("banco", "") != banco:
@@ -225,7 +201,7 @@ class PendientesView(QWidget):
             if cuenta and str(m.get("cuenta", "")) != cuenta:
                 continue
 
-            if categoria != "Todas" and self._categoria_de_cuenta(m.get("cuenta")) != categoria:
+            if categoria != "Todas" and categoria_de_cuenta(m.get("cuenta"), oficial=True) != categoria:
                 continue
 
             if tipo == "Solo gastos" and float(m.get("debe", 0)) == 0:
@@ -245,22 +221,15 @@ class PendientesView(QWidget):
         return filtrados
 
     def actualizar(self):
-        pendientes = [m for m in self.data.movimientos if m.get("estado", "").lower() == "pendiente"]
+        pendientes = self.data.pendientes()
         filtrados = self._aplicar_filtros(pendientes)
 
-        # ORDENAR POR FECHA DESCENDENTE
-        def fecha_key(m):
-            try:
-                d, mm, a = m.get("fecha", "01/01/1900").split("/")
-                return datetime.datetime(int(a), int(mm), int(d))
-            except (ValueError, AttributeError):
-                return datetime.datetime(1900, 1, 1)
-
-        filtrados.sort(key=fecha_key, reverse=True)
+        # ORDENAR POR FECHA DESCENDENTE (fechas ya parseadas en el índice)
+        filtrados.sort(key=lambda m: self.data.fecha_de(m) or datetime.date(1900, 1, 1), reverse=True)
         self.filtrados_actuales = filtrados
 
-        self.tabla.setRowCount(0)
         saldo_acum = total_debe = total_haber = 0
+        filas = []
 
         for m in filtrados:
             debe = float(m.get("debe", 0))
@@ -271,44 +240,12 @@ class PendientesView(QWidget):
             total_haber += haber
 
             # Días transcurridos
-            try:
-                d, mm, a = m.get("fecha", "").split("/")
-                fecha_mov = datetime.datetime(int(a), int(mm), int(d))
-                dias = (self.hoy - fecha_mov.date()).days
-            except (ValueError, AttributeError):
-                dias = 999
-
-            fila = self.tabla.rowCount()
-            self.tabla.insertRow(fila)
-
-            items = [
-                m.get("fecha", ""),
-                m.get("documento", ""),
-                m.get("concepto", ""),
-                str(m.get("cuenta", "")),
-                self.data.obtener_nombre_cuenta(m.get("cuenta")),
-                self._fmt(debe),
-                self._fmt(haber),
-                m.get("banco", "Caja"),
-                m.get("estado", ""),
-                self._fmt(saldo_acum)
-            ]
-
-            for col, val in enumerate(items):
-                item = QTableWidgetItem(val)
-
-                if dias > 30:
-                    item.setBackground(QColor("#fee2e2"))  # rojo suave vencido
-                else:
-                    item.setBackground(QColor("#fef9c3"))  # amarillo suave
-
-                if col == 5 and debe > 0:
-                    item.setForeground(QColor("#dc2626"))
-
-                if col == 6 and haber > 0:
-                    item.setForeground(QColor("#16a34a"))
-
-                self.tabla.setItem(fila, col, item)
+            fecha_mov = self.data.fecha_de(m)
+            dias = (self.hoy - fecha_mov).days if fecha_mov else 999
+
+            filas.append((m, debe, haber, saldo_acum, dias))
+
+        self.tabla.set_filas(filas)
 
         self.lbl_totales.setText(
             f"TOTAL PENDIENTE (DEBE): {self._fmt(total_debe)}   |   "
@@ -317,15 +254,17 @@ class PendientesView(QWidget):
         )
 
     def _marcar_pagado(self):
-        row = self.tabla.currentRow()
-        if row < 0:
+        fila = self.tabla.fila_actual()
+        if fila is None:
             QMessageBox.warning(self, "Seleccionar", "Seleccione un movimiento pendiente.")
             return
 
-        mov = self.filtrados_actuales[row]
+        mov = fila[0]
 
-        mov["estado"] = "pagado"
-        self.data.guardar()
+        if not self.data.actualizar_movimiento(mov.get("id"), {"estado": "pagado"}):
+            QMessageBox.warning(self, "Actualizar", "El movimiento ya no existe en la base de datos.")
+            self.actualizar()
+            return
 
         QMessageBox.information(self, "Actualizado", "Movimiento marcado como pagado.")
         self.actualizar()
@@ -416,13 +355,14 @@ class PendientesView(QWidget):
                 "debe": debe,
                 "haber": haber,
                 "saldo_acumulado": saldo_acum,
+                "saldo": saldo_acum,
                 "banco": m.get("banco", ""),
                 "estado": m.get("estado", ""),
                 "documento": m.get("documento", "")
             })
 
-        try:
-            ExportadorExcelMensual.exportar(ruta, datos)
-            QMessageBox.information(self, "OK", "Exportado correctamente.")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
+        # El exportador no tiene exportar(): el listado usa el formato general
+        trabajo_con_progreso(
+            self, "Exportando pendientes", ExportadorExcelMensual.exportar_general, ruta, datos, "Pendientes",
+            al_terminar=lambda _: QMessageBox.information(self, "OK", "Exportado correctamente."),
+        )
@@ -7,14 +7,17 @@ Versión COMPLETAMENTE CORREGIDA
 from models.CuentasMotor import MotorCuentas
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QFormLayout, QLineEdit, QDateEdit,
-    QComboBox, QPushButton, QLabel, QTableWidget, QTableWidgetItem,
-    QMessageBox, QCompleter, QHeaderView, QAbstractItemView,
+    QComboBox, QPushButton, QLabel,
+    QMessageBox, QCompleter, QHeaderView,
     QRadioButton, QButtonGroup
 )
 from PySide6.QtCore import Qt, QDate, QLocale
-from datetime import datetime
+from datetime import date
+import heapq
 import random
 
+from ui.TablaMovimientos import TablaMovimientos, Columna
+
 try:
     from ui.Dialogs.ImportarExcelDialog import ImportarExcelDialog
 except ImportError:
@@ -23,6 +26,10 @@ except ImportError:
 
 class RegistrarView(QWidget):
 
+    NUM_SUGERENCIAS = 3      # cuentas sugeridas bajo el concepto
+    ULTIMOS = 20             # filas sin buscar: los más recientes
+    MAX_RESULTADOS = 200     # con texto: coincidencias más recientes de todo el libro
+
     def __init__(self, data):
         super().__init__()
         self.data = data
@@ -152,8 +159,25 @@ class RegistrarView(QWidget):
         self.concepto = QLineEdit()
         self.concepto.setPlaceholderText("Descripción…")
         self.concepto.textChanged.connect(self._validar_concepto_live)
+        self.concepto.textChanged.connect(self._sugerir_cuentas)
         form.addRow("Concepto:", self.concepto)
 
+        # Sugerencias de cuenta aprendidas del historial (clic = seleccionar)
+        fila_sug = QHBoxLayout()
+        self.btns_sugerencia = []
+        for _ in range(self.NUM_SUGERENCIAS):
+            b = QPushButton()
+            b.setObjectName("sugerencia")
+            b.setFlat(True)
+            b.setCursor(Qt.PointingHandCursor)
+            b.setStyleSheet("color:#2563eb;text-decoration:underline;padding:2px 6px;")
+            b.clicked.connect(lambda _=False, boton=b: self._usar_sugerencia(boton))
+            b.hide()
+            fila_sug.addWidget(b)
+            self.btns_sugerencia.append(b)
+        fila_sug.addStretch()
+        form.addRow("", fila_sug)
+
         # --------------------------------------------------------
         # DEBE / HABER (INTERFAZ CORRECTA)
         # --------------------------------------------------------
@@ -291,20 +315,13 @@ class RegistrarView(QWidget):
 
         # BUSCADOR
         self.buscador = QLineEdit()
-        self.buscador.setPlaceholderText("Buscar…")
+        self.buscador.setPlaceholderText("Buscar en el libro (concepto, documento, cuenta, banco)…")
         self.buscador.textChanged.connect(self._filtrar_tabla)
         layout.addWidget(self.buscador)
 
         # TABLA
-        self.tabla = QTableWidget(0,10)
-        self.tabla.setHorizontalHeaderLabels([
-            "Fecha","Documento","Concepto","Cuenta",
-            "Nombre Cuenta","Debe","Haber",
-            "Banco","Estado","Saldo"
-        ])
+        self.tabla = TablaMovimientos(self._columnas_tabla())
         self.tabla.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.tabla.setEditTriggers(QAbstractItemView.NoEditTriggers)
-        self.tabla.setSelectionBehavior(QAbstractItemView.SelectRows)
         layout.addWidget(self.tabla)
 
         # TOTALES
@@ -586,6 +603,24 @@ class RegistrarView(QWidget):
         except (AttributeError, KeyError):
             self.lbl_nombre.setText("→ Cuenta desconocida")
 
+    def _sugerir_cuentas(self, texto):
+        codigos = self.data.sugeridor.sugerir(texto, k=self.NUM_SUGERENCIAS) if texto.strip() else []
+        for b, codigo in zip(self.btns_sugerencia, codigos + [None] * self.NUM_SUGERENCIAS):
+            if codigo is None:
+                b.hide()
+                continue
+            b.setProperty("codigo", codigo)
+            b.setText(f"{codigo} – {self.motor.get_nombre(codigo)}")
+            b.show()
+
+    def _usar_sugerencia(self, boton):
+        codigo = boton.property("codigo")
+        idx = self.cuenta_combo.findText(f"{codigo} – ", Qt.MatchStartsWith)
+        if idx >= 0:
+            self.cuenta_combo.setCurrentIndex(idx)
+        else:
+            self.cuenta_combo.setEditText(boton.text())
+
     def _validar_concepto_live(self):
         concepto_txt = self.concepto.text().lower()
         cuenta_txt = self.cuenta_combo.currentText()
@@ -621,15 +656,12 @@ class RegistrarView(QWidget):
             pass
 
     def _duplicar(self):
-        row = self.tabla.currentRow()
-        if row < 0:
+        fila = self.tabla.fila_actual()
+        if fila is None:
             QMessageBox.information(self,"Duplicar","Seleccione un movimiento.")
             return
 
-        if not self.movimientos_filtrados:
-            return
-
-        m = self.movimientos_filtrados[row]
+        m = fila[0]
 
         self.fecha.setDate(QDate.fromString(m["fecha"],"dd/MM/yyyy"))
         self.documento.clear()
@@ -673,22 +705,50 @@ class RegistrarView(QWidget):
     # ============================================================
     # TABLA + FILTRO + TOTALES
     # ============================================================
+    def _columnas_tabla(self):
+        # Filas: (mov, debe, haber, saldo acumulado)
+        def nombre(f):
+            try:
+                return self.data.obtener_nombre_cuenta(f[0]["cuenta"])
+            except (KeyError, AttributeError):
+                return "Desconocida"
+
+        def importe(titulo, i):
+            return Columna(titulo, lambda f: f[i], self._fmt, Qt.AlignRight | Qt.AlignVCenter)
+
+        return [
+            Columna("Fecha", lambda f: f[0].get("fecha","")),
+            Columna("Documento", lambda f: f[0].get("documento","")),
+            Columna("Concepto", lambda f: f[0].get("concepto","")),
+            Columna("Cuenta", lambda f: f[0].get("cuenta","")),
+            Columna("Nombre Cuenta", nombre),
+            importe("Debe", 1),
+            importe("Haber", 2),
+            Columna("Banco", lambda f: f[0].get("banco","Caja")),
+            Columna("Estado", lambda f: f[0].get("estado","pagado")),
+            importe("Saldo", 3),
+        ]
+
     def _cargar_ultimos(self):
-        try:
-            movs = sorted(
-                self.data.movimientos,
-                key=lambda m: datetime.strptime(m["fecha"], "%d/%m/%Y"),
-                reverse=True
-            )[:20]
-        except (ValueError, KeyError, TypeError):
-            movs = self.data.movimientos[:20]
+        # Con texto en el buscador se consulta el índice de todo el libro
+        texto = self.buscador.text().strip()
+        if texto:
+            candidatos, limite = self.data.buscar_texto(texto), self.MAX_RESULTADOS
+        else:
+            candidatos, limite = self.data.movimientos, self.ULTIMOS
+
+        # Top-N por fecha ya parseada (sin strptime por fila ni ordenar todo el libro)
+        movs = heapq.nlargest(
+            limite, candidatos,
+            key=lambda m: self.data.fecha_de(m) or date.min
+        )
 
         self.movimientos_filtrados = movs
-        self.tabla.setRowCount(0)
 
         total_debe = 0
         total_haber = 0
         saldo = 0
+        filas = []
 
         for m in movs:
             d = self._parse_float(m.get("debe","0"))
@@ -697,33 +757,9 @@ class RegistrarView(QWidget):
             saldo += h - d  # SALDO = HABER - DEBE (ingresos - gastos)
             total_debe += d
             total_haber += h
+            filas.append((m, d, h, saldo))
 
-            row = self.tabla.rowCount()
-            self.tabla.insertRow(row)
-
-            try:
-                nombre_cta = self.data.obtener_nombre_cuenta(m["cuenta"])
-            except (KeyError, AttributeError):
-                nombre_cta = "Desconocida"
-
-            datos = [
-                m.get("fecha",""),
-                m.get("documento",""),
-                m.get("concepto",""),
-                m.get("cuenta",""),
-                nombre_cta,
-                self._fmt(d),
-                self._fmt(h),
-                m.get("banco","Caja"),
-                m.get("estado","pagado"),
-                self._fmt(saldo)
-            ]
-
-            for col,val in enumerate(datos):
-                item = QTableWidgetItem(str(val))
-                if col in (5,6,9):
-                    item.setTextAlignment(Qt.AlignRight|Qt.AlignVCenter)
-                self.tabla.setItem(row,col,item)
+        self.tabla.set_filas(filas)
 
         self.lbl_totales.setText(
             f"TOTAL DEBE: {self._fmt(total_debe)}  |  "
@@ -732,13 +768,4 @@ class RegistrarView(QWidget):
         )
 
     def _filtrar_tabla(self):
-        txt = self.buscador.text().lower()
-
-        for row in range(self.tabla.rowCount()):
-            mostrar = False
-            for col in range(self.tabla.columnCount()):
-                it = self.tabla.item(row,col)
-                if it and txt in it.text().lower():
-                    mostrar = True
-                    break
-            self.tabla.setRowHidden(row, not mostrar)
+        self._cargar_ultimos()
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+"""
+TablaMovimientos.py — SHILLONG CONTABILIDAD v3.8.0 PRO
+---------------------------------------------------------
+Capa modelo/vista compartida para las tablas del libro:
+- ModeloMovimientos (QAbstractTableModel): guarda solo la lista de filas;
+  el texto, colores y fuentes se calculan en data() cuando Qt pinta la celda
+  (únicamente las filas visibles), sin crear un QTableWidgetItem por celda.
+- FiltroMovimientos (QSortFilterProxyModel): búsqueda de texto y orden
+  por el valor crudo de cada columna.
+- TablaMovimientos (QTableView): junta ambos con el estilo común.
+---------------------------------------------------------
+"""
+
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, QSortFilterProxyModel
+from PySide6.QtGui import QColor, QFont
+from PySide6.QtWidgets import QTableView, QHeaderView, QAbstractItemView
+
+DERECHA = Qt.AlignRight | Qt.AlignVCenter
+ROL_VALOR = Qt.UserRole   # valor crudo (para ordenar)
+
+_colores = {}
+_fuentes = {}
+
+
+def _qcolor(hex_color):
+    """QColor compartido por color (no se crea uno por celda)."""
+    c = _colores.get(hex_color)
+    if c is None:
+        c = _colores[hex_color] = QColor(hex_color)
+    return c
+
+
+def negrita(tamaño=9):
+    """QFont negrita compartida (una instancia por tamaño)."""
+    f = _fuentes.get(tamaño)
+    if f is None:
+        f = _fuentes[tamaño] = QFont("Arial", tamaño, QFont.Bold)
+    return f
+
+
+def importe_fmt(v):
+    """Formato numérico estándar de las tablas: 1,234.56"""
+    return f"{v:,.2f}"
+
+
+class Columna:
+    """
+    Definición de una columna.
+      valor(fila)          -> valor crudo (se usa para ordenar y para formatear)
+      formato(valor)       -> texto mostrado (str por defecto)
+      alineacion           -> Qt.Alignment o None
+      color(fila, valor)   -> "#hex" o None
+      fuente(fila, valor)  -> QFont o None
+    """
+
+    def __init__(self, titulo, valor, formato=str, alineacion=None, color=None, fuente=None):
+        self.titulo = titulo
+        self.valor = valor
+        self.formato = formato
+        self.alineacion = alineacion
+        self.color = color
+        self.fuente = fuente
+
+
+def columna_importe(titulo, valor, color=None, fuente=None):
+    """Columna numérica alineada a la derecha con formato 1,234.56"""
+    return Columna(titulo, valor, importe_fmt, DERECHA, color, fuente)
+
+
+# ============================================================
+# MODELO
+# ============================================================
+class ModeloMovimientos(QAbstractTableModel):
+
+    def __init__(self, columnas, parent=None, fondo=None):
+        super().__init__(parent)
+        self.columnas = list(columnas)
+        self.fondo = fondo          # fondo(fila) -> "#hex" o None (color de toda la fila)
+        self._filas = []
+
+    def set_filas(self, filas):
+        self.beginResetModel()
+        self._filas = list(filas)
+        self.endResetModel()
+
+    def filas(self):
+        return self._filas
+
+    def fila(self, row):
+        return self._filas[row] if 0 <= row < len(self._filas) else None
+
+    # --- API Qt ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._filas)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columnas)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.columnas[section].titulo
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        col = self.columnas[index.column()]
+        fila = self._filas[index.row()]
+
+        if role == Qt.DisplayRole:
+            return self.texto(index.row(), index.column())
+        if role == ROL_VALOR:
+            return col.valor(fila)
+        if role == Qt.TextAlignmentRole:
+            return col.alineacion
+        if role == Qt.ForegroundRole and col.color:
+            c = col.color(fila, col.valor(fila))
+            return _qcolor(c) if c else None
+        if role == Qt.FontRole and col.fuente:
+            return col.fuente(fila, col.valor(fila))
+        if role == Qt.BackgroundRole and self.fondo:
+            c = self.fondo(fila)
+            return _qcolor(c) if c else None
+        return None
+
+    def texto(self, row, column):
+        col = self.columnas[column]
+        v = col.valor(self._filas[row])
+        return "" if v is None else col.formato(v)
+
+
+# ============================================================
+# FILTRO / ORDEN
+# ============================================================
+class FiltroMovimientos(QSortFilterProxyModel):
+    """Filtro de texto (sin distinguir mayúsculas) sobre todas las columnas."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setSortRole(ROL_VALOR)
+        self.setFilterKeyColumn(-1)
+        self.setFilterCaseSensitivity(Qt.CaseInsensitive)
+
+    def lessThan(self, izq, der):
+        a, b = izq.data(ROL_VALOR), der.data(ROL_VALOR)
+        try:
+            return a < b
+        except TypeError:       # tipos mezclados (None, str, float)
+            return str(a) < str(b)
+
+
+# ============================================================
+# VISTA
+# ============================================================
+class TablaMovimientos(QTableView):
+    """QTableView + ModeloMovimientos + FiltroMovimientos con el estilo de SHILLONG."""
+
+    def __init__(self, columnas, parent=None, ordenable=False, fondo=None):
+        super().__init__(parent)
+        self.modelo = ModeloMovimientos(columnas, self, fondo)
+        self.proxy = FiltroMovimientos(self)
+        self.proxy.setSourceModel(self.modelo)
+        self.setModel(self.proxy)
+
+        self.setAlternatingRowColors(True)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setSortingEnabled(ordenable)
+        self.verticalHeader().setDefaultSectionSize(26)
+
+    def set_filas(self, filas):
+        self.modelo.set_filas(filas)
+
+    def filtrar(self, texto):
+        self.proxy.setFilterFixedString(texto)
+
+    def estirar_columna(self, columna):
+        self.horizontalHeader().setSectionResizeMode(columna, QHeaderView.Stretch)
+
+    # --- Traducción fila visible -> fila del modelo ---
+    def indice_origen(self, row_visible):
+        if row_visible < 0:
+            return -1
+        return self.proxy.mapToSource(self.proxy.index(row_visible, 0)).row()
+
+    def indice_actual(self):
+        """Índice en el modelo de la fila seleccionada (-1 si no hay)."""
+        idx = self.currentIndex()
+        return self.proxy.mapToSource(idx).row() if idx.isValid() else -1
+
+    def fila_actual(self):
+        return self.modelo.fila(self.indice_actual())
+
+    def fila_en(self, row_visible):
+        return self.modelo.fila(self.indice_origen(row_visible))
+
+    # --- Lectura en orden visible (impresión / exportación) ---
+    def filas_visibles(self):
+        return [self.fila_en(r) for r in range(self.proxy.rowCount())]
+
+    def textos_visibles(self):
+        """Lista de filas de texto tal como se ven (respeta filtro y orden)."""
+        cols = range(self.modelo.columnCount())
+        return [
+            [self.modelo.texto(self.indice_origen(r), c) for c in cols]
+            for r in range(self.proxy.rowCount())
+        ]
+
+    def titulos(self):
+        return [c.titulo for c in self.modelo.columnas]
+
@@ -23,6 +23,8 @@ import random
 import json
 from collections import Counter
 
+from ui.EjecutorTrabajos import ejecutor
+
 # --- IMPORTACIONES ---
 try:
     from ui.Dialogs.ImportarExcelDialog import ImportarExcelDialog
@@ -55,6 +57,9 @@ try:
 except ImportError:
     VerificadorBalanceDialog = None
 # ---------------------------------------------
+# Grupos de duplicados que se listan en el detalle de la reconciliación
+MAX_GRUPOS_DETALLE = 100
+
 try:
     locale.setlocale(locale.LC_TIME, 'es_ES.UTF-8')
 except locale.Error:
@@ -361,58 +366,68 @@ class ToolsView(QWidget):
         """
 
     def _reconciliar_duplicados(self):
-        """Busca y reporta movimientos duplicados en la base de datos de contabilidad."""
-        # NOTA: ASUMIMOS que self.data.movimientos es una lista de objetos con atributos .fecha, .concepto, .valor, .tipo
-        if not hasattr(self.data, 'movimientos') or not self.data.movimientos:
+        """Busca duplicados exactos y parecidos; los exactos se pueden fusionar."""
+        if not getattr(self.data, "movimientos", None):
             QMessageBox.information(self, "Reconciliación", "La base de datos está vacía. No hay datos que reconciliar.")
             return
 
-        huellas = {}
-        duplicados = []
-        
-        # Un duplicado se define por la combinación de Fecha, Concepto y Valor
-        for i, mov in enumerate(self.data.movimientos):
-            try:
-                # Creando una huella única (hash)
-                huella = (
-                    mov.fecha, 
-                    mov.concepto, 
-                    mov.valor, 
-                    mov.tipo 
-                )
-            except AttributeError:
-                # Si falta algún atributo, saltar el movimiento (o loguear el error)
-                continue
-            
-            if huella in huellas:
-                duplicados.append((i, mov))
-            else:
-                huellas[huella] = i
-        
-        if duplicados:
-            mensaje = f"⚠️ Se encontraron {len(duplicados)} movimientos duplicados potenciales.\n"
-            mensaje += "Se recomienda revisar el archivo de origen (JSON) y eliminar los movimientos redundantes antes de importar.\n"
-            
-            detalles = "\nDetalles de Duplicados Encontrados (Índice | Fecha | Concepto | Valor):\n"
-            for i, mov in duplicados:
-                fecha_str = mov.fecha.strftime('%Y-%m-%d') if hasattr(mov, 'fecha') else 'N/A'
-                concepto_str = str(mov.concepto)[:30] + '...' if hasattr(mov, 'concepto') else 'N/A'
-                valor_str = f"{mov.valor:.2f}" if hasattr(mov, 'valor') else 'N/A'
-                
-                detalles += f"Índice {i}: {fecha_str} | {concepto_str} | {valor_str}\n"
-            
-            QMessageBox.warning(self, "DUPLICADOS DETECTADOS", mensaje, QMessageBox.Open | QMessageBox.Close)
-            
-            # Muestra los detalles en una ventana separada
-            detalles_msg = QMessageBox(self)
-            detalles_msg.setWindowTitle("Detalles de Duplicados")
-            detalles_msg.setText("Se encontraron duplicados, revisa la lista para depurar.")
-            detalles_msg.setDetailedText(detalles)
-            detalles_msg.exec()
+        self.setCursor(Qt.WaitCursor)
+        try:
+            grupos = self.data.duplicados()
+        finally:
+            self.setCursor(Qt.ArrowCursor)
 
-        else:
+        if not grupos:
             QMessageBox.information(self, "Reconciliación", "✅ Base de datos limpia: No se encontraron movimientos duplicados.")
+            return
+
+        exactos = [g for g in grupos if g["tipo"] == "exacto"]
+        parecidos = [g for g in grupos if g["tipo"] == "parecido"]
+        sobrantes = sum(len(g["movimientos"]) - 1 for g in exactos)
 
+        detalles = "\n\n".join(self._describir_grupo(g) for g in grupos[:MAX_GRUPOS_DETALLE])
+        if len(grupos) > MAX_GRUPOS_DETALLE:
+            detalles += f"\n\n... y {len(grupos) - MAX_GRUPOS_DETALLE} grupos más."
+
+        msg = QMessageBox(self)
+        msg.setIcon(QMessageBox.Warning)
+        msg.setWindowTitle("DUPLICADOS DETECTADOS")
+        msg.setText(
+            f"⚠️ {len(exactos)} grupos de duplicados exactos ({sobrantes} movimientos sobrantes).\n"
+            f"{len(parecidos)} grupos de movimientos parecidos (mismo importe, fechas cercanas y concepto similar)."
+        )
+        msg.setDetailedText(detalles)
+        if exactos:
+            msg.setInformativeText(
+                "¿Fusionar los duplicados exactos? Se conserva el primero de cada grupo.\n"
+                "Los parecidos no se tocan: revísalos en el detalle."
+            )
+            msg.setStandardButtons(QMessageBox.Yes | QMessageBox.No)
+        else:
+            msg.setInformativeText("Revisa los movimientos parecidos en el detalle.")
+            msg.setStandardButtons(QMessageBox.Close)
+
+        if msg.exec() == QMessageBox.Yes:
+            eliminados = sum(
+                bool(self.data.eliminar_movimiento(m["id"]))
+                for g in exactos for m in g["movimientos"][1:] if m.get("id")
+            )
+            QMessageBox.information(self, "Reconciliación", f"Fusionados {len(exactos)} grupos: {eliminados} movimientos eliminados.")
+
+    @staticmethod
+    def _describir_grupo(grupo):
+        """Cabecera del grupo y una línea por movimiento (Fecha | Doc | Concepto | Cuenta | Debe | Haber | Banco)."""
+        if grupo["tipo"] == "exacto":
+            cabecera = "EXACTO"
+        else:
+            cabecera = f"PARECIDO (similitud {grupo['similitud']:.0%})"
+        lineas = [cabecera]
+        for m in grupo["movimientos"]:
+            lineas.append(
+                f"  {m.get('fecha', 'N/A')} | {m.get('documento', '')} | {str(m.get('concepto', ''))[:30]} | "
+                f"{m.get('cuenta', '')} | {m.get('debe', 0)} | {m.get('haber', 0)} | {m.get('banco', '')}"
+            )
+        return "\n".join(lineas)
 
     def _panel_datos(self):
         f = QFrame()
@@ -472,42 +487,24 @@ class ToolsView(QWidget):
     # ================================================================
     def _auditar_movimientos(self):
         """Busca errores de Debe/Haber y devuelve una lista."""
-        errores = []
-        
-        # Función local para normalizar los valores del JSON (que vienen como strings)
-        def _normalizar(txt):
-            try:
-                # Esta función es crucial si los valores en el JSON están como "1.550,00" o "1550"
-                return float(str(txt).replace(",", "."))
-            except (ValueError, TypeError):
-                return 0.0
-
         if not hasattr(self.data, 'movimientos'):
             QMessageBox.critical(self, "Error de Datos", "La propiedad 'movimientos' no está disponible en self.data.")
             return []
-            
-        for i, mov in enumerate(self.data.movimientos):
-            debe = _normalizar(mov.get("debe", "0.00"))
-            haber = _normalizar(mov.get("haber", "0.00"))
-            
-            error_msg = None
-            
-            # Regla A: Ambos son cero (No es un movimiento contable válido)
-            if debe == 0.0 and haber == 0.0:
-                error_msg = "Ambos Debe y Haber son CERO."
-            
-            # Regla B: Ambos son mayores que cero (Rompe la partida doble a nivel de registro simple)
-            elif debe > 0.0 and haber > 0.0:
-                error_msg = "Debe y Haber coexisten (> 0)."
-            
-            if error_msg:
-                errores.append({
-                    "index": i,
-                    "movimiento": mov,
-                    "error": error_msg,
-                })
-                
-        return errores
+
+        # Importes ya normalizados en columnas (admite "1,5" en el JSON)
+        libro = self.data.columnar()
+        # Regla A: Ambos son cero (No es un movimiento contable válido)
+        ceros = libro.filas(libro.mascara(con_debe=False, con_haber=False))
+        # Regla B: Ambos son mayores que cero (Rompe la partida doble a nivel de registro simple)
+        ambos = libro.filas(libro.mascara(con_debe=True, con_haber=True))
+
+        errores = [(i, "Ambos Debe y Haber son CERO.") for i in ceros]
+        errores += [(i, "Debe y Haber coexisten (> 0).") for i in ambos]
+        errores.sort()
+        return [
+            {"index": i, "movimiento": self.data.movimientos[i], "error": msg}
+            for i, msg in errores
+        ]
 
     def _auditoria_ligera(self):
         """Chequeo rápido de datos faltantes/duplicados con resumen de totales."""
@@ -649,6 +646,7 @@ class ToolsView(QWidget):
             name = f"backup_{datetime.now().strftime('%Y%m%d')}.json"
             dest, _ = QFileDialog.getSaveFileName(self, "Guardar backup", name, "JSON (*.json)")
             if dest:
+                self.data.cerrar()  # Volcar el diario al snapshot antes de copiar
                 shutil.copy2(self.data.archivo_json, dest)
                 QMessageBox.information(self, "OK", "Backup creado.")
         except Exception as e:
@@ -657,8 +655,7 @@ class ToolsView(QWidget):
     def _restore(self):
         f, _ = QFileDialog.getOpenFileName(self, "Restaurar backup", "", "JSON (*.json)")
         if f and QMessageBox.question(self, "Confirmar", "¿Restaurar datos antiguos?", QMessageBox.Yes | QMessageBox.No) == QMessageBox.Yes:
-            shutil.copy2(f, self.data.archivo_json)
-            self.data.cargar()
+            self.data.restaurar(f)  # Sin el diario del libro actual
             QMessageBox.information(self, "OK", "Datos restaurados. Reinicia la app.")
 
     def _excel(self):
@@ -694,13 +691,21 @@ class ToolsView(QWidget):
             )
             return
         
-        # Show loading cursor
+        # Show loading cursor while the request runs in the background
         self.setCursor(Qt.WaitCursor)
-        
+        ejecutor().enviar(
+            get_update_info,
+            al_terminar=self._mostrar_actualizacion,
+            al_fallar=self._mostrar_actualizacion,
+            dueño=self,
+        )
+
+    def _mostrar_actualizacion(self, info):
+        self.setCursor(Qt.ArrowCursor)
         try:
-            info = get_update_info()
-            self.setCursor(Qt.ArrowCursor)
-            
+            if isinstance(info, Exception):
+                raise info
+
             if info["available"]:
                 # Update available - show detailed dialog
                 msg = QMessageBox(self)
@@ -746,7 +751,6 @@ class ToolsView(QWidget):
                 )
                 
         except Exception as e:
-            self.setCursor(Qt.ArrowCursor)
             QMessageBox.warning(
                 self,
                 "Error de Conexión",
@@ -757,6 +761,7 @@ class ToolsView(QWidget):
 
     def _reparar(self):
         if reparar_json and QMessageBox.question(self, "Reparar", "¿Corregir Debe/Haber invertidos?", QMessageBox.Yes | QMessageBox.No) == QMessageBox.Yes:
+            self.data.cerrar()  # El script trabaja sobre el archivo: volcar el diario antes
             reparar_json(str(self.data.archivo_json))
             self.data.cargar()
             QMessageBox.information(self, "OK", "Base de datos reparada.")
@@ -766,7 +771,8 @@ class ToolsView(QWidget):
             QMessageBox.warning(self, "Error", "Módulo de auto-aprendizaje no encontrado.")
             return
         self.setCursor(Qt.WaitCursor)
-        num, msg = ejecutar_aprendizaje(str(self.data.archivo_json))
+        # Sobre los movimientos en memoria: no hace falta volcar el diario al archivo
+        num, msg = ejecutar_aprendizaje(str(self.data.archivo_json), movimientos=self.data.movimientos)
         self.setCursor(Qt.ArrowCursor)
         titulo = "Aprendizaje completado" if num > 0 else "Sin cambios"
         QMessageBox.information(self, titulo, msg)
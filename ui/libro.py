@@ -16,6 +16,7 @@ import datetime
 
 from models.exportador_excel import ExportadorExcel
 from models.BankManager import BankManager
+from models.CategoriasCuentas import categoria_de_cuenta
 
 
 class LibroMensualView(QWidget):
@@ -171,32 +172,6 @@ class LibroMensualView(QWidget):
         except:
             return str(num)
 
-    # ==============================================================
-    #   CATEGORÍAS OFICIALES
-    # ==============================================================
-    def _categoria_de_cuenta(self, cuenta):
-        try:
-            c = int(cuenta)
-        except:
-            return "OTROS"
-
-        if 600000 <= c <= 609999:
-            return "FOOD"
-        if 610000 <= c <= 619999:
-            return "MEDICINE"
-        if 620000 <= c <= 629999:
-            return "HYGIENE"
-        if 750000 <= c <= 759999:
-            return "SALARY"
-        if 770000 <= c <= 779999:
-            return "ONLINE"
-        if 780000 <= c <= 789999:
-            return "THERAPEUTIC"
-        if 790000 <= c <= 799999:
-            return "DIET"
-
-        return "OTROS"
-
     # ==============================================================
     #   AGRUPAR MOVIMIENTOS
     # ==============================================================
@@ -208,7 +183,7 @@ class LibroMensualView(QWidget):
         }
 
         for m in movimientos:
-            cat = self._categoria_de_cuenta(m.get("cuenta"))
+            cat = categoria_de_cuenta(m.get("cuenta"), oficial=True)
             grupos[cat].append(m)
 
         return grupos
@@ -248,7 +223,7 @@ class LibroMensualView(QWidget):
                 m.get("estado", ""),
                 m.get("banco", ""),
                 self._fmt(m.get("saldo", 0)),
-                self._categoria_de_cuenta(m.get("cuenta"))
+                categoria_de_cuenta(m.get("cuenta"), oficial=True)
             ]
 
             for j, valor in enumerate(fila):